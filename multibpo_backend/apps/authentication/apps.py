@@ -9,4 +9,4 @@ class AuthenticationConfig(AppConfig):
         """
         Configurações que rodam quando o app é carregado
         """
-        pass
\ No newline at end of file
+        from . import signals  # noqa: F401 - invalidação do cache de perfil
\ No newline at end of file
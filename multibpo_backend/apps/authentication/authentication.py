@@ -0,0 +1,170 @@
+"""
+Autenticação JWT sem consulta ao banco (opt-in)
+MultiBPO - o usuário é montado a partir dos claims verificados do access token
+
+Os tokens emitidos por MultiBPOTokenObtainPairSerializer já carregam
+contador_id, tipo_pessoa, escritorio_id e as permissões do contador; a
+revogação (logout e contas desativadas) é conferida num conjunto em memória
+recarregado a cada JWT_REVOGACAO_CACHE_TTL segundos.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from apps.contadores.models import Contador
+
+logger = logging.getLogger(__name__)
+
+
+# ========== REVOGAÇÃO ==========
+
+class ConjuntoRevogacao:
+    """
+    JTIs na blacklist e ids de usuários desativados (cache por processo)
+
+    Só entram JTIs que expiram dentro da vida de um access token: refresh
+    tokens rotacionados (7 dias) não interessam à autenticação e deixariam
+    o conjunto do tamanho da tabela.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = frozenset()
+        self._usuarios = frozenset()
+        self._validade = 0.0
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, 'JWT_REVOGACAO_CACHE_TTL', 30)
+
+    def _carregar(self):
+        agora = timezone.now()
+        jtis = BlacklistedToken.objects.filter(
+            token__expires_at__gt=agora,
+            token__expires_at__lte=agora + api_settings.ACCESS_TOKEN_LIFETIME,
+        ).values_list('token__jti', flat=True)
+        usuarios = User.objects.filter(is_active=False).values_list('id', flat=True).union(
+            Contador.objects.filter(ativo=False).order_by().values_list('user_id', flat=True)
+        )
+        self._jtis = frozenset(jtis)
+        self._usuarios = frozenset(usuarios)
+        self._validade = time.monotonic() + self.ttl
+
+    def _atualizar(self):
+        if time.monotonic() < self._validade:
+            return
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            if time.monotonic() >= self._validade:
+                self._carregar()
+
+    def revogado(self, jti, user_id) -> bool:
+        self._atualizar()
+        return jti in self._jtis or user_id in self._usuarios
+
+    def invalidar(self):
+        """Força a recarga na próxima verificação (só neste processo)"""
+        self._validade = 0.0
+
+
+revogacoes = ConjuntoRevogacao()
+
+
+def revogar_token(token):
+    """
+    Coloca um access token na blacklist (logout)
+
+    Usa as tabelas do token_blacklist, as mesmas dos refresh tokens.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            'user_id': token.get(api_settings.USER_ID_CLAIM),
+            'token': str(token),
+            'created_at': datetime_from_epoch(token['iat']) if 'iat' in token else None,
+            'expires_at': datetime_from_epoch(token['exp']),
+        },
+    )
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+    revogacoes.invalidar()
+
+
+# ========== AUTENTICAÇÃO ==========
+
+class UsuarioToken(TokenUser):
+    """Usuário montado a partir dos claims do token (sem consulta ao banco)"""
+
+    @cached_property
+    def contador_id(self):
+        return self.token.get('contador_id')
+
+    @cached_property
+    def escritorio_id(self):
+        return self.token.get('escritorio_id')
+
+    @cached_property
+    def tipo_pessoa(self):
+        return self.token.get('tipo_pessoa')
+
+    @cached_property
+    def documento(self):
+        return self.token.get('documento')
+
+    @cached_property
+    def eh_responsavel_tecnico(self):
+        return bool(self.token.get('eh_responsavel'))
+
+    @cached_property
+    def pode_assinar_documentos(self):
+        return bool(self.token.get('pode_assinar'))
+
+
+class JWTStatelessAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWTAuthentication sem a consulta do User por requisição
+
+    Contas desativadas e tokens revogados são recusados com o atraso máximo
+    de JWT_REVOGACAO_CACHE_TTL segundos (imediato no processo que revogou).
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken("Token sem identificação de usuário")
+
+        if validated_token.get('ativo') is False:
+            raise AuthenticationFailed("Perfil de contador desativado.", code='user_inactive')
+
+        if revogacoes.revogado(validated_token.get(api_settings.JTI_CLAIM), user_id):
+            raise AuthenticationFailed("Token revogado.", code='token_revoked')
+
+        return UsuarioToken(validated_token)
+
+
+class AutenticacaoStatelessMixin:
+    """
+    Views de leitura: usa JWTStatelessAuthentication quando JWT_STATELESS_AUTH=True
+
+    A view deve buscar o que precisar por request.user.id (UsuarioToken não
+    é uma instância de User).
+    """
+
+    def get_authenticators(self):
+        if getattr(settings, 'JWT_STATELESS_AUTH', False):
+            return [JWTStatelessAuthentication(), SessionAuthentication()]
+        return super().get_authenticators()
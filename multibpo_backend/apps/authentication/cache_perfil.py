@@ -0,0 +1,91 @@
+"""
+Cache versionado do perfil do contador
+MultiBPO - GET /api/v1/auth/profile/ com ETag e 304
+
+Cada usuário tem uma versão no cache compartilhado (settings.PERFIL_CACHE_ALIAS);
+os signals em signals.py trocam a versão quando Contador, Escritorio, User,
+Especialidade ou o vínculo de especialidades mudam. O perfil serializado fica
+guardado sob (usuário, versão, campos pedidos), e o ETag é a própria versão:
+If-None-Match igual devolve 304 sem ir ao banco nem serializar.
+
+A troca de versão roda no on_commit: antes do commit outra requisição ainda
+lê os dados antigos e os gravaria sob a versão nova. A versão vence em
+PERFIL_VERSAO_TTL, limite para uma escrita que escape da invalidação.
+"""
+
+import hashlib
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = 'perfil'
+
+
+def _cache():
+    return caches[getattr(settings, 'PERFIL_CACHE_ALIAS', 'default')]
+
+
+def _chave_versao(user_id):
+    return f'{PREFIXO}:v:{user_id}'
+
+
+def _ttl_versao():
+    return getattr(settings, 'PERFIL_VERSAO_TTL', 24 * 3600)
+
+
+def _nova_versao():
+    # Aleatória e não sequencial: se a chave for despejada do cache, a
+    # próxima versão não repete uma já usada num ETag antigo
+    return uuid.uuid4().hex[:16]
+
+
+def versao_perfil(user_id) -> str:
+    """Versão atual do perfil (criada na primeira leitura)"""
+    cache = _cache()
+    versao = cache.get(_chave_versao(user_id))
+    if versao is None:
+        versao = _nova_versao()
+        if not cache.add(_chave_versao(user_id), versao, timeout=_ttl_versao()):
+            # Outra requisição criou antes: vale a dela
+            versao = cache.get(_chave_versao(user_id)) or versao
+    return versao
+
+
+def invalidar_perfis(user_ids):
+    """Troca a versão dos perfis após o commit da transação atual"""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+
+    def trocar_versoes():
+        _cache().set_many(
+            {_chave_versao(user_id): _nova_versao() for user_id in user_ids}, timeout=_ttl_versao()
+        )
+
+    transaction.on_commit(trocar_versoes)
+
+
+def _sufixo_campos(campos):
+    if campos is None:
+        return 'todos'
+    return hashlib.md5(','.join(sorted(campos)).encode()).hexdigest()[:12]
+
+
+def etag_perfil(user_id, versao, campos=None) -> str:
+    return f'"{user_id}-{versao}-{_sufixo_campos(campos)}"'
+
+
+def obter_perfil(user_id, versao, campos=None):
+    return _cache().get(f'{PREFIXO}:{user_id}:{versao}:{_sufixo_campos(campos)}')
+
+
+def salvar_perfil(user_id, versao, campos, dados):
+    _cache().set(
+        f'{PREFIXO}:{user_id}:{versao}:{_sufixo_campos(campos)}', dados,
+        timeout=getattr(settings, 'PERFIL_CACHE_TTL', 300),
+    )
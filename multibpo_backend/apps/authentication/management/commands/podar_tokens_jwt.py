@@ -0,0 +1,33 @@
+# apps/authentication/management/commands/podar_tokens_jwt.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.authentication.tokens import podar_tokens_expirados
+
+
+class Command(BaseCommand):
+    help = 'Apaga em lotes os tokens JWT expirados das tabelas do token_blacklist'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help='Tokens por transação')
+        parser.add_argument('--pausa', type=float, default=0.0, help='Segundos entre lotes (alivia o banco em produção)')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de tokens apagados nesta execução')
+        parser.add_argument('--continuo', action='store_true', help='Repete a poda indefinidamente')
+        parser.add_argument('--intervalo', type=int, default=3600, help='Segundos entre rodadas (com --continuo)')
+    
+    def handle(self, *args, **options):
+        while True:
+            resumo = podar_tokens_expirados(
+                lote=options['lote'],
+                pausa=options['pausa'],
+                limite=options['limite'],
+            )
+            self.stdout.write(
+                f"{resumo['outstanding']} tokens expirados apagados "
+                f"({resumo['blacklisted']} na blacklist)"
+            )
+            
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice em OutstandingToken.expires_at (tabela do token_blacklist)
+
+    Usado pela poda em lotes (podar_tokens_jwt) e pelo conjunto de revogação
+    da autenticação stateless; a tabela cresce a cada refresh rotacionado.
+    """
+
+    dependencies = [
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS token_outstanding_expires_idx ON token_blacklist_outstandingtoken (expires_at)",
+            reverse_sql="DROP INDEX IF EXISTS token_outstanding_expires_idx",
+        ),
+    ]
@@ -9,16 +9,53 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.db import transaction
+from django.db.models.functions import Lower, Upper
+from django.utils import timezone
 from validate_docbr import CPF
 import re
 import logging
 
-from apps.contadores.models import Contador, Escritorio, Especialidade
+from apps.contadores.catalogo import catalogo, confirmar_ativas
+from apps.contadores.models import Contador, Escritorio
 from apps.contadores.serializers import ContadorPerfilSerializer
 
 logger = logging.getLogger(__name__)
 
 
+# ========== RESOLUÇÃO DO LOGIN ==========
+
+def email_em_uso(email):
+    """E-mail já cadastrado, sem diferenciar maiúsculas (índice LOWER(email))"""
+    return User.objects.alias(email_lower=Lower('email')).filter(
+        email_lower=(email or '').strip().lower()
+    ).exists()
+
+
+def resolver_login(login, login_type):
+    """
+    User do login com contador e escritório em uma única consulta
+    
+    O contador fica no cache da relação (user.contador; None se o user não
+    tiver perfil), reaproveitado pela validação e pelos claims do token.
+    
+    Returns:
+        User ou None se nenhum (ou mais de um) user corresponder ao login
+    """
+    usuarios = User.objects.select_related('contador__escritorio')
+    if login_type == 'email':
+        usuarios = usuarios.alias(email_lower=Lower('email')).filter(email_lower=login.lower())
+    elif login_type == 'crc':
+        usuarios = usuarios.alias(crc_upper=Upper('contador__crc')).filter(crc_upper=login.upper())
+    else:
+        usuarios = usuarios.filter(username=login)
+    
+    encontrados = list(usuarios[:2])
+    if len(encontrados) > 1:
+        logger.warning(f"Login ambíguo ({login_type}): mais de uma conta para {login}")
+        return None
+    return encontrados[0] if encontrados else None
+
+
 class ContadorRegistroSerializer(serializers.Serializer):
     """
     Serializer para registro completo de Contador
@@ -90,7 +127,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         return value.lower().strip()
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if email_em_uso(value):
             raise serializers.ValidationError("Já existe uma conta com este email.")
         return value.lower().strip()
 
@@ -99,7 +136,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         cpf_validator = CPF()
         if not cpf_validator.validate(cpf_clean):
             raise serializers.ValidationError("CPF inválido. Verifique os números digitados.")
-        if Contador.objects.filter(cpf__contains=cpf_clean).exists():
+        if Contador.documento_em_uso(cpf_clean):
             raise serializers.ValidationError("Já existe um contador cadastrado com este CPF.")
         return f"{cpf_clean[:3]}.{cpf_clean[3:6]}.{cpf_clean[6:9]}-{cpf_clean[9:]}"
 
@@ -107,7 +144,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         crc_pattern = r'^CRC-[A-Z]{2}\s+\d+/[OT]-\d+$'
         if not re.match(crc_pattern, value.upper()):
             raise serializers.ValidationError("CRC deve estar no formato: CRC-UF 123456/O-7 ou CRC-UF 123456/T-8")
-        if Contador.objects.filter(crc__iexact=value).exists():
+        if Contador.por_crc(value).exists():
             raise serializers.ValidationError("Já existe um contador cadastrado com este CRC.")
         return value.upper()
 
@@ -129,8 +166,8 @@ class ContadorRegistroSerializer(serializers.Serializer):
 
     def validate_especialidades_ids(self, value):
         if value:
-            especialidades_existentes = Especialidade.objects.filter(id__in=value, ativa=True).count()
-            if especialidades_existentes != len(value):
+            # Conferido no banco: o catálogo em memória pode estar atrasado
+            if len(confirmar_ativas(value)) != len(value):
                 raise serializers.ValidationError("Uma ou mais especialidades não existem ou estão inativas.")
         return value or []
 
@@ -243,9 +280,9 @@ class ContadorRegistroSerializer(serializers.Serializer):
 
             # 7. Associar especialidades (ManyToMany)
             if especialidades_ids:
-                especialidades = Especialidade.objects.filter(id__in=especialidades_ids, ativa=True)
-                contador.especialidades.set(especialidades)
-                especialidades_nomes = [esp.nome for esp in especialidades]
+                ids_ativos = confirmar_ativas(especialidades_ids)
+                contador.especialidades.set(ids_ativos)
+                especialidades_nomes = [esp.nome for esp in catalogo().ativas(ids_ativos)]
                 logger.info(f"Especialidades associadas: {', '.join(especialidades_nomes)}")
 
             # 8. Verificação final de integridade
@@ -298,7 +335,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         from apps.contadores.serializers import ContadorPerfilSerializer
 
         # Usar serializer existente para response completa
-        perfil_serializer = ContadorPerfilSerializer(instance)
+        perfil_serializer = ContadorPerfilSerializer(instance, context=self.context)
         response_data = perfil_serializer.data
 
         # Adicionar metadados específicos da criação
@@ -363,16 +400,7 @@ class ContadorLoginSerializer(serializers.Serializer):
         return 'username'
 
     def find_user_by_login_type(self, login, login_type):
-        try:
-            if login_type == 'email':
-                return User.objects.select_related().get(email=login)
-            elif login_type == 'crc':
-                contador = Contador.objects.select_related('user').get(crc=login.upper())
-                return contador.user
-            elif login_type == 'username':
-                return User.objects.select_related().get(username=login)
-        except (User.DoesNotExist, Contador.DoesNotExist):
-            return None
+        return resolver_login(login, login_type)
 
     def validate(self, data):
         login = data.get('login')
@@ -392,7 +420,8 @@ class ContadorLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError({'login': 'Esta conta está desativada.'})
 
         try:
-            contador = Contador.objects.select_related('escritorio').get(user=user)
+            # Já carregado por resolver_login (select_related)
+            contador = user.contador
         except Contador.DoesNotExist:
             raise serializers.ValidationError({'login': 'Conta sem perfil de contador.'})
 
@@ -425,7 +454,7 @@ class ContadorLoginSerializer(serializers.Serializer):
 
     def get_contador(self, obj):
         if self.validated_contador:
-            perfil_serializer = ContadorPerfilSerializer(self.validated_contador)
+            perfil_serializer = ContadorPerfilSerializer(self.validated_contador, context=self.context)
             return perfil_serializer.data
         return None
 
@@ -15,8 +15,12 @@ from validate_docbr import CPF, CNPJ
 import re
 import logging
 
+from apps.contadores.catalogo import confirmar_ativas
 from apps.contadores.models import Contador, Escritorio
 from apps.contadores.serializers import ContadorPerfilSerializer
+from apps.contadores.validators.documentos import validar_digitos, validar_documentos
+from apps.receita.services import ReceitaFederalService
+from .auth import email_em_uso, resolver_login
 
 logger = logging.getLogger(__name__)
 
@@ -84,7 +88,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         return value.lower().strip()
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if email_em_uso(value):
             raise serializers.ValidationError("Já existe uma conta com este email.")
         return value.lower().strip()
 
@@ -93,7 +97,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         cpf_validator = CPF()
         if not cpf_validator.validate(cpf_clean):
             raise serializers.ValidationError("CPF inválido.")
-        if Contador.objects.filter(cpf__contains=cpf_clean).exists():
+        if Contador.documento_em_uso(cpf_clean):
             raise serializers.ValidationError("Já existe um contador com este CPF.")
         return f"{cpf_clean[:3]}.{cpf_clean[3:6]}.{cpf_clean[6:9]}-{cpf_clean[9:]}"
 
@@ -101,7 +105,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         crc_pattern = r'^CRC-[A-Z]{2}\s+\d+/[OT]-\d+$'
         if not re.match(crc_pattern, value.upper()):
             raise serializers.ValidationError("CRC inválido.")
-        if Contador.objects.filter(crc__iexact=value).exists():
+        if Contador.por_crc(value).exists():
             raise serializers.ValidationError("Já existe um contador com este CRC.")
         return value.upper()
 
@@ -135,9 +139,7 @@ class ContadorRegistroSerializer(serializers.Serializer):
         contador = Contador.objects.create(**contador_data)
         
         if especialidades_ids:
-            from apps.contadores.models import Especialidade
-            especialidades = Especialidade.objects.filter(id__in=especialidades_ids, ativa=True)
-            contador.especialidades.set(especialidades)
+            contador.especialidades.set(confirmar_ativas(especialidades_ids))
             
         return contador
 
@@ -166,16 +168,7 @@ class ContadorLoginSerializer(serializers.Serializer):
         return 'username'
 
     def find_user_by_login_type(self, login, login_type):
-        try:
-            if login_type == 'email':
-                return User.objects.select_related().get(email=login)
-            elif login_type == 'crc':
-                contador = Contador.objects.select_related('user').get(crc=login.upper())
-                return contador.user
-            elif login_type == 'username':
-                return User.objects.select_related().get(username=login)
-        except (User.DoesNotExist, Contador.DoesNotExist):
-            return None
+        return resolver_login(login, login_type)
 
     def validate(self, data):
         login = data.get('login')
@@ -192,7 +185,7 @@ class ContadorLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError({'login': 'Esta conta está desativada.'})
 
         try:
-            contador = Contador.objects.select_related('escritorio').get(user=user)
+            contador = user.contador
         except Contador.DoesNotExist:
             raise serializers.ValidationError({'login': 'Conta sem perfil de contador.'})
 
@@ -227,55 +220,23 @@ class DocumentoValidationSerializer(serializers.Serializer):
     )
     
     def validate_documento(self, value):
-        """Validação básica de formato"""
-        documento_clean = ''.join(filter(str.isdigit, value))
-        
-        if len(documento_clean) == 11:
-            # Validar CPF
-            cpf_validator = CPF()
-            if not cpf_validator.validate(documento_clean):
-                raise serializers.ValidationError("CPF inválido")
-            return f"{documento_clean[:3]}.{documento_clean[3:6]}.{documento_clean[6:9]}-{documento_clean[9:]}"
-            
-        elif len(documento_clean) == 14:
-            # Validar CNPJ
-            cnpj_validator = CNPJ()
-            if not cnpj_validator.validate(documento_clean):
-                raise serializers.ValidationError("CNPJ inválido")
-            return f"{documento_clean[:2]}.{documento_clean[2:5]}.{documento_clean[5:8]}/{documento_clean[8:12]}-{documento_clean[12:]}"
-            
-        else:
-            raise serializers.ValidationError("Documento deve ter 11 dígitos (CPF) ou 14 dígitos (CNPJ)")
+        """Formato e dígitos verificadores (núcleo de validação, sem banco)"""
+        resultado = validar_digitos([value])[0]
+        if not resultado.valido:
+            raise serializers.ValidationError(resultado.erro)
+        return resultado.formatado
     
     def validate(self, data):
-        documento = data.get('documento')
-        documento_clean = ''.join(filter(str.isdigit, documento))
+        # Existência: igualdade nas colunas só com dígitos (cache curto por processo)
+        resultado = validar_documentos([data['documento']])[0]
         
         # Detectar tipo automaticamente se não informado
-        if not data.get('tipo'):
-            if len(documento_clean) == 11:
-                data['tipo'] = 'cpf'
-            elif len(documento_clean) == 14:
-                data['tipo'] = 'cnpj'
-        
-        # Verificar se já existe no sistema
-        documento_formatado = self.validate_documento(documento)
-        
-        if data['tipo'] == 'cpf':
-            # Verificar no campo documento (novo) e cpf (legado)
-            exists = Contador.objects.filter(
-                models.Q(documento=documento_formatado) | 
-                models.Q(cpf=documento_formatado)
-            ).exists()
-        else:
-            # Verificar CNPJ no Contador (PJ) e Escritorio
-            exists = (
-                Contador.objects.filter(documento=documento_formatado).exists() or
-                Escritorio.objects.filter(cnpj=documento_formatado).exists()
-            )
+        if data.get('tipo') and data['tipo'] != resultado.tipo:
+            raise serializers.ValidationError({'tipo': f"Documento informado é um {resultado.tipo.upper()}"})
+        data['tipo'] = resultado.tipo
         
-        data['available'] = not exists
-        data['formatted'] = documento_formatado
+        data['available'] = resultado.disponivel
+        data['formatted'] = resultado.formatado
         
         return data
 
@@ -319,7 +280,7 @@ class BPORegistroSerializer(serializers.Serializer):
     escritorio_criado = serializers.BooleanField(read_only=True)
     
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if email_em_uso(value):
             raise serializers.ValidationError("Já existe uma conta com este email.")
         return value.lower().strip()
     
@@ -334,10 +295,7 @@ class BPORegistroSerializer(serializers.Serializer):
                 raise serializers.ValidationError("CPF inválido")
             
             # Verificar duplicatas
-            if Contador.objects.filter(
-                models.Q(documento__contains=documento_clean) | 
-                models.Q(cpf__contains=documento_clean)
-            ).exists():
+            if Contador.documento_em_uso(documento_clean):
                 raise serializers.ValidationError("Já existe um cadastro com este CPF.")
                 
             return f"{documento_clean[:3]}.{documento_clean[3:6]}.{documento_clean[6:9]}-{documento_clean[9:]}"
@@ -350,8 +308,7 @@ class BPORegistroSerializer(serializers.Serializer):
             
             # Verificar duplicatas
             cnpj_formatado = f"{documento_clean[:2]}.{documento_clean[2:5]}.{documento_clean[5:8]}/{documento_clean[8:12]}-{documento_clean[12:]}"
-            if (Contador.objects.filter(documento=cnpj_formatado).exists() or 
-                Escritorio.objects.filter(cnpj=cnpj_formatado).exists()):
+            if Contador.documento_em_uso(documento_clean) or Escritorio.cnpj_em_uso(documento_clean):
                 raise serializers.ValidationError("Já existe um cadastro com este CNPJ.")
                 
             return cnpj_formatado
@@ -375,19 +332,33 @@ class BPORegistroSerializer(serializers.Serializer):
             data['tipo_pessoa'] = 'juridica'
             # Para PJ, buscar dados da Receita Federal se solicitado
             if data.get('usar_dados_receita', True):
-                # TODO: Integrar com API da Receita Federal
-                # Por enquanto, simular dados
-                data['dados_receita'] = {
-                    'razao_social': 'Empresa Exemplo Ltda',
-                    'nome_fantasia': 'Exemplo Corp',
-                    'situacao': 'ATIVA'
-                }
-                # Se não tem nome_completo, usar razão social
-                if not data.get('nome_completo'):
-                    data['nome_completo'] = data['dados_receita'].get('razao_social', '')
+                data['dados_receita'] = self._consultar_receita(data['documento'])
+            
+            # Se não tem nome_completo, usar razão social
+            if not data.get('nome_completo'):
+                razao_social = (data.get('dados_receita') or {}).get('razao_social')
+                if not razao_social:
+                    raise serializers.ValidationError({
+                        'nome_completo': 'Informe a razão social: dados da Receita Federal indisponíveis.'
+                    })
+                data['nome_completo'] = razao_social[:150]
         
         return data
     
+    def _consultar_receita(self, cnpj):
+        """
+        Dados da Receita Federal para o CNPJ
+        
+        Normalmente já estão no cache: a validação de documento em tempo
+        real dispara o prefetch assim que o CNPJ é digitado. Se a consulta
+        ainda estiver em andamento, o single-flight aproveita a mesma chamada.
+        """
+        resultado = ReceitaFederalService().consultar_cnpj(cnpj)
+        if not resultado.get('success'):
+            logger.info(f"Receita Federal sem dados para {cnpj}: {resultado.get('message')}")
+            return {}
+        return {chave: valor for chave, valor in resultado.items() if chave != 'cache'}
+    
     @transaction.atomic
     def create(self, validated_data):
         """
@@ -467,6 +438,8 @@ class BPORegistroSerializer(serializers.Serializer):
             validated_data['user_id'] = user.id
             validated_data['contador_id'] = contador.id
             validated_data['escritorio_criado'] = escritorio_criado
+            # save() repassa uma cópia de validated_data: o flag segue na instância
+            contador.escritorio_criado = escritorio_criado
             
             return contador
             
@@ -488,7 +461,7 @@ class BPORegistroSerializer(serializers.Serializer):
                 'user_id': instance.user.id,
                 'contador_id': instance.id,
                 'tipo_pessoa': instance.tipo_pessoa,
-                'escritorio_criado': bool(instance.escritorio),
+                'escritorio_criado': getattr(instance, 'escritorio_criado', False),
                 'dados_receita': instance.dados_receita_federal if hasattr(instance, 'dados_receita_federal') else {}
             })
         
@@ -0,0 +1,48 @@
+"""
+Signals de invalidação do cache de perfil (cache_perfil.py)
+
+Alterações via QuerySet.update() ou bulk_update() não disparam signals:
+quem usar deve chamar invalidar_perfis. No pior caso a versão (e o ETag)
+vence em PERFIL_VERSAO_TTL.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.contadores.models import Contador, Escritorio, Especialidade
+from .cache_perfil import invalidar_perfis
+
+
+@receiver([post_save, post_delete], sender=Contador)
+def contador_alterado(sender, instance, **kwargs):
+    invalidar_perfis([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def user_alterado(sender, instance, **kwargs):
+    invalidar_perfis([instance.pk])
+
+
+@receiver(post_save, sender=Escritorio)
+def escritorio_alterado(sender, instance, created, **kwargs):
+    if not created:
+        invalidar_perfis(instance.contadores.values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Especialidade)
+def especialidade_alterada(sender, instance, created, **kwargs):
+    if not created:
+        invalidar_perfis(instance.contadores.values_list('user_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Contador.especialidades.through)
+def especialidades_do_contador_alteradas(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            invalidar_perfis([instance.user_id])
+    elif action == 'pre_clear':
+        # Depois do clear a especialidade já não tem contadores para consultar
+        invalidar_perfis(instance.contadores.values_list('user_id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        invalidar_perfis(Contador.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
@@ -0,0 +1,163 @@
+"""
+Testes do fluxo BPO: validação de documento e registro simplificado
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.contadores.models import Escritorio
+from apps.contadores.validators.documentos import cache_existencia
+from apps.receita.cache import cnpj_cache
+from apps.receita.services import ReceitaFederalService
+
+
+CNPJ = '11222333000181'
+CNPJ_FORMATADO = '11.222.333/0001-81'
+
+
+def dados_receita():
+    return {
+        'success': True,
+        'fonte': 'BrasilAPI',
+        'cnpj': CNPJ_FORMATADO,
+        'razao_social': 'EMPRESA TESTE LTDA',
+        'nome_fantasia': 'TESTE',
+        'situacao': 'ATIVA',
+        'endereco': {
+            'logradouro': 'AV PAULISTA', 'numero': '1000', 'complemento': 'CJ 1',
+            'bairro': 'BELA VISTA', 'municipio': 'SAO PAULO', 'uf': 'SP', 'cep': '01310100',
+        },
+        'telefone': '',
+        'email': '',
+        'atividade_principal': '',
+        'data_consulta': '',
+        'raw_data': {},
+    }
+
+
+class DocumentoValidationViewTest(TestCase):
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache_existencia.lru.clear()
+        self.addCleanup(cache_existencia.lru.clear)
+    
+    def test_cnpj_disponivel_dispara_prefetch(self):
+        with mock.patch.object(ReceitaFederalService, 'prefetch', return_value='agendado') as prefetch:
+            response = self.client.post('/api/v1/auth/validate/document/', {'documento': CNPJ}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('available', response.data)  # anônimo
+        self.assertEqual(response.data['formatted'], CNPJ_FORMATADO)
+        self.assertNotIn('receita_prefetch', response.data)
+        prefetch.assert_called_once_with(CNPJ_FORMATADO)
+    
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-testes'}},
+        RECEITA_PREFETCH_THROTTLE='1/hour',
+    )
+    def test_prefetch_anonimo_com_throttle_por_ip(self):
+        with mock.patch.object(ReceitaFederalService, 'prefetch', return_value='agendado') as prefetch:
+            for _ in range(2):
+                self.client.post('/api/v1/auth/validate/document/', {'documento': CNPJ}, format='json')
+        prefetch.assert_called_once_with(CNPJ_FORMATADO)
+    
+    def test_cpf_nao_dispara_prefetch(self):
+        with mock.patch.object(ReceitaFederalService, 'prefetch') as prefetch:
+            response = self.client.post('/api/v1/auth/validate/document/', {'documento': '529.982.247-25'}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tipo'], 'cpf')
+        prefetch.assert_not_called()
+    
+    def test_documento_invalido(self):
+        response = self.client.post('/api/v1/auth/validate/document/', {'documento': '11222333000180'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data['valid'])
+    
+    def test_get_invalido_cacheavel(self):
+        response = self.client.get('/api/v1/auth/validate/document/', {'documento': '11222333000180'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['valid'])
+        self.assertIn('immutable', response['Cache-Control'])
+    
+    def test_get_valido_cache_curto(self):
+        with mock.patch.object(ReceitaFederalService, 'prefetch', return_value='agendado'):
+            anonimo = self.client.get('/api/v1/auth/validate/document/', {'documento': CNPJ})
+            self.client.force_authenticate(User.objects.create_user('operador', password='x'))
+            response = self.client.get('/api/v1/auth/validate/document/', {'documento': CNPJ})
+        self.assertNotIn('available', anonimo.data)
+        self.assertTrue(response.data['available'])
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+    
+    def test_lote(self):
+        Escritorio.criar_via_cnpj(CNPJ_FORMATADO, {'razao_social': 'EMPRESA TESTE LTDA'})
+        self.client.force_authenticate(User.objects.create_user('operador', password='x'))
+        response = self.client.post('/api/v1/auth/validate/document/', {
+            'documentos': [CNPJ, '529.982.247-25', '123'],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['validos'], response.data['cadastrados']), (2, 1))
+        self.assertEqual([r['available'] for r in response.data['resultados']], [False, True, None])
+    
+    def test_lote_exige_autenticacao(self):
+        response = self.client.post('/api/v1/auth/validate/document/', {'documentos': [CNPJ]}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('cadastrados', response.data)
+    
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-testes'}},
+        DOCUMENTO_VALIDACAO_LOTE_THROTTLE='1/hour',
+    )
+    def test_lote_com_throttle(self):
+        self.client.force_authenticate(User.objects.create_user('operador', password='x'))
+        respostas = [
+            self.client.post('/api/v1/auth/validate/document/', {'documentos': [CNPJ]}, format='json').status_code
+            for _ in range(2)
+        ]
+        self.assertEqual(respostas, [200, 429])
+    
+    def test_lote_acima_do_limite(self):
+        self.client.force_authenticate(User.objects.create_user('operador', password='x'))
+        with self.settings(DOCUMENTO_VALIDACAO_LOTE_MAX=2):
+            response = self.client.post('/api/v1/auth/validate/document/', {
+                'documentos': [CNPJ, CNPJ, CNPJ],
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BPORegistroViewTest(TestCase):
+    
+    def setUp(self):
+        ReceitaFederalService.resetar_estado()
+        cnpj_cache.lru.clear()
+        self.addCleanup(cnpj_cache.lru.clear)
+    
+    def test_registro_pj_usa_cache_aquecido(self):
+        # Simula o prefetch já concluído
+        cnpj_cache.salvar(CNPJ, dados_receita())
+        
+        with mock.patch.object(ReceitaFederalService, '_consultar_provedores') as provedores:
+            response = APIClient().post('/api/v1/auth/register-service/', {
+                'email': 'empresa@teste.com.br',
+                'password': 'SenhaForte123',
+                'password_confirm': 'SenhaForte123',
+                'documento': CNPJ,
+                'telefone': '11987654321',
+            }, format='json')
+        
+        self.assertEqual(response.status_code, 201, response.data)
+        provedores.assert_not_called()
+        self.assertEqual(response.data['cadastro']['nome_completo'], 'EMPRESA TESTE LTDA')
+        self.assertTrue(response.data['cadastro']['escritorio_criado'])
+        self.assertIn('access', response.data['tokens'])
+        
+        escritorio = Escritorio.objects.get(cnpj=CNPJ_FORMATADO)
+        self.assertEqual(escritorio.cidade, 'SAO PAULO')
+        self.assertEqual(escritorio.estado, 'SP')
+        self.assertEqual(escritorio.cep, '01310-100')
+        self.assertNotIn('cache', escritorio.dados_receita_federal)
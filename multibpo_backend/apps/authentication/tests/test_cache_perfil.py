@@ -0,0 +1,86 @@
+"""
+Testes do cache versionado do perfil (ETag / 304)
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.contadores.models import Contador, Escritorio
+from apps.contadores.services.atualizacao_receita import AtualizadorReceita
+from ..authentication import revogacoes
+from ..views import MultiBPOTokenObtainPairSerializer
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'perfil-testes'}}
+
+
+@override_settings(CACHES=CACHE_LOCAL, JWT_STATELESS_AUTH=True)
+class CachePerfilTest(TestCase):
+    
+    def setUp(self):
+        caches['default'].clear()
+        self.escritorio = Escritorio.criar_via_cnpj('11.222.333/0001-81', {'razao_social': 'EMPRESA TESTE LTDA'})
+        self.user = User.objects.create_user('maria', email='maria@teste.com.br', password='SenhaForte123')
+        self.contador = Contador.objects.create(
+            user=self.user, escritorio=self.escritorio, nome_completo='Maria Silva', tipo_pessoa='fisica',
+            documento='529.982.247-25', telefone_pessoal='11987654321', cargo='cliente_bpo',
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {MultiBPOTokenObtainPairSerializer.get_token(self.user).access_token}'
+        )
+        revogacoes.invalidar()
+        self.addCleanup(revogacoes.invalidar)
+    
+    def _perfil(self, **headers):
+        return self.client.get('/api/v1/auth/profile/', **headers)
+    
+    def test_leitura_repetida_sem_banco_e_304(self):
+        primeira = self._perfil()
+        self.assertEqual(primeira.status_code, 200)
+        
+        with self.assertNumQueries(0):
+            segunda = self._perfil()
+        self.assertEqual(segunda.data['nome_completo'], 'Maria Silva')
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+        
+        with self.assertNumQueries(0):
+            response = self._perfil(HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_alteracoes_trocam_a_versao(self):
+        etag = self._perfil()['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.escritorio.nome_fantasia = 'Nova Fantasia'
+            self.escritorio.save()
+        response = self._perfil(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['escritorio_detalhes']['nome_fantasia'], 'Nova Fantasia')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.contador.especialidades.clear()
+            Contador.objects.get(pk=self.contador.pk).save()
+        self.assertNotEqual(self._perfil()['ETag'], response['ETag'])
+    
+    def test_atualizacao_em_massa_troca_a_versao(self):
+        # bulk_update não dispara post_save
+        etag = self._perfil()['ETag']
+        Escritorio.objects.filter(pk=self.escritorio.pk).update(receita_atualizado_em=None)
+        service = mock.Mock()
+        service.consultar_cnpj.return_value = {'success': True, 'razao_social': 'NOVA RAZAO LTDA', 'fonte': 'BrasilAPI'}
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            AtualizadorReceita(rpm=6000, service=service).executar()
+        response = self._perfil(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['escritorio_detalhes']['razao_social'], 'NOVA RAZAO LTDA')
+    
+    def test_etag_por_conjunto_de_campos(self):
+        completo = self._perfil()
+        parcial = self.client.get('/api/v1/auth/profile/', {'fields': 'id,nome_completo'})
+        self.assertNotEqual(completo['ETag'], parcial['ETag'])
+        self.assertNotIn('escritorio_detalhes', parcial.data)
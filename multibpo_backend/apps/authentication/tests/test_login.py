@@ -0,0 +1,70 @@
+"""
+Testes da resolução do login (uma consulta para user, contador e escritório)
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.contadores.models import Contador, Escritorio
+from ..serializers.auth import ContadorLoginSerializer
+from ..views import MultiBPOTokenObtainPairSerializer
+
+
+class ContadorLoginSerializerTest(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('joao.contador', email='Joao@Escritorio.com.br', password='SenhaForte123')
+        self.escritorio = Escritorio.criar_via_cnpj('11.222.333/0001-81', {'razao_social': 'EMPRESA TESTE LTDA'})
+        self.contador = Contador.objects.create(
+            user=self.user, escritorio=self.escritorio, nome_completo='João Silva', tipo_pessoa='fisica',
+            documento='529.982.247-25', telefone_pessoal='11987654321', cargo='contador_pleno',
+            crc='CRC-SP 123456/O-7', crc_estado='SP',
+        )
+    
+    def _login(self, login):
+        serializer = ContadorLoginSerializer(data={'login': login, 'password': 'SenhaForte123'})
+        # SELECT com os joins + UPDATE do last_login
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer
+    
+    def test_login_por_email_sem_diferenciar_maiusculas(self):
+        serializer = self._login('JOAO@escritorio.com.br')
+        self.assertEqual(serializer.validated_contador, self.contador)
+        self.assertEqual(serializer.detected_login_type, 'email')
+    
+    def test_login_por_crc(self):
+        serializer = self._login('crc-sp 123456/o-7')
+        self.assertEqual(serializer.validated_user, self.user)
+        self.assertEqual(serializer.validated_contador.escritorio, self.escritorio)
+    
+    def test_login_por_username(self):
+        self._login('joao.contador')
+    
+    def test_token_reaproveita_contador_carregado(self):
+        serializer = self._login('joao.contador')
+        # Só o INSERT do OutstandingToken (token_blacklist); o contador já veio no login
+        with self.assertNumQueries(1):
+            token = MultiBPOTokenObtainPairSerializer.get_token(serializer.validated_user)
+        self.assertEqual(token['contador_id'], self.contador.id)
+        self.assertEqual(token['escritorio_id'], self.escritorio.id)
+    
+    def test_user_sem_contador(self):
+        User.objects.create_user('admin', password='SenhaForte123')
+        serializer = ContadorLoginSerializer(data={'login': 'admin', 'password': 'SenhaForte123'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('perfil de contador', str(serializer.errors['login']))
+    
+    def test_email_ambiguo_nao_autentica(self):
+        User.objects.create_user('outro', email='joao@escritorio.com.br', password='SenhaForte123')
+        serializer = ContadorLoginSerializer(data={'login': 'joao@escritorio.com.br', 'password': 'SenhaForte123'})
+        self.assertFalse(serializer.is_valid())
+    
+    def test_login_com_sparse_fieldset(self):
+        response = self.client.post(
+            '/api/v1/auth/login/?fields=id,nome_completo',
+            {'login': 'joao.contador', 'password': 'SenhaForte123'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['contador'], {'id': self.contador.id, 'nome_completo': 'João Silva'})
@@ -0,0 +1,57 @@
+"""
+Testes da autenticação JWT stateless (JWT_STATELESS_AUTH)
+"""
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.contadores.models import Contador
+from ..authentication import revogacoes
+from ..views import MultiBPOTokenObtainPairSerializer
+
+
+@override_settings(JWT_STATELESS_AUTH=True)
+class JWTStatelessAuthenticationTest(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('maria', email='maria@teste.com.br', password='SenhaForte123')
+        self.contador = Contador.objects.create(
+            user=self.user, nome_completo='Maria Silva', tipo_pessoa='fisica',
+            documento='529.982.247-25', telefone_pessoal='11987654321', cargo='cliente_bpo',
+        )
+        self.refresh = MultiBPOTokenObtainPairSerializer.get_token(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        revogacoes.invalidar()
+        self.addCleanup(revogacoes.invalidar)
+    
+    def _consultas_perfil(self):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get('/api/v1/auth/profile/')
+        self.assertEqual(response.status_code, 200, response.data)
+        return len(contexto.captured_queries)
+    
+    def test_perfil_sem_consulta_do_user(self):
+        self._consultas_perfil()  # carrega o conjunto de revogação
+        stateless = self._consultas_perfil()
+        with override_settings(JWT_STATELESS_AUTH=False):
+            padrao = self._consultas_perfil()
+        self.assertEqual(stateless, padrao - 1)
+    
+    def test_perfil_usa_dados_do_banco(self):
+        response = self.client.get('/api/v1/auth/profile/')
+        self.assertEqual(response.data['session_info']['email'], 'maria@teste.com.br')
+    
+    def test_logout_revoga_access_token(self):
+        response = self.client.post('/api/v1/auth/logout/', {'refresh_token': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.client.get('/api/v1/auth/profile/').status_code, 401)
+    
+    def test_contador_desativado(self):
+        self.contador.ativo = False
+        self.contador.save()
+        revogacoes.invalidar()
+        self.assertEqual(self.client.get('/api/v1/auth/profile/').status_code, 401)
@@ -0,0 +1,88 @@
+"""
+Testes da rotação de refresh token e da poda do token_blacklist
+"""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from ..tokens import MultiBPORefreshToken, TokenRefreshRotativoSerializer, jtis_revogados, podar_tokens_expirados
+
+
+class RefreshRotativoTest(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('maria', password='SenhaForte123')
+        self.refresh = str(MultiBPORefreshToken.for_user(self.user))
+        jtis_revogados.clear()
+        self.addCleanup(jtis_revogados.clear)
+    
+    def test_rotacao_e_reuso(self):
+        client = APIClient()
+        response = client.post('/api/v1/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.data)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        
+        response = client.post('/api/v1/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+    
+    def test_reuso_detectado_pelo_indice_unico(self):
+        # Outro processo já rotacionou o token (cache local vazio)
+        MultiBPORefreshToken(self.refresh).blacklist()
+        jtis_revogados.clear()
+        
+        with self.assertRaises(TokenError):
+            TokenRefreshRotativoSerializer().validate({'refresh': self.refresh})
+    
+    def test_corrida_no_outstanding_nao_e_reuso(self):
+        # A leitura não acha o jti e um refresh concorrente o insere antes:
+        # o INSERT em OutstandingToken falha no índice único
+        vazio = OutstandingToken.objects.none()
+        with patch.object(OutstandingToken.objects, 'filter', return_value=vazio):
+            data = TokenRefreshRotativoSerializer().validate({'refresh': self.refresh})
+        
+        self.assertIn('refresh', data)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+    
+    def test_revogado_em_cache_nao_consulta_banco(self):
+        MultiBPORefreshToken(self.refresh).blacklist()
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                TokenRefreshRotativoSerializer().validate({'refresh': self.refresh})
+
+
+class PodaTokensTest(TestCase):
+    
+    def setUp(self):
+        user = User.objects.create_user('maria', password='SenhaForte123')
+        agora = timezone.now()
+        for indice in range(5):
+            token = OutstandingToken.objects.create(
+                user=user, jti=f'expirado{indice}', token='x', expires_at=agora - timedelta(days=1)
+            )
+            if indice % 2 == 0:
+                BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(user=user, jti='valido', token='x', expires_at=agora + timedelta(days=1))
+    
+    def test_poda_em_lotes(self):
+        resumo = podar_tokens_expirados(lote=2)
+        self.assertEqual(resumo, {'outstanding': 5, 'blacklisted': 3})
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['valido'])
+    
+    def test_limite(self):
+        resumo = podar_tokens_expirados(lote=2, limite=3)
+        self.assertEqual(resumo['outstanding'], 3)
+        self.assertEqual(OutstandingToken.objects.count(), 3)
+    
+    def test_comando(self):
+        call_command('podar_tokens_jwt', lote=10, stdout=StringIO())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
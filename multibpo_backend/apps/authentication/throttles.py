@@ -0,0 +1,52 @@
+"""
+Throttles das rotas de validação de documento
+MultiBPO - limites por usuário autenticado ou, para anônimos, por IP
+
+As taxas vêm do settings a cada requisição (não do DEFAULT_THROTTLE_RATES,
+fixado no import) e o histórico fica no cache default: com DummyCache os
+throttles não limitam nada.
+"""
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TaxaDoSettingsThrottle(SimpleRateThrottle):
+    """Base: taxa em settings.<setting> e chave por usuário ou IP"""
+
+    setting = None
+    taxa_padrao = None
+
+    def get_rate(self):
+        return getattr(settings, self.setting, self.taxa_padrao)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class ValidacaoDocumentoThrottle(TaxaDoSettingsThrottle):
+    """Validação de um documento (digitação no cadastro, rota pública)"""
+
+    scope = 'validacao_documento'
+    setting = 'DOCUMENTO_VALIDACAO_THROTTLE'
+    taxa_padrao = '120/min'
+
+
+class ValidacaoDocumentoLoteThrottle(TaxaDoSettingsThrottle):
+    """Validação em lote (só autenticados)"""
+
+    scope = 'validacao_documento_lote'
+    setting = 'DOCUMENTO_VALIDACAO_LOTE_THROTTLE'
+    taxa_padrao = '20/hour'
+
+
+class PrefetchReceitaThrottle(TaxaDoSettingsThrottle):
+    """Prefetch da Receita disparado pela validação anônima (por IP)"""
+
+    scope = 'receita_prefetch'
+    setting = 'RECEITA_PREFETCH_THROTTLE'
+    taxa_padrao = '10/hour'
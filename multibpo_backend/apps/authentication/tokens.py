@@ -0,0 +1,157 @@
+"""
+Refresh tokens com blacklist de custo constante
+MultiBPO - rotação atômica e cache de JTIs revogados
+
+Com ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION o refresh padrão do
+simplejwt consulta a blacklist e depois grava o token usado nela. Aqui a
+própria gravação é a verificação: o INSERT no índice único de
+BlacklistedToken falha se o token já tinha sido usado, o que também impede
+que duas requisições concorrentes rotacionem o mesmo refresh token.
+
+JTIs revogados vistos por este processo ficam num LRU só de acertos
+positivos (não é um Bloom filter: não há falso positivo nem resposta
+negativa confiável) e são recusados sem ir ao banco (reuso de token vazado
+costuma vir em rajadas).
+"""
+
+import logging
+import time
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from apps.receita.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# JTIs sabidamente revogados (positivo apenas: ausência aqui não prova nada,
+# outros processos também gravam na blacklist)
+jtis_revogados = LRUCache(maxsize=10000)
+
+
+class MultiBPORefreshToken(RefreshToken):
+    """RefreshToken que consulta o cache de revogados antes do banco"""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if jtis_revogados.get(jti):
+            raise TokenError("Token is blacklisted")
+        super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        jtis_revogados.set(self.payload[api_settings.JTI_CLAIM], True)
+        return blacklisted
+
+    def _outstanding(self):
+        """OutstandingToken do jti, criado se preciso (corrida no INSERT não é reuso)"""
+        jti = self.payload[api_settings.JTI_CLAIM]
+        outstanding = OutstandingToken.objects.filter(jti=jti).first()
+        if outstanding:
+            return outstanding
+        try:
+            with transaction.atomic():
+                return OutstandingToken.objects.create(
+                    jti=jti,
+                    user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+                    token=str(self),
+                    created_at=self.current_time,
+                    expires_at=datetime_from_epoch(self.payload['exp']),
+                )
+        except IntegrityError:
+            # Refresh concorrente gravou o mesmo jti antes: relê a linha dele
+            return OutstandingToken.objects.get(jti=jti)
+
+    def consumir(self):
+        """
+        Coloca o token na blacklist; TokenError se ele já estava lá
+
+        Substitui o par check_blacklist + blacklist na rotação. Só o INSERT
+        em BlacklistedToken conta como reuso, e apenas se a linha existir.
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        outstanding = self._outstanding()
+        try:
+            with transaction.atomic():
+                BlacklistedToken.objects.create(token=outstanding)
+        except IntegrityError:
+            if not BlacklistedToken.objects.filter(token=outstanding).exists():
+                raise
+            jtis_revogados.set(jti, True)
+            logger.warning(f"Refresh token reutilizado (jti {jti})")
+            raise TokenError("Token is blacklisted")
+        jtis_revogados.set(jti, True)
+
+
+class RefreshTokenRotativo(MultiBPORefreshToken):
+    """Na decodificação só confere o cache; o banco é conferido em consumir()"""
+
+    def check_blacklist(self):
+        if jtis_revogados.get(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+
+class TokenRefreshRotativoSerializer(TokenRefreshSerializer):
+    """
+    TOKEN_REFRESH_SERIALIZER do MultiBPO
+
+    Mesma resposta do serializer padrão; com rotação + blacklist a
+    verificação e a gravação viram um único INSERT no índice único.
+    """
+
+    def validate(self, attrs):
+        rotacao_com_blacklist = api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+        refresh = (RefreshTokenRotativo if rotacao_com_blacklist else MultiBPORefreshToken)(attrs['refresh'])
+
+        if rotacao_com_blacklist:
+            refresh.consumir()
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+# ========== PODA ==========
+
+def podar_tokens_expirados(lote=5000, pausa=0.0, limite=None, antes=None):
+    """
+    Apaga tokens expirados (OutstandingToken e o BlacklistedToken ligado)
+
+    Em lotes pelo índice de expires_at, cada lote na sua transação, para
+    não segurar locks longos nem inflar o WAL numa tabela de milhões de linhas.
+
+    Returns:
+        dict com outstanding e blacklisted apagados
+    """
+    antes = antes or timezone.now()
+    resumo = {'outstanding': 0, 'blacklisted': 0}
+
+    while limite is None or resumo['outstanding'] < limite:
+        tamanho = lote if limite is None else min(lote, limite - resumo['outstanding'])
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=antes)
+            .order_by('expires_at').values_list('id', flat=True)[:tamanho]
+        )
+        if not ids:
+            break
+
+        with transaction.atomic():
+            resumo['blacklisted'] += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            resumo['outstanding'] += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+        if pausa:
+            time.sleep(pausa)
+
+    return resumo
@@ -30,7 +30,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 # ========== IMPORTS ADICIONAIS PARA SUB-FASE 2.2.3 ==========
-from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken, Token
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
@@ -39,6 +39,7 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth import update_session_auth_hash
 from django.utils import timezone
 from django.core.cache import cache
+from django.utils.http import parse_etags
 import logging
 
 # Imports do projeto
@@ -48,12 +49,16 @@ from .serializers import (
 )
 
 # ========== NOVOS IMPORTS PARA BPO (SUB-FASE 2.2.3) ==========
-# TODO: Implementar estes serializers nos próximos artefatos
-# from .serializers.bpo import BPORegistroSerializer  
-# from .serializers.validation import DocumentoValidationSerializer
+from .serializers.bpo import BPORegistroSerializer, DocumentoValidationSerializer
+from apps.receita.services import ReceitaFederalService
+from apps.contadores.validators.documentos import validar_documentos
 
 from apps.contadores.models import Contador, Escritorio
-from apps.contadores.serializers import ContadorPerfilSerializer
+from apps.contadores.serializers import ContadorPerfilSerializer, contadores_para_perfil
+from .authentication import AutenticacaoStatelessMixin, revogar_token
+from .cache_perfil import etag_perfil, obter_perfil, salvar_perfil, versao_perfil
+from .throttles import PrefetchReceitaThrottle, ValidacaoDocumentoLoteThrottle, ValidacaoDocumentoThrottle
+from .tokens import MultiBPORefreshToken
 
 # Logger para auditoria
 logger = logging.getLogger(__name__)
@@ -72,17 +77,19 @@ class MultiBPOTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         
         try:
-            contador = Contador.objects.select_related('escritorio').get(user=user)
+            # Reaproveita o contador já carregado (login/registro); senão, uma consulta
+            contador = user.contador
             
             # Claims customizados do contador
             token['contador_id'] = contador.id
             token['crc'] = getattr(contador, 'crc', None)  # CRC pode ser opcional agora
             token['documento'] = getattr(contador, 'documento', contador.cpf)  # Documento unificado
             token['tipo_pessoa'] = getattr(contador, 'tipo_pessoa', 'fisica')  # Novo campo
-            token['escritorio_id'] = contador.escritorio.id if contador.escritorio else None
+            token['escritorio_id'] = contador.escritorio_id
             token['eh_responsavel'] = getattr(contador, 'eh_responsavel_tecnico', False)
             token['pode_assinar'] = getattr(contador, 'pode_assinar_documentos', False)
             token['ativo'] = contador.ativo
+            token['username'] = user.username  # UsuarioToken (autenticação stateless)
             
         except Contador.DoesNotExist:
             # User sem perfil contador - apenas claims básicos
@@ -135,7 +142,7 @@ class RegisterView(APIView):
             500: Erro interno (rollback automático)
         """
         
-        serializer = ContadorRegistroSerializer(data=request.data)
+        serializer = ContadorRegistroSerializer(data=request.data, context={'request': request})
         
         if not serializer.is_valid():
             logger.warning(f"Tentativa de registro com dados inválidos: {serializer.errors}")
@@ -234,7 +241,7 @@ class LoginView(APIView):
             404: Conta não encontrada
         """
         
-        serializer = ContadorLoginSerializer(data=request.data)
+        serializer = ContadorLoginSerializer(data=request.data, context={'request': request})
         
         if not serializer.is_valid():
             logger.warning(f"Tentativa de login com dados inválidos: {serializer.errors}")
@@ -337,24 +344,61 @@ class BPORegistroView(APIView):
         """
         Registro simplificado BPO
         
-        TODO: Implementar quando BPORegistroSerializer estiver disponível
+        Para CNPJ, o escritório é criado com Escritorio.criar_via_cnpj a
+        partir dos dados da Receita, normalmente já aquecidos no cache pelo
+        prefetch da validação de documento.
+        
+        Returns:
+            201: Conta criada + JWT tokens
+            400: Erro de validação nos dados
         """
         
-        # PLACEHOLDER - implementar quando serializer estiver pronto
+        serializer = BPORegistroSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            logger.warning(f"Tentativa de registro BPO com dados inválidos: {serializer.errors}")
+            return Response({
+                'success': False,
+                'message': 'Dados de registro inválidos.',
+                'errors': serializer.errors,
+                'error_code': 'VALIDATION_ERROR'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        contador = serializer.save()
+        
+        refresh = MultiBPOTokenObtainPairSerializer.get_token(contador.user)
+        access = refresh.access_token
+        
+        logger.info(f"Conta BPO registrada: {contador.documento} - User ID: {contador.user.id}")
+        
         return Response({
-            'message': 'BPORegistroView - Implementação em andamento',
-            'endpoint': 'POST /api/v1/auth/register-service/',
-            'status': 'placeholder',
-            'data_received': request.data,
-            'next_step': 'Implementar BPORegistroSerializer'
-        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+            'success': True,
+            'message': f'Conta BPO criada com sucesso para {contador.nome_completo}!',
+            'cadastro': {
+                'user_id': contador.user.id,
+                'contador_id': contador.id,
+                'tipo_pessoa': contador.tipo_pessoa,
+                'documento': contador.documento,
+                'nome_completo': contador.nome_completo,
+                'escritorio_id': contador.escritorio_id,
+                'escritorio_criado': getattr(contador, 'escritorio_criado', False),
+                'fonte_receita': (contador.dados_receita_federal or {}).get('fonte'),
+            },
+            'tokens': {
+                'access': str(access),
+                'refresh': str(refresh),
+                'access_expires_in': int(access.lifetime.total_seconds()),
+                'refresh_expires_in': int(refresh.lifetime.total_seconds()),
+            },
+        }, status=status.HTTP_201_CREATED)
 
 
 class DocumentoValidationView(APIView):
     """
     View para validação de CPF/CNPJ em tempo real (NOVA)
     
-    POST /api/v1/validate/document/
+    GET  /api/v1/validate/document/?documento=...   (cacheável)
+    POST /api/v1/validate/document/                 ({"documento": ...} ou {"documentos": [...]})
     POST /api/v1/auth/validate/document/
     
     Funcionalidades:
@@ -362,34 +406,174 @@ class DocumentoValidationView(APIView):
     - Verifica se documento já existe no sistema
     - Suporte para CPF e CNPJ
     - Response em tempo real para frontend
+    - Lote de documentos com uma consulta de existência por lote
     
     NOVO: Validação antes do registro
+    
+    Só a validação de um documento é pública (o cadastro precisa dela), e
+    sem `available`: anônimos não descobrem quais documentos estão
+    cadastrados (o próprio registro recusa o duplicado). O lote exige
+    autenticação e tem throttle próprio, mais restrito.
     """
     
     permission_classes = [AllowAny]
+    throttle_classes = [ValidacaoDocumentoThrottle]
+    
+    # Dígitos verificadores não mudam: resposta de documento inválido pode ficar em cache
+    CACHE_INVALIDO = 'public, max-age=86400, immutable'
+    
+    def _eh_lote(self):
+        request = self.request
+        return request.method == 'POST' and isinstance(request.data, dict) and 'documentos' in request.data
+    
+    def get_permissions(self):
+        if self._eh_lote():
+            return [IsAuthenticated()]
+        return super().get_permissions()
+    
+    def get_throttles(self):
+        if self._eh_lote():
+            return [ValidacaoDocumentoLoteThrottle()]
+        return super().get_throttles()
+    
+    def _prefetch(self, tipo, formatted, available):
+        """
+        Para um CNPJ válido e ainda não cadastrado, dispara em background a
+        consulta à Receita Federal (prefetch): quando o usuário concluir o
+        cadastro, os dados da empresa já estarão no cache.
+        
+        Anônimos têm throttle por IP: o prefetch gasta o rate limit dos
+        provedores, e o serviço ainda o pula quando o limite está baixo.
+        """
+        if tipo != 'cnpj' or not available:
+            return None
+        if not self.request.user.is_authenticated and not PrefetchReceitaThrottle().allow_request(self.request, self):
+            return 'ignorado'
+        return ReceitaFederalService().prefetch(formatted)
+    
+    def get(self, request):
+        """
+        Validação de um documento por querystring (digitação)
+        
+        Sempre 200 com `valid`; o Cache-Control deixa o navegador e a CDN
+        reaproveitar a resposta enquanto o usuário digita/apaga.
+        """
+        documento = request.query_params.get('documento', '')
+        if not documento:
+            return Response({
+                'success': False,
+                'valid': False,
+                'errors': {'documento': ['Este campo é obrigatório.']},
+                'error_code': 'VALIDATION_ERROR'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        resultado = validar_documentos([documento])[0]
+        response_data = {
+            'success': True,
+            'valid': resultado.valido,
+            'tipo': resultado.tipo,
+            'formatted': resultado.formatado,
+        }
+        
+        if not resultado.valido:
+            response_data['message'] = resultado.erro
+            response = Response(response_data, status=status.HTTP_200_OK)
+            response['Cache-Control'] = self.CACHE_INVALIDO
+            return response
+        
+        if request.user.is_authenticated:
+            response_data['available'] = resultado.disponivel
+        prefetch = self._prefetch(resultado.tipo, resultado.formatado, resultado.disponivel)
+        # Só há prefetch para CNPJ livre: o status também revelaria o cadastro
+        if prefetch and request.user.is_authenticated:
+            response_data['receita_prefetch'] = prefetch
+        
+        response = Response(response_data, status=status.HTTP_200_OK)
+        # Disponibilidade muda com novos cadastros: mesmo TTL do cache de existência
+        ttl = getattr(settings, 'DOCUMENTO_VALIDACAO_CACHE_TTL', 30)
+        response['Cache-Control'] = f'private, max-age={ttl}'
+        return response
     
     def post(self, request):
         """
         Validação de documento em tempo real
         
-        TODO: Implementar quando DocumentoValidationSerializer estiver disponível
+        Com {"documentos": [...]} valida o lote inteiro e devolve um
+        resultado por entrada, na mesma ordem.
         """
         
-        # PLACEHOLDER - implementar quando serializer estiver pronto
-        documento = request.data.get('documento', '')
-        tipo = request.data.get('tipo', 'auto')
+        if 'documentos' in request.data:
+            return self._post_lote(request.data['documentos'])
+        
+        serializer = DocumentoValidationSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'valid': False,
+                'errors': serializer.errors,
+                'error_code': 'VALIDATION_ERROR'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        response_data = {
+            'success': True,
+            'valid': True,
+            'tipo': data['tipo'],
+            'formatted': data['formatted'],
+        }
+        if request.user.is_authenticated:
+            response_data['available'] = data['available']
+        
+        prefetch = self._prefetch(data['tipo'], data['formatted'], data['available'])
+        # Só há prefetch para CNPJ livre: o status também revelaria o cadastro
+        if prefetch and request.user.is_authenticated:
+            response_data['receita_prefetch'] = prefetch
+        
+        return Response(response_data, status=status.HTTP_200_OK)
+    
+    def _post_lote(self, documentos):
+        limite = getattr(settings, 'DOCUMENTO_VALIDACAO_LOTE_MAX', 10000)
+        
+        if not isinstance(documentos, list) or not documentos:
+            message = 'Informe uma lista de documentos'
+        elif len(documentos) > limite:
+            message = f'Máximo de {limite} documentos por requisição'
+        else:
+            message = None
+        
+        if message:
+            return Response({
+                'success': False,
+                'message': message,
+                'error_code': 'VALIDATION_ERROR'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Lote não passa pelo cache de existência (não polui o da digitação)
+        resultados = validar_documentos(documentos, usar_cache=False)
+        validos = sum(1 for r in resultados if r.valido)
         
         return Response({
-            'message': 'DocumentoValidationView - Implementação em andamento',
-            'endpoint': 'POST /api/v1/validate/document/',
-            'status': 'placeholder',
-            'documento_received': documento,
-            'tipo_received': tipo,
-            'next_step': 'Implementar DocumentoValidationSerializer'
-        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+            'success': True,
+            'total': len(resultados),
+            'validos': validos,
+            'invalidos': len(resultados) - validos,
+            'cadastrados': sum(1 for r in resultados if r.disponivel is False),
+            'resultados': [
+                {
+                    'documento': r.entrada,
+                    'valid': r.valido,
+                    'tipo': r.tipo,
+                    'formatted': r.formatado,
+                    'available': r.disponivel,
+                    'message': r.erro,
+                }
+                for r in resultados
+            ],
+        }, status=status.HTTP_200_OK)
 
 
-class ContadorPerfilView(APIView):
+class ContadorPerfilView(AutenticacaoStatelessMixin, APIView):
     """
     View para perfil do contador autenticado (ADAPTADA)
     
@@ -402,6 +586,12 @@ class ContadorPerfilView(APIView):
     - Serialização via ContadorPerfilSerializer existente
     
     ADAPTADA: Funciona com dados antigos e novos
+    
+    Com JWT_STATELESS_AUTH=True a autenticação não consulta o User: os dados
+    da conta vêm do select_related de contadores_para_perfil.
+    
+    Perfil em cache versionado (cache_perfil.py): If-None-Match com o ETag
+    atual devolve 304, e leituras repetidas não vão ao banco.
     """
     
     permission_classes = [IsAuthenticated]
@@ -410,45 +600,67 @@ class ContadorPerfilView(APIView):
         """
         Retorna perfil completo do contador autenticado
         """
-        try:
-            contador = Contador.objects.select_related('user', 'escritorio').get(user=request.user)
-            
-            # Usar serializer existente (já adaptado para novos campos)
-            serializer = ContadorPerfilSerializer(contador)
-            
-            # Adicionar informações extras da sessão
-            profile_data = serializer.data
-            profile_data.update({
-                'success': True,
-                'profile_type': 'contador',
-                'session_info': {
-                    'user_id': request.user.id,
-                    'username': request.user.username,
-                    'email': request.user.email,
-                    'last_login': request.user.last_login.isoformat() if request.user.last_login else None,
-                    'is_staff': request.user.is_staff,
-                    'is_active': request.user.is_active,
-                },
-                'conta_tipo': 'BPO Cliente' if getattr(contador, 'cargo', '') == 'cliente_bpo' else 'Contador Profissional',
-                'tipo_pessoa': getattr(contador, 'tipo_pessoa', 'fisica'),
-                'documento': getattr(contador, 'documento', contador.cpf),
-                'profile_retrieved_at': timezone.now().isoformat(),
-            })
-            
-            return Response(profile_data, status=status.HTTP_200_OK)
+        # ?fields= / ?omit= reduzem também o que é buscado no banco
+        campos = ContadorPerfilSerializer.selecionar_da_requisicao(request)
+        versao = versao_perfil(request.user.id)
+        etag = etag_perfil(request.user.id, versao, campos)
+        
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            profile_data = obter_perfil(request.user.id, versao, campos)
+            if profile_data is None:
+                try:
+                    profile_data = self._montar_perfil(request, campos)
+                except Contador.DoesNotExist:
+                    return Response({
+                        'success': False,
+                        'message': 'Perfil de contador não encontrado para este usuário.',
+                        'error_code': 'PROFILE_NOT_FOUND',
+                        'user_info': {
+                            'user_id': request.user.id,
+                            'username': request.user.username,
+                            'email': getattr(request.user, 'email', ''),
+                            'is_authenticated': True,
+                        }
+                    }, status=status.HTTP_404_NOT_FOUND)
+                salvar_perfil(request.user.id, versao, campos, profile_data)
             
-        except Contador.DoesNotExist:
-            return Response({
-                'success': False,
-                'message': 'Perfil de contador não encontrado para este usuário.',
-                'error_code': 'PROFILE_NOT_FOUND',
-                'user_info': {
-                    'user_id': request.user.id,
-                    'username': request.user.username,
-                    'email': request.user.email,
-                    'is_authenticated': True,
-                }
-            }, status=status.HTTP_404_NOT_FOUND)
+            response = Response(
+                {**profile_data, 'profile_retrieved_at': timezone.now().isoformat()},
+                status=status.HTTP_200_OK
+            )
+        
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    def _montar_perfil(self, request, campos):
+        """Perfil serializado + dados da sessão (o que vai para o cache)"""
+        contador = contadores_para_perfil(campos=campos).get(user_id=request.user.id)
+        user = contador.user
+        
+        # Usar serializer existente (já adaptado para novos campos)
+        serializer = ContadorPerfilSerializer(contador, context={'request': request})
+        
+        # Adicionar informações extras da sessão
+        profile_data = dict(serializer.data)
+        profile_data.update({
+            'success': True,
+            'profile_type': 'contador',
+            'session_info': {
+                'user_id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'last_login': user.last_login.isoformat() if user.last_login else None,
+                'is_staff': user.is_staff,
+                'is_active': user.is_active,
+            },
+            'conta_tipo': 'BPO Cliente' if getattr(contador, 'cargo', '') == 'cliente_bpo' else 'Contador Profissional',
+            'tipo_pessoa': getattr(contador, 'tipo_pessoa', 'fisica'),
+            'documento': getattr(contador, 'documento', contador.cpf),
+        })
+        return profile_data
 
 
 @api_view(['POST'])
@@ -461,6 +673,7 @@ def logout_view(request):
     
     Funcionalidades:
     - Blacklist do refresh token fornecido
+    - Revogação do access token usado na requisição
     - Logout seguro
     - Response de confirmação
     """
@@ -468,9 +681,13 @@ def logout_view(request):
         refresh_token = request.data.get('refresh_token')
         
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = MultiBPORefreshToken(refresh_token)
             token.blacklist()
             
+            # Access token atual também deixa de valer (autenticação stateless)
+            if isinstance(request.auth, Token):
+                revogar_token(request.auth)
+            
             logger.info(f"Logout realizado: User {request.user.id} - Token blacklisted")
             
             return Response({
@@ -712,8 +929,8 @@ def test_endpoints(request):
             '4': 'GET /api/v1/auth/profile/ - ver perfil'
         },
         'fluxo_pessoa_juridica': {
-            '1': 'POST /api/v1/validate/document/ - validar CNPJ',
-            '2': 'GET /api/v1/receita/cnpj/{cnpj}/ - buscar dados RF',
+            '1': 'POST /api/v1/validate/document/ - validar CNPJ (já inicia a consulta RF)',
+            '2': 'GET /api/v1/receita/cnpj/{cnpj}/ - buscar dados RF (opcional)',
             '3': 'POST /api/v1/auth/register-service/ - criar conta + escritório',
             '4': 'POST /api/v1/auth/login/ - fazer login',
             '5': 'GET /api/v1/auth/profile/ - ver perfil'
@@ -738,9 +955,9 @@ def test_endpoints(request):
         },
         'implementacao_status': {
             'views_originais': 'Funcionando',
-            'views_bpo': 'Placeholders implementados',
-            'serializers_needed': ['BPORegistroSerializer', 'DocumentoValidationSerializer'],
-            'next_step': 'Implementar serializers BPO'
+            'views_bpo': 'Funcionando (validação de documento com prefetch da Receita)',
+            'serializers_needed': [],
+            'next_step': None
         },
         'debug_info': {
             'user_authenticated': request.user.is_authenticated,
@@ -1,6 +1,12 @@
 from django.contrib import admin
+from django.db.models import Q
 from django.utils.html import format_html
-from .models import Escritorio, Especialidade, Contador
+from apps.authentication.cache_perfil import invalidar_perfis
+from config.admin_paginacao import TabelaGrandeAdminMixin
+from .busca import TAMANHO_MINIMO, buscar, suporta_trigram
+from .catalogo import catalogo, invalidar_catalogo
+from .models import Escritorio, Especialidade, Contador, AlteracaoReceita
+from .serializers.querysets import anotado, contadores_para_admin, especialidades_para_admin
 
 # Customização do cabeçalho do Django Admin
 admin.site.site_header = "MultiBPO - Administração Contábil"
@@ -14,9 +20,48 @@ class ContadorEspecialidadeInline(admin.TabularInline):
     verbose_name = "Especialidade"
     verbose_name_plural = "Especialidades do Contador"
 
+class EspecialidadeCatalogoFilter(admin.SimpleListFilter):
+    """Filtro por especialidade com as opções do catálogo em memória"""
+
+    title = 'especialidades'
+    parameter_name = 'especialidades__id__exact'
+
+    def lookups(self, request, model_admin):
+        especialidades = sorted(catalogo().por_id.values(), key=lambda esp: (esp.area_principal, esp.nome))
+        return [(str(esp.id), esp.nome) for esp in especialidades]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(especialidades__id=self.value())
+        return queryset
+
+
+class BuscaTrigramAdminMixin:
+    """
+    Busca do admin por nome via índice trigram (PostgreSQL)
+
+    Termos com letras somam os resultados de apps.contadores.busca (tolera
+    acento e erro de digitação) aos do search_fields, que continua cobrindo
+    usuário, e-mail, CRC etc. Documentos, e-mails e outros bancos seguem só
+    no search_fields.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        padrao, duplicatas = super().get_search_results(request, queryset, search_term)
+        termo = search_term.strip()
+        if (suporta_trigram() and len(termo) >= TAMANHO_MINIMO
+                and '@' not in termo and any(c.isalpha() for c in termo)):
+            # A ordenação vem da changelist; o pk__in também elimina duplicatas
+            similares = buscar(queryset, termo)
+            return queryset.filter(
+                Q(pk__in=similares.values('pk')) | Q(pk__in=padrao.values('pk'))
+            ), False
+        return padrao, duplicatas
+
+
 # Admin para Escritorio - VERSÃO MELHORADA
 @admin.register(Escritorio)
-class EscritorioAdmin(admin.ModelAdmin):
+class EscritorioAdmin(TabelaGrandeAdminMixin, BuscaTrigramAdminMixin, admin.ModelAdmin):
     """
     Interface administrativa para gestão de escritórios contábeis
     """
@@ -146,6 +191,7 @@ class EscritorioAdmin(admin.ModelAdmin):
     def ativar_escritorios(self, request, queryset):
         """Ativa múltiplos escritórios de uma vez"""
         updated = queryset.update(ativo=True)
+        invalidar_perfis(Contador.objects.filter(escritorio__in=queryset).values_list('user_id', flat=True))
         self.message_user(
             request, 
             f'{updated} escritório(s) ativado(s) com sucesso.',
@@ -156,6 +202,7 @@ class EscritorioAdmin(admin.ModelAdmin):
     def desativar_escritorios(self, request, queryset):
         """Desativa múltiplos escritórios de uma vez"""
         updated = queryset.update(ativo=False)
+        invalidar_perfis(Contador.objects.filter(escritorio__in=queryset).values_list('user_id', flat=True))
         self.message_user(
             request, 
             f'{updated} escritório(s) desativado(s) com sucesso.',
@@ -164,7 +211,7 @@ class EscritorioAdmin(admin.ModelAdmin):
 
 # Admin para Contador - VERSÃO MELHORADA
 @admin.register(Contador)
-class ContadorAdmin(admin.ModelAdmin):
+class ContadorAdmin(TabelaGrandeAdminMixin, BuscaTrigramAdminMixin, admin.ModelAdmin):
     """
     Interface administrativa para gestão de contadores
     """
@@ -182,10 +229,11 @@ class ContadorAdmin(admin.ModelAdmin):
     
     list_filter = [
         'ativo',
-        'escritorio',
+        # Com/sem escritório: a lista de todos os escritórios não cabe no filtro
+        ('escritorio', admin.EmptyFieldListFilter),
         'categoria_crc',
         'cargo',
-        'especialidades',
+        EspecialidadeCatalogoFilter,
         'eh_responsavel_tecnico'
     ]
     
@@ -201,6 +249,12 @@ class ContadorAdmin(admin.ModelAdmin):
     
     readonly_fields = ['created_at', 'updated_at']
     filter_horizontal = ['especialidades']
+    raw_id_fields = ['user']
+    autocomplete_fields = ['escritorio']
+    list_select_related = ['user', 'escritorio']
+
+    def get_queryset(self, request):
+        return contadores_para_admin(super().get_queryset(request))
     
     fieldsets = (
         ('👤 Informações Pessoais', {
@@ -291,7 +345,7 @@ class ContadorAdmin(admin.ModelAdmin):
     @admin.display(description='📚 Especialidades')
     def especialidades_count(self, obj):
         """Conta especialidades do contador"""
-        count = obj.especialidades.count()
+        count = anotado(obj, 'num_especialidades', obj.especialidades.count)
         if count > 0:
             return format_html('📚 {} especialidade(s)', count)
         return "❌ Nenhuma"
@@ -312,16 +366,19 @@ class ContadorAdmin(admin.ModelAdmin):
     @admin.action(description='✅ Ativar contadores selecionados')
     def ativar_contadores(self, request, queryset):
         updated = queryset.update(ativo=True)
+        invalidar_perfis(queryset.values_list('user_id', flat=True))
         self.message_user(request, f'{updated} contador(es) ativado(s).', level='SUCCESS')
     
     @admin.action(description='❌ Desativar contadores selecionados')
     def desativar_contadores(self, request, queryset):
         updated = queryset.update(ativo=False)
+        invalidar_perfis(queryset.values_list('user_id', flat=True))
         self.message_user(request, f'{updated} contador(es) desativado(s).', level='WARNING')
     
     @admin.action(description='👨‍💼 Marcar como responsável técnico')
     def aprovar_como_responsavel(self, request, queryset):
         updated = queryset.update(eh_responsavel_tecnico=True, pode_assinar_documentos=True)
+        invalidar_perfis(queryset.values_list('user_id', flat=True))
         self.message_user(request, f'{updated} contador(es) aprovado(s) como responsável técnico.', level='SUCCESS')
 
 # Admin para Especialidade - VERSÃO AVANÇADA CORRIGIDA
@@ -452,7 +509,7 @@ class EspecialidadeAdmin(admin.ModelAdmin):
     @admin.display(description='👥 Contadores')
     def contadores_vinculados(self, obj):
         """Mostra quantidade de contadores com esta especialidade"""
-        count = obj.contadores.count()
+        count = anotado(obj, 'num_contadores', obj.contadores.count)
         
         if count > 0:
             return format_html(
@@ -470,10 +527,8 @@ class EspecialidadeAdmin(admin.ModelAdmin):
     
     # Otimização de queries para performance
     def get_queryset(self, request):
-        """Otimiza consultas com prefetch_related"""
-        queryset = super().get_queryset(request)
-        # Prefetch contadores para evitar N+1 queries na contagem
-        return queryset.prefetch_related('contadores')
+        """Contagem de contadores anotada (sem carregar os vínculos)"""
+        return especialidades_para_admin(super().get_queryset(request))
     
     # Ações personalizadas em lote
     actions = [
@@ -484,10 +539,18 @@ class EspecialidadeAdmin(admin.ModelAdmin):
         'remover_certificacao_obrigatoria'
     ]
     
+    def _especialidades_alteradas(self, queryset):
+        """QuerySet.update() não dispara signals: catálogo e perfis vinculados"""
+        invalidar_catalogo()
+        invalidar_perfis(
+            Contador.objects.filter(especialidades__in=queryset).values_list('user_id', flat=True)
+        )
+    
     @admin.action(description='✅ Ativar especialidades selecionadas')
     def ativar_especialidades(self, request, queryset):
         """Ativa múltiplas especialidades de uma vez"""
         updated = queryset.update(ativa=True)
+        self._especialidades_alteradas(queryset)
         self.message_user(
             request, 
             f'{updated} especialidade(s) ativada(s) com sucesso.',
@@ -498,6 +561,7 @@ class EspecialidadeAdmin(admin.ModelAdmin):
     def desativar_especialidades(self, request, queryset):
         """Desativa múltiplas especialidades de uma vez"""
         updated = queryset.update(ativa=False)
+        self._especialidades_alteradas(queryset)
         self.message_user(
             request, 
             f'{updated} especialidade(s) desativada(s) com sucesso.',
@@ -536,6 +600,7 @@ class EspecialidadeAdmin(admin.ModelAdmin):
     def marcar_certificacao_obrigatoria(self, request, queryset):
         """Marca especialidades como exigindo certificação"""
         updated = queryset.update(requer_certificacao=True)
+        self._especialidades_alteradas(queryset)
         self.message_user(
             request,
             f'{updated} especialidade(s) marcada(s) como certificação obrigatória.',
@@ -546,8 +611,30 @@ class EspecialidadeAdmin(admin.ModelAdmin):
     def remover_certificacao_obrigatoria(self, request, queryset):
         """Remove obrigatoriedade de certificação"""
         updated = queryset.update(requer_certificacao=False)
+        self._especialidades_alteradas(queryset)
         self.message_user(
             request,
             f'{updated} especialidade(s) com certificação removida.',
             level='INFO'
-        )
\ No newline at end of file
+        )
+
+# Admin para o log de alterações da Receita (somente leitura)
+@admin.register(AlteracaoReceita)
+class AlteracaoReceitaAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
+    """
+    Diferenças registradas pelo atualizar_dados_receita
+    """
+    
+    list_display = ['cnpj', 'escritorio', 'contador', 'campos_alterados', 'fonte', 'created_at']
+    list_filter = ['fonte', 'created_at']
+    search_fields = ['cnpj', 'escritorio__razao_social', 'contador__nome_completo']
+    list_select_related = ['escritorio', 'contador']
+    readonly_fields = ['escritorio', 'contador', 'cnpj', 'alteracoes', 'fonte', 'created_at']
+    date_hierarchy = 'created_at'
+    
+    def campos_alterados(self, obj):
+        return ', '.join(obj.alteracoes)
+    campos_alterados.short_description = 'Campos'
+    
+    def has_add_permission(self, request):
+        return False
@@ -9,4 +9,4 @@ class ContadoresConfig(AppConfig):
         """
         Configurações que rodam quando o app é carregado
         """
-        pass
\ No newline at end of file
+        from . import signals  # noqa: F401 - invalidação do catálogo de especialidades
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Busca aproximada por nome de escritórios e contadores
+MultiBPO - pg_trgm + unaccent (PostgreSQL)
+
+No PostgreSQL a busca usa o operador de similaridade por palavra (%>) sobre
+uma expressão normalizada (minúsculas, sem acento) com índice GIN
+gin_trgm_ops, criado na migration 0008. Em outros bancos (SQLite dos
+testes) cai num icontains por palavra, sem ranking por similaridade.
+"""
+
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, TextField, Value
+from django.db.models.functions import Concat
+
+from .models import Contador, Escritorio
+
+# Função IMMUTABLE criada na migration (unaccent puro não pode ir em índice)
+FUNCAO_NORMALIZAR = 'multibpo_normalizar'
+
+# Campos concatenados na expressão indexada de cada model (por model_name)
+CAMPOS_BUSCA = {
+    'escritorio': ['razao_social', 'nome_fantasia', 'cidade'],
+    'contador': ['nome_completo'],
+}
+
+TAMANHO_MINIMO = 3
+
+
+def normalizar(texto):
+    """Minúsculas, sem acento e com espaços simples (igual à função do banco)"""
+    sem_acento = unicodedata.normalize('NFKD', texto or '')
+    sem_acento = ''.join(c for c in sem_acento if not unicodedata.combining(c))
+    return ' '.join(sem_acento.lower().split())
+
+
+class Normalizar(Func):
+    function = FUNCAO_NORMALIZAR
+    output_field = TextField()
+
+
+def expressao_busca(model_name):
+    """
+    Expressão indexada: normalizar(campo1 || ' ' || campo2 ...)
+
+    A migration 0008 guarda uma cópia congelada desta expressão para criar
+    o índice: a expressão da consulta precisa ser idêntica à do índice
+    para ele ser usado. Mudou aqui, crie uma migration com o índice novo.
+    """
+    partes = []
+    for campo in CAMPOS_BUSCA[model_name]:
+        if partes:
+            partes.append(Value(' '))
+        partes.append(F(campo))
+    return Normalizar(Concat(*partes, output_field=TextField()) if len(partes) > 1 else partes[0])
+
+
+def suporta_trigram():
+    return connection.vendor == 'postgresql'
+
+
+def buscar(queryset, termo):
+    """
+    Filtra e ordena `queryset` pela similaridade com `termo`
+
+    Returns:
+        queryset anotado com `similaridade` (0 a 1; None fora do PostgreSQL)
+    """
+    termo = normalizar(termo)
+    model_name = queryset.model._meta.model_name
+
+    if suporta_trigram():
+        return queryset.alias(
+            busca=expressao_busca(model_name)
+        ).filter(
+            busca__trigram_word_similar=termo
+        ).annotate(
+            similaridade=TrigramWordSimilarity(Value(termo), 'busca')
+        ).order_by('-similaridade', 'pk')
+
+    condicao = Q()
+    for palavra in termo.split():
+        condicao &= Q(*[Q(**{f'{campo}__icontains': palavra}) for campo in CAMPOS_BUSCA[model_name]], _connector=Q.OR)
+    return queryset.filter(condicao).annotate(similaridade=Value(None, output_field=FloatField())).order_by('pk')
+
+
+def autocompletar(termo, tipo='todos', limite=10):
+    """
+    Sugestões ranqueadas para o autocomplete do suporte
+
+    Returns:
+        lista de dicts (tipo, id, nome, descricao, similaridade), mais similares primeiro
+    """
+    resultados = []
+
+    if tipo in ('todos', 'escritorio'):
+        escritorios = buscar(Escritorio.objects.filter(ativo=True), termo).only(
+            'id', 'razao_social', 'nome_fantasia', 'cidade', 'estado', 'cnpj'
+        )[:limite]
+        resultados += [
+            {
+                'tipo': 'escritorio',
+                'id': e.id,
+                'nome': e.nome_fantasia or e.razao_social,
+                'descricao': f"{e.cnpj} - {e.cidade}/{e.estado}" if e.cidade else e.cnpj,
+                'similaridade': e.similaridade,
+            }
+            for e in escritorios
+        ]
+
+    if tipo in ('todos', 'contador'):
+        contadores = buscar(Contador.objects.filter(ativo=True), termo).only(
+            'id', 'nome_completo', 'documento', 'tipo_pessoa'
+        )[:limite]
+        resultados += [
+            {
+                'tipo': 'contador',
+                'id': c.id,
+                'nome': c.nome_completo,
+                'descricao': c.documento or '',
+                'similaridade': c.similaridade,
+            }
+            for c in contadores
+        ]
+
+    if suporta_trigram():
+        resultados.sort(key=lambda r: r['similaridade'] or 0, reverse=True)
+    return resultados[:limite]
@@ -0,0 +1,185 @@
+"""
+Catálogo em memória das especialidades
+MultiBPO - tabela pequena e quase estática, lida a cada cadastro e perfil
+
+Cada processo carrega a tabela inteira uma vez num snapshot imutável (por id
+e por código). Alterações trocam a versão do catálogo no cache compartilhado
+(settings.PERFIL_CACHE_ALIAS) após o commit; os outros processos conferem a
+versão no máximo a cada ESPECIALIDADES_CATALOGO_VERIFICACAO segundos e
+recarregam quando ela muda. Sem cache compartilhado (DummyCache) o snapshot
+é recarregado a cada ESPECIALIDADES_CATALOGO_TTL segundos; no processo que
+alterou, a recarga é imediata.
+
+Alterações via QuerySet.update() não disparam signals: quem usar deve
+chamar invalidar_catalogo.
+
+O snapshot serve às leituras (perfis, filtros do admin). O caminho de
+escrita (validar e vincular especialidades no cadastro) usa
+confirmar_ativas, que confere no banco: um snapshot atrasado recusaria uma
+especialidade recém-criada ou aceitaria uma apagada, que só falharia no
+.set() com IntegrityError.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO = 'especialidades:catalogo:v'
+
+
+@dataclass(frozen=True)
+class EspecialidadeCatalogada:
+    """Cópia imutável de uma Especialidade"""
+
+    id: int
+    nome: str
+    codigo: str
+    area_principal: str
+    requer_certificacao: bool
+    ativa: bool
+
+    def detalhes(self) -> dict:
+        """Formato de especialidades_detalhes do ContadorPerfilSerializer"""
+        detalhes = asdict(self)
+        del detalhes['ativa']
+        return detalhes
+
+
+class Catalogo:
+    """Snapshot das especialidades (somente leitura)"""
+
+    def __init__(self, especialidades: Iterable[EspecialidadeCatalogada], versao=None):
+        especialidades = list(especialidades)
+        self.versao = versao
+        self.por_id = MappingProxyType({esp.id: esp for esp in especialidades})
+        self.por_codigo = MappingProxyType({esp.codigo: esp for esp in especialidades})
+        self.ids_ativos = frozenset(esp.id for esp in especialidades if esp.ativa)
+
+    def __len__(self):
+        return len(self.por_id)
+
+    def get(self, especialidade_id) -> Optional[EspecialidadeCatalogada]:
+        return self.por_id.get(especialidade_id)
+
+    def ativas(self, ids: Iterable[int]) -> List[EspecialidadeCatalogada]:
+        """Especialidades ativas entre `ids`, na ordem do model (área, nome)"""
+        encontradas = {self.por_id[i] for i in ids if i in self.ids_ativos}
+        return sorted(encontradas, key=lambda esp: (esp.area_principal, esp.nome))
+
+
+class CatalogoEspecialidades:
+    """Snapshot por processo, recarregado quando a versão compartilhada muda"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalogo = None
+        self._verificar_em = 0.0
+        self._expira_em = 0.0
+
+    @property
+    def intervalo_verificacao(self) -> float:
+        return getattr(settings, 'ESPECIALIDADES_CATALOGO_VERIFICACAO', 5)
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, 'ESPECIALIDADES_CATALOGO_TTL', 300)
+
+    def _cache(self):
+        return caches[getattr(settings, 'PERFIL_CACHE_ALIAS', 'default')]
+
+    def _carregar(self, versao) -> Catalogo:
+        from .models import Especialidade
+
+        campos = ['id', 'nome', 'codigo', 'area_principal', 'requer_certificacao', 'ativa']
+        catalogo = Catalogo(
+            (EspecialidadeCatalogada(**valores) for valores in Especialidade.objects.values(*campos)),
+            versao=versao,
+        )
+        logger.debug(f"Catálogo de especialidades carregado ({len(catalogo)} itens, versão {versao})")
+        return catalogo
+
+    def atual(self) -> Catalogo:
+        catalogo = self._catalogo
+        if catalogo is not None and time.monotonic() < self._verificar_em:
+            return catalogo
+
+        with self._lock:
+            agora = time.monotonic()
+            catalogo = self._catalogo
+            # Outra thread pode ter conferido enquanto esperávamos o lock
+            if catalogo is not None and agora < self._verificar_em:
+                return catalogo
+
+            # A versão é lida antes da tabela: uma troca no meio do caminho
+            # só causa uma recarga a mais na próxima verificação
+            versao = self._cache().get(CHAVE_VERSAO)
+            if (catalogo is None or agora >= self._expira_em
+                    or (versao is not None and versao != catalogo.versao)):
+                catalogo = self._carregar(versao)
+                self._catalogo = catalogo
+                self._expira_em = agora + self.ttl
+            self._verificar_em = agora + self.intervalo_verificacao
+            return catalogo
+
+    def descartar(self):
+        """Força a recarga na próxima leitura (só neste processo)"""
+        with self._lock:
+            self._catalogo = None
+            self._verificar_em = 0.0
+
+
+catalogo_especialidades = CatalogoEspecialidades()
+
+
+def catalogo() -> Catalogo:
+    """Snapshot atual das especialidades"""
+    return catalogo_especialidades.atual()
+
+
+def invalidar_catalogo():
+    """
+    Descarta o snapshot deste processo e troca a versão após o commit
+
+    O descarte imediato deixa a própria transação ler o que acabou de gravar;
+    o do on_commit apaga o que outra thread tenha recarregado antes do commit.
+    """
+    catalogo_especialidades.descartar()
+
+    def trocar_versao():
+        catalogo_especialidades.descartar()
+        try:
+            catalogo_especialidades._cache().set(CHAVE_VERSAO, uuid.uuid4().hex[:16], timeout=None)
+        except Exception as e:
+            logger.warning(f"Versão do catálogo de especialidades não propagada: {e}")
+
+    transaction.on_commit(trocar_versao)
+
+
+def confirmar_ativas(ids: Iterable[int]) -> List[int]:
+    """
+    Ids de `ids` que existem e estão ativos, conferidos no banco
+
+    Se o banco discordar do snapshot deste processo, ele é descartado.
+    """
+    from .models import Especialidade
+
+    ids = set(ids)
+    if not ids:
+        return []
+    ativos = set(Especialidade.objects.filter(id__in=ids, ativa=True).values_list('id', flat=True))
+
+    atual = catalogo_especialidades._catalogo
+    if atual is not None and ativos != ids & atual.ids_ativos:
+        logger.info("Catálogo de especialidades desatualizado; recarregando")
+        catalogo_especialidades.descartar()
+    return sorted(ativos)
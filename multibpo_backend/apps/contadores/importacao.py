@@ -0,0 +1,409 @@
+"""
+Importação em massa de escritórios e contadores (CSV/XLSX)
+MultiBPO - migração da base de clientes de parceiros
+
+As linhas são lidas em streaming e processadas em lotes, sem o save() de
+cada objeto (que roda full_clean com consultas):
+- documento: dígitos verificadores e duplicidade via validar_documentos
+  (uma consulta IN por lote, sem passar pelo cache da validação em tempo real)
+- demais campos: full_clean sem validações que consultam o banco
+- gravação: bulk_create numa transação por lote
+
+Linhas rejeitadas vão para o relatório de erros e não interrompem o lote.
+"""
+
+import csv
+import io
+import logging
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, List
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - openpyxl é opcional (só para XLSX)
+    openpyxl = None
+
+from .busca import normalizar
+from .models import Contador, Escritorio, somente_digitos
+from .validators.documentos import cache_existencia, validar_documentos
+
+logger = logging.getLogger(__name__)
+
+TIPOS = ('escritorio', 'contador')
+LOTE_PADRAO = 500
+
+# Colunas aceitas (cabeçalho normalizado: minúsculas, sem acento, "_" no lugar de espaços)
+COLUNAS = {
+    'escritorio': {
+        'cnpj', 'razao_social', 'nome_fantasia', 'regime_tributario', 'email', 'telefone',
+        'whatsapp', 'website', 'cep', 'logradouro', 'numero', 'complemento', 'bairro',
+        'cidade', 'estado', 'responsavel_tecnico', 'crc_responsavel', 'observacoes',
+    },
+    'contador': {
+        'documento', 'tipo_pessoa', 'nome_completo', 'email', 'telefone_pessoal',
+        'whatsapp_pessoal', 'cnpj_escritorio', 'crc', 'crc_estado', 'cargo', 'observacoes',
+    },
+}
+OBRIGATORIAS = {
+    'escritorio': ('cnpj',),
+    'contador': ('documento', 'nome_completo', 'email', 'telefone_pessoal'),
+}
+COLUNA_DOCUMENTO = {'escritorio': 'cnpj', 'contador': 'documento'}
+
+
+class FormatoInvalido(Exception):
+    """Arquivo que não dá para ler como planilha"""
+
+
+# ========== LEITURA ==========
+
+def _cabecalho(nome):
+    return normalizar(str(nome or '')).replace(' ', '_')
+
+
+def ler_planilha(arquivo, nome):
+    """
+    Itera (número da linha, dict) de um CSV (',' ou ';', UTF-8) ou XLSX
+
+    Linhas vazias são puladas; o número é o da planilha (cabeçalho = 1).
+    """
+    if nome.lower().endswith('.xlsx'):
+        return _ler_xlsx(arquivo)
+    return _ler_csv(arquivo)
+
+
+def _ler_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    try:
+        primeira = texto.readline()
+    except UnicodeDecodeError:
+        raise FormatoInvalido("CSV deve estar em UTF-8")
+    delimitador = ';' if primeira.count(';') > primeira.count(',') else ','
+    cabecalho = [_cabecalho(c) for c in next(csv.reader([primeira], delimiter=delimitador), [])]
+
+    for numero, valores in enumerate(csv.reader(texto, delimiter=delimitador), start=2):
+        valores = [v.strip() for v in valores]
+        if any(valores):
+            yield numero, dict(zip(cabecalho, valores))
+
+
+def _celula(valor, coluna):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    if isinstance(valor, int) and coluna in ('cnpj', 'cnpj_escritorio', 'documento'):
+        # Documento gravado como número perde os zeros à esquerda
+        digitos = str(valor)
+        return digitos.zfill(14 if coluna != 'documento' or len(digitos) > 11 else 11)
+    return str(valor).strip()
+
+
+def _ler_xlsx(arquivo):
+    if openpyxl is None:
+        raise FormatoInvalido("Leitura de XLSX requer o pacote openpyxl")
+    try:
+        planilha = openpyxl.load_workbook(arquivo, read_only=True, data_only=True).active
+    except Exception as e:
+        raise FormatoInvalido(f"XLSX inválido: {e}")
+
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = [_cabecalho(c) for c in next(linhas, ())]
+    for numero, valores in enumerate(linhas, start=2):
+        valores = [_celula(v, coluna) for v, coluna in zip(valores, cabecalho)]
+        if any(valores):
+            yield numero, dict(zip(cabecalho, valores))
+
+
+# ========== IMPORTAÇÃO ==========
+
+@dataclass
+class ResultadoImportacao:
+    """Totais e linhas rejeitadas de uma importação"""
+
+    tipo: str
+    lidas: int = 0
+    validas: int = 0
+    importadas: int = 0
+    erros: List[Dict] = field(default_factory=list)
+
+    @property
+    def rejeitadas(self) -> int:
+        return len(self.erros)
+
+    def as_dict(self, max_erros=None) -> Dict:
+        return {
+            'tipo': self.tipo,
+            'lidas': self.lidas,
+            'validas': self.validas,
+            'importadas': self.importadas,
+            'rejeitadas': self.rejeitadas,
+            'erros': self.erros if max_erros is None else self.erros[:max_erros],
+        }
+
+
+def _erros_de_validacao(obj, exclude):
+    """Regras do model (campos + clean) sem as que consultam o banco"""
+    try:
+        obj.full_clean(exclude=exclude, validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        return e.message_dict
+    return {}
+
+
+class ImportadorCadastros:
+    """
+    Importa escritórios ou contadores de linhas já lidas (ler_planilha)
+
+    Args:
+        tipo: 'escritorio' ou 'contador'
+        lote: linhas por lote (uma transação e poucas consultas por lote)
+        enriquecer_receita: completa escritórios com ReceitaFederalService.consultar_lote
+            e consulta nos provedores externos os CEPs fora da base local
+        simular: só valida (nada é gravado)
+    """
+
+    def __init__(self, tipo, lote=LOTE_PADRAO, enriquecer_receita=False, simular=False):
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo deve ser um de: {', '.join(TIPOS)}")
+        self.tipo = tipo
+        self.lote = lote
+        self.enriquecer_receita = enriquecer_receita
+        self.simular = simular
+        self._documentos_vistos = set()
+        self._emails_vistos = set()
+
+    def importar(self, linhas) -> ResultadoImportacao:
+        resultado = ResultadoImportacao(self.tipo)
+        iterador = iter(linhas)
+        while True:
+            lote = list(islice(iterador, self.lote))
+            if not lote:
+                break
+            resultado.lidas += len(lote)
+            validos = self._validar_escritorios(lote, resultado) if self.tipo == 'escritorio' \
+                else self._validar_contadores(lote, resultado)
+            resultado.validas += len(validos)
+            if validos and not self.simular:
+                self._gravar(validos, resultado)
+            logger.info(
+                f"Importação de {self.tipo}: {resultado.lidas} lidas, "
+                f"{resultado.importadas} importadas, {resultado.rejeitadas} rejeitadas"
+            )
+        return resultado
+
+    def _rejeitar(self, resultado, numero, linha, erros):
+        resultado.erros.append({
+            'linha': numero,
+            'documento': linha.get(COLUNA_DOCUMENTO[self.tipo], ''),
+            'erros': erros,
+        })
+
+    def _erros_iniciais(self, linha, documento):
+        erros = {
+            coluna: ["Campo obrigatório."]
+            for coluna in OBRIGATORIAS[self.tipo] if not linha.get(coluna)
+        }
+        coluna = COLUNA_DOCUMENTO[self.tipo]
+        if coluna not in erros:
+            if not documento.valido:
+                erros[coluna] = [documento.erro]
+            elif documento.digitos in self._documentos_vistos:
+                erros[coluna] = ["Documento repetido na planilha."]
+            elif not documento.disponivel:
+                erros[coluna] = ["Documento já cadastrado."]
+        return erros
+
+    def _campos(self, linha):
+        return {k: v for k, v in linha.items() if k in COLUNAS[self.tipo] and v}
+
+    # ---------- Escritórios ----------
+
+    def _consultar_receita(self, cnpjs):
+        if not cnpjs:
+            return {}
+        from apps.receita.services import ReceitaFederalService
+        return {
+            somente_digitos(item['entrada']): item['resultado']
+            for item in ReceitaFederalService().consultar_lote(cnpjs)
+            if item['resultado'].get('success')
+        }
+
+    def _consultar_ceps(self, lote):
+        """Endereço dos CEPs do lote sem logradouro/bairro/cidade/estado completos"""
+        from apps.receita.cep import CAMPOS_ESCRITORIO, CEPService, limpar_cep
+
+        ceps = {
+            limpar_cep(linha.get('cep')) for _, linha in lote
+            if linha.get('cep') and not all(linha.get(campo) for campo in CAMPOS_ESCRITORIO)
+        }
+        if not ceps:
+            return {}
+        return CEPService().consultar_lote(ceps, externo=self.enriquecer_receita)
+
+    def _validar_escritorios(self, lote, resultado):
+        from apps.receita.cep import campos_escritorio, limpar_cep
+
+        documentos = validar_documentos([linha.get('cnpj', '') for _, linha in lote], usar_cache=False)
+        receita = self._consultar_receita([
+            d.digitos for d in documentos if d.tipo == 'cnpj' and d.valido and d.disponivel
+        ]) if self.enriquecer_receita else {}
+        enderecos = self._consultar_ceps(lote)
+
+        validos = []
+        for (numero, linha), documento in zip(lote, documentos):
+            erros = self._erros_iniciais(linha, documento)
+            if not erros and documento.tipo != 'cnpj':
+                erros['cnpj'] = ["Informe um CNPJ (14 dígitos)."]
+            if erros:
+                self._rejeitar(resultado, numero, linha, erros)
+                continue
+
+            # Dados da Receita completam; o que veio na planilha prevalece
+            campos = Escritorio.campos_da_receita(receita[documento.digitos]) if documento.digitos in receita else {}
+            campos.update(self._campos(linha))
+            # CEP só completa o que nem a planilha nem a Receita trouxeram
+            for campo, valor in campos_escritorio(enderecos.get(limpar_cep(linha.get('cep')), {})).items():
+                if not campos.get(campo):
+                    campos[campo] = valor
+            campos['regime_tributario'] = campos.get('regime_tributario', 'simples').lower()
+            campos['estado'] = campos.get('estado', '').upper()
+            escritorio = Escritorio(**{**campos, 'cnpj': documento.formatado}, cnpj_digitos=documento.digitos)
+
+            erros = _erros_de_validacao(escritorio, exclude=None)
+            if erros:
+                self._rejeitar(resultado, numero, linha, erros)
+                continue
+            self._documentos_vistos.add(documento.digitos)
+            validos.append((numero, linha, documento.digitos, [escritorio]))
+        return validos
+
+    # ---------- Contadores ----------
+
+    def _validar_contadores(self, lote, resultado):
+        documentos = validar_documentos([linha.get('documento', '') for _, linha in lote], usar_cache=False)
+        emails = {linha.get('email', '').lower() for _, linha in lote} - {''}
+        usernames = {d.digitos for d in documentos if d.valido}
+
+        # Uma consulta para escritórios e uma para e-mails/usernames em uso
+        cnpjs = {somente_digitos(linha.get('cnpj_escritorio')) for _, linha in lote} - {None}
+        escritorios = dict(
+            Escritorio.objects.filter(cnpj_digitos__in=cnpjs).values_list('cnpj_digitos', 'id')
+        ) if cnpjs else {}
+        em_uso = User.objects.alias(email_lower=Lower('email')).filter(
+            Q(email_lower__in=emails) | Q(username__in=usernames)
+        ).values_list('username', Lower('email'))
+        usernames_em_uso, emails_em_uso = set(), set()
+        for username, email in em_uso:
+            usernames_em_uso.add(username)
+            emails_em_uso.add(email)
+
+        validos = []
+        for (numero, linha), documento in zip(lote, documentos):
+            erros = self._erros_iniciais(linha, documento)
+            email = linha.get('email', '').lower()
+            tipo_pessoa = {'cpf': 'fisica', 'cnpj': 'juridica'}.get(documento.tipo)
+
+            if email and 'email' not in erros:
+                try:
+                    validate_email(email)
+                except ValidationError:
+                    erros['email'] = ["E-mail inválido."]
+                else:
+                    if email in emails_em_uso or email in self._emails_vistos:
+                        erros['email'] = ["E-mail já cadastrado."]
+            if documento.valido and documento.digitos in usernames_em_uso and 'documento' not in erros:
+                erros['documento'] = ["Já existe um usuário com este documento."]
+            if linha.get('tipo_pessoa') and documento.valido and linha['tipo_pessoa'].lower() != tipo_pessoa:
+                erros['tipo_pessoa'] = [f"Documento informado é de pessoa {tipo_pessoa}."]
+            cnpj_escritorio = somente_digitos(linha.get('cnpj_escritorio'))
+            if cnpj_escritorio and cnpj_escritorio not in escritorios:
+                erros['cnpj_escritorio'] = ["Escritório não cadastrado."]
+            if erros:
+                self._rejeitar(resultado, numero, linha, erros)
+                continue
+
+            campos = self._campos(linha)
+            for coluna in ('documento', 'tipo_pessoa', 'email', 'cnpj_escritorio'):
+                campos.pop(coluna, None)
+            if 'crc' in campos:
+                campos['crc'] = campos['crc'].upper()
+            if 'crc_estado' in campos:
+                campos['crc_estado'] = campos['crc_estado'].upper()
+            campos.setdefault('cargo', 'contador_pleno' if campos.get('crc') else 'cliente_bpo')
+            contador = Contador(
+                **campos,
+                tipo_pessoa=tipo_pessoa,
+                documento=documento.formatado,
+                documento_digitos=documento.digitos,
+                escritorio_id=escritorios.get(cnpj_escritorio),
+            )
+            erros = _erros_de_validacao(contador, exclude=['user', 'escritorio'])
+            if erros:
+                self._rejeitar(resultado, numero, linha, erros)
+                continue
+
+            # Acesso pelo e-mail; a senha é definida no primeiro acesso
+            user = User(username=documento.digitos, email=email, first_name=campos['nome_completo'][:150])
+            user.set_unusable_password()
+            self._documentos_vistos.add(documento.digitos)
+            self._emails_vistos.add(email)
+            validos.append((numero, linha, documento.digitos, [user, contador]))
+        return validos
+
+    # ---------- Gravação ----------
+
+    def _inserir(self, itens):
+        if self.tipo == 'escritorio':
+            Escritorio.objects.bulk_create([objetos[0] for *_, objetos in itens])
+            return
+        users = User.objects.bulk_create([objetos[0] for *_, objetos in itens])
+        contadores = []
+        for user, (*_, objetos) in zip(users, itens):
+            objetos[1].user = user
+            contadores.append(objetos[1])
+        Contador.objects.bulk_create(contadores)
+
+    def _gravar(self, itens, resultado):
+        try:
+            with transaction.atomic():
+                self._inserir(itens)
+            gravados = itens
+        except IntegrityError as e:
+            # Cadastro concorrente entre a validação e o INSERT: refaz linha a linha
+            logger.warning(f"Conflito no lote de {self.tipo}, gravando linha a linha: {e}")
+            gravados = []
+            for item in itens:
+                for obj in item[3]:
+                    obj.pk = None
+                try:
+                    with transaction.atomic():
+                        self._inserir([item])
+                except IntegrityError:
+                    self._rejeitar(resultado, item[0], item[1], {
+                        COLUNA_DOCUMENTO[self.tipo]: ["Conflito com cadastro gravado durante a importação."]
+                    })
+                else:
+                    gravados.append(item)
+
+        resultado.importadas += len(gravados)
+        for _, _, digitos, _ in gravados:
+            cache_existencia.invalidar(digitos)
+
+
+def escrever_relatorio(erros, destino):
+    """Relatório de erros em CSV (uma linha por mensagem)"""
+    escritor = csv.writer(destino)
+    escritor.writerow(['linha', 'documento', 'campo', 'mensagem'])
+    for erro in erros:
+        for campo, mensagens in erro['erros'].items():
+            for mensagem in mensagens:
+                escritor.writerow([erro['linha'], erro['documento'], campo, mensagem])
@@ -0,0 +1,29 @@
+"""
+Operações de migration para índices que só existem no PostgreSQL
+(GIN com gin_trgm_ops, jsonb_path_ops...). Nos demais bancos (SQLite dos
+testes) não fazem nada.
+"""
+
+from django.db import migrations
+
+
+class AddIndexPostgres(migrations.AddIndex):
+    """
+    AddIndex aplicado só no PostgreSQL
+
+    O índice não entra no estado dos models: em Meta.indexes ele seria
+    criado também no SQLite, que não tem os métodos de acesso do PostgreSQL.
+    """
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            model = to_state.apps.get_model(app_label, self.model_name)
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            model = from_state.apps.get_model(app_label, self.model_name)
+            schema_editor.remove_index(model, self.index)
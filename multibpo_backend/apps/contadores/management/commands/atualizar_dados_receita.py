@@ -0,0 +1,40 @@
+# apps/contadores/management/commands/atualizar_dados_receita.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.contadores.services.atualizacao_receita import AtualizadorReceita
+
+
+class Command(BaseCommand):
+    help = 'Reconsulta na Receita os escritórios e contadores PJ com snapshot vencido e registra as diferenças'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rpm', type=float, default=None, help='Consultas externas por minuto (default RECEITA_REFRESH_RPM)')
+        parser.add_argument('--limite', type=int, default=100, help='Máximo de escritórios e de contadores por rodada')
+        parser.add_argument('--idade-minima-dias', type=int, default=None, help='Idade mínima do snapshot (default RECEITA_REFRESH_IDADE_DIAS)')
+        parser.add_argument('--dry-run', action='store_true', help='Calcula as diferenças sem gravar')
+        parser.add_argument('--continuo', action='store_true', help='Repete as rodadas indefinidamente')
+        parser.add_argument('--intervalo', type=int, default=300, help='Segundos entre rodadas sem pendências (com --continuo)')
+    
+    def handle(self, *args, **options):
+        idade = options['idade_minima_dias']
+        
+        while True:
+            atualizador = AtualizadorReceita(
+                rpm=options['rpm'],
+                idade_minima=timedelta(days=idade) if idade is not None else None,
+                dry_run=options['dry_run'],
+            )
+            resumo = atualizador.executar(limite=options['limite'])
+            self.stdout.write(
+                f"{resumo['consultados']} consultados ({resumo['externas']} externos), "
+                f"{resumo['alterados']} com alterações, {resumo['falhas']} falhas"
+                + (' [dry-run]' if options['dry_run'] else '')
+            )
+            
+            if not options['continuo']:
+                break
+            if not resumo['consultados']:
+                time.sleep(options['intervalo'])
@@ -0,0 +1,46 @@
+# apps/contadores/management/commands/importar_cadastros.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.contadores.importacao import (
+    LOTE_PADRAO, TIPOS, FormatoInvalido, ImportadorCadastros, escrever_relatorio, ler_planilha
+)
+
+
+class Command(BaseCommand):
+    help = 'Importa escritórios ou contadores de uma planilha CSV/XLSX em lotes (bulk_create), com relatório de erros'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Planilha .csv (UTF-8, "," ou ";") ou .xlsx com cabeçalho')
+        parser.add_argument('--tipo', choices=TIPOS, required=True)
+        parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help='Linhas por lote/transação')
+        parser.add_argument('--receita', action='store_true', help='Completa os escritórios com a consulta em lote da Receita')
+        parser.add_argument('--dry-run', action='store_true', help='Só valida, sem gravar')
+        parser.add_argument('--erros', help='Grava o relatório de linhas rejeitadas (CSV) neste arquivo')
+    
+    def handle(self, *args, **options):
+        importador = ImportadorCadastros(
+            options['tipo'],
+            lote=options['lote'],
+            enriquecer_receita=options['receita'],
+            simular=options['dry_run'],
+        )
+        
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = importador.importar(ler_planilha(arquivo, options['arquivo']))
+        except OSError as e:
+            raise CommandError(f"Erro ao abrir {options['arquivo']}: {e}")
+        except FormatoInvalido as e:
+            raise CommandError(str(e))
+        
+        if options['erros'] and resultado.erros:
+            with open(options['erros'], 'w', encoding='utf-8', newline='') as destino:
+                escrever_relatorio(resultado.erros, destino)
+        
+        self.stdout.write(
+            f"{resultado.lidas} linhas lidas, {resultado.validas} válidas, "
+            f"{resultado.importadas} importadas, {resultado.rejeitadas} rejeitadas"
+            + (' [dry-run]' if options['dry_run'] else '')
+        )
+        if resultado.erros and not options['erros']:
+            escrever_relatorio(resultado.erros, self.stderr)
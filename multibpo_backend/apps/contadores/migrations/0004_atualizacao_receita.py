@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contadores', '0003_alter_contador_options_alter_especialidade_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contador',
+            name='receita_atualizado_em',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Última consulta dos dados na Receita Federal', null=True, verbose_name='Receita Atualizada em'),
+        ),
+        migrations.AddField(
+            model_name='escritorio',
+            name='receita_atualizado_em',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Última consulta dos dados na Receita Federal', null=True, verbose_name='Receita Atualizada em'),
+        ),
+        migrations.CreateModel(
+            name='AlteracaoReceita',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cnpj', models.CharField(db_index=True, max_length=18, verbose_name='CNPJ')),
+                ('alteracoes', models.JSONField(default=dict, help_text='{"campo": {"antes": ..., "depois": ...}}', verbose_name='Alterações')),
+                ('fonte', models.CharField(blank=True, max_length=30, verbose_name='Fonte')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Registrado em')),
+                ('contador', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alteracoes_receita', to='contadores.contador', verbose_name='Cliente/Contador')),
+                ('escritorio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alteracoes_receita', to='contadores.escritorio', verbose_name='Escritório')),
+            ],
+            options={
+                'verbose_name': 'Alteração na Receita Federal',
+                'verbose_name_plural': 'Alterações na Receita Federal',
+                'db_table': 'contadores_alteracoes_receita',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:58
+
+import logging
+import re
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+logger = logging.getLogger(__name__)
+
+LOTE = 2000
+
+
+def _preencher(modelo, destino, origem, campos):
+    """
+    Backfill em lotes por faixa de pk (cada lote na sua transação)
+    
+    Documentos repetidos em formatos diferentes ficam com o campo nulo
+    a partir da segunda ocorrência, para a constraint única poder ser criada;
+    o save() dos models mantém esses registros vazios e editáveis.
+    """
+    vistos = set()
+    ultimo = 0
+    while True:
+        lote = list(modelo.objects.filter(pk__gt=ultimo).order_by('pk').only('pk', *campos)[:LOTE])
+        if not lote:
+            break
+        for obj in lote:
+            digitos = re.sub(r'\D', '', origem(obj) or '') or None
+            if digitos in vistos:
+                logger.warning(f"{modelo.__name__} {obj.pk}: documento {digitos} duplicado; {destino} fica vazio")
+                digitos = None
+            elif digitos:
+                vistos.add(digitos)
+            setattr(obj, destino, digitos)
+        with transaction.atomic():
+            modelo.objects.bulk_update(lote, [destino])
+        ultimo = lote[-1].pk
+
+
+def preencher_digitos(apps, schema_editor):
+    Contador = apps.get_model('contadores', 'Contador')
+    Escritorio = apps.get_model('contadores', 'Escritorio')
+    _preencher(Contador, 'documento_digitos', lambda c: c.documento or c.cpf, ['documento', 'cpf'])
+    _preencher(Escritorio, 'cnpj_digitos', lambda e: e.cnpj, ['cnpj'])
+
+
+class Migration(migrations.Migration):
+
+    # Backfill em lotes com commit por lote
+    atomic = False
+
+    dependencies = [
+        ('contadores', '0004_atualizacao_receita'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contador',
+            name='documento_digitos',
+            field=models.CharField(blank=True, editable=False, help_text='Preenchido no save a partir de documento/cpf; usado nas verificações de duplicidade', max_length=14, null=True, verbose_name='CPF/CNPJ (somente dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='escritorio',
+            name='cnpj_digitos',
+            field=models.CharField(blank=True, editable=False, help_text='Preenchido no save; usado nas verificações de duplicidade', max_length=14, null=True, verbose_name='CNPJ (somente dígitos)'),
+        ),
+        migrations.RunPython(preencher_digitos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contador',
+            index=models.Index(condition=models.Q(('ativo', True), ('tipo_pessoa', 'juridica')), fields=['receita_atualizado_em'], name='contador_pj_receita_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='contador',
+            constraint=models.UniqueConstraint(condition=models.Q(('documento_digitos__isnull', False)), fields=('documento_digitos',), name='contador_documento_digitos_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='escritorio',
+            constraint=models.UniqueConstraint(condition=models.Q(('cnpj_digitos__isnull', False)), fields=('cnpj_digitos',), name='escritorio_cnpj_digitos_unico'),
+        ),
+    ]
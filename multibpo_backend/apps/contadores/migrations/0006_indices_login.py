@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:02
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contadores', '0005_documento_digitos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contador',
+            index=models.Index(django.db.models.functions.text.Upper('crc'), name='contador_crc_upper_idx'),
+        ),
+        # auth_user é do django.contrib.auth: índice funcional via SQL
+        # (expressão aceita por PostgreSQL e SQLite)
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email))",
+            reverse_sql="DROP INDEX IF EXISTS auth_user_email_lower_idx",
+        ),
+    ]
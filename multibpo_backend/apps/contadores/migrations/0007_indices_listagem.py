@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contadores', '0006_indices_login'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contador',
+            index=models.Index(fields=['tipo_pessoa', 'id'], name='contador_tipo_pessoa_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contador',
+            index=models.Index(fields=['ativo', 'id'], name='contador_ativo_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contador',
+            index=models.Index(fields=['escritorio', 'id'], name='contador_escritorio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='escritorio',
+            index=models.Index(fields=['estado', 'id'], name='escritorio_estado_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='escritorio',
+            index=models.Index(fields=['regime_tributario', 'id'], name='escritorio_regime_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='escritorio',
+            index=models.Index(fields=['situacao_cadastral', 'id'], name='escritorio_situacao_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='escritorio',
+            index=models.Index(fields=['ativo', 'id'], name='escritorio_ativo_id_idx'),
+        ),
+    ]
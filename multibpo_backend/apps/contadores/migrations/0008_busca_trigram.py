@@ -0,0 +1,60 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:10
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import migrations
+from django.db.models import F, Func, TextField, Value
+from django.db.models.functions import Concat
+
+from apps.contadores.indices import AddIndexPostgres
+
+# Cópia congelada de apps.contadores.busca na época desta migration: a
+# expressão de consulta de busca.py precisa continuar idêntica a esta
+FUNCAO_NORMALIZAR = 'multibpo_normalizar'
+
+
+def _normalizar(expressao):
+    return Func(expressao, function=FUNCAO_NORMALIZAR, output_field=TextField())
+
+
+EXPRESSAO_ESCRITORIO = _normalizar(Concat(
+    F('razao_social'), Value(' '), F('nome_fantasia'), Value(' '), F('cidade'), output_field=TextField()
+))
+EXPRESSAO_CONTADOR = _normalizar(F('nome_completo'))
+
+
+def criar_funcao_normalizar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent(text) é STABLE; com o dicionário explícito pode ir num índice
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION {FUNCAO_NORMALIZAR}(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+            SELECT regexp_replace(lower(public.unaccent('public.unaccent'::regdictionary, $1)), '\\s+', ' ', 'g')
+        $$
+    """)
+
+
+def remover_funcao_normalizar(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP FUNCTION IF EXISTS {FUNCAO_NORMALIZAR}(text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contadores', '0007_indices_listagem'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_funcao_normalizar, remover_funcao_normalizar),
+        AddIndexPostgres(
+            model_name='escritorio',
+            index=GinIndex(OpClass(EXPRESSAO_ESCRITORIO, name='gin_trgm_ops'), name='escritorio_busca_trgm_idx'),
+        ),
+        AddIndexPostgres(
+            model_name='contador',
+            index=GinIndex(OpClass(EXPRESSAO_CONTADOR, name='gin_trgm_ops'), name='contador_busca_trgm_idx'),
+        ),
+    ]
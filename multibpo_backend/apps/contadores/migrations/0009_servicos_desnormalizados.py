@@ -0,0 +1,70 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:20
+
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations, models
+
+from apps.contadores.indices import AddIndexPostgres
+
+
+def resumir_servicos(servicos):
+    """Cópia congelada de apps.contadores.models.resumir_servicos na época desta migration"""
+    quantidade, total = 0, Decimal('0')
+    for servico in servicos or []:
+        if not isinstance(servico, dict):
+            continue
+        servico.setdefault('ativo', True)
+        servico.setdefault('categoria', 'geral')
+        if servico['ativo']:
+            quantidade += 1
+            try:
+                total += Decimal(str(servico.get('valor_mensal') or 0))
+            except InvalidOperation:
+                pass
+    return quantidade, total.quantize(Decimal('0.01'))
+
+
+def preencher_resumo_servicos(apps, schema_editor):
+    """Normaliza servicos_contratados e calcula as colunas novas, em lotes"""
+    Contador = apps.get_model('contadores', 'Contador')
+    lote = []
+    for contador in Contador.objects.only('pk', 'servicos_contratados').order_by('pk').iterator(chunk_size=1000):
+        contador.servicos_ativos_count, contador.valor_total_mensal = resumir_servicos(contador.servicos_contratados)
+        lote.append(contador)
+        if len(lote) == 1000:
+            Contador.objects.bulk_update(lote, ['servicos_contratados', 'servicos_ativos_count', 'valor_total_mensal'])
+            lote = []
+    if lote:
+        Contador.objects.bulk_update(lote, ['servicos_contratados', 'servicos_ativos_count', 'valor_total_mensal'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contadores', '0008_busca_trigram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contador',
+            name='servicos_ativos_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Calculado no save a partir de servicos_contratados', verbose_name='Serviços Ativos'),
+        ),
+        migrations.AddField(
+            model_name='contador',
+            name='valor_total_mensal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, help_text='Soma de valor_mensal dos serviços ativos (calculado no save)', max_digits=12, verbose_name='Valor Total Mensal'),
+        ),
+        migrations.AddIndex(
+            model_name='contador',
+            index=models.Index(condition=models.Q(('servicos_ativos_count__gt', 0)), fields=['escritorio', 'valor_total_mensal'], name='contador_faturamento_idx'),
+        ),
+        migrations.RunPython(preencher_resumo_servicos, migrations.RunPython.noop),
+        # Containment (@>) de Contador.objects.com_servico
+        AddIndexPostgres(
+            model_name='contador',
+            index=GinIndex(fields=['servicos_contratados'], opclasses=['jsonb_path_ops'], name='contador_servicos_gin_idx'),
+        ),
+    ]
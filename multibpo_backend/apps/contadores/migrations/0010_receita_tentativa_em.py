@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contadores', '0009_servicos_desnormalizados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contador',
+            name='receita_tentativa_em',
+            field=models.DateTimeField(blank=True, help_text='Última consulta sem sucesso na Receita Federal (backoff curto)', null=True, verbose_name='Última Falha na Receita'),
+        ),
+        migrations.AddField(
+            model_name='escritorio',
+            name='receita_tentativa_em',
+            field=models.DateTimeField(blank=True, help_text='Última consulta sem sucesso na Receita Federal (backoff curto)', null=True, verbose_name='Última Falha na Receita'),
+        ),
+    ]
@@ -8,10 +8,42 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, Upper
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 from validate_docbr import CNPJ, CPF
 import re
 import json
+from decimal import Decimal, InvalidOperation
+
+
+def somente_digitos(documento):
+    """Dígitos de um CPF/CNPJ em qualquer formato (None se vazio)"""
+    return re.sub(r'\D', '', documento or '') or None
+
+
+def _digitos_para_gravar(instancia, campo, digitos):
+    """
+    Valor de `campo` (documento normalizado) a gravar no save
+
+    Registros legados com o documento repetido ficaram com o campo vazio na
+    migration 0005; continuam vazios enquanto o valor pertencer a outro
+    registro, para poderem ser editados. Registros novos sempre preenchem
+    (e o full_clean recusa o duplicado).
+    """
+    if (instancia.pk and digitos and not getattr(instancia, campo)
+            and type(instancia)._default_manager.filter(**{campo: digitos}).exclude(pk=instancia.pk).exists()):
+        return None
+    return digitos
+
+
+def _invalidar_cache_existencia(digitos):
+    """Documento recém-gravado deixa de aparecer como disponível na validação"""
+    if digitos:
+        from .validators.documentos import cache_existencia
+        cache_existencia.invalidar(digitos)
 
 
 class Escritorio(models.Model):
@@ -35,6 +67,14 @@ class Escritorio(models.Model):
         verbose_name="CNPJ",
         help_text="CNPJ do escritório com validação automática"
     )
+    cnpj_digitos = models.CharField(
+        max_length=14,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="CNPJ (somente dígitos)",
+        help_text="Preenchido no save; usado nas verificações de duplicidade"
+    )
     
     # Regime Tributário (mantido)
     REGIME_CHOICES = [
@@ -163,6 +203,19 @@ class Escritorio(models.Model):
         verbose_name="Dados Receita Federal",
         help_text="Dados completos retornados pela API da Receita Federal"
     )
+    receita_atualizado_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Receita Atualizada em",
+        help_text="Última consulta dos dados na Receita Federal"
+    )
+    receita_tentativa_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Última Falha na Receita",
+        help_text="Última consulta sem sucesso na Receita Federal (backoff curto)"
+    )
     
     # Status e Controle (mantidos)
     ativo = models.BooleanField(
@@ -191,6 +244,20 @@ class Escritorio(models.Model):
         verbose_name = 'Escritório Contábil'
         verbose_name_plural = 'Escritórios Contábeis'
         ordering = ['razao_social']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cnpj_digitos'],
+                condition=models.Q(cnpj_digitos__isnull=False),
+                name='escritorio_cnpj_digitos_unico'
+            ),
+        ]
+        indexes = [
+            # Filtros da listagem paginada por id (keyset)
+            models.Index(fields=['estado', 'id'], name='escritorio_estado_id_idx'),
+            models.Index(fields=['regime_tributario', 'id'], name='escritorio_regime_id_idx'),
+            models.Index(fields=['situacao_cadastral', 'id'], name='escritorio_situacao_id_idx'),
+            models.Index(fields=['ativo', 'id'], name='escritorio_ativo_id_idx'),
+        ]
         
     def clean(self):
         super().clean()
@@ -204,12 +271,20 @@ class Escritorio(models.Model):
                 self.cnpj = f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:8]}/{cnpj_limpo[8:12]}-{cnpj_limpo[12:]}"
     
     def save(self, *args, **kwargs):
+        self.cnpj_digitos = _digitos_para_gravar(self, 'cnpj_digitos', somente_digitos(self.cnpj))
         self.full_clean()
         super().save(*args, **kwargs)
+        _invalidar_cache_existencia(self.cnpj_digitos)
     
     def __str__(self):
         return f"{self.nome_fantasia or self.razao_social} ({self.cnpj})"
     
+    @classmethod
+    def cnpj_em_uso(cls, cnpj):
+        """CNPJ (em qualquer formato) já cadastrado? Busca por igualdade no índice"""
+        digitos = somente_digitos(cnpj)
+        return bool(digitos) and cls.objects.filter(cnpj_digitos=digitos).exists()
+    
     @property
     def endereco_completo(self):
         if not self.logradouro:
@@ -232,24 +307,40 @@ class Escritorio(models.Model):
     def criar_via_cnpj(cls, cnpj, dados_receita):
         """
         Cria escritório automaticamente baseado nos dados da Receita Federal
+        
+        Aceita o resultado do ReceitaFederalService (endereço aninhado em
+        'endereco') ou o formato antigo, com os campos de endereço achatados.
         """
-        return cls.objects.create(
-            cnpj=cnpj,
-            razao_social=dados_receita.get('razao_social', ''),
-            nome_fantasia=dados_receita.get('nome_fantasia', ''),
-            situacao_cadastral=dados_receita.get('situacao', 'ativa').lower(),
-            logradouro=dados_receita.get('logradouro', ''),
-            numero=dados_receita.get('numero', ''),
-            complemento=dados_receita.get('complemento', ''),
-            bairro=dados_receita.get('bairro', ''),
-            cidade=dados_receita.get('municipio', ''),
-            estado=dados_receita.get('uf', ''),
-            cep=dados_receita.get('cep', ''),
+        return cls.objects.create(cnpj=cnpj, ativo=True, **cls.campos_da_receita(dados_receita))
+    
+    @classmethod
+    def campos_da_receita(cls, dados_receita):
+        """Campos do model preenchidos a partir de uma consulta da Receita"""
+        dados_receita = {k: v for k, v in (dados_receita or {}).items() if k != 'cache'}
+        endereco = dados_receita.get('endereco') or dados_receita
+        
+        situacao = str(dados_receita.get('situacao') or 'ativa').lower()
+        if situacao not in dict(cls.SITUACAO_CHOICES):
+            situacao = 'ativa'
+        cep = re.sub(r'\D', '', endereco.get('cep') or '')
+        uf = (endereco.get('uf') or '').upper()
+        
+        return dict(
+            razao_social=(dados_receita.get('razao_social') or '')[:200],
+            nome_fantasia=(dados_receita.get('nome_fantasia') or '')[:150],
+            situacao_cadastral=situacao,
+            logradouro=(endereco.get('logradouro') or '')[:200],
+            numero=(endereco.get('numero') or '')[:10],
+            complemento=(endereco.get('complemento') or '')[:100],
+            bairro=(endereco.get('bairro') or '')[:100],
+            cidade=(endereco.get('municipio') or '')[:100],
+            estado=uf if re.match(r'^[A-Z]{2}$', uf) else '',
+            cep=f"{cep[:5]}-{cep[5:]}" if len(cep) == 8 else '',
             telefone=dados_receita.get('telefone', ''),
             email=dados_receita.get('email', ''),
             criado_automaticamente=True,
             dados_receita_federal=dados_receita,
-            ativo=True
+            receita_atualizado_em=timezone.now(),
         )
 
 
@@ -320,6 +411,73 @@ class Especialidade(models.Model):
         return f"{self.nome} ({self.area_principal.title()})"
 
 
+def resumir_servicos(servicos):
+    """
+    Normaliza a lista de servicos_contratados e resume os ativos
+
+    Completa 'ativo' (True) e 'categoria' ('geral') ausentes, para que as
+    buscas por containment (@>) enxerguem os mesmos padrões que o código.
+
+    Returns:
+        (quantidade de serviços ativos, soma de valor_mensal dos ativos)
+    """
+    quantidade, total = 0, Decimal('0')
+    for servico in servicos or []:
+        if not isinstance(servico, dict):
+            continue
+        servico.setdefault('ativo', True)
+        servico.setdefault('categoria', 'geral')
+        if servico['ativo']:
+            quantidade += 1
+            try:
+                total += Decimal(str(servico.get('valor_mensal') or 0))
+            except InvalidOperation:
+                pass
+    return quantidade, total.quantize(Decimal('0.01'))
+
+
+class ContadorQuerySet(models.QuerySet):
+    """Consultas de clientes por serviço contratado e de faturamento"""
+    
+    def com_servico(self, categoria=None, ativo=True, **atributos):
+        """
+        Contadores com ao menos um serviço que tenha todos os atributos pedidos
+        
+        No PostgreSQL é um containment (servicos_contratados @> '[{...}]')
+        atendido pelo índice GIN jsonb_path_ops; nos demais bancos o filtro
+        é feito em Python sobre os clientes com serviços.
+        """
+        criterio = {**atributos, 'ativo': ativo}
+        if categoria is not None:
+            criterio['categoria'] = categoria
+        
+        if connections[self.db].vendor == 'postgresql':
+            return self.filter(servicos_contratados__contains=[criterio])
+        
+        candidatos = self.filter(servicos_ativos_count__gt=0) if ativo else self
+        ids = [
+            pk for pk, servicos in candidatos.values_list('pk', 'servicos_contratados')
+            if any(
+                isinstance(s, dict) and all(s.get(k) == v for k, v in criterio.items())
+                for s in servicos or []
+            )
+        ]
+        return self.filter(pk__in=ids)
+    
+    def com_servicos_ativos(self):
+        return self.filter(servicos_ativos_count__gt=0)
+    
+    def resumo_faturamento(self):
+        """Totais de serviços ativos (colunas desnormalizadas, sem ler o JSON)"""
+        return self.aggregate(
+            clientes=Count('pk', filter=Q(servicos_ativos_count__gt=0)),
+            servicos_ativos=Coalesce(Sum('servicos_ativos_count'), 0),
+            valor_total_mensal=Coalesce(
+                Sum('valor_total_mensal'), Value(Decimal('0')), output_field=models.DecimalField()
+            ),
+        )
+
+
 class Contador(models.Model):
     """Model para contadores profissionais e clientes BPO (adaptado para novo fluxo)"""
     
@@ -344,6 +502,14 @@ class Contador(models.Model):
         null=True,  # Para migração dos dados existentes
         blank=True
     )
+    documento_digitos = models.CharField(
+        max_length=14,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="CPF/CNPJ (somente dígitos)",
+        help_text="Preenchido no save a partir de documento/cpf; usado nas verificações de duplicidade"
+    )
     
     # Relacionamentos (mantidos, mas escritorio agora opcional)
     user = models.OneToOneField(
@@ -503,6 +669,20 @@ class Contador(models.Model):
         verbose_name="Serviços BPO Contratados",
         help_text="Lista de serviços BPO ativos para este cliente"
     )
+    servicos_ativos_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Serviços Ativos",
+        help_text="Calculado no save a partir de servicos_contratados"
+    )
+    valor_total_mensal = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0'),
+        editable=False,
+        verbose_name="Valor Total Mensal",
+        help_text="Soma de valor_mensal dos serviços ativos (calculado no save)"
+    )
     
     # NOVO: Dados da Receita Federal (para PJ)
     dados_receita_federal = models.JSONField(
@@ -511,6 +691,19 @@ class Contador(models.Model):
         verbose_name="Dados Receita Federal",
         help_text="Dados da empresa via CNPJ (se pessoa jurídica)"
     )
+    receita_atualizado_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Receita Atualizada em",
+        help_text="Última consulta dos dados na Receita Federal"
+    )
+    receita_tentativa_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Última Falha na Receita",
+        help_text="Última consulta sem sucesso na Receita Federal (backoff curto)"
+    )
     
     # Status (mantidos, mas data_admissao agora opcional)
     ativo = models.BooleanField(
@@ -554,12 +747,41 @@ class Contador(models.Model):
         auto_now=True,
         verbose_name="Atualizado em"
     )
+    
+    objects = ContadorQuerySet.as_manager()
 
     class Meta:
         db_table = 'contadores_contador'
         verbose_name = 'Cliente/Contador'
         verbose_name_plural = 'Clientes/Contadores'
         ordering = ['nome_completo']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['documento_digitos'],
+                condition=models.Q(documento_digitos__isnull=False),
+                name='contador_documento_digitos_unico'
+            ),
+        ]
+        indexes = [
+            # Fila do atualizar_dados_receita: só PJ ativos
+            models.Index(
+                fields=['receita_atualizado_em'],
+                condition=models.Q(tipo_pessoa='juridica', ativo=True),
+                name='contador_pj_receita_idx'
+            ),
+            # Login e unicidade por CRC sem diferenciar maiúsculas
+            models.Index(Upper('crc'), name='contador_crc_upper_idx'),
+            # Filtros da listagem paginada por id (keyset)
+            models.Index(fields=['tipo_pessoa', 'id'], name='contador_tipo_pessoa_id_idx'),
+            models.Index(fields=['ativo', 'id'], name='contador_ativo_id_idx'),
+            models.Index(fields=['escritorio', 'id'], name='contador_escritorio_id_idx'),
+            # Relatórios de faturamento (clientes com serviços ativos)
+            models.Index(
+                fields=['escritorio', 'valor_total_mensal'],
+                condition=models.Q(servicos_ativos_count__gt=0),
+                name='contador_faturamento_idx'
+            ),
+        ]
         
     def clean(self):
         super().clean()
@@ -623,8 +845,16 @@ class Contador(models.Model):
             self.documento = self.cpf
             self.tipo_pessoa = 'fisica'
         
+        self.documento_digitos = _digitos_para_gravar(
+            self, 'documento_digitos', somente_digitos(self.documento or self.cpf)
+        )
+        self.servicos_ativos_count, self.valor_total_mensal = resumir_servicos(self.servicos_contratados)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'servicos_contratados' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'servicos_ativos_count', 'valor_total_mensal'}
         self.full_clean()
         super().save(*args, **kwargs)
+        _invalidar_cache_existencia(self.documento_digitos)
     
     def __str__(self):
         if self.documento:
@@ -687,6 +917,17 @@ class Contador(models.Model):
         else:
             return "Pessoa Física"
     
+    @classmethod
+    def documento_em_uso(cls, documento):
+        """CPF/CNPJ (em qualquer formato) já cadastrado? Busca por igualdade no índice"""
+        digitos = somente_digitos(documento)
+        return bool(digitos) and cls.objects.filter(documento_digitos=digitos).exists()
+    
+    @classmethod
+    def por_crc(cls, crc):
+        """Contadores com o CRC, sem diferenciar maiúsculas (índice UPPER(crc))"""
+        return cls.objects.alias(crc_upper=Upper('crc')).filter(crc_upper=(crc or '').strip().upper())
+    
     @property
     def documento_principal(self):
         """Retorna documento principal (novo ou antigo para compatibilidade)"""
@@ -718,4 +959,47 @@ class Contador(models.Model):
             cargo='proprietario',
             dados_receita_federal=dados_receita or {},
             **kwargs
-        )
\ No newline at end of file
+        )
+
+
+class AlteracaoReceita(models.Model):
+    """
+    Log de diferenças encontradas ao reconsultar a Receita Federal
+    
+    Cada linha registra os campos que mudaram entre o snapshot anterior
+    (dados_receita_federal) e a nova consulta de um escritório ou contador PJ.
+    """
+    
+    escritorio = models.ForeignKey(
+        Escritorio,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='alteracoes_receita',
+        verbose_name="Escritório"
+    )
+    contador = models.ForeignKey(
+        Contador,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='alteracoes_receita',
+        verbose_name="Cliente/Contador"
+    )
+    cnpj = models.CharField(max_length=18, db_index=True, verbose_name="CNPJ")
+    alteracoes = models.JSONField(
+        default=dict,
+        verbose_name="Alterações",
+        help_text='{"campo": {"antes": ..., "depois": ...}}'
+    )
+    fonte = models.CharField(max_length=30, blank=True, verbose_name="Fonte")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Registrado em")
+    
+    class Meta:
+        db_table = 'contadores_alteracoes_receita'
+        verbose_name = 'Alteração na Receita Federal'
+        verbose_name_plural = 'Alterações na Receita Federal'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.cnpj}: {', '.join(self.alteracoes)}"
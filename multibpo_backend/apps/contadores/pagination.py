@@ -0,0 +1,19 @@
+"""
+Paginação das listagens do app Contadores
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class CursorPaginacao(CursorPagination):
+    """
+    Paginação por keyset (cursor opaco em ?cursor=)
+
+    Ordena pelo id: cada página é uma busca no índice (id < último visto),
+    com custo constante em qualquer profundidade, ao contrário do OFFSET.
+    """
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-id'
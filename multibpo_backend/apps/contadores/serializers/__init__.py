@@ -23,6 +23,17 @@ from .contador import (
     ContadorResumoSerializer,
 )
 
+# Sparse fieldsets (?fields= / ?omit=)
+from .campos import CamposDinamicosMixin
+
+# Querysets preparados (listagens com número constante de consultas)
+from .querysets import (
+    contadores_para_perfil,
+    contadores_para_resumo,
+    escritorios_com_totais,
+    especialidades_com_totais,
+)
+
 __all__ = [
     # Especialidade (2 serializers)
     'EspecialidadeSerializer',
@@ -35,6 +46,15 @@ __all__ = [
     # Contador (2 serializers) - AGORA COMPLETO
     'ContadorPerfilSerializer',
     'ContadorResumoSerializer',
+    
+    # Sparse fieldsets
+    'CamposDinamicosMixin',
+    
+    # Querysets preparados
+    'contadores_para_perfil',
+    'contadores_para_resumo',
+    'escritorios_com_totais',
+    'especialidades_com_totais',
 ]
 
 # Total: 6 serializers implementados ✅
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Sparse fieldsets para os serializers do app Contadores
+MultiBPO - ?fields=id,nome_completo / ?omit=especialidades_detalhes
+
+Os campos não pedidos são removidos antes da serialização: os
+SerializerMethodField deles nem chegam a ser chamados. As funções de
+querysets.py recebem o mesmo conjunto para não buscar relacionamentos
+que ninguém vai ler.
+"""
+
+from rest_framework import serializers
+
+PARAMETRO_CAMPOS = 'fields'
+PARAMETRO_OMITIR = 'omit'
+
+
+def _lista(valor):
+    if not valor:
+        return None
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    return {campo.strip() for campo in valor if campo.strip()}
+
+
+class CamposDinamicosMixin:
+    """
+    Seleção de campos por kwargs (fields=/omit=) ou pela querystring
+
+    A querystring só vale para o serializer raiz (ou o filho de um many=True
+    raiz): serializers aninhados não são afetados. Nomes desconhecidos são
+    ignorados.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._campos = _lista(kwargs.pop(PARAMETRO_CAMPOS, None))
+        self._omitir = _lista(kwargs.pop(PARAMETRO_OMITIR, None))
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def selecionar(cls, campos=None, omitir=None):
+        """
+        Nomes que serão serializados (None quando todos)
+
+        Usado pelas views para montar o queryset com os mesmos campos.
+        """
+        campos, omitir = _lista(campos), _lista(omitir)
+        if not campos and not omitir:
+            return None
+        selecionados = set(cls.Meta.fields)
+        if campos:
+            selecionados &= campos
+        if omitir:
+            selecionados -= omitir
+        return selecionados
+
+    @classmethod
+    def selecionar_da_requisicao(cls, request):
+        if request is None:
+            return None
+        return cls.selecionar(
+            request.query_params.get(PARAMETRO_CAMPOS),
+            request.query_params.get(PARAMETRO_OMITIR),
+        )
+
+    def _eh_raiz(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        if self._campos or self._omitir:
+            selecionados = self.selecionar(self._campos, self._omitir)
+        elif self._eh_raiz():
+            selecionados = self.selecionar_da_requisicao(self.context.get('request'))
+        else:
+            selecionados = None
+
+        if selecionados is not None:
+            for nome in set(fields) - selecionados:
+                fields.pop(nome)
+        return fields
@@ -8,10 +8,13 @@ ADAPTADOS para suportar tipo_pessoa, documento, servicos_contratados
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from apps.contadores.catalogo import catalogo
 from apps.contadores.models import Contador, Escritorio, Especialidade
+from .campos import CamposDinamicosMixin
+from .querysets import anotado, ids_especialidades
 
 
-class ContadorPerfilSerializer(serializers.ModelSerializer):
+class ContadorPerfilSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer completo para perfil do Contador
     ADAPTADO para funcionar com novos campos BPO
@@ -157,17 +160,8 @@ class ContadorPerfilSerializer(serializers.ModelSerializer):
     def get_especialidades_detalhes(self, obj):
         """Lista detalhada de especialidades (DEPRECATED para clientes BPO)"""
         try:
-            especialidades = obj.especialidades.filter(ativa=True)
-            result = [
-                {
-                    'id': esp.id,
-                    'nome': esp.nome,
-                    'codigo': esp.codigo,
-                    'area_principal': esp.area_principal,
-                    'requer_certificacao': esp.requer_certificacao
-                }
-                for esp in especialidades
-            ]
+            # Ids do prefetch de contadores_para_perfil; dados do catálogo em memória
+            result = [esp.detalhes() for esp in catalogo().ativas(ids_especialidades(obj))]
             
             # Adicionar aviso de depreciação para clientes BPO
             tipo_pessoa = getattr(obj, 'tipo_pessoa', None)
@@ -198,7 +192,9 @@ class ContadorPerfilSerializer(serializers.ModelSerializer):
         
         # Verificar especialidades (contadores tradicionais)
         try:
-            status['tem_especialidades'] = obj.especialidades.exists()
+            status['tem_especialidades'] = anotado(
+                obj, 'num_especialidades', lambda: obj.especialidades.count()
+            ) > 0
         except AttributeError:
             pass
         
@@ -309,20 +305,20 @@ class ContadorPerfilSerializer(serializers.ModelSerializer):
                 'ultimo_update': None
             }
         
-        # Processar lista de serviços
+        # Processar lista de serviços (contagem e total vêm das colunas do save)
         servicos_ativos = [s for s in servicos if s.get('ativo', True)]
         
         return {
             'total': len(servicos),
-            'ativos': len(servicos_ativos),
+            'ativos': obj.servicos_ativos_count,
             'servicos': servicos_ativos,
             'categorias': list(set(s.get('categoria', 'geral') for s in servicos_ativos)),
-            'valor_total_mensal': sum(s.get('valor_mensal', 0) for s in servicos_ativos),
+            'valor_total_mensal': float(obj.valor_total_mensal),
             'ultimo_update': max((s.get('contratado_em') for s in servicos if s.get('contratado_em')), default=None)
         }
 
 
-class ContadorResumoSerializer(serializers.ModelSerializer):
+class ContadorResumoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer resumido para Contador
     ADAPTADO para incluir novos campos BPO essenciais
@@ -415,7 +411,9 @@ class ContadorResumoSerializer(serializers.ModelSerializer):
         Mantido para compatibilidade com sistemas antigos
         """
         try:
-            count = obj.especialidades.filter(ativa=True).count()
+            count = anotado(
+                obj, 'num_especialidades_ativas', lambda: len(catalogo().ativas(ids_especialidades(obj)))
+            )
             # Adicionar aviso se for cliente BPO
             if hasattr(obj, 'tipo_pessoa') and not obj.crc:
                 return {
@@ -428,13 +426,11 @@ class ContadorResumoSerializer(serializers.ModelSerializer):
             return 0
     
     def get_total_servicos_bpo(self, obj):
-        """Quantidade de serviços BPO ativos (NOVO)"""
-        servicos = getattr(obj, 'servicos_contratados', None)
-        if not servicos:
-            return 0
-        
-        # Contar apenas serviços ativos
-        return len([s for s in servicos if s.get('ativo', True)])
+        """Quantidade de serviços BPO ativos (NOVO) - coluna calculada no save"""
+        return obj.servicos_ativos_count
+    
+    def _num_especialidades(self, obj):
+        return anotado(obj, 'num_especialidades', lambda: obj.especialidades.count())
     
     def get_status(self, obj):
         """
@@ -454,7 +450,7 @@ class ContadorResumoSerializer(serializers.ModelSerializer):
         
         # Verificar se é contador profissional
         if obj.crc:
-            if obj.especialidades.count() == 0:
+            if self._num_especialidades(obj) == 0:
                 return 'contador_pendente'
             elif not obj.escritorio:
                 return 'sem_escritorio'
@@ -463,15 +459,14 @@ class ContadorResumoSerializer(serializers.ModelSerializer):
         
         # Verificar se é cliente BPO
         elif hasattr(obj, 'tipo_pessoa'):
-            servicos = getattr(obj, 'servicos_contratados', None)
-            if servicos and len([s for s in servicos if s.get('ativo', True)]) > 0:
+            if obj.servicos_ativos_count > 0:
                 return 'cliente_bpo_ativo'
             else:
                 return 'cliente_bpo_pendente'
         
         # Fallback para dados legados
         else:
-            if obj.especialidades.count() == 0:
+            if self._num_especialidades(obj) == 0:
                 return 'legado_pendente'
             elif not obj.escritorio:
                 return 'sem_escritorio'
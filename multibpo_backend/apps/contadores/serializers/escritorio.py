@@ -14,9 +14,11 @@ from validate_docbr import CNPJ
 from django.utils import timezone
 from datetime import datetime, timedelta
 from apps.contadores.models import Escritorio
+from .campos import CamposDinamicosMixin
+from .querysets import anotado
 
 
-class EscritorioSerializer(serializers.ModelSerializer):
+class EscritorioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Escritório Contábil
     ADAPTADO para suportar criação automática via Receita Federal
@@ -103,7 +105,7 @@ class EscritorioSerializer(serializers.ModelSerializer):
         Quantidade de contadores neste escritório (mantido)
         """
         try:
-            return obj.contadores.filter(ativo=True).count()
+            return anotado(obj, 'num_contadores_ativos', lambda: obj.contadores.filter(ativo=True).count())
         except AttributeError:
             # Se relacionamento não existe ainda, retorna 0
             return 0
@@ -293,9 +295,28 @@ class EscritorioSerializer(serializers.ModelSerializer):
                 )
             return cep_clean
         return value
+    
+    def validate(self, data):
+        """
+        Completa logradouro, bairro, cidade e UF vazios a partir do CEP
+        
+        Só com a base local e o cache de CEPs (sem provedores externos, para
+        não pôr latência de rede no cadastro), e só quando o CEP é novo ou mudou.
+        """
+        data = super().validate(data)
+        cep = data.get('cep')
+        cep_atual = ''.join(filter(str.isdigit, getattr(self.instance, 'cep', '') or ''))
+        if cep and cep != cep_atual:
+            from apps.receita.cep import CEPService, campos_escritorio
+            
+            endereco = campos_escritorio(CEPService().consultar_cep(cep, externo=False))
+            for campo, valor in endereco.items():
+                if not data.get(campo):
+                    data[campo] = valor
+        return data
 
 
-class EscritorioResumoSerializer(serializers.ModelSerializer):
+class EscritorioResumoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer resumido para Escritório
     ADAPTADO com informações de origem e status RF (simplificado)
@@ -336,7 +357,7 @@ class EscritorioResumoSerializer(serializers.ModelSerializer):
     def get_total_contadores(self, obj):
         """Total de contadores ativos (mantido)"""
         try:
-            return obj.contadores.filter(ativo=True).count()
+            return anotado(obj, 'num_contadores_ativos', lambda: obj.contadores.filter(ativo=True).count())
         except AttributeError:
             return 0
     
@@ -438,7 +459,7 @@ class EscritorioCreateAutoSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("CNPJ inválido.")
         
         # Para criação automática, verificar se já existe
-        if Escritorio.objects.filter(cnpj=cnpj_clean).exists():
+        if Escritorio.cnpj_em_uso(cnpj_clean):
             raise serializers.ValidationError("CNPJ já cadastrado.")
         
         return cnpj_clean
@@ -5,9 +5,11 @@ MultiBPO Sub-Fase 2.2.1 - Artefato 2A
 
 from rest_framework import serializers
 from ..models import Especialidade
+from .campos import CamposDinamicosMixin
+from .querysets import anotado
 
 
-class EspecialidadeSerializer(serializers.ModelSerializer):
+class EspecialidadeSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Especialidade Contábil
     
@@ -43,7 +45,7 @@ class EspecialidadeSerializer(serializers.ModelSerializer):
         """
         # Verifica se existe relacionamento antes de contar
         try:
-            return obj.contadores.filter(ativo=True).count()
+            return anotado(obj, 'num_contadores_ativos', lambda: obj.contadores.filter(ativo=True).count())
         except AttributeError:
             # Se não existe o relacionamento ainda, retorna 0
             return 0
@@ -99,7 +101,7 @@ class EspecialidadeSerializer(serializers.ModelSerializer):
         return value
 
 
-class EspecialidadeResumoSerializer(serializers.ModelSerializer):
+class EspecialidadeResumoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer resumido para Especialidade
     
@@ -0,0 +1,159 @@
+"""
+Querysets preparados para os serializers do app Contadores
+MultiBPO - listagens com número constante de consultas
+
+Cada serializer lê os relacionamentos de um Prefetch(to_attr=...) ou de uma
+anotação feita aqui; sem eles (ex: um objeto avulso), cai na consulta
+individual de antes. Views de listagem devem montar o queryset por estas
+funções.
+
+`campos` é o conjunto devolvido por CamposDinamicosMixin.selecionar
+(None = todos): o que só serve a campos fora dele não é buscado.
+
+Os dados das especialidades vêm do catálogo em memória (catalogo.py): do
+banco só saem os ids vinculados a cada contador.
+"""
+
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.contadores.catalogo import catalogo
+from apps.contadores.models import Contador, Escritorio, Especialidade
+
+
+# Campos do serializer que leem cada relacionamento/anotação
+_PERFIL_PRECISA = {
+    'escritorio': {'escritorio_detalhes', 'status_completo'},
+    'num_especialidades': {'status_completo'},
+    'especialidades_vinculadas': {'especialidades_detalhes'},
+    'dados_receita_federal': {'dados_receita_federal'},
+    'servicos_contratados': {'servicos_contratados', 'servicos_bpo_detalhes', 'status_completo'},
+}
+
+_RESUMO_PRECISA = {
+    'escritorio': {'escritorio_nome', 'status'},
+    'num_especialidades': {'status'},
+    'num_especialidades_ativas': {'total_especialidades'},
+}
+
+
+def _precisa(dependencias, item, campos):
+    return campos is None or bool(dependencias[item] & campos)
+
+
+def anotado(obj, atributo, calcular):
+    """Valor anotado/prefetchado em `obj` ou, se ausente, calculado na hora"""
+    valor = getattr(obj, atributo, None)
+    return calcular() if valor is None else valor
+
+
+def _contagem(queryset, campo):
+    """
+    COUNT correlacionado por linha
+
+    Diferente de Count() com GROUP BY, é avaliado só para as linhas que
+    saem da consulta: combina com paginação (LIMIT) em tabelas grandes.
+    """
+    return Coalesce(Subquery(
+        queryset.filter(**{campo: OuterRef('pk')}).order_by()
+        .values(campo).annotate(total=Count('*')).values('total')
+    ), 0)
+
+
+def _especialidades(apenas_ativas=False):
+    vinculos = Contador.especialidades.through.objects.all()
+    if apenas_ativas:
+        # Ids ativos do catálogo: sem JOIN com a tabela de especialidades
+        vinculos = vinculos.filter(especialidade_id__in=catalogo().ids_ativos)
+    return _contagem(vinculos, 'contador_id')
+
+
+def ids_especialidades(contador):
+    """Ids das especialidades do contador (prefetch ou tabela de vínculo)"""
+    vinculadas = getattr(contador, 'especialidades_vinculadas', None)
+    if vinculadas is not None:
+        return [esp.pk for esp in vinculadas]
+    return list(
+        Contador.especialidades.through.objects.filter(contador_id=contador.pk)
+        .values_list('especialidade_id', flat=True)
+    )
+
+
+def _contadores_ativos(campo):
+    return _contagem(Contador.objects.filter(ativo=True), campo)
+
+
+def contadores_para_perfil(queryset=None, campos=None):
+    """
+    Queryset para ContadorPerfilSerializer (até 2 consultas para N contadores)
+
+    O user vem sempre no JOIN: as views de autenticação o usam fora do serializer.
+    """
+    queryset = Contador.objects.all() if queryset is None else queryset
+
+    def precisa(item):
+        return _precisa(_PERFIL_PRECISA, item, campos)
+
+    queryset = queryset.select_related('user', 'escritorio') if precisa('escritorio') \
+        else queryset.select_related('user')
+    if precisa('num_especialidades'):
+        queryset = queryset.annotate(num_especialidades=_especialidades())
+    if precisa('especialidades_vinculadas'):
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                'especialidades',
+                queryset=Especialidade.objects.only('id').order_by(),
+                to_attr='especialidades_vinculadas',
+            ),
+        )
+    adiados = [campo for campo in ('dados_receita_federal', 'servicos_contratados') if not precisa(campo)]
+    return queryset.defer(*adiados) if adiados else queryset
+
+
+def contadores_para_resumo(queryset=None, campos=None):
+    """Queryset para ContadorResumoSerializer (1 consulta para N contadores)"""
+    queryset = Contador.objects.all() if queryset is None else queryset
+
+    def precisa(item):
+        return _precisa(_RESUMO_PRECISA, item, campos)
+
+    queryset = queryset.select_related('user', 'escritorio') if precisa('escritorio') \
+        else queryset.select_related('user')
+    # Serviços vêm das colunas desnormalizadas: os JSONs não são lidos
+    queryset = queryset.defer('servicos_contratados', 'dados_receita_federal')
+    anotacoes = {}
+    if precisa('num_especialidades'):
+        anotacoes['num_especialidades'] = _especialidades()
+    if precisa('num_especialidades_ativas'):
+        anotacoes['num_especialidades_ativas'] = _especialidades(apenas_ativas=True)
+    return queryset.annotate(**anotacoes) if anotacoes else queryset
+
+
+def escritorios_com_totais(queryset=None, campos=None):
+    """Queryset para EscritorioSerializer e EscritorioResumoSerializer"""
+    queryset = Escritorio.objects.all() if queryset is None else queryset
+    if campos is not None and 'total_contadores' not in campos:
+        return queryset
+    return queryset.annotate(num_contadores_ativos=_contadores_ativos('escritorio'))
+
+
+def especialidades_com_totais(queryset=None, campos=None):
+    """Queryset para EspecialidadeSerializer"""
+    queryset = Especialidade.objects.all() if queryset is None else queryset
+    if campos is not None and 'total_contadores' not in campos:
+        return queryset
+    return queryset.annotate(num_contadores_ativos=_contadores_ativos('especialidades'))
+
+
+def contadores_para_admin(queryset=None):
+    """Changelist de ContadorAdmin (1 consulta por página)"""
+    queryset = Contador.objects.all() if queryset is None else queryset
+    return queryset.select_related('user', 'escritorio').annotate(num_especialidades=_especialidades())
+
+
+def especialidades_para_admin(queryset=None):
+    """Changelist de EspecialidadeAdmin: total de contadores vinculados, ativos ou não"""
+    queryset = Especialidade.objects.all() if queryset is None else queryset
+    return queryset.annotate(
+        num_contadores=_contagem(Contador.especialidades.through.objects.all(), 'especialidade_id')
+    )
@@ -0,0 +1,254 @@
+"""
+Atualização periódica dos snapshots da Receita Federal
+Escritórios e contadores PJ, dos mais antigos para os mais novos, dentro de
+um orçamento de requisições por minuto
+"""
+
+import logging
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.authentication.cache_perfil import invalidar_perfis
+from apps.receita.services import ReceitaFederalService
+from ..models import Escritorio, Contador, AlteracaoReceita
+
+logger = logging.getLogger(__name__)
+
+# Campos do snapshot comparados no diff (raw_data e metadados ficam de fora)
+CAMPOS_SNAPSHOT = [
+    'razao_social', 'nome_fantasia', 'situacao', 'telefone', 'email', 'atividade_principal',
+]
+CAMPOS_ENDERECO = ['logradouro', 'numero', 'complemento', 'bairro', 'municipio', 'uf', 'cep']
+
+SITUACOES_ESCRITORIO = {
+    '1': 'nula', '01': 'nula', 'nula': 'nula',
+    '2': 'ativa', '02': 'ativa', 'ativa': 'ativa',
+    '3': 'suspensa', '03': 'suspensa', 'suspensa': 'suspensa',
+    '4': 'inapta', '04': 'inapta', 'inapta': 'inapta',
+    '8': 'baixada', '08': 'baixada', 'baixada': 'baixada',
+}
+
+
+def situacao_escritorio(valor):
+    """Converte a situação da Receita (texto ou código) para SITUACAO_CHOICES"""
+    return SITUACOES_ESCRITORIO.get(str(valor or '').strip().lower())
+
+
+def _plano(dados):
+    """Achata o snapshot normalizado nos campos comparáveis"""
+    dados = dados or {}
+    plano = {campo: dados.get(campo, '') for campo in CAMPOS_SNAPSHOT}
+    endereco = dados.get('endereco') or {}
+    for campo in CAMPOS_ENDERECO:
+        # Snapshots antigos podem ter o endereço achatado
+        plano[f'endereco.{campo}'] = endereco.get(campo, dados.get(campo, ''))
+    return plano
+
+
+def diff_snapshot(anterior, novo):
+    """
+    Returns:
+        dict {campo: {'antes', 'depois'}} só com o que mudou
+    """
+    antes, depois = _plano(anterior), _plano(novo)
+    return {
+        campo: {'antes': antes[campo], 'depois': depois[campo]}
+        for campo in depois
+        if str(antes[campo] or '') != str(depois[campo] or '')
+    }
+
+
+def _snapshot(resultado):
+    """Resultado do serviço sem os metadados de cache"""
+    return {chave: valor for chave, valor in resultado.items() if chave != 'cache'}
+
+
+class AtualizadorReceita:
+    """
+    Reconsulta snapshots vencidos e grava as mudanças em lote
+
+    Args:
+        rpm: orçamento de consultas externas por minuto
+        idade_minima: só reconsulta snapshots mais velhos que isso
+        backoff: espera antes de repetir um registro cuja consulta falhou
+        lote: registros por escrita em massa
+        dry_run: calcula os diffs sem gravar
+    """
+
+    def __init__(self, rpm=None, idade_minima=None, lote=50, dry_run=False, service=None,
+                 backoff=None):
+        self.rpm = rpm or getattr(settings, 'RECEITA_REFRESH_RPM', 20)
+        if idade_minima is None:
+            idade_minima = timedelta(days=getattr(settings, 'RECEITA_REFRESH_IDADE_DIAS', 30))
+        self.idade_minima = idade_minima
+        if backoff is None:
+            backoff = timedelta(hours=getattr(settings, 'RECEITA_REFRESH_BACKOFF_HORAS', 6))
+        self.backoff = backoff
+        self.lote = lote
+        self.dry_run = dry_run
+        self.service = service or ReceitaFederalService()
+        self._proxima_consulta = 0.0
+        self.resumo = {'consultados': 0, 'alterados': 0, 'falhas': 0, 'externas': 0}
+
+    # ========== SELEÇÃO ==========
+
+    def _vencidos(self, queryset, limite):
+        agora = timezone.now()
+        corte = agora - self.idade_minima
+        return list(
+            queryset.filter(
+                Q(receita_atualizado_em__isnull=True) | Q(receita_atualizado_em__lt=corte)
+            ).filter(
+                # Falhas recentes esperam o backoff, sem esconder o registro por idade_minima
+                Q(receita_tentativa_em__isnull=True) | Q(receita_tentativa_em__lt=agora - self.backoff)
+            ).order_by(
+                F('receita_atualizado_em').asc(nulls_first=True), 'created_at'
+            )[:limite]
+        )
+
+    def escritorios_vencidos(self, limite):
+        return self._vencidos(Escritorio.objects.filter(ativo=True), limite)
+
+    def contadores_vencidos(self, limite):
+        return self._vencidos(
+            Contador.objects.filter(ativo=True, tipo_pessoa='juridica', documento__isnull=False),
+            limite
+        )
+
+    # ========== CONSULTA COM ORÇAMENTO ==========
+
+    def _aguardar_orcamento(self):
+        espera = self._proxima_consulta - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+    def _consultar(self, cnpj):
+        """Consulta respeitando o rpm; só chamadas às APIs externas gastam orçamento"""
+        self._aguardar_orcamento()
+        resultado = self.service.consultar_cnpj(cnpj)
+        self.resumo['consultados'] += 1
+
+        # Cache, índice local e CNPJ inválido respondem sem ir à rede
+        if (resultado.get('cache') or {}).get('consulta_externa'):
+            self.resumo['externas'] += 1
+            self._proxima_consulta = time.monotonic() + 60.0 / self.rpm
+
+        if not resultado.get('success'):
+            self.resumo['falhas'] += 1
+            return None
+        return _snapshot(resultado)
+
+    # ========== APLICAÇÃO ==========
+
+    def _aplicar_escritorio(self, escritorio, snapshot):
+        """Atualiza os campos sincronizados; devolve o diff"""
+        diff = diff_snapshot(escritorio.dados_receita_federal, snapshot)
+        escritorio.dados_receita_federal = snapshot
+        escritorio.receita_atualizado_em = escritorio.updated_at = timezone.now()
+        escritorio.receita_tentativa_em = None
+
+        situacao = situacao_escritorio(snapshot.get('situacao'))
+        if situacao:
+            escritorio.situacao_cadastral = situacao
+        if snapshot.get('razao_social'):
+            escritorio.razao_social = snapshot['razao_social'][:200]
+
+        # Endereço só é sobrescrito em escritórios criados pela Receita
+        if escritorio.criado_automaticamente:
+            endereco = snapshot.get('endereco') or {}
+            escritorio.logradouro = (endereco.get('logradouro') or '')[:200]
+            escritorio.numero = (endereco.get('numero') or '')[:10]
+            escritorio.complemento = (endereco.get('complemento') or '')[:100]
+            escritorio.bairro = (endereco.get('bairro') or '')[:100]
+            escritorio.cidade = (endereco.get('municipio') or '')[:100]
+            uf = (endereco.get('uf') or '').upper()
+            if re.match(r'^[A-Z]{2}$', uf):
+                escritorio.estado = uf
+            cep = re.sub(r'\D', '', endereco.get('cep') or '')
+            if len(cep) == 8:
+                escritorio.cep = f"{cep[:5]}-{cep[5:]}"
+        return diff
+
+    def _aplicar_contador(self, contador, snapshot):
+        diff = diff_snapshot(contador.dados_receita_federal, snapshot)
+        contador.dados_receita_federal = snapshot
+        contador.receita_atualizado_em = contador.updated_at = timezone.now()
+        contador.receita_tentativa_em = None
+        return diff
+
+    def _gravar(self, modelo, campos, objetos, logs):
+        if self.dry_run or not objetos:
+            return
+        with transaction.atomic():
+            modelo.objects.bulk_update(objetos, campos, batch_size=self.lote)
+            AlteracaoReceita.objects.bulk_create(logs, batch_size=self.lote)
+            # bulk_update não dispara post_save: troca a versão dos perfis aqui
+            invalidar_perfis(self._usuarios_afetados(modelo, objetos))
+
+    def _usuarios_afetados(self, modelo, objetos):
+        if modelo is Escritorio:
+            return Contador.objects.filter(escritorio__in=objetos).values_list('user_id', flat=True)
+        return [contador.user_id for contador in objetos]
+
+    def _processar(self, registros, documento, aplicar, modelo, campos, relacao):
+        pendentes, logs = [], []
+        for registro in registros:
+            snapshot = self._consultar(documento(registro))
+            if snapshot is None:
+                # Falha só adia o registro pelo backoff: receita_atualizado_em
+                # continua marcando o último snapshot válido
+                registro.receita_tentativa_em = timezone.now()
+                pendentes.append(registro)
+            else:
+                diff = aplicar(registro, snapshot)
+                pendentes.append(registro)
+                if diff:
+                    self.resumo['alterados'] += 1
+                    logs.append(AlteracaoReceita(
+                        cnpj=documento(registro),
+                        alteracoes=diff,
+                        fonte=snapshot.get('fonte', ''),
+                        **{relacao: registro}
+                    ))
+                    logger.info(f"Receita: {documento(registro)} mudou ({', '.join(diff)})")
+
+            if len(pendentes) >= self.lote:
+                self._gravar(modelo, campos, pendentes, logs)
+                pendentes, logs = [], []
+
+        self._gravar(modelo, campos, pendentes, logs)
+
+    def executar(self, limite=100):
+        """
+        Processa até `limite` escritórios e `limite` contadores PJ vencidos
+
+        Returns:
+            dict com consultados, alterados, falhas e consultas externas
+        """
+        self._processar(
+            self.escritorios_vencidos(limite),
+            documento=lambda e: e.cnpj,
+            aplicar=self._aplicar_escritorio,
+            modelo=Escritorio,
+            campos=[
+                'dados_receita_federal', 'receita_atualizado_em', 'receita_tentativa_em',
+                'situacao_cadastral', 'razao_social',
+                'logradouro', 'numero', 'complemento', 'bairro', 'cidade', 'estado', 'cep', 'updated_at',
+            ],
+            relacao='escritorio',
+        )
+        self._processar(
+            self.contadores_vencidos(limite),
+            documento=lambda c: c.documento,
+            aplicar=self._aplicar_contador,
+            modelo=Contador,
+            campos=['dados_receita_federal', 'receita_atualizado_em', 'receita_tentativa_em', 'updated_at'],
+            relacao='contador',
+        )
+        return self.resumo
@@ -0,0 +1,14 @@
+"""
+Signals de invalidação do catálogo de especialidades (catalogo.py)
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalogo import invalidar_catalogo
+from .models import Especialidade
+
+
+@receiver([post_save, post_delete], sender=Especialidade)
+def especialidade_alterada(sender, **kwargs):
+    invalidar_catalogo()
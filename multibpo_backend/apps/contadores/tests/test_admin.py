@@ -0,0 +1,102 @@
+"""
+Testes das changelists do admin de contadores (consultas por página)
+"""
+
+import random
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from config.admin_paginacao import ContagemEstimadaPaginator
+from ..catalogo import catalogo
+from ..models import Contador, Escritorio, Especialidade
+from .test_validacao_documentos import gerar_cnpj, gerar_cpf
+
+
+class TestAdminChangelists(TestCase):
+    
+    def setUp(self):
+        self.rnd = random.Random(48)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@multibpo.com', 'x'))
+        self.especialidades = [
+            Especialidade.objects.create(nome=f'Especialidade {i}', codigo=f'ESP{i}', area_principal='fiscal')
+            for i in range(3)
+        ]
+        catalogo()  # carregado uma vez por processo (filtro de especialidades)
+        self.total = 0
+    
+    def _criar(self, quantidade):
+        for _ in range(quantidade):
+            self.total += 1
+            escritorio = Escritorio.criar_via_cnpj(gerar_cnpj(self.rnd), {
+                'razao_social': f'Escritório {self.total} LTDA',
+                'endereco': {'uf': 'SP', 'municipio': 'São Paulo'},
+            })
+            contador = Contador.objects.create(
+                user=User.objects.create_user(f'contador{self.total}', password='x'),
+                nome_completo=f'Contador {self.total}', tipo_pessoa='fisica',
+                documento=gerar_cpf(self.rnd), telefone_pessoal='11987654321',
+                cargo='contador_pleno', escritorio=escritorio,
+            )
+            contador.especialidades.set(self.especialidades[:self.total % 3 + 1])
+    
+    def _consultas(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+    
+    def test_consultas_constantes(self):
+        urls = [
+            '/admin/contadores/contador/',
+            '/admin/contadores/escritorio/',
+            '/admin/contadores/especialidade/',
+        ]
+        self._criar(2)
+        poucas = [self._consultas(url) for url in urls]
+        self._criar(10)
+        self.assertEqual([self._consultas(url) for url in urls], poucas)
+    
+    def test_contagens_anotadas(self):
+        self._criar(3)
+        response = self.client.get('/admin/contadores/contador/')
+        self.assertContains(response, '3 especialidade(s)')
+        response = self.client.get('/admin/contadores/especialidade/')
+        self.assertContains(response, '👥 3')
+    
+    def test_paginator_conta_exato_fora_do_postgresql(self):
+        self._criar(2)
+        paginator = ContagemEstimadaPaginator(Contador.objects.order_by('pk'), 1)
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(paginator.num_pages, 2)
+    
+    def test_paginator_estimado_conta_exato_no_fim(self):
+        self._criar(2)
+        queryset = Contador.objects.order_by('pk')
+        with mock.patch.object(ContagemEstimadaPaginator, '_estimativa', return_value=150000):
+            paginator = ContagemEstimadaPaginator(queryset, 1)
+            self.assertEqual(paginator.num_pages, 150000)
+            self.assertEqual(len(paginator.page(2).object_list), 1)
+            self.assertTrue(paginator.estimado)
+            
+            # Página vazia abaixo do fim estimado: passa a contar exato
+            with self.assertRaises(EmptyPage):
+                paginator.page(3)
+            self.assertEqual((paginator.count, paginator.num_pages), (2, 2))
+            
+            # Última página estimada: conta exato antes de validar
+            paginator = ContagemEstimadaPaginator(queryset, 1)
+            with self.assertRaises(EmptyPage):
+                paginator.page(150000)
+            self.assertEqual(paginator.count, 2)
+    
+    def test_busca_por_nome_mantem_search_fields(self):
+        self._criar(2)
+        with mock.patch('apps.contadores.admin.suporta_trigram', return_value=True):
+            response = self.client.get('/admin/contadores/contador/', {'q': 'contador2'})
+        # 'contador2' só existe no username (user__username do search_fields)
+        self.assertEqual([c.user.username for c in response.context['cl'].result_list], ['contador2'])
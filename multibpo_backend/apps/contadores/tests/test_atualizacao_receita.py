@@ -0,0 +1,144 @@
+"""
+Testes da atualização periódica dos snapshots da Receita Federal
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Escritorio, AlteracaoReceita
+from ..services.atualizacao_receita import AtualizadorReceita, diff_snapshot, situacao_escritorio
+
+
+def _snapshot(razao='EMPRESA TESTE LTDA', situacao='ATIVA', cep='01310-100'):
+    return {
+        'success': True,
+        'cnpj': '11222333000181',
+        'razao_social': razao,
+        'nome_fantasia': 'TESTE',
+        'situacao': situacao,
+        'endereco': {
+            'logradouro': 'AV PAULISTA', 'numero': '1000', 'complemento': '',
+            'bairro': 'BELA VISTA', 'municipio': 'SAO PAULO', 'uf': 'SP', 'cep': cep,
+        },
+        'fonte': 'BrasilAPI',
+    }
+
+
+class ServiceFalso:
+    """Devolve respostas fixas por CNPJ (sem rede)"""
+
+    def __init__(self, respostas, cache_status='miss', externa=None):
+        self.respostas = respostas
+        self.cache_status = cache_status
+        self.externa = cache_status != 'hit' if externa is None else externa
+        self.chamadas = []
+
+    def consultar_cnpj(self, cnpj):
+        self.chamadas.append(cnpj)
+        resposta = self.respostas.get(cnpj, {'success': False, 'error': 'falha'})
+        return {**resposta, 'cache': {'status': self.cache_status, 'consulta_externa': self.externa}}
+
+
+class TestAtualizadorReceita(TestCase):
+
+    def setUp(self):
+        self.escritorio = Escritorio.criar_via_cnpj(
+            '11.222.333/0001-81', {**_snapshot(), 'cep': '01310100'}
+        )
+        self.escritorio.dados_receita_federal = _snapshot()
+        self.escritorio.receita_atualizado_em = timezone.now() - timedelta(days=60)
+        self.escritorio.save()
+
+    def test_diff_snapshot_so_campos_alterados(self):
+        diff = diff_snapshot(_snapshot(), _snapshot(razao='NOVA RAZAO LTDA', cep='01310-200'))
+        self.assertEqual(set(diff), {'razao_social', 'endereco.cep'})
+        self.assertEqual(diff['razao_social']['antes'], 'EMPRESA TESTE LTDA')
+
+    def test_situacao_aceita_texto_e_codigo(self):
+        self.assertEqual(situacao_escritorio('BAIXADA'), 'baixada')
+        self.assertEqual(situacao_escritorio(8), 'baixada')
+        self.assertIsNone(situacao_escritorio('desconhecida'))
+
+    def test_atualiza_e_registra_alteracao(self):
+        service = ServiceFalso({
+            self.escritorio.cnpj: _snapshot(razao='NOVA RAZAO LTDA', situacao='BAIXADA'),
+        })
+        resumo = AtualizadorReceita(rpm=6000, service=service).executar()
+
+        self.escritorio.refresh_from_db()
+        self.assertEqual(self.escritorio.razao_social, 'NOVA RAZAO LTDA')
+        self.assertEqual(self.escritorio.situacao_cadastral, 'baixada')
+        self.assertGreater(self.escritorio.receita_atualizado_em, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.escritorio.updated_at, self.escritorio.receita_atualizado_em)
+        self.assertEqual(resumo['alterados'], 1)
+
+        alteracao = AlteracaoReceita.objects.get(escritorio=self.escritorio)
+        self.assertEqual(set(alteracao.alteracoes), {'razao_social', 'situacao'})
+
+    def test_snapshot_recente_nao_e_reconsultado(self):
+        Escritorio.objects.filter(pk=self.escritorio.pk).update(receita_atualizado_em=timezone.now())
+        service = ServiceFalso({})
+        AtualizadorReceita(rpm=6000, service=service).executar()
+        self.assertEqual(service.chamadas, [])
+
+    def test_falha_volta_para_fila_depois_do_backoff(self):
+        atualizado_em = self.escritorio.receita_atualizado_em
+        resumo = AtualizadorReceita(rpm=6000, service=ServiceFalso({})).executar()
+        self.assertEqual(resumo['falhas'], 1)
+
+        self.escritorio.refresh_from_db()
+        self.assertEqual(self.escritorio.receita_atualizado_em, atualizado_em)
+        self.assertIsNotNone(self.escritorio.receita_tentativa_em)
+
+        # Dentro do backoff fica de fora; depois dele é reconsultado
+        service = ServiceFalso({})
+        AtualizadorReceita(rpm=6000, service=service).executar()
+        self.assertEqual(service.chamadas, [])
+
+        service = ServiceFalso({self.escritorio.cnpj: _snapshot()})
+        AtualizadorReceita(rpm=6000, service=service, backoff=timedelta(0)).executar()
+        self.assertEqual(service.chamadas, [self.escritorio.cnpj])
+        self.escritorio.refresh_from_db()
+        self.assertIsNone(self.escritorio.receita_tentativa_em)
+        self.assertGreater(self.escritorio.receita_atualizado_em, atualizado_em)
+
+    def test_dry_run_nao_grava(self):
+        service = ServiceFalso({self.escritorio.cnpj: _snapshot(razao='NOVA RAZAO LTDA')})
+        resumo = AtualizadorReceita(rpm=6000, service=service, dry_run=True).executar()
+
+        self.assertEqual(resumo['alterados'], 1)
+        self.escritorio.refresh_from_db()
+        self.assertEqual(self.escritorio.razao_social, 'EMPRESA TESTE LTDA')
+        self.assertFalse(AlteracaoReceita.objects.exists())
+
+    def test_orcamento_rpm_espaca_consultas_externas(self):
+        outro = Escritorio.criar_via_cnpj('11.444.777/0001-61', _snapshot())
+        Escritorio.objects.filter(pk=outro.pk).update(receita_atualizado_em=None)
+        service = ServiceFalso({})
+        with patch('apps.contadores.services.atualizacao_receita.time.sleep') as sleep:
+            AtualizadorReceita(rpm=1, service=service).executar()
+        self.assertEqual(len(service.chamadas), 2)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertGreater(sleep.call_args[0][0], 50)
+        self.assertIn(outro.cnpj, service.chamadas)
+
+    def test_cache_hit_nao_consome_orcamento(self):
+        outro = Escritorio.criar_via_cnpj('11.444.777/0001-61', _snapshot())
+        Escritorio.objects.filter(pk=outro.pk).update(receita_atualizado_em=None)
+        service = ServiceFalso({}, cache_status='hit')
+        with patch('apps.contadores.services.atualizacao_receita.time.sleep') as sleep:
+            resumo = AtualizadorReceita(rpm=1, service=service).executar()
+        sleep.assert_not_called()
+        self.assertEqual(resumo['externas'], 0)
+
+    def test_indice_local_nao_consome_orcamento(self):
+        outro = Escritorio.criar_via_cnpj('11.444.777/0001-61', _snapshot())
+        Escritorio.objects.filter(pk=outro.pk).update(receita_atualizado_em=None)
+        service = ServiceFalso({}, externa=False)
+        with patch('apps.contadores.services.atualizacao_receita.time.sleep') as sleep:
+            resumo = AtualizadorReceita(rpm=1, service=service).executar()
+        sleep.assert_not_called()
+        self.assertEqual(resumo['externas'], 0)
@@ -0,0 +1,76 @@
+"""
+Testes da busca por nome (autocomplete do suporte)
+
+No SQLite a busca cai no icontains por palavra; o ranking por trigram só
+existe no PostgreSQL.
+"""
+
+import random
+from importlib import import_module
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.sql import Query
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..busca import expressao_busca, normalizar
+from ..models import Contador, Escritorio
+from .test_validacao_documentos import gerar_cnpj, gerar_cpf
+
+
+class TestBusca(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(43)
+        cls.sao_jose = Escritorio.criar_via_cnpj(gerar_cnpj(rnd), {
+            'razao_social': 'CONTABIL SAO JOSE LTDA',
+            'endereco': {'uf': 'SP', 'municipio': 'Campinas'},
+        })
+        Escritorio.criar_via_cnpj(gerar_cnpj(rnd), {'razao_social': 'CONTABIL SANTA RITA LTDA'})
+        Contador.objects.create(
+            user=User.objects.create_user('jose', password='x'),
+            escritorio=cls.sao_jose, nome_completo='Jose Contabil da Silva',
+            tipo_pessoa='fisica', documento=gerar_cpf(rnd), telefone_pessoal='11987654321',
+            cargo='cliente_bpo',
+        )
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def test_normalizar(self):
+        self.assertEqual(normalizar('  Contábil  SÃO   José '), 'contabil sao jose')
+    
+    def test_expressao_igual_a_do_indice(self):
+        # O índice da migration 0008 só é usado se a expressão for idêntica
+        migracao = import_module('apps.contadores.migrations.0008_busca_trigram')
+        for model, congelada in [(Escritorio, migracao.EXPRESSAO_ESCRITORIO), (Contador, migracao.EXPRESSAO_CONTADOR)]:
+            compilador = Query(model).get_compiler(connection=connection)
+            self.assertEqual(
+                expressao_busca(model._meta.model_name).resolve_expression(Query(model)).as_sql(compilador, connection),
+                congelada.resolve_expression(Query(model)).as_sql(compilador, connection),
+            )
+    
+    def test_autocomplete_por_palavras(self):
+        response = self.client.get('/api/v1/contadores/autocomplete/', {'q': 'contabil sao jose'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r['tipo'], r['id']) for r in response.data['resultados']],
+            [('escritorio', self.sao_jose.id)]
+        )
+        
+        response = self.client.get('/api/v1/contadores/autocomplete/', {'q': 'jose', 'tipo': 'contador'})
+        self.assertEqual([r['nome'] for r in response.data['resultados']], ['Jose Contabil da Silva'])
+    
+    def test_autocomplete_parametros_invalidos(self):
+        response = self.client.get('/api/v1/contadores/autocomplete/', {'q': 'ab', 'tipo': 'outro'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {'q', 'tipo'})
+    
+    def test_autocomplete_restrito_ao_admin(self):
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/v1/contadores/autocomplete/', {'q': 'contabil'})
+        self.assertIn(response.status_code, (401, 403))
@@ -0,0 +1,94 @@
+"""
+Testes do catálogo em memória das especialidades
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+
+from apps.authentication.serializers.auth import ContadorRegistroSerializer
+from ..catalogo import CHAVE_VERSAO, CatalogoEspecialidades, catalogo, catalogo_especialidades, confirmar_ativas
+from ..models import Especialidade
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class TestCatalogoEspecialidades(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.fiscal = Especialidade.objects.create(nome='Fiscal', codigo='FISCAL', area_principal='fiscal')
+        cls.contabil = Especialidade.objects.create(nome='Contábil', codigo='CONTABIL', area_principal='contabil')
+        cls.inativa = Especialidade.objects.create(
+            nome='Perícia', codigo='PERICIA', area_principal='pericial', ativa=False
+        )
+    
+    def setUp(self):
+        cache.clear()
+        # O rollback entre testes não passa pelos signals
+        catalogo_especialidades.descartar()
+    
+    def test_carrega_uma_vez(self):
+        atual = catalogo()
+        with self.assertNumQueries(0):
+            self.assertIs(catalogo(), atual)
+        self.assertEqual(atual.por_codigo['FISCAL'].id, self.fiscal.id)
+        self.assertEqual(atual.ids_ativos, {self.fiscal.id, self.contabil.id})
+        with self.assertRaises(TypeError):
+            atual.por_id[0] = None
+    
+    def test_ativas_na_ordem_do_model(self):
+        ids = [self.fiscal.id, self.inativa.id, self.contabil.id, 999]
+        self.assertEqual([esp.codigo for esp in catalogo().ativas(ids)], ['CONTABIL', 'FISCAL'])
+        self.assertEqual(catalogo().get(self.fiscal.id).detalhes(), {
+            'id': self.fiscal.id, 'nome': 'Fiscal', 'codigo': 'FISCAL',
+            'area_principal': 'fiscal', 'requer_certificacao': False,
+        })
+    
+    def test_validacao_confere_no_banco(self):
+        serializer = ContadorRegistroSerializer()
+        self.assertEqual(serializer.validate_especialidades_ids([self.fiscal.id]), [self.fiscal.id])
+        for invalidos in ([self.inativa.id], [999], [self.fiscal.id, self.fiscal.id]):
+            with self.subTest(invalidos=invalidos), self.assertRaises(serializers.ValidationError):
+                serializer.validate_especialidades_ids(invalidos)
+    
+    def test_snapshot_atrasado_nao_decide_a_escrita(self):
+        # Sem cache compartilhado outro processo não vê a troca de versão;
+        # alterações sem signals simulam o snapshot atrasado
+        antigo = catalogo()
+        nova, = Especialidade.objects.bulk_create([
+            Especialidade(nome='Societário', codigo='SOCIETARIO', area_principal='societaria')
+        ])
+        Especialidade.objects.filter(pk=self.contabil.pk).update(ativa=False)
+        
+        self.assertEqual(confirmar_ativas([nova.id, self.contabil.id, self.fiscal.id]), sorted([nova.id, self.fiscal.id]))
+        serializer = ContadorRegistroSerializer()
+        self.assertEqual(serializer.validate_especialidades_ids([nova.id]), [nova.id])
+        with self.assertRaises(serializers.ValidationError):
+            serializer.validate_especialidades_ids([self.contabil.id])
+        # O snapshot divergente é descartado
+        self.assertIsNot(catalogo(), antigo)
+        self.assertIn(nova.id, catalogo().ids_ativos)
+    
+    def test_save_troca_a_versao(self):
+        antigo = catalogo()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fiscal.nome = 'Fiscal e Tributária'
+            self.fiscal.save()
+        self.assertIsNotNone(cache.get(CHAVE_VERSAO))
+        self.assertIsNot(catalogo(), antigo)
+        self.assertEqual(catalogo().get(self.fiscal.id).nome, 'Fiscal e Tributária')
+    
+    def test_outro_processo_recarrega_pela_versao(self):
+        outro = CatalogoEspecialidades()
+        self.assertIn(self.contabil.id, outro.atual().ids_ativos)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.contabil.ativa = False
+            self.contabil.save()
+        # Dentro do intervalo de verificação o snapshot antigo continua valendo
+        self.assertIn(self.contabil.id, outro.atual().ids_ativos)
+        
+        outro._verificar_em = 0.0
+        self.assertNotIn(self.contabil.id, outro.atual().ids_ativos)
@@ -0,0 +1,72 @@
+"""
+Testes da coluna normalizada de documento (somente dígitos)
+"""
+
+from importlib import import_module
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from ..models import Contador, Escritorio
+
+
+class TestDocumentoDigitos(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('pf', password='x')
+        self.contador = Contador.objects.create(
+            user=self.user, nome_completo='Maria Silva', tipo_pessoa='fisica',
+            documento='529.982.247-25', telefone_pessoal='11987654321', cargo='cliente_bpo',
+        )
+        self.escritorio = Escritorio.criar_via_cnpj('11.222.333/0001-81', {'razao_social': 'EMPRESA TESTE LTDA'})
+    
+    def test_save_preenche_digitos(self):
+        self.assertEqual(self.contador.documento_digitos, '52998224725')
+        self.assertEqual(self.escritorio.cnpj_digitos, '11222333000181')
+    
+    def test_existencia_em_qualquer_formato(self):
+        self.assertTrue(Contador.documento_em_uso('52998224725'))
+        self.assertTrue(Contador.documento_em_uso('529.982.247-25'))
+        self.assertTrue(Escritorio.cnpj_em_uso('11222333000181'))
+        self.assertFalse(Escritorio.cnpj_em_uso('11444777000161'))
+        self.assertFalse(Contador.documento_em_uso(''))
+    
+    def test_documento_duplicado_em_outro_formato_e_recusado(self):
+        with self.assertRaises(ValidationError):
+            Contador.objects.create(
+                user=User.objects.create_user('pf2', password='x'), nome_completo='Outra',
+                tipo_pessoa='fisica', documento='52998224725', telefone_pessoal='11987654322',
+                cargo='cliente_bpo',
+            )
+    
+    def test_backfill_ignora_duplicados(self):
+        migracao = import_module('apps.contadores.migrations.0005_documento_digitos')
+        # Simula dados legados: colunas vazias e o mesmo CNPJ em dois formatos
+        Escritorio.objects.update(cnpj_digitos=None)
+        Escritorio.objects.bulk_create([Escritorio(cnpj='11222333000181', razao_social='Duplicado')])
+        
+        migracao._preencher(Escritorio, 'cnpj_digitos', lambda e: e.cnpj, ['cnpj'])
+        
+        self.assertEqual(
+            list(Escritorio.objects.order_by('pk').values_list('cnpj_digitos', flat=True)),
+            ['11222333000181', None]
+        )
+    
+    def test_duplicado_legado_continua_editavel(self):
+        # Estado deixado pelo backfill: segundo registro do mesmo CPF com a coluna vazia
+        Contador.objects.bulk_create([Contador(
+            user=User.objects.create_user('legado', password='x'), nome_completo='Legado',
+            tipo_pessoa='fisica', documento='52998224725', telefone_pessoal='11987654322',
+            cargo='cliente_bpo',
+        )])
+        legado = Contador.objects.get(documento_digitos__isnull=True)
+        
+        legado.nome_completo = 'Legado Editado'
+        legado.save()
+        
+        legado.refresh_from_db()
+        self.assertEqual(legado.nome_completo, 'Legado Editado')
+        self.assertIsNone(legado.documento_digitos)
+        self.contador.refresh_from_db()
+        self.assertEqual(self.contador.documento_digitos, '52998224725')
@@ -0,0 +1,126 @@
+"""
+Testes da importação em massa de escritórios e contadores
+"""
+
+import io
+import os
+import random
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.receita.models import CEPLocal
+from ..importacao import ImportadorCadastros, ler_planilha
+from ..models import Contador, Escritorio
+from .test_validacao_documentos import gerar_cnpj, gerar_cpf
+
+
+def _csv(linhas, separador=';'):
+    return io.BytesIO('\n'.join(separador.join(linha) for linha in linhas).encode('utf-8'))
+
+
+class TestImportacao(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.rnd = random.Random(46)
+        cls.existente = Escritorio.criar_via_cnpj(gerar_cnpj(cls.rnd), {'razao_social': 'JA CADASTRADO LTDA'})
+    
+    def _importar(self, tipo, linhas, **kwargs):
+        return ImportadorCadastros(tipo, **kwargs).importar(ler_planilha(_csv(linhas), 'base.csv'))
+    
+    def test_escritorios_validos_e_rejeitados(self):
+        cnpj = gerar_cnpj(self.rnd)
+        resultado = self._importar('escritorio', [
+            ['CNPJ', 'Razão Social', 'Estado', 'Regime Tributário'],
+            [cnpj, 'NOVO ESCRITORIO LTDA', 'sp', 'Presumido'],
+            [cnpj, 'REPETIDO LTDA', 'SP', ''],
+            [self.existente.cnpj, 'OUTRO LTDA', '', ''],
+            ['11.111.111/1111-11', 'INVALIDO LTDA', '', ''],
+            [gerar_cnpj(self.rnd), '', '', ''],
+            [gerar_cnpj(self.rnd), 'ESTADO ERRADO LTDA', 'S1', ''],
+        ])
+        
+        self.assertEqual((resultado.lidas, resultado.importadas, resultado.rejeitadas), (6, 1, 5))
+        self.assertEqual([e['linha'] for e in resultado.erros], [3, 4, 5, 6, 7])
+        self.assertEqual(set(resultado.erros[3]['erros']), {'razao_social'})
+        novo = Escritorio.objects.get(cnpj_digitos=''.join(filter(str.isdigit, cnpj)))
+        self.assertEqual((novo.estado, novo.regime_tributario), ('SP', 'presumido'))
+    
+    def test_endereco_completado_pelo_cep(self):
+        CEPLocal.objects.create(
+            cep='01310100', logradouro='Avenida Paulista', bairro='Bela Vista',
+            cidade='São Paulo', uf='SP', referencia='2025-05',
+        )
+        cnpj = gerar_cnpj(self.rnd)
+        resultado = self._importar('escritorio', [
+            ['cnpj', 'razao_social', 'cep', 'bairro'],
+            [cnpj, 'ESCRITORIO PAULISTA LTDA', '01310-100', 'Cerqueira César'],
+        ])
+        
+        self.assertEqual(resultado.importadas, 1)
+        novo = Escritorio.objects.get(cnpj_digitos=''.join(filter(str.isdigit, cnpj)))
+        self.assertEqual(
+            (novo.logradouro, novo.bairro, novo.cidade, novo.estado),
+            ('Avenida Paulista', 'Cerqueira César', 'São Paulo', 'SP')
+        )
+    
+    def test_consultas_nao_crescem_com_o_lote(self):
+        def consultas(quantidade):
+            linhas = [['cnpj', 'razao_social']] + [
+                [gerar_cnpj(self.rnd), f'ESCRITORIO {i} LTDA'] for i in range(quantidade)
+            ]
+            with CaptureQueriesContext(connection) as contexto:
+                self.assertEqual(self._importar('escritorio', linhas).importadas, quantidade)
+            return len(contexto.captured_queries)
+        
+        self.assertEqual(consultas(5), consultas(20))
+    
+    def test_contadores_com_usuario_e_escritorio(self):
+        cpf = gerar_cpf(self.rnd)
+        resultado = self._importar('contador', [
+            ['documento', 'nome_completo', 'email', 'telefone_pessoal', 'cnpj_escritorio', 'crc'],
+            [cpf, 'Ana Souza', 'Ana@Cliente.com', '11987654321', self.existente.cnpj, ''],
+            [gerar_cpf(self.rnd), 'Bruno Lima', 'ana@cliente.com', '11987654321', '', ''],
+            [gerar_cpf(self.rnd), 'Carla Dias', 'carla@cliente.com', '11987654321', gerar_cnpj(self.rnd), ''],
+            [gerar_cpf(self.rnd), 'Davi Melo', 'davi@cliente.com', '11987654321', '', 'crc errado'],
+        ], lote=2)
+        
+        self.assertEqual((resultado.importadas, resultado.rejeitadas), (1, 3))
+        self.assertEqual(
+            [set(e['erros']) for e in resultado.erros],
+            [{'email'}, {'cnpj_escritorio'}, {'crc'}]
+        )
+        contador = Contador.objects.select_related('user').get(nome_completo='Ana Souza')
+        self.assertEqual(contador.escritorio, self.existente)
+        self.assertEqual((contador.cargo, contador.tipo_pessoa), ('cliente_bpo', 'fisica'))
+        self.assertEqual(contador.user.email, 'ana@cliente.com')
+        self.assertFalse(contador.user.has_usable_password())
+    
+    def test_endpoint_dry_run_e_comando(self):
+        linhas = [['cnpj', 'razao_social'], [gerar_cnpj(self.rnd), 'DRY RUN LTDA'], ['123', 'X']]
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        
+        response = client.post('/api/v1/contadores/importacao/', {
+            'tipo': 'escritorio', 'dry_run': 'true',
+            'arquivo': SimpleUploadedFile('base.csv', _csv(linhas, ',').getvalue()),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['validas'], response.data['importadas']), (1, 0))
+        self.assertFalse(Escritorio.objects.filter(razao_social='DRY RUN LTDA').exists())
+        
+        with tempfile.TemporaryDirectory() as pasta:
+            planilha, relatorio = os.path.join(pasta, 'base.csv'), os.path.join(pasta, 'erros.csv')
+            with open(planilha, 'wb') as arquivo:
+                arquivo.write(_csv(linhas).getvalue())
+            call_command('importar_cadastros', planilha, tipo='escritorio', erros=relatorio, stdout=io.StringIO())
+            with open(relatorio, encoding='utf-8') as arquivo:
+                self.assertEqual(arquivo.read().splitlines()[1].split(',')[:3], ['3', '123', 'cnpj'])
+        self.assertTrue(Escritorio.objects.filter(razao_social='DRY RUN LTDA').exists())
@@ -0,0 +1,74 @@
+"""
+Testes das listagens paginadas de contadores e escritórios
+"""
+
+import random
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..models import Contador, Escritorio
+from .test_validacao_documentos import gerar_cnpj, gerar_cpf
+
+
+class TestListagens(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(11)
+        cls.escritorios = []
+        for i in range(6):
+            escritorio = Escritorio.criar_via_cnpj(gerar_cnpj(rnd), {
+                'razao_social': f'ESCRITORIO {i} LTDA',
+                'endereco': {'uf': 'SP' if i % 2 else 'RJ'},
+            })
+            cls.escritorios.append(escritorio)
+        for i in range(12):
+            Contador.objects.create(
+                user=User.objects.create_user(f'cliente{i}', password='x'),
+                escritorio=cls.escritorios[i % 6], nome_completo=f'Cliente {i}',
+                tipo_pessoa='fisica', documento=gerar_cpf(rnd), telefone_pessoal='11987654321',
+                cargo='cliente_bpo', ativo=i % 4 != 0,
+            )
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def _todas_as_paginas(self, url, params):
+        ids, consultas = [], []
+        response = self.client.get(url, {**params, 'page_size': 5})
+        while True:
+            self.assertEqual(response.status_code, 200, response.data)
+            ids += [item['id'] for item in response.data['results']]
+            if not response.data['next']:
+                return ids
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data['next'])
+    
+    def test_contadores_paginados_e_filtrados(self):
+        ids = self._todas_as_paginas('/api/v1/contadores/', {'ativo': 'true', 'estado': 'SP'})
+        esperados = Contador.objects.filter(ativo=True, escritorio__estado='SP').order_by('-id')
+        self.assertEqual(ids, list(esperados.values_list('id', flat=True)))
+    
+    def test_escritorios_paginados(self):
+        ids = self._todas_as_paginas('/api/v1/contadores/escritorios/', {'estado': 'rj'})
+        self.assertEqual(len(ids), 3)
+        response = self.client.get('/api/v1/contadores/escritorios/', {'estado': 'RJ'})
+        self.assertEqual(response.data['results'][0]['total_contadores'], 1)
+    
+    def test_filtro_invalido(self):
+        response = self.client.get('/api/v1/contadores/', {'tipo_pessoa': 'outra', 'ativo': 'talvez'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {'tipo_pessoa', 'ativo'})
+    
+    def test_somente_staff(self):
+        self.client.force_authenticate(User.objects.create_user('comum', password='x'))
+        self.assertEqual(self.client.get('/api/v1/contadores/').status_code, 403)
+    
+    def test_listagem_com_fields(self):
+        response = self.client.get('/api/v1/contadores/', {'fields': 'id,tipo_cliente', 'page_size': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([set(item) for item in response.data['results']], [{'id', 'tipo_cliente'}] * 3)
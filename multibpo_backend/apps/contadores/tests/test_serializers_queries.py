@@ -0,0 +1,86 @@
+"""
+Testes de número de consultas dos serializers em listagens
+"""
+
+import random
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..catalogo import catalogo
+from ..models import Contador, Escritorio, Especialidade
+from ..serializers import (
+    ContadorPerfilSerializer,
+    ContadorResumoSerializer,
+    EscritorioResumoSerializer,
+    EscritorioSerializer,
+    EspecialidadeSerializer,
+    contadores_para_perfil,
+    contadores_para_resumo,
+    escritorios_com_totais,
+    especialidades_com_totais,
+)
+from .test_validacao_documentos import gerar_cnpj, gerar_cpf
+
+
+class TestSerializersSemConsultaPorObjeto(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(3)
+        ativa = Especialidade.objects.create(nome='Contabilidade Geral', codigo='CONT_GERAL', area_principal='contabil')
+        inativa = Especialidade.objects.create(nome='Perícia', codigo='PERICIA', area_principal='pericial', ativa=False)
+        escritorios = [
+            Escritorio.criar_via_cnpj(gerar_cnpj(rnd), {'razao_social': f'ESCRITORIO {i} LTDA'})
+            for i in range(2)
+        ]
+        for i in range(6):
+            contador = Contador.objects.create(
+                user=User.objects.create_user(f'contador{i}', password='x'),
+                escritorio=escritorios[i % 2], nome_completo=f'Contador {i}', tipo_pessoa='fisica',
+                documento=gerar_cpf(rnd), telefone_pessoal='11987654321', ativo=i != 5,
+                crc=f'CRC-SP {100000 + i}/O-1' if i % 2 else None, crc_estado='SP' if i % 2 else '',
+            )
+            if i % 3:
+                contador.especialidades.set([ativa, inativa] if i % 3 == 2 else [inativa])
+    
+    def _assert_igual_sem_factory(self, serializer, factory, queryset, consultas):
+        catalogo()  # especialidades: carregadas uma vez por processo
+        with self.assertNumQueries(consultas):
+            otimizado = serializer(factory(queryset.order_by('pk')), many=True).data
+        self.assertEqual(otimizado, serializer(queryset.order_by('pk'), many=True).data)
+    
+    def test_contador_perfil(self):
+        self._assert_igual_sem_factory(ContadorPerfilSerializer, contadores_para_perfil, Contador.objects.all(), 2)
+    
+    def test_contador_resumo(self):
+        self._assert_igual_sem_factory(ContadorResumoSerializer, contadores_para_resumo, Contador.objects.all(), 1)
+    
+    def test_escritorio(self):
+        self._assert_igual_sem_factory(EscritorioSerializer, escritorios_com_totais, Escritorio.objects.all(), 1)
+        self._assert_igual_sem_factory(EscritorioResumoSerializer, escritorios_com_totais, Escritorio.objects.all(), 1)
+    
+    def test_especialidade(self):
+        self._assert_igual_sem_factory(EspecialidadeSerializer, especialidades_com_totais, Especialidade.objects.all(), 1)
+    
+    def test_sparse_fieldsets(self):
+        campos = ContadorPerfilSerializer.selecionar('id,nome_completo,tipo_cliente,inexistente')
+        self.assertEqual(campos, {'id', 'nome_completo', 'tipo_cliente'})
+        
+        with self.assertNumQueries(1):
+            dados = ContadorPerfilSerializer(
+                contadores_para_perfil(campos=campos).order_by('pk'), many=True, fields=campos
+            ).data
+        self.assertEqual(set(dados[0]), campos)
+        
+        omitidos = {'especialidades_detalhes', 'status_completo', 'escritorio_detalhes'}
+        campos = ContadorPerfilSerializer.selecionar(omitir=omitidos)
+        completo = ContadorPerfilSerializer(Contador.objects.order_by('pk'), many=True).data
+        with self.assertNumQueries(1):
+            dados = ContadorPerfilSerializer(
+                contadores_para_perfil(campos=campos).order_by('pk'), many=True, omit=omitidos
+            ).data
+        self.assertEqual(
+            [dict(d) for d in dados],
+            [{k: v for k, v in d.items() if k not in omitidos} for d in completo]
+        )
@@ -0,0 +1,56 @@
+"""
+Testes das colunas desnormalizadas e consultas de servicos_contratados
+"""
+
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..models import Contador
+from .test_validacao_documentos import gerar_cpf
+
+
+class TestServicosContratados(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(47)
+        
+        def cliente(nome, servicos):
+            return Contador.objects.create(
+                user=User.objects.create_user(nome, password='x'), nome_completo=nome,
+                tipo_pessoa='fisica', documento=gerar_cpf(rnd), telefone_pessoal='11987654321',
+                cargo='cliente_bpo', servicos_contratados=servicos,
+            )
+        
+        cls.fiscal = cliente('fiscal', [
+            {'nome': 'Apuração', 'categoria': 'fiscal', 'valor_mensal': 350.5},
+            {'nome': 'Folha', 'categoria': 'folha', 'valor_mensal': 200, 'ativo': False},
+        ])
+        cls.folha = cliente('folha', [{'nome': 'Folha', 'categoria': 'folha', 'valor_mensal': '120.00'}])
+        cls.sem_servicos = cliente('sem', [])
+    
+    def test_colunas_calculadas_no_save(self):
+        self.assertEqual(
+            (self.fiscal.servicos_ativos_count, self.fiscal.valor_total_mensal), (1, Decimal('350.50'))
+        )
+        self.assertTrue(all('ativo' in s and 'categoria' in s for s in self.fiscal.servicos_contratados))
+        
+        self.folha.servicos_contratados[0]['ativo'] = False
+        self.folha.save(update_fields=['servicos_contratados'])
+        self.folha.refresh_from_db()
+        self.assertEqual((self.folha.servicos_ativos_count, self.folha.valor_total_mensal), (0, Decimal('0')))
+    
+    def test_consulta_por_categoria_e_status(self):
+        self.assertEqual(list(Contador.objects.com_servico(categoria='fiscal')), [self.fiscal])
+        self.assertEqual(
+            set(Contador.objects.com_servico(categoria='folha')), {self.folha}
+        )
+        self.assertEqual(list(Contador.objects.com_servico(categoria='folha', ativo=False)), [self.fiscal])
+    
+    def test_resumo_faturamento(self):
+        self.assertEqual(Contador.objects.resumo_faturamento(), {
+            'clientes': 2, 'servicos_ativos': 2, 'valor_total_mensal': Decimal('470.50'),
+        })
@@ -0,0 +1,101 @@
+"""
+Testes do núcleo de validação de CPF/CNPJ (dígitos e existência em lote)
+"""
+
+import random
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..models import Contador, Escritorio
+from ..validators import documentos
+from ..validators.documentos import (
+    cache_existencia, cnpj_valido, cpf_valido, validar_digitos, validar_documentos,
+)
+
+
+def _gerar(base, pesos_1, pesos_2):
+    def dv(digitos, pesos):
+        resto = sum(int(d) * p for d, p in zip(digitos, pesos)) % 11
+        return '0' if resto < 2 else str(11 - resto)
+    base += dv(base, pesos_1)
+    return base + dv(base, pesos_2)
+
+
+def gerar_cpf(rnd):
+    return _gerar(''.join(rnd.choice('0123456789') for _ in range(9)), documentos.PESOS_CPF_1, documentos.PESOS_CPF_2)
+
+
+def gerar_cnpj(rnd):
+    return _gerar(''.join(rnd.choice('0123456789') for _ in range(8)) + '0001',
+                  documentos.PESOS_CNPJ_1, documentos.PESOS_CNPJ_2)
+
+
+class TestDigitosVerificadores(TestCase):
+    
+    def test_documentos_conhecidos(self):
+        self.assertTrue(cpf_valido('52998224725'))
+        self.assertFalse(cpf_valido('52998224724'))
+        self.assertFalse(cpf_valido('11111111111'))
+        self.assertTrue(cnpj_valido('11222333000181'))
+        self.assertFalse(cnpj_valido('11222333000180'))
+    
+    def test_resultado_mantem_ordem_e_formata(self):
+        resultados = validar_digitos(['11.222.333/0001-81', '123', '529.982.247-25'])
+        self.assertEqual([r.tipo for r in resultados], ['cnpj', None, 'cpf'])
+        self.assertEqual(resultados[0].formatado, '11.222.333/0001-81')
+        self.assertFalse(resultados[1].valido)
+        self.assertEqual(resultados[2].digitos, '52998224725')
+    
+    @skipIf(documentos.np is None, 'numpy não instalado')
+    def test_numpy_equivale_ao_laco(self):
+        rnd = random.Random(42)
+        lote = []
+        for _ in range(300):
+            lote.append(gerar_cpf(rnd))
+            lote.append(gerar_cnpj(rnd))
+            # Dígito trocado: inválido na maioria dos casos
+            lote.append(gerar_cnpj(rnd)[:-1] + rnd.choice('0123456789'))
+        lote += ['00000000000', '11111111111111']
+        
+        vetorizado = [r.valido for r in validar_digitos(lote)]
+        laco = [cpf_valido(d) if len(d) == 11 else cnpj_valido(d) for d in lote]
+        self.assertEqual(vetorizado, laco)
+        self.assertFalse(vetorizado[-1])
+
+
+class TestExistenciaEmLote(TestCase):
+    
+    def setUp(self):
+        cache_existencia.lru.clear()
+        self.addCleanup(cache_existencia.lru.clear)
+        Contador.objects.create(
+            user=User.objects.create_user('pf', password='x'), nome_completo='Maria Silva',
+            tipo_pessoa='fisica', documento='529.982.247-25', telefone_pessoal='11987654321',
+            cargo='cliente_bpo',
+        )
+        Escritorio.criar_via_cnpj('11.222.333/0001-81', {'razao_social': 'EMPRESA TESTE LTDA'})
+    
+    def test_lote_com_uma_consulta(self):
+        rnd = random.Random(7)
+        lote = ['529.982.247-25', '11222333000181'] + [gerar_cnpj(rnd) for _ in range(50)]
+        with self.assertNumQueries(1):
+            resultados = validar_documentos(lote, usar_cache=False)
+        self.assertEqual([r.disponivel for r in resultados[:2]], [False, False])
+        self.assertTrue(all(r.disponivel for r in resultados[2:]))
+    
+    def test_cache_evita_segunda_consulta(self):
+        validar_documentos(['11.444.777/0001-61'])
+        with self.assertNumQueries(0):
+            resultado = validar_documentos(['11444777000161'])[0]
+        self.assertTrue(resultado.disponivel)
+    
+    def test_cadastro_invalida_cache(self):
+        self.assertTrue(validar_documentos(['11.444.777/0001-61'])[0].disponivel)
+        Escritorio.criar_via_cnpj('11.444.777/0001-61', {'razao_social': 'OUTRA LTDA'})
+        self.assertFalse(validar_documentos(['11.444.777/0001-61'])[0].disponivel)
+    
+    def test_lote_sem_cache_nao_grava_no_cache(self):
+        validar_documentos(['11.444.777/0001-61'], usar_cache=False)
+        self.assertIsNone(cache_existencia.obter('11444777000161'))
@@ -4,8 +4,11 @@ from . import views
 app_name = 'contadores'
 
 urlpatterns = [
-    # Endpoints de contadores (serão implementados na Mini-Fase 2.2)
-    # path('escritorios/', views.EscritorioListView.as_view(), name='escritorio-list'),
+    # Listagens paginadas (back office)
+    path('', views.ContadorListView.as_view(), name='contador-list'),
+    path('escritorios/', views.EscritorioListView.as_view(), name='escritorio-list'),
+    path('autocomplete/', views.AutocompleteView.as_view(), name='autocomplete'),
+    path('importacao/', views.ImportacaoView.as_view(), name='importacao'),
     # path('especialidades/', views.EspecialidadeListView.as_view(), name='especialidade-list'),
     
     # Por enquanto, apenas um placeholder
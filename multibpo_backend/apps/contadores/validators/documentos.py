@@ -0,0 +1,236 @@
+"""
+Núcleo de validação de CPF/CNPJ
+Dígitos verificadores de um documento ou de um lote inteiro (vetorizado com
+NumPy a partir de LIMIAR_VETORIZADO) e verificação de existência com uma
+consulta indexada por lote nas colunas só com dígitos.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy é opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+PESOS_CPF_1 = list(range(10, 1, -1))
+PESOS_CPF_2 = list(range(11, 1, -1))
+PESOS_CNPJ_1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+PESOS_CNPJ_2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+
+# Abaixo disso o laço em Python é mais rápido que montar as matrizes
+LIMIAR_VETORIZADO = 256
+
+# Parâmetros por consulta de existência (folga para o limite do SQLite)
+LOTE_CONSULTA = 900
+
+
+@dataclass
+class ResultadoDocumento:
+    """Resultado da validação de um documento"""
+
+    entrada: str
+    digitos: str
+    tipo: Optional[str]
+    valido: bool
+    formatado: str = ''
+    erro: str = ''
+    disponivel: Optional[bool] = None
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+# ========== DÍGITOS VERIFICADORES ==========
+
+def _dv(digitos, pesos):
+    resto = sum(int(d) * p for d, p in zip(digitos, pesos)) % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+def cpf_valido(digitos: str) -> bool:
+    if len(digitos) != 11 or not digitos.isdigit() or digitos == digitos[0] * 11:
+        return False
+    return (_dv(digitos[:9], PESOS_CPF_1) == int(digitos[9])
+            and _dv(digitos[:10], PESOS_CPF_2) == int(digitos[10]))
+
+
+def cnpj_valido(digitos: str) -> bool:
+    if len(digitos) != 14 or not digitos.isdigit() or digitos == digitos[0] * 14:
+        return False
+    return (_dv(digitos[:12], PESOS_CNPJ_1) == int(digitos[12])
+            and _dv(digitos[:13], PESOS_CNPJ_2) == int(digitos[13]))
+
+
+def _dvs_validos_numpy(documentos: List[str], pesos_1, pesos_2) -> List[bool]:
+    """Verifica os dois DVs de documentos do mesmo tamanho de uma vez"""
+    tamanho = len(pesos_2) + 1
+    matriz = (
+        np.frombuffer(''.join(documentos).encode('ascii'), dtype=np.uint8)
+        .reshape(-1, tamanho)
+        .astype(np.int32) - ord('0')
+    )
+
+    def dv(colunas, pesos):
+        resto = (matriz[:, :colunas] @ np.array(pesos, dtype=np.int32)) % 11
+        return np.where(resto < 2, 0, 11 - resto)
+
+    validos = (dv(tamanho - 2, pesos_1) == matriz[:, -2]) & (dv(tamanho - 1, pesos_2) == matriz[:, -1])
+    repetidos = (matriz == matriz[:, :1]).all(axis=1)
+    return (validos & ~repetidos).tolist()
+
+
+def formatar(digitos: str) -> str:
+    if len(digitos) == 11:
+        return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+    if len(digitos) == 14:
+        return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+    return digitos
+
+
+def _resultado(entrada, digitos, valido) -> ResultadoDocumento:
+    tipo = 'cpf' if len(digitos) == 11 else 'cnpj'
+    if valido:
+        return ResultadoDocumento(entrada, digitos, tipo, True, formatar(digitos))
+    return ResultadoDocumento(entrada, digitos, tipo, False, erro=f"{tipo.upper()} inválido")
+
+
+def validar_digitos(documentos: Iterable[str]) -> List[ResultadoDocumento]:
+    """
+    Valida formato e dígitos verificadores, sem acesso ao banco
+
+    Lotes grandes usam NumPy (quando instalado); a ordem da entrada é mantida.
+    """
+    entradas = [str(doc or '') for doc in documentos]
+    resultados: List[Optional[ResultadoDocumento]] = [None] * len(entradas)
+    grupos = {11: [], 14: []}
+
+    for indice, entrada in enumerate(entradas):
+        digitos = re.sub(r'[^0-9]', '', entrada)
+        if len(digitos) in grupos:
+            grupos[len(digitos)].append((indice, digitos))
+        else:
+            resultados[indice] = ResultadoDocumento(
+                entrada, digitos, None, False,
+                erro="Documento deve ter 11 dígitos (CPF) ou 14 dígitos (CNPJ)"
+            )
+
+    for tamanho, itens in grupos.items():
+        if not itens:
+            continue
+        digitos = [d for _, d in itens]
+        if np is not None and len(itens) >= LIMIAR_VETORIZADO:
+            pesos = (PESOS_CPF_1, PESOS_CPF_2) if tamanho == 11 else (PESOS_CNPJ_1, PESOS_CNPJ_2)
+            validos = _dvs_validos_numpy(digitos, *pesos)
+        else:
+            funcao = cpf_valido if tamanho == 11 else cnpj_valido
+            validos = [funcao(d) for d in digitos]
+        for (indice, doc), valido in zip(itens, validos):
+            resultados[indice] = _resultado(entradas[indice], doc, valido)
+
+    return resultados
+
+
+# ========== EXISTÊNCIA ==========
+
+def documentos_cadastrados(digitos: Iterable[str]) -> set:
+    """
+    Dígitos (entre os informados) já cadastrados em Contador ou Escritorio
+
+    Uma consulta (UNION nos dois índices únicos) a cada LOTE_CONSULTA documentos.
+    """
+    from ..models import Contador, Escritorio
+
+    pendentes = sorted(set(d for d in digitos if d))
+    encontrados = set()
+    for inicio in range(0, len(pendentes), LOTE_CONSULTA):
+        lote = pendentes[inicio:inicio + LOTE_CONSULTA]
+        cnpjs = [d for d in lote if len(d) == 14]
+        consulta = (
+            Contador.objects.filter(documento_digitos__in=lote)
+            .order_by().values_list('documento_digitos', flat=True)
+        )
+        if cnpjs:
+            consulta = consulta.union(
+                Escritorio.objects.filter(cnpj_digitos__in=cnpjs)
+                .order_by().values_list('cnpj_digitos', flat=True)
+            )
+        encontrados.update(consulta)
+    return encontrados
+
+
+class CacheExistencia:
+    """
+    Cache curto de existência por documento (por processo)
+
+    Na digitação o mesmo documento é validado várias vezes seguidas; o
+    cadastro refaz a verificação, então alguns segundos de atraso são aceitáveis.
+    """
+
+    def __init__(self, maxsize=4096):
+        from apps.receita.cache import LRUCache
+        self.lru = LRUCache(maxsize)
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, 'DOCUMENTO_VALIDACAO_CACHE_TTL', 30)
+
+    def obter(self, digitos) -> Optional[bool]:
+        item = self.lru.get(digitos)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def salvar(self, digitos, existe: bool):
+        self.lru.set(digitos, (time.monotonic() + self.ttl, existe))
+
+    def invalidar(self, digitos):
+        self.lru.delete(digitos)
+
+
+cache_existencia = CacheExistencia()
+
+
+def validar_documentos(documentos: Iterable[str], verificar_existencia: bool = True,
+                       usar_cache: bool = True) -> List[ResultadoDocumento]:
+    """
+    Valida um ou mais documentos e marca os já cadastrados
+
+    Args:
+        usar_cache: False para importações em massa (não polui o cache
+            da validação em tempo real)
+
+    Returns:
+        ResultadoDocumento por entrada, na mesma ordem; `disponivel` só é
+        preenchido para documentos válidos quando verificar_existencia=True
+    """
+    resultados = validar_digitos(documentos)
+    if not verificar_existencia:
+        return resultados
+
+    validos = [r for r in resultados if r.valido]
+    consultar = set()
+    for resultado in validos:
+        existe = cache_existencia.obter(resultado.digitos) if usar_cache else None
+        if existe is None:
+            consultar.add(resultado.digitos)
+        else:
+            resultado.disponivel = not existe
+
+    if consultar:
+        cadastrados = documentos_cadastrados(consultar)
+        if usar_cache:
+            for digitos in consultar:
+                cache_existencia.salvar(digitos, digitos in cadastrados)
+        for resultado in validos:
+            if resultado.disponivel is None:
+                resultado.disponivel = resultado.digitos not in cadastrados
+
+    return resultados
@@ -1,8 +1,22 @@
 from django.shortcuts import render
 from django.http import JsonResponse
+from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .busca import TAMANHO_MINIMO, autocompletar
+from .importacao import TIPOS, FormatoInvalido, ImportadorCadastros, ler_planilha
+from .models import Contador, Escritorio
+from .pagination import CursorPaginacao
+from .serializers import (
+    ContadorResumoSerializer,
+    EscritorioResumoSerializer,
+    contadores_para_resumo,
+    escritorios_com_totais,
+)
 
 # View temporária para teste - SEM autenticação
 @api_view(['GET'])
@@ -18,4 +32,228 @@ def test_view(request):
         'version': '2.1',
         'models_ready': False,  # Será True após implementar models
         'admin_ready': False    # Será True após configurar admin
-    })
\ No newline at end of file
+    })
+
+# ========== FILTROS ==========
+
+class FiltroInvalido(Exception):
+    def __init__(self, erros):
+        super().__init__(erros)
+        self.erros = erros
+
+
+def _booleano(valor):
+    valor = valor.strip().lower()
+    if valor in ('true', '1', 'sim'):
+        return True
+    if valor in ('false', '0', 'nao', 'não'):
+        return False
+    raise ValueError("Use true ou false.")
+
+
+def _inteiro(valor):
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError("Informe um número inteiro.")
+
+
+def _escolha(choices, maiusculas=False):
+    validas = {chave for chave, _ in choices}
+
+    def converter(valor):
+        valor = valor.strip().upper() if maiusculas else valor.strip().lower()
+        if valor not in validas:
+            raise ValueError(f"Valores aceitos: {', '.join(sorted(validas))}.")
+        return valor
+    return converter
+
+
+def _uf(valor):
+    valor = valor.strip().upper()
+    if len(valor) != 2 or not valor.isalpha():
+        raise ValueError("UF deve ter 2 letras.")
+    return valor
+
+
+class ListagemFiltradaMixin:
+    """
+    Filtros por querystring limitados a colunas indexadas
+
+    `filtros` mapeia parâmetro -> (lookup, conversor); valor inválido gera
+    400 no formato padrão de erro da API.
+    """
+    
+    filtros = {}
+    
+    def filtrar(self, queryset):
+        erros = {}
+        for parametro, (lookup, converter) in self.filtros.items():
+            valor = self.request.query_params.get(parametro)
+            if valor in (None, ''):
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: converter(valor)})
+            except ValueError as e:
+                erros[parametro] = [str(e)]
+        if erros:
+            raise FiltroInvalido(erros)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except FiltroInvalido as e:
+            return Response({
+                'success': False,
+                'message': 'Filtros inválidos.',
+                'errors': e.erros,
+                'error_code': 'VALIDATION_ERROR'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+
+# ========== LISTAGENS (BACK OFFICE) ==========
+
+class ContadorListView(ListagemFiltradaMixin, generics.ListAPIView):
+    """
+    Listagem de contadores e clientes BPO
+    
+    GET /api/v1/contadores/?tipo_pessoa=juridica&ativo=true&estado=SP&cursor=...
+    
+    Paginação por cursor (keyset) e queryset com número fixo de consultas.
+    """
+    
+    permission_classes = [IsAdminUser]
+    serializer_class = ContadorResumoSerializer
+    pagination_class = CursorPaginacao
+    filtros = {
+        'tipo_pessoa': ('tipo_pessoa', _escolha(Contador.TIPO_PESSOA_CHOICES)),
+        'ativo': ('ativo', _booleano),
+        'escritorio': ('escritorio_id', _inteiro),
+        'estado': ('escritorio__estado', _uf),
+    }
+    
+    def get_queryset(self):
+        campos = self.get_serializer_class().selecionar_da_requisicao(self.request)
+        return contadores_para_resumo(self.filtrar(Contador.objects.all()), campos=campos)
+
+
+class EscritorioListView(ListagemFiltradaMixin, generics.ListAPIView):
+    """
+    Listagem de escritórios
+    
+    GET /api/v1/contadores/escritorios/?estado=SP&regime_tributario=simples&situacao_cadastral=ativa&cursor=...
+    """
+    
+    permission_classes = [IsAdminUser]
+    serializer_class = EscritorioResumoSerializer
+    pagination_class = CursorPaginacao
+    filtros = {
+        'estado': ('estado', _uf),
+        'regime_tributario': ('regime_tributario', _escolha(Escritorio.REGIME_CHOICES)),
+        'situacao_cadastral': ('situacao_cadastral', _escolha(Escritorio.SITUACAO_CHOICES)),
+        'ativo': ('ativo', _booleano),
+    }
+    
+    def get_queryset(self):
+        campos = self.get_serializer_class().selecionar_da_requisicao(self.request)
+        return escritorios_com_totais(self.filtrar(Escritorio.objects.all()), campos=campos)
+
+
+# ========== AUTOCOMPLETE (SUPORTE) ==========
+
+class AutocompleteView(APIView):
+    """
+    Sugestões por nome de escritórios e contadores
+    
+    GET /api/v1/contadores/autocomplete/?q=contabil sao jose&tipo=escritorio&limite=10
+    
+    Tolera acentos e erros de digitação (trigram no PostgreSQL); resultados
+    ordenados pela similaridade.
+    """
+    
+    permission_classes = [IsAdminUser]
+    TIPOS = ('todos', 'escritorio', 'contador')
+    LIMITE_MAXIMO = 50
+    
+    def get(self, request):
+        termo = request.query_params.get('q', '').strip()
+        tipo = request.query_params.get('tipo', 'todos').strip().lower()
+        erros = {}
+        
+        if len(termo) < TAMANHO_MINIMO:
+            erros['q'] = [f"Informe pelo menos {TAMANHO_MINIMO} caracteres."]
+        if tipo not in self.TIPOS:
+            erros['tipo'] = [f"Valores aceitos: {', '.join(self.TIPOS)}."]
+        try:
+            limite = min(max(int(request.query_params.get('limite', 10)), 1), self.LIMITE_MAXIMO)
+        except ValueError:
+            erros['limite'] = ["Informe um número inteiro."]
+        
+        if erros:
+            return Response({
+                'success': False,
+                'message': 'Parâmetros inválidos.',
+                'errors': erros,
+                'error_code': 'VALIDATION_ERROR'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'success': True,
+            'resultados': autocompletar(termo, tipo=tipo, limite=limite),
+        })
+
+
+# ========== IMPORTAÇÃO EM MASSA ==========
+
+class ImportacaoView(APIView):
+    """
+    Importação de escritórios ou contadores por planilha
+    
+    POST /api/v1/contadores/importacao/ (multipart)
+        arquivo: .csv ou .xlsx com cabeçalho
+        tipo: escritorio | contador
+        receita: true para completar escritórios com a Receita (consulta em lote)
+        dry_run: true para só validar
+    
+    Para bases muito grandes prefira o comando importar_cadastros.
+    """
+    
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+    MAX_ERROS_RESPOSTA = 500
+    
+    def post(self, request):
+        arquivo = request.FILES.get('arquivo')
+        tipo = request.data.get('tipo', '')
+        erros = {}
+        if not arquivo:
+            erros['arquivo'] = ["Envie a planilha (.csv ou .xlsx)."]
+        if tipo not in TIPOS:
+            erros['tipo'] = [f"Valores aceitos: {', '.join(TIPOS)}."]
+        if erros:
+            return self._erro('Parâmetros inválidos.', erros)
+        
+        importador = ImportadorCadastros(
+            tipo,
+            enriquecer_receita=str(request.data.get('receita', '')).lower() == 'true',
+            simular=str(request.data.get('dry_run', '')).lower() == 'true',
+        )
+        try:
+            resultado = importador.importar(ler_planilha(arquivo, arquivo.name))
+        except FormatoInvalido as e:
+            return self._erro('Planilha inválida.', {'arquivo': [str(e)]})
+        
+        return Response({
+            'success': True,
+            'dry_run': importador.simular,
+            **resultado.as_dict(max_erros=self.MAX_ERROS_RESPOSTA),
+        }, status=status.HTTP_200_OK)
+    
+    def _erro(self, message, erros):
+        return Response({
+            'success': False,
+            'message': message,
+            'errors': erros,
+            'error_code': 'VALIDATION_ERROR'
+        }, status=status.HTTP_400_BAD_REQUEST)
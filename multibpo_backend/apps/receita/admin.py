@@ -1,3 +1,38 @@
 from django.contrib import admin
 
-# Register your models here.
+from config.admin_paginacao import TabelaGrandeAdminMixin
+
+from .models import CEPConsulta, CEPLocal, CNPJConsulta, ReceitaImportacao
+
+
+@admin.register(CNPJConsulta)
+class CNPJConsultaAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
+    list_display = ['cnpj', 'encontrado', 'fonte', 'consultado_em']
+    list_filter = ['encontrado', 'fonte']
+    search_fields = ['cnpj']
+    readonly_fields = ['cnpj', 'encontrado', 'fonte', 'dados', 'consultado_em']
+
+
+@admin.register(ReceitaImportacao)
+class ReceitaImportacaoAdmin(admin.ModelAdmin):
+    list_display = ['referencia', 'arquivo', 'tipo', 'status', 'linhas_processadas', 'atualizado_em', 'concluido_em']
+    list_filter = ['referencia', 'tipo', 'status']
+    search_fields = ['arquivo']
+    readonly_fields = ['referencia', 'arquivo', 'tipo', 'tamanho', 'linhas_processadas', 'erro',
+                       'iniciado_em', 'atualizado_em', 'concluido_em']
+
+
+@admin.register(CEPLocal)
+class CEPLocalAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
+    list_display = ['cep', 'logradouro', 'bairro', 'cidade', 'uf', 'referencia']
+    list_filter = ['uf']
+    search_fields = ['=cep']
+    readonly_fields = ['cep', 'logradouro', 'complemento', 'bairro', 'cidade', 'uf', 'ibge', 'referencia']
+
+
+@admin.register(CEPConsulta)
+class CEPConsultaAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
+    list_display = ['cep', 'encontrado', 'fonte', 'consultado_em']
+    list_filter = ['encontrado', 'fonte']
+    search_fields = ['=cep']
+    readonly_fields = ['cep', 'encontrado', 'fonte', 'dados', 'consultado_em']
@@ -0,0 +1,166 @@
+"""
+Cache de consultas de CNPJ em dois níveis
+LRU em memória (por processo) na frente da tabela receita_cnpj_consultas
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EntradaCNPJ:
+    """Entrada do cache (positiva ou negativa)"""
+
+    cnpj: str
+    encontrado: bool
+    dados: Dict[str, Any]
+    fonte: str
+    consultado_em: datetime
+
+    def idade(self, agora: Optional[datetime] = None) -> timedelta:
+        return (agora or timezone.now()) - self.consultado_em
+
+    def fresca(self, ttl: int, ttl_negativo: int, agora: Optional[datetime] = None) -> bool:
+        limite = ttl if self.encontrado else ttl_negativo
+        return self.idade(agora) <= timedelta(seconds=limite)
+
+
+class LRUCache:
+    """LRU thread-safe simples baseado em OrderedDict"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            valor = self._dados.get(chave)
+            if valor is not None:
+                self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def delete(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+
+class CNPJCache:
+    """
+    Cache de CNPJ em dois níveis (LRU + banco)
+
+    A leitura devolve a entrada mesmo vencida; quem decide entre usar,
+    revalidar ou servir vencida (serve-stale) é o ReceitaFederalService.
+    Falhas de banco nunca quebram a consulta: o cache apenas deixa de ajudar.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.lru = LRUCache(maxsize or getattr(settings, 'RECEITA_CACHE_LRU_SIZE', 2048))
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'RECEITA_CACHE_TTL', 7 * 24 * 3600)
+
+    @property
+    def ttl_negativo(self) -> int:
+        return getattr(settings, 'RECEITA_CACHE_NEGATIVE_TTL', 3600)
+
+    def fresca(self, entrada: EntradaCNPJ) -> bool:
+        return entrada.fresca(self.ttl, self.ttl_negativo)
+
+    def obter(self, cnpj: str) -> Optional[EntradaCNPJ]:
+        """Busca no LRU e, se não houver, no banco (promovendo ao LRU)"""
+        entrada = self.lru.get(cnpj)
+        if entrada is not None:
+            return entrada
+
+        from .models import CNPJConsulta
+
+        try:
+            registro = CNPJConsulta.objects.filter(cnpj=cnpj).first()
+        except DatabaseError as e:
+            logger.warning(f"Cache CNPJ indisponível no banco: {e}")
+            return None
+
+        if registro is None:
+            return None
+
+        entrada = EntradaCNPJ(
+            cnpj=registro.cnpj,
+            encontrado=registro.encontrado,
+            dados=registro.dados,
+            fonte=registro.fonte,
+            consultado_em=registro.consultado_em,
+        )
+        self.lru.set(cnpj, entrada)
+        return entrada
+
+    def salvar(self, cnpj: str, dados: Dict[str, Any], encontrado: bool = True,
+               consultado_em: Optional[datetime] = None) -> EntradaCNPJ:
+        """Grava nos dois níveis (write-through)"""
+        from .models import CNPJConsulta
+
+        entrada = EntradaCNPJ(
+            cnpj=cnpj,
+            encontrado=encontrado,
+            dados=dados if encontrado else {},
+            fonte=dados.get('fonte', '') if encontrado else '',
+            consultado_em=consultado_em or timezone.now(),
+        )
+        self.lru.set(cnpj, entrada)
+
+        try:
+            CNPJConsulta.objects.update_or_create(
+                cnpj=cnpj,
+                defaults={
+                    'encontrado': entrada.encontrado,
+                    'dados': entrada.dados,
+                    'fonte': entrada.fonte,
+                    'consultado_em': entrada.consultado_em,
+                },
+            )
+        except DatabaseError as e:
+            logger.warning(f"Falha ao persistir cache do CNPJ {cnpj}: {e}")
+
+        return entrada
+
+    def salvar_negativo(self, cnpj: str) -> EntradaCNPJ:
+        """Registra "CNPJ não encontrado" com TTL curto"""
+        return self.salvar(cnpj, {}, encontrado=False)
+
+    def invalidar(self, cnpj: str):
+        from .models import CNPJConsulta
+
+        self.lru.delete(cnpj)
+        try:
+            CNPJConsulta.objects.filter(cnpj=cnpj).delete()
+        except DatabaseError as e:
+            logger.warning(f"Falha ao invalidar cache do CNPJ {cnpj}: {e}")
+
+
+# Instância por processo compartilhada pelos serviços
+cnpj_cache = CNPJCache()
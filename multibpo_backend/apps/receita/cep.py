@@ -0,0 +1,382 @@
+"""
+Consulta de CEP (logradouro, bairro, cidade e UF)
+MultiBPO - base local + cache em dois níveis + provedores externos opcionais
+
+Ordem de resolução de cada CEP:
+1. LRU do processo
+2. base local (CEPLocal, dataset offline carregado com importar_ceps)
+3. cache persistente das consultas externas (CEPConsulta), dentro do TTL
+4. provedores externos (BrasilAPI, ViaCEP), só com externo=True e
+   CEP_CONSULTA_EXTERNA ligado; cada provedor tem seu circuit breaker
+
+O cadastro usa externo=False: o endereço é completado só com o que já está
+no banco, sem latência de rede. consultar_lote faz uma consulta por nível
+a cada LOTE_CONSULTA CEPs (importação de planilhas).
+"""
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .cache import LRUCache
+from .resiliencia import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros por consulta (folga para o limite do SQLite)
+LOTE_CONSULTA = 900
+
+# Campos do Escritorio preenchidos pelo CEP (campo do model -> campo do resultado)
+CAMPOS_ESCRITORIO = {
+    'logradouro': 'logradouro',
+    'bairro': 'bairro',
+    'cidade': 'cidade',
+    'estado': 'uf',
+}
+
+
+class CEPNaoEncontrado(Exception):
+    """Provedor respondeu de forma definitiva que o CEP não existe"""
+    pass
+
+
+def limpar_cep(cep) -> str:
+    return re.sub(r'\D', '', str(cep or ''))
+
+
+def formatar_cep(digitos: str) -> str:
+    return f"{digitos[:5]}-{digitos[5:]}" if len(digitos) == 8 else digitos
+
+
+# ========== CACHE ==========
+
+@dataclass(frozen=True)
+class EntradaCEP:
+    """Entrada do cache (positiva ou negativa)"""
+
+    cep: str
+    encontrado: bool
+    dados: Dict[str, Any]
+    fonte: str
+    consultado_em: datetime
+
+    def fresca(self, ttl: int, ttl_negativo: int) -> bool:
+        limite = ttl if self.encontrado else ttl_negativo
+        return timezone.now() - self.consultado_em <= timedelta(seconds=limite)
+
+
+class CEPCache:
+    """
+    Cache de CEP em dois níveis (LRU + receita_cep_consultas)
+
+    Como no CNPJCache, falhas de banco nunca quebram a consulta. Resultados
+    da base local só vão para o LRU: a própria base já é a cópia persistente.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.lru = LRUCache(maxsize or getattr(settings, 'CEP_CACHE_LRU_SIZE', 4096))
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'CEP_CACHE_TTL', 90 * 24 * 3600)
+
+    @property
+    def ttl_negativo(self) -> int:
+        return getattr(settings, 'CEP_CACHE_NEGATIVE_TTL', 24 * 3600)
+
+    def fresca(self, entrada: EntradaCEP) -> bool:
+        return entrada.fresca(self.ttl, self.ttl_negativo)
+
+    def obter_do_banco(self, ceps) -> Dict[str, EntradaCEP]:
+        """Entradas gravadas (mesmo vencidas) para `ceps`, promovendo as frescas ao LRU"""
+        from .models import CEPConsulta
+
+        ceps = sorted(ceps)
+        entradas = {}
+        try:
+            for inicio in range(0, len(ceps), LOTE_CONSULTA):
+                for registro in CEPConsulta.objects.filter(cep__in=ceps[inicio:inicio + LOTE_CONSULTA]):
+                    entradas[registro.cep] = EntradaCEP(
+                        registro.cep, registro.encontrado, registro.dados, registro.fonte, registro.consultado_em
+                    )
+        except DatabaseError as e:
+            logger.warning(f"Cache de CEP indisponível no banco: {e}")
+
+        for entrada in entradas.values():
+            if self.fresca(entrada):
+                self.lru.set(entrada.cep, entrada)
+        return entradas
+
+    def salvar(self, cep: str, dados: Dict[str, Any], encontrado: bool = True,
+               persistir: bool = True) -> EntradaCEP:
+        """Grava no LRU e, com persistir=True, no banco (write-through)"""
+        from .models import CEPConsulta
+
+        entrada = EntradaCEP(
+            cep=cep,
+            encontrado=encontrado,
+            dados=dados if encontrado else {},
+            fonte=dados.get('fonte', '') if encontrado else '',
+            consultado_em=timezone.now(),
+        )
+        self.lru.set(cep, entrada)
+
+        if persistir:
+            try:
+                CEPConsulta.objects.update_or_create(
+                    cep=cep,
+                    defaults={
+                        'encontrado': entrada.encontrado,
+                        'dados': entrada.dados,
+                        'fonte': entrada.fonte,
+                        'consultado_em': entrada.consultado_em,
+                    },
+                )
+            except DatabaseError as e:
+                logger.warning(f"Falha ao persistir cache do CEP {cep}: {e}")
+
+        return entrada
+
+    def salvar_negativo(self, cep: str) -> EntradaCEP:
+        """Registra "CEP não encontrado" com TTL curto"""
+        return self.salvar(cep, {}, encontrado=False)
+
+
+# Instância por processo compartilhada pelos serviços
+cep_cache = CEPCache()
+
+
+# ========== SERVIÇO ==========
+
+class CEPService:
+    """Resolução de CEPs individual ou em lote"""
+
+    BRASILAPI_URL = "https://brasilapi.com.br/api/cep/v2"
+    VIACEP_URL = "https://viacep.com.br/ws"
+
+    # Breakers compartilhados entre instâncias (por processo)
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+
+    def __init__(self, cache=None):
+        self.timeout = getattr(settings, 'CEP_TIMEOUT', 3)
+        self.consulta_externa = getattr(settings, 'CEP_CONSULTA_EXTERNA', True)
+        self.cache = cache or cep_cache
+        self.headers = {
+            'User-Agent': 'MultiBPO/1.0 (Contabilidade)',
+            'Accept': 'application/json'
+        }
+
+    def consultar_cep(self, cep: str, externo: bool = True) -> Dict[str, Any]:
+        """
+        Endereço de um CEP
+
+        Args:
+            cep: CEP formatado ou apenas números
+            externo: False resolve só com a base local e o cache (sem rede)
+
+        Returns:
+            Dict com success, cep, logradouro, complemento, bairro, cidade,
+            uf, ibge e fonte; ou erro
+        """
+        digitos = limpar_cep(cep)
+        if len(digitos) != 8:
+            return self._error_response("CEP deve ter 8 dígitos")
+        return self.consultar_lote([digitos], externo=externo)[digitos]
+
+    def consultar_lote(self, ceps: Iterable[str], externo: bool = False,
+                       max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve vários CEPs com uma consulta por nível a cada LOTE_CONSULTA
+
+        Returns:
+            Resultado por CEP (chave: 8 dígitos; entradas inválidas ficam
+            com a chave original)
+        """
+        resultados = {}
+        pendentes = set()
+        for original in ceps:
+            digitos = limpar_cep(original)
+            if len(digitos) == 8:
+                pendentes.add(digitos)
+            elif original:
+                resultados[original] = self._error_response("CEP deve ter 8 dígitos")
+
+        # 1. LRU
+        for cep in list(pendentes):
+            entrada = self.cache.lru.get(cep)
+            if entrada is not None and self.cache.fresca(entrada):
+                resultados[cep] = self._resposta(entrada)
+                pendentes.discard(cep)
+
+        # 2. Base local
+        for cep, dados in self._consultar_local(pendentes).items():
+            resultados[cep] = self._resposta(self.cache.salvar(cep, dados, persistir=False))
+            pendentes.discard(cep)
+
+        # 3. Consultas externas anteriores
+        vencidas = {}
+        for cep, entrada in self.cache.obter_do_banco(pendentes).items():
+            if self.cache.fresca(entrada):
+                resultados[cep] = self._resposta(entrada)
+                pendentes.discard(cep)
+            else:
+                vencidas[cep] = entrada
+
+        # 4. Provedores externos (só rede nas threads; o cache é gravado aqui)
+        if pendentes and externo and self.consulta_externa:
+            ordem = sorted(pendentes)
+            if len(ordem) == 1:
+                respostas = [self._consultar_provedores(ordem[0])]
+            else:
+                workers = min(max_workers or getattr(settings, 'CEP_LOTE_WORKERS', 4), len(ordem))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cep') as executor:
+                    respostas = list(executor.map(self._consultar_provedores, ordem))
+            for cep, (situacao, dados) in zip(ordem, respostas):
+                if situacao == 'encontrado':
+                    resultados[cep] = self._resposta(self.cache.salvar(cep, dados))
+                elif situacao == 'nao_encontrado':
+                    resultados[cep] = self._resposta(self.cache.salvar_negativo(cep))
+                else:
+                    continue
+                pendentes.discard(cep)
+
+        for cep in pendentes:
+            # Provedores indisponíveis: vale a consulta vencida (serve-stale)
+            entrada = vencidas.get(cep)
+            resultados[cep] = self._resposta(entrada) if entrada is not None \
+                else self._error_response("CEP não encontrado")
+
+        return resultados
+
+    def _consultar_local(self, ceps) -> Dict[str, Dict[str, Any]]:
+        from .models import CEPLocal
+
+        ceps = sorted(ceps)
+        encontrados = {}
+        try:
+            for inicio in range(0, len(ceps), LOTE_CONSULTA):
+                for registro in CEPLocal.objects.filter(cep__in=ceps[inicio:inicio + LOTE_CONSULTA]):
+                    encontrados[registro.cep] = self._normalizar(
+                        'BaseLocal', registro.cep, registro.logradouro, registro.complemento,
+                        registro.bairro, registro.cidade, registro.uf, registro.ibge,
+                    )
+        except DatabaseError as e:
+            logger.warning(f"Base local de CEP indisponível: {e}")
+        return encontrados
+
+    def _consultar_provedores(self, cep: str):
+        """
+        Provedores em sequência, pulando os de circuito aberto
+
+        Returns:
+            (situacao, dados) com situacao em 'encontrado' | 'nao_encontrado' | 'falha'
+        """
+        nao_encontrado = False
+        for api_name, api_method in (('BrasilAPI', self._consultar_brasilapi), ('ViaCEP', self._consultar_viacep)):
+            breaker = self._breaker(api_name)
+            if not breaker.permitir():
+                continue
+
+            inicio = time.monotonic()
+            sucesso = False
+            try:
+                dados = api_method(cep)
+                sucesso = True
+            except CEPNaoEncontrado:
+                # Resposta definitiva: não conta como falha do provedor
+                sucesso = True
+                nao_encontrado = True
+                continue
+            except Exception as e:
+                logger.warning(f"Erro ao consultar CEP {cep} via {api_name}: {e}")
+                continue
+            finally:
+                breaker.registrar(sucesso, time.monotonic() - inicio)
+
+            logger.info(f"CEP {cep} encontrado via {api_name}")
+            return 'encontrado', dados
+
+        return ('nao_encontrado' if nao_encontrado else 'falha'), None
+
+    @classmethod
+    def _breaker(cls, api_name: str) -> CircuitBreaker:
+        """Circuit breaker do provedor (mesma configuração do RECEITA_BREAKER)"""
+        if api_name not in cls._breakers:
+            with cls._breakers_lock:
+                if api_name not in cls._breakers:
+                    cls._breakers[api_name] = CircuitBreaker(
+                        f'CEP {api_name}', **getattr(settings, 'RECEITA_BREAKER', {})
+                    )
+        return cls._breakers[api_name]
+
+    def _consultar_brasilapi(self, cep: str) -> Dict[str, Any]:
+        response = requests.get(f"{self.BRASILAPI_URL}/{cep}", headers=self.headers, timeout=self.timeout)
+        if response.status_code == 404:
+            raise CEPNaoEncontrado(cep)
+        response.raise_for_status()
+        data = response.json()
+        return self._normalizar(
+            'BrasilAPI', cep, data.get('street'), '', data.get('neighborhood'),
+            data.get('city'), data.get('state'), '',
+        )
+
+    def _consultar_viacep(self, cep: str) -> Dict[str, Any]:
+        response = requests.get(f"{self.VIACEP_URL}/{cep}/json/", headers=self.headers, timeout=self.timeout)
+        if response.status_code == 400:
+            raise CEPNaoEncontrado(cep)
+        response.raise_for_status()
+        data = response.json()
+        if data.get('erro'):
+            raise CEPNaoEncontrado(cep)
+        return self._normalizar(
+            'ViaCEP', cep, data.get('logradouro'), data.get('complemento'), data.get('bairro'),
+            data.get('localidade'), data.get('uf'), data.get('ibge'),
+        )
+
+    def _normalizar(self, fonte, cep, logradouro, complemento, bairro, cidade, uf, ibge) -> Dict[str, Any]:
+        """Formato padrão do resultado (igual para base local e provedores)"""
+        return {
+            'success': True,
+            'fonte': fonte,
+            'cep': formatar_cep(cep),
+            'logradouro': logradouro or '',
+            'complemento': complemento or '',
+            'bairro': bairro or '',
+            'cidade': cidade or '',
+            'uf': (uf or '').upper(),
+            'ibge': ibge or '',
+        }
+
+    def _resposta(self, entrada: EntradaCEP) -> Dict[str, Any]:
+        if not entrada.encontrado:
+            return self._error_response("CEP não encontrado")
+        # Cópia: quem chama pode alterar a resposta sem mexer no LRU
+        return dict(entrada.dados)
+
+    def _error_response(self, message: str) -> Dict[str, Any]:
+        """Resposta padronizada de erro"""
+        return {
+            'success': False,
+            'error': True,
+            'message': message,
+            'fonte': 'local'
+        }
+
+
+def campos_escritorio(resultado: Dict[str, Any]) -> Dict[str, str]:
+    """Campos de endereço do Escritorio a partir de um resultado de CEP (só os não vazios)"""
+    if not resultado.get('success'):
+        return {}
+    campos = {campo: resultado.get(chave) for campo, chave in CAMPOS_ESCRITORIO.items()}
+    return {campo: valor for campo, valor in campos.items() if valor}
@@ -0,0 +1,357 @@
+"""
+Importador dos dados abertos de CNPJ da Receita Federal
+
+Lê os ZIPs mensais (Empresas*, Estabelecimentos*, Cnaes, Municipios) em
+streaming, sem extrair para o disco, normaliza as linhas e grava em lotes:
+no PostgreSQL via COPY para uma tabela temporária + upsert; nos demais
+bancos via bulk_create com update_conflicts.
+
+A importação é retomável (o progresso de cada arquivo é gravado na mesma
+transação de cada lote) e incremental (o upsert só reescreve linhas que
+mudaram desde o dump anterior).
+"""
+
+import csv
+import io
+import logging
+import os
+import zipfile
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    CEPLocal, ReceitaEmpresa, ReceitaEstabelecimento, ReceitaCNAE, ReceitaMunicipio, ReceitaImportacao
+)
+
+logger = logging.getLogger(__name__)
+
+# Ordem de importação: tabelas auxiliares primeiro
+TIPOS = ['cnaes', 'municipios', 'empresas', 'estabelecimentos']
+
+# Base de CEPs (comando importar_ceps): mesmo pipeline, dataset de outra origem
+TIPO_CEPS = 'ceps'
+
+# Os arquivos da Receita são latin-1; o dataset de CEPs, UTF-8
+CODIFICACAO = {TIPO_CEPS: 'utf-8-sig'}
+
+
+def tipo_do_arquivo(caminho):
+    """Identifica o tipo pelo nome do ZIP (ex: Estabelecimentos3.zip)"""
+    nome = os.path.basename(caminho).lower()
+    for tipo in TIPOS + [TIPO_CEPS]:
+        if nome.startswith(tipo):
+            return tipo
+    return None
+
+
+def ler_zip(caminho, encoding='latin-1'):
+    """
+    Itera as linhas de todos os CSVs de um ZIP sem extraí-lo
+
+    Os arquivos da Receita são latin-1, separados por ';' e sem cabeçalho.
+    Um CSV solto (fora de ZIP) também é aceito.
+    """
+    if not zipfile.is_zipfile(caminho):
+        with open(caminho, encoding=encoding, newline='') as texto:
+            yield from csv.reader(texto, delimiter=';', quotechar='"')
+        return
+
+    with zipfile.ZipFile(caminho) as arquivo_zip:
+        for membro in arquivo_zip.infolist():
+            if membro.is_dir():
+                continue
+            with arquivo_zip.open(membro) as bruto:
+                texto = io.TextIOWrapper(bruto, encoding=encoding, newline='')
+                yield from csv.reader(texto, delimiter=';', quotechar='"')
+
+
+# ========== NORMALIZAÇÃO ==========
+
+def _texto(valor):
+    return (valor or '').replace('\x00', '').strip()
+
+
+def _data(valor):
+    valor = _texto(valor)
+    if len(valor) != 8 or not valor.isdigit() or valor == '00000000':
+        return None
+    try:
+        return date(int(valor[:4]), int(valor[4:6]), int(valor[6:]))
+    except ValueError:
+        return None
+
+
+def _decimal(valor):
+    valor = _texto(valor).replace('.', '').replace(',', '.')
+    if not valor:
+        return None
+    try:
+        return Decimal(valor)
+    except InvalidOperation:
+        return None
+
+
+def _cortar(modelo):
+    """Função que trunca os campos texto no max_length do model"""
+    limites = {
+        campo.attname: campo.max_length
+        for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'max_length', None)
+    }
+
+    def cortar(dados):
+        for campo, limite in limites.items():
+            valor = dados.get(campo)
+            if isinstance(valor, str) and len(valor) > limite:
+                dados[campo] = valor[:limite]
+        return dados
+
+    return cortar
+
+
+def normalizar_cnae(linha, referencia):
+    if len(linha) < 2 or not _texto(linha[0]):
+        return None
+    return {'codigo': _texto(linha[0]), 'descricao': _texto(linha[1])}
+
+
+def normalizar_municipio(linha, referencia):
+    if len(linha) < 2 or not _texto(linha[0]):
+        return None
+    return {'codigo': _texto(linha[0]), 'descricao': _texto(linha[1])}
+
+
+def normalizar_empresa(linha, referencia):
+    if len(linha) < 6 or len(_texto(linha[0])) != 8:
+        return None
+    return {
+        'cnpj_basico': _texto(linha[0]),
+        'razao_social': _texto(linha[1]),
+        'natureza_juridica': _texto(linha[2]),
+        'capital_social': _decimal(linha[4]),
+        'porte': _texto(linha[5]),
+        'referencia': referencia,
+    }
+
+
+def normalizar_estabelecimento(linha, referencia):
+    if len(linha) < 28:
+        return None
+    cnpj = _texto(linha[0]) + _texto(linha[1]) + _texto(linha[2])
+    if len(cnpj) != 14 or not cnpj.isdigit():
+        return None
+    return {
+        'cnpj': cnpj,
+        'cnpj_basico': cnpj[:8],
+        'matriz': _texto(linha[3]) == '1',
+        'nome_fantasia': _texto(linha[4]),
+        'situacao_cadastral': _texto(linha[5]).zfill(2) if _texto(linha[5]) else '',
+        'data_situacao_cadastral': _data(linha[6]),
+        'data_inicio_atividade': _data(linha[10]),
+        'cnae_principal': _texto(linha[11]),
+        'cnaes_secundarios': _texto(linha[12]),
+        'tipo_logradouro': _texto(linha[13]),
+        'logradouro': _texto(linha[14]),
+        'numero': _texto(linha[15]),
+        'complemento': _texto(linha[16]),
+        'bairro': _texto(linha[17]),
+        'cep': _texto(linha[18]),
+        'uf': _texto(linha[19]).upper(),
+        'municipio_codigo': _texto(linha[20]),
+        'telefone': _texto(linha[21]) + _texto(linha[22]),
+        'email': _texto(linha[27]).lower(),
+        'referencia': referencia,
+    }
+
+
+def normalizar_cep(linha, referencia):
+    """
+    Linha do dataset de CEPs: cep;logradouro;bairro;cidade;uf[;ibge[;complemento]]
+
+    Linhas sem CEP de 8 dígitos (inclusive um cabeçalho) são ignoradas.
+    """
+    if len(linha) < 5:
+        return None
+    cep = ''.join(c for c in _texto(linha[0]) if c.isdigit())
+    uf = _texto(linha[4]).upper()
+    if len(cep) != 8 or len(uf) != 2:
+        return None
+    return {
+        'cep': cep,
+        'logradouro': _texto(linha[1]),
+        'bairro': _texto(linha[2]),
+        'cidade': _texto(linha[3]),
+        'uf': uf,
+        'ibge': _texto(linha[5]) if len(linha) > 5 else '',
+        'complemento': _texto(linha[6]) if len(linha) > 6 else '',
+        'referencia': referencia,
+    }
+
+
+LAYOUTS = {
+    'cnaes': (ReceitaCNAE, normalizar_cnae),
+    'municipios': (ReceitaMunicipio, normalizar_municipio),
+    'empresas': (ReceitaEmpresa, normalizar_empresa),
+    'estabelecimentos': (ReceitaEstabelecimento, normalizar_estabelecimento),
+    TIPO_CEPS: (CEPLocal, normalizar_cep),
+}
+
+
+# ========== GRAVAÇÃO ==========
+
+class ImportadorCNPJ:
+    """
+    Importa arquivos de um dump mensal
+
+    Args:
+        referencia: mês do dump (AAAA-MM)
+        lote: linhas por transação
+        ufs: se informado, só importa estabelecimentos dessas UFs
+    """
+
+    def __init__(self, referencia, lote=50000, ufs=None):
+        self.referencia = referencia
+        self.lote = lote
+        self.ufs = {uf.upper() for uf in ufs} if ufs else None
+
+    def importar_arquivo(self, caminho, reiniciar=False, tipo=None):
+        """
+        Importa (ou retoma) um ZIP
+
+        Args:
+            tipo: força o layout (default: deduzido do nome do arquivo)
+
+        Returns:
+            ReceitaImportacao com o status final
+        """
+        tipo = tipo or tipo_do_arquivo(caminho)
+        if tipo is None:
+            raise ValueError(f"Tipo de arquivo não reconhecido: {caminho}")
+
+        modelo, normalizar = LAYOUTS[tipo]
+        cortar = _cortar(modelo)
+        registro, _ = ReceitaImportacao.objects.get_or_create(
+            referencia=self.referencia,
+            arquivo=os.path.basename(caminho),
+            defaults={'tipo': tipo, 'tamanho': os.path.getsize(caminho)},
+        )
+
+        if reiniciar:
+            registro.linhas_processadas = 0
+            registro.status = 'importando'
+        elif registro.status == 'concluido':
+            logger.info(f"{registro.arquivo} ({self.referencia}) já importado; pulando")
+            return registro
+
+        registro.status = 'importando'
+        registro.erro = ''
+        registro.save()
+
+        linhas = ler_zip(caminho, encoding=CODIFICACAO.get(tipo, 'latin-1'))
+        if registro.linhas_processadas:
+            logger.info(f"Retomando {registro.arquivo} a partir da linha {registro.linhas_processadas}")
+            linhas = islice(linhas, registro.linhas_processadas, None)
+
+        try:
+            while True:
+                bloco = list(islice(linhas, self.lote))
+                if not bloco:
+                    break
+
+                dados = []
+                for linha in bloco:
+                    normalizado = normalizar(linha, self.referencia)
+                    if normalizado is None:
+                        continue
+                    if self.ufs and tipo == 'estabelecimentos' and normalizado['uf'] not in self.ufs:
+                        continue
+                    dados.append(cortar(normalizado))
+
+                # Dados e checkpoint na mesma transação: retomada exata
+                with transaction.atomic():
+                    if dados:
+                        self._gravar(modelo, dados)
+                    registro.linhas_processadas += len(bloco)
+                    registro.save(update_fields=['linhas_processadas', 'atualizado_em'])
+
+                logger.info(f"{registro.arquivo}: {registro.linhas_processadas} linhas")
+
+        except Exception as e:
+            registro.status = 'erro'
+            registro.erro = str(e)
+            registro.save(update_fields=['status', 'erro', 'atualizado_em'])
+            raise
+
+        registro.status = 'concluido'
+        registro.concluido_em = timezone.now()
+        registro.save(update_fields=['status', 'concluido_em', 'atualizado_em'])
+        return registro
+
+    def _gravar(self, modelo, dados):
+        if connection.vendor == 'postgresql':
+            self._gravar_copy(modelo, dados)
+        else:
+            self._gravar_bulk(modelo, dados)
+
+    def _colunas(self, modelo):
+        pk = modelo._meta.pk.attname
+        colunas = [campo.attname for campo in modelo._meta.concrete_fields]
+        comparadas = [c for c in colunas if c not in (pk, 'referencia')]
+        return pk, colunas, comparadas
+
+    def _gravar_bulk(self, modelo, dados):
+        """Fallback genérico (SQLite em desenvolvimento/testes)"""
+        pk, colunas, _ = self._colunas(modelo)
+        unicos = {item[pk]: item for item in dados}
+        modelo.objects.bulk_create(
+            [modelo(**item) for item in unicos.values()],
+            update_conflicts=True,
+            unique_fields=[pk],
+            update_fields=[c for c in colunas if c != pk],
+        )
+
+    def _gravar_copy(self, modelo, dados):
+        """
+        COPY para tabela temporária + INSERT ... ON CONFLICT
+
+        Só atualiza linhas cujo conteúdo mudou (IS DISTINCT FROM), o que
+        torna a reimportação de um dump novo barata para registros estáveis.
+        """
+        pk, colunas, comparadas = self._colunas(modelo)
+        tabela = modelo._meta.db_table
+        temporaria = f"tmp_{tabela}"
+
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for item in dados:
+            escritor.writerow([
+                '\\N' if item.get(c) is None else item[c]
+                for c in colunas
+            ])
+        buffer.seek(0)
+
+        lista = ', '.join(colunas)
+        atualizacoes = ', '.join(f"{c} = EXCLUDED.{c}" for c in colunas if c != pk)
+        atuais = ', '.join(f"{tabela}.{c}" for c in comparadas)
+        novos = ', '.join(f"EXCLUDED.{c}" for c in comparadas)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {temporaria} "
+                f"(LIKE {tabela} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.execute(f"TRUNCATE {temporaria}")
+            cursor.cursor.copy_expert(
+                f"COPY {temporaria} ({lista}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO {tabela} ({lista}) "
+                f"SELECT DISTINCT ON ({pk}) {lista} FROM {temporaria} "
+                f"ON CONFLICT ({pk}) DO UPDATE SET {atualizacoes} "
+                f"WHERE ({atuais}) IS DISTINCT FROM ({novos})"
+            )
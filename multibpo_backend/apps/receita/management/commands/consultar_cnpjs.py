@@ -0,0 +1,60 @@
+# apps/receita/management/commands/consultar_cnpjs.py
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.receita.services import ReceitaFederalService
+
+
+class Command(BaseCommand):
+    help = 'Consulta CNPJs em lote (pool de workers + rate limit por provedor), saída em NDJSON'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('cnpjs', nargs='*', help='CNPJs a consultar')
+        parser.add_argument(
+            '--arquivo',
+            help='Arquivo com um CNPJ por linha (ou CSV: usa a primeira coluna); "-" lê da entrada padrão'
+        )
+        parser.add_argument('--workers', type=int, default=None, help='Tamanho do pool (default RECEITA_LOTE_WORKERS)')
+        parser.add_argument('--saida', help='Grava o NDJSON neste arquivo em vez da saída padrão')
+    
+    def handle(self, *args, **options):
+        cnpjs = list(options['cnpjs'])
+        if options['arquivo']:
+            cnpjs.extend(self._ler_arquivo(options['arquivo']))
+        if not cnpjs:
+            raise CommandError('Informe CNPJs como argumentos ou via --arquivo')
+        
+        destino = open(options['saida'], 'w', encoding='utf-8') if options['saida'] else self.stdout
+        service = ReceitaFederalService()
+        inicio = time.monotonic()
+        total = encontrados = 0
+        
+        try:
+            for item in service.consultar_lote(cnpjs, max_workers=options['workers']):
+                total += 1
+                encontrados += bool(item['resultado'].get('success'))
+                destino.write(json.dumps(item, ensure_ascii=False, default=str) + '\n')
+                destino.flush()
+        finally:
+            if options['saida']:
+                destino.close()
+        
+        self.stderr.write(
+            f"{total} CNPJs únicos consultados ({encontrados} encontrados) "
+            f"em {time.monotonic() - inicio:.1f}s"
+        )
+    
+    def _ler_arquivo(self, caminho):
+        try:
+            arquivo = sys.stdin if caminho == '-' else open(caminho, encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Erro ao abrir {caminho}: {e}")
+        
+        with arquivo:
+            for linha in arquivo:
+                valor = linha.split(',')[0].split(';')[0].strip()
+                if valor and any(c.isdigit() for c in valor):
+                    yield valor
@@ -0,0 +1,38 @@
+# apps/receita/management/commands/importar_ceps.py
+import os
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.receita.importador import ImportadorCNPJ, TIPO_CEPS
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa um dataset offline de CEPs (CSV UTF-8 separado por ";", solto ou em ZIP, '
+        'colunas cep;logradouro;bairro;cidade;uf[;ibge[;complemento]]) para a base local '
+        'usada pelo CEPService. Retomável e incremental entre versões do dataset.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('arquivos', nargs='+', help='CSVs ou ZIPs do dataset')
+        parser.add_argument('--referencia', required=True, help='Versão do dataset (AAAA-MM)')
+        parser.add_argument('--lote', type=int, default=50000, help='Linhas por transação')
+        parser.add_argument('--reiniciar', action='store_true', help='Ignora o progresso salvo e reimporta')
+    
+    def handle(self, *args, **options):
+        if not re.match(r'^\d{4}-\d{2}$', options['referencia']):
+            raise CommandError('Referência deve estar no formato AAAA-MM')
+        
+        for caminho in options['arquivos']:
+            if not os.path.isfile(caminho):
+                raise CommandError(f"Arquivo não encontrado: {caminho}")
+        
+        importador = ImportadorCNPJ(options['referencia'], lote=options['lote'])
+        
+        for caminho in options['arquivos']:
+            self.stdout.write(f"📦 {os.path.basename(caminho)}...")
+            registro = importador.importar_arquivo(caminho, reiniciar=options['reiniciar'], tipo=TIPO_CEPS)
+            self.stdout.write(self.style.SUCCESS(
+                f"   {registro.get_status_display()}: {registro.linhas_processadas} linhas"
+            ))
@@ -0,0 +1,59 @@
+# apps/receita/management/commands/importar_cnpj_receita.py
+import glob
+import os
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.receita.importador import ImportadorCNPJ, TIPOS, tipo_do_arquivo
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa os dados abertos de CNPJ da Receita Federal (ZIPs Empresas*, '
+        'Estabelecimentos*, Cnaes, Municipios) para o índice local. '
+        'Retomável e incremental entre dumps mensais.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('caminhos', nargs='+', help='ZIPs ou diretórios com os ZIPs do dump')
+        parser.add_argument('--referencia', required=True, help='Mês do dump (AAAA-MM)')
+        parser.add_argument('--tipos', default=','.join(TIPOS), help='Tipos a importar (separados por vírgula)')
+        parser.add_argument('--uf', action='append', help='Só estabelecimentos destas UFs (repetível)')
+        parser.add_argument('--lote', type=int, default=50000, help='Linhas por transação')
+        parser.add_argument('--reiniciar', action='store_true', help='Ignora o progresso salvo e reimporta')
+    
+    def handle(self, *args, **options):
+        if not re.match(r'^\d{4}-\d{2}$', options['referencia']):
+            raise CommandError('Referência deve estar no formato AAAA-MM')
+        
+        tipos = [t.strip().lower() for t in options['tipos'].split(',') if t.strip()]
+        invalidos = set(tipos) - set(TIPOS)
+        if invalidos:
+            raise CommandError(f"Tipos inválidos: {', '.join(sorted(invalidos))}")
+        
+        arquivos = []
+        for caminho in options['caminhos']:
+            if os.path.isdir(caminho):
+                arquivos.extend(glob.glob(os.path.join(caminho, '*.zip')))
+            elif os.path.isfile(caminho):
+                arquivos.append(caminho)
+            else:
+                raise CommandError(f"Caminho não encontrado: {caminho}")
+        
+        # Auxiliares antes de empresas/estabelecimentos
+        arquivos = sorted(
+            (a for a in arquivos if tipo_do_arquivo(a) in tipos),
+            key=lambda a: (TIPOS.index(tipo_do_arquivo(a)), os.path.basename(a))
+        )
+        if not arquivos:
+            raise CommandError('Nenhum arquivo do dump encontrado para os tipos informados')
+        
+        importador = ImportadorCNPJ(options['referencia'], lote=options['lote'], ufs=options['uf'])
+        
+        for caminho in arquivos:
+            self.stdout.write(f"📦 {os.path.basename(caminho)}...")
+            registro = importador.importar_arquivo(caminho, reiniciar=options['reiniciar'])
+            self.stdout.write(self.style.SUCCESS(
+                f"   {registro.get_status_display()}: {registro.linhas_processadas} linhas"
+            ))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CNPJConsulta',
+            fields=[
+                ('cnpj', models.CharField(help_text='CNPJ apenas com dígitos', max_length=14, primary_key=True, serialize=False, verbose_name='CNPJ')),
+                ('encontrado', models.BooleanField(default=True, help_text='False para entradas negativas ("CNPJ não encontrado")', verbose_name='Encontrado')),
+                ('fonte', models.CharField(blank=True, max_length=30, verbose_name='Fonte')),
+                ('dados', models.JSONField(blank=True, default=dict, help_text='Resultado normalizado retornado pelo serviço', verbose_name='Dados')),
+                ('consultado_em', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Consultado em')),
+            ],
+            options={
+                'verbose_name': 'Consulta de CNPJ',
+                'verbose_name_plural': 'Consultas de CNPJ',
+                'db_table': 'receita_cnpj_consultas',
+                'ordering': ['-consultado_em'],
+            },
+        ),
+    ]
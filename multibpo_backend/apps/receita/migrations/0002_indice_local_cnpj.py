@@ -0,0 +1,106 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receita', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceitaCNAE',
+            fields=[
+                ('codigo', models.CharField(max_length=7, primary_key=True, serialize=False, verbose_name='Código')),
+                ('descricao', models.CharField(max_length=300, verbose_name='Descrição')),
+            ],
+            options={
+                'verbose_name': 'CNAE',
+                'verbose_name_plural': 'CNAEs',
+                'db_table': 'receita_cnaes',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReceitaEmpresa',
+            fields=[
+                ('cnpj_basico', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CNPJ Básico')),
+                ('razao_social', models.CharField(blank=True, max_length=200, verbose_name='Razão Social')),
+                ('natureza_juridica', models.CharField(blank=True, max_length=4, verbose_name='Natureza Jurídica')),
+                ('capital_social', models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True, verbose_name='Capital Social')),
+                ('porte', models.CharField(blank=True, max_length=2, verbose_name='Porte')),
+                ('referencia', models.CharField(help_text='Dump (AAAA-MM) em que o registro mudou pela última vez', max_length=7, verbose_name='Referência')),
+            ],
+            options={
+                'verbose_name': 'Empresa (Receita)',
+                'verbose_name_plural': 'Empresas (Receita)',
+                'db_table': 'receita_empresas',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReceitaEstabelecimento',
+            fields=[
+                ('cnpj', models.CharField(max_length=14, primary_key=True, serialize=False, verbose_name='CNPJ')),
+                ('cnpj_basico', models.CharField(db_index=True, max_length=8, verbose_name='CNPJ Básico')),
+                ('matriz', models.BooleanField(default=True, verbose_name='Matriz')),
+                ('nome_fantasia', models.CharField(blank=True, max_length=200, verbose_name='Nome Fantasia')),
+                ('situacao_cadastral', models.CharField(blank=True, choices=[('01', 'NULA'), ('02', 'ATIVA'), ('03', 'SUSPENSA'), ('04', 'INAPTA'), ('08', 'BAIXADA')], max_length=2, verbose_name='Situação Cadastral')),
+                ('data_situacao_cadastral', models.DateField(blank=True, null=True, verbose_name='Data da Situação')),
+                ('data_inicio_atividade', models.DateField(blank=True, null=True, verbose_name='Início de Atividade')),
+                ('cnae_principal', models.CharField(blank=True, max_length=7, verbose_name='CNAE Principal')),
+                ('cnaes_secundarios', models.TextField(blank=True, verbose_name='CNAEs Secundários')),
+                ('tipo_logradouro', models.CharField(blank=True, max_length=20, verbose_name='Tipo de Logradouro')),
+                ('logradouro', models.CharField(blank=True, max_length=200, verbose_name='Logradouro')),
+                ('numero', models.CharField(blank=True, max_length=20, verbose_name='Número')),
+                ('complemento', models.CharField(blank=True, max_length=200, verbose_name='Complemento')),
+                ('bairro', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('cep', models.CharField(blank=True, max_length=8, verbose_name='CEP')),
+                ('uf', models.CharField(blank=True, max_length=2, verbose_name='UF')),
+                ('municipio_codigo', models.CharField(blank=True, max_length=4, verbose_name='Código do Município')),
+                ('telefone', models.CharField(blank=True, max_length=20, verbose_name='Telefone')),
+                ('email', models.CharField(blank=True, max_length=200, verbose_name='Email')),
+                ('referencia', models.CharField(help_text='Dump (AAAA-MM) em que o registro mudou pela última vez', max_length=7, verbose_name='Referência')),
+            ],
+            options={
+                'verbose_name': 'Estabelecimento (Receita)',
+                'verbose_name_plural': 'Estabelecimentos (Receita)',
+                'db_table': 'receita_estabelecimentos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReceitaMunicipio',
+            fields=[
+                ('codigo', models.CharField(max_length=4, primary_key=True, serialize=False, verbose_name='Código')),
+                ('descricao', models.CharField(max_length=100, verbose_name='Descrição')),
+            ],
+            options={
+                'verbose_name': 'Município (Receita)',
+                'verbose_name_plural': 'Municípios (Receita)',
+                'db_table': 'receita_municipios',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReceitaImportacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('referencia', models.CharField(max_length=7, verbose_name='Referência')),
+                ('arquivo', models.CharField(max_length=200, verbose_name='Arquivo')),
+                ('tipo', models.CharField(max_length=20, verbose_name='Tipo')),
+                ('tamanho', models.BigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('status', models.CharField(choices=[('importando', 'Importando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='importando', max_length=20, verbose_name='Status')),
+                ('linhas_processadas', models.BigIntegerField(default=0, verbose_name='Linhas Processadas')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('iniciado_em', models.DateTimeField(auto_now_add=True, verbose_name='Iniciado em')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+            ],
+            options={
+                'verbose_name': 'Importação de Dados Abertos',
+                'verbose_name_plural': 'Importações de Dados Abertos',
+                'db_table': 'receita_importacoes',
+                'ordering': ['-iniciado_em'],
+                'constraints': [models.UniqueConstraint(fields=('referencia', 'arquivo'), name='receita_importacao_arquivo_unico')],
+            },
+        ),
+    ]
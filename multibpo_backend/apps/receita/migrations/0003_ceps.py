@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receita', '0002_indice_local_cnpj'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CEPConsulta',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('encontrado', models.BooleanField(default=True, verbose_name='Encontrado')),
+                ('fonte', models.CharField(blank=True, max_length=30, verbose_name='Fonte')),
+                ('dados', models.JSONField(blank=True, default=dict, verbose_name='Dados')),
+                ('consultado_em', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Consultado em')),
+            ],
+            options={
+                'verbose_name': 'Consulta de CEP',
+                'verbose_name_plural': 'Consultas de CEP',
+                'db_table': 'receita_cep_consultas',
+                'ordering': ['-consultado_em'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CEPLocal',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('logradouro', models.CharField(blank=True, max_length=200, verbose_name='Logradouro')),
+                ('complemento', models.CharField(blank=True, max_length=100, verbose_name='Complemento')),
+                ('bairro', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('cidade', models.CharField(max_length=100, verbose_name='Cidade')),
+                ('uf', models.CharField(max_length=2, verbose_name='UF')),
+                ('ibge', models.CharField(blank=True, max_length=7, verbose_name='Código IBGE')),
+                ('referencia', models.CharField(help_text='Versão do dataset (AAAA-MM) em que o registro mudou pela última vez', max_length=7, verbose_name='Referência')),
+            ],
+            options={
+                'verbose_name': 'CEP (base local)',
+                'verbose_name_plural': 'CEPs (base local)',
+                'db_table': 'receita_ceps',
+            },
+        ),
+    ]
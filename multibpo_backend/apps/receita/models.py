@@ -1,3 +1,262 @@
+"""
+Models do app Receita Federal
+"""
+
 from django.db import models
+from django.utils import timezone
+
+
+class CNPJConsulta(models.Model):
+    """
+    Cache persistente das consultas de CNPJ
+    
+    Guarda o resultado normalizado do ReceitaFederalService (ou a ausência
+    dele, em entradas negativas) junto com o momento da consulta. A validade
+    é decidida na leitura, conforme RECEITA_CACHE_TTL / RECEITA_CACHE_NEGATIVE_TTL.
+    """
+    
+    cnpj = models.CharField(
+        max_length=14,
+        primary_key=True,
+        help_text='CNPJ apenas com dígitos',
+        verbose_name='CNPJ'
+    )
+    encontrado = models.BooleanField(
+        default=True,
+        help_text='False para entradas negativas ("CNPJ não encontrado")',
+        verbose_name='Encontrado'
+    )
+    fonte = models.CharField(max_length=30, blank=True, verbose_name='Fonte')
+    dados = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Resultado normalizado retornado pelo serviço',
+        verbose_name='Dados'
+    )
+    consultado_em = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Consultado em'
+    )
+    
+    class Meta:
+        db_table = 'receita_cnpj_consultas'
+        verbose_name = 'Consulta de CNPJ'
+        verbose_name_plural = 'Consultas de CNPJ'
+        ordering = ['-consultado_em']
+    
+    def __str__(self):
+        status = self.dados.get('razao_social') if self.encontrado else 'não encontrado'
+        return f"{self.cnpj} - {status}"
+
+
+# ===================================================================
+# ÍNDICE LOCAL DE CNPJ - Dados abertos da Receita Federal
+# ===================================================================
+#
+# Tabelas carregadas pelo comando importar_cnpj_receita a partir dos ZIPs
+# mensais (Empresas*, Estabelecimentos*, Cnaes, Municipios). Sem FKs de
+# propósito: a carga é feita em massa (COPY) e fora de ordem garantida.
+
+class ReceitaEmpresa(models.Model):
+    """Empresa (dados comuns a todos os estabelecimentos da raiz do CNPJ)"""
+    
+    cnpj_basico = models.CharField(max_length=8, primary_key=True, verbose_name='CNPJ Básico')
+    razao_social = models.CharField(max_length=200, blank=True, verbose_name='Razão Social')
+    natureza_juridica = models.CharField(max_length=4, blank=True, verbose_name='Natureza Jurídica')
+    capital_social = models.DecimalField(
+        max_digits=18, decimal_places=2, null=True, blank=True, verbose_name='Capital Social'
+    )
+    porte = models.CharField(max_length=2, blank=True, verbose_name='Porte')
+    referencia = models.CharField(
+        max_length=7,
+        help_text='Dump (AAAA-MM) em que o registro mudou pela última vez',
+        verbose_name='Referência'
+    )
+    
+    class Meta:
+        db_table = 'receita_empresas'
+        verbose_name = 'Empresa (Receita)'
+        verbose_name_plural = 'Empresas (Receita)'
+    
+    def __str__(self):
+        return f"{self.cnpj_basico} - {self.razao_social}"
+
+
+class ReceitaEstabelecimento(models.Model):
+    """Estabelecimento (matriz ou filial) identificado pelo CNPJ completo"""
+    
+    SITUACAO_CHOICES = [
+        ('01', 'NULA'),
+        ('02', 'ATIVA'),
+        ('03', 'SUSPENSA'),
+        ('04', 'INAPTA'),
+        ('08', 'BAIXADA'),
+    ]
+    
+    cnpj = models.CharField(max_length=14, primary_key=True, verbose_name='CNPJ')
+    cnpj_basico = models.CharField(max_length=8, db_index=True, verbose_name='CNPJ Básico')
+    matriz = models.BooleanField(default=True, verbose_name='Matriz')
+    nome_fantasia = models.CharField(max_length=200, blank=True, verbose_name='Nome Fantasia')
+    situacao_cadastral = models.CharField(
+        max_length=2, choices=SITUACAO_CHOICES, blank=True, verbose_name='Situação Cadastral'
+    )
+    data_situacao_cadastral = models.DateField(null=True, blank=True, verbose_name='Data da Situação')
+    data_inicio_atividade = models.DateField(null=True, blank=True, verbose_name='Início de Atividade')
+    cnae_principal = models.CharField(max_length=7, blank=True, verbose_name='CNAE Principal')
+    cnaes_secundarios = models.TextField(blank=True, verbose_name='CNAEs Secundários')
+    tipo_logradouro = models.CharField(max_length=20, blank=True, verbose_name='Tipo de Logradouro')
+    logradouro = models.CharField(max_length=200, blank=True, verbose_name='Logradouro')
+    numero = models.CharField(max_length=20, blank=True, verbose_name='Número')
+    complemento = models.CharField(max_length=200, blank=True, verbose_name='Complemento')
+    bairro = models.CharField(max_length=100, blank=True, verbose_name='Bairro')
+    cep = models.CharField(max_length=8, blank=True, verbose_name='CEP')
+    uf = models.CharField(max_length=2, blank=True, verbose_name='UF')
+    municipio_codigo = models.CharField(max_length=4, blank=True, verbose_name='Código do Município')
+    telefone = models.CharField(max_length=20, blank=True, verbose_name='Telefone')
+    email = models.CharField(max_length=200, blank=True, verbose_name='Email')
+    referencia = models.CharField(
+        max_length=7,
+        help_text='Dump (AAAA-MM) em que o registro mudou pela última vez',
+        verbose_name='Referência'
+    )
+    
+    class Meta:
+        db_table = 'receita_estabelecimentos'
+        verbose_name = 'Estabelecimento (Receita)'
+        verbose_name_plural = 'Estabelecimentos (Receita)'
+    
+    def __str__(self):
+        return f"{self.cnpj} - {self.nome_fantasia or self.get_situacao_cadastral_display()}"
+
+
+class ReceitaCNAE(models.Model):
+    """Tabela de CNAEs"""
+    
+    codigo = models.CharField(max_length=7, primary_key=True, verbose_name='Código')
+    descricao = models.CharField(max_length=300, verbose_name='Descrição')
+    
+    class Meta:
+        db_table = 'receita_cnaes'
+        verbose_name = 'CNAE'
+        verbose_name_plural = 'CNAEs'
+    
+    def __str__(self):
+        return f"{self.codigo} - {self.descricao}"
+
+
+class ReceitaMunicipio(models.Model):
+    """Tabela de municípios (código próprio da Receita, não IBGE)"""
+    
+    codigo = models.CharField(max_length=4, primary_key=True, verbose_name='Código')
+    descricao = models.CharField(max_length=100, verbose_name='Descrição')
+    
+    class Meta:
+        db_table = 'receita_municipios'
+        verbose_name = 'Município (Receita)'
+        verbose_name_plural = 'Municípios (Receita)'
+    
+    def __str__(self):
+        return self.descricao
+
+
+class ReceitaImportacao(models.Model):
+    """
+    Controle da importação de cada arquivo do dump
+    
+    Guarda o progresso (linhas já gravadas) para retomar uma importação
+    interrompida e para pular arquivos já concluídos na mesma referência.
+    """
+    
+    STATUS_CHOICES = [
+        ('importando', 'Importando'),
+        ('concluido', 'Concluído'),
+        ('erro', 'Erro'),
+    ]
+    
+    referencia = models.CharField(max_length=7, verbose_name='Referência')
+    arquivo = models.CharField(max_length=200, verbose_name='Arquivo')
+    tipo = models.CharField(max_length=20, verbose_name='Tipo')
+    tamanho = models.BigIntegerField(default=0, verbose_name='Tamanho (bytes)')
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='importando', verbose_name='Status'
+    )
+    linhas_processadas = models.BigIntegerField(default=0, verbose_name='Linhas Processadas')
+    erro = models.TextField(blank=True, verbose_name='Erro')
+    iniciado_em = models.DateTimeField(auto_now_add=True, verbose_name='Iniciado em')
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    concluido_em = models.DateTimeField(null=True, blank=True, verbose_name='Concluído em')
+    
+    class Meta:
+        db_table = 'receita_importacoes'
+        verbose_name = 'Importação de Dados Abertos'
+        verbose_name_plural = 'Importações de Dados Abertos'
+        ordering = ['-iniciado_em']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['referencia', 'arquivo'],
+                name='receita_importacao_arquivo_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.referencia} {self.arquivo} ({self.get_status_display()})"
+
+
+# ===================================================================
+# CEP - Base local e cache de consultas (apps.receita.cep)
+# ===================================================================
+
+class CEPLocal(models.Model):
+    """
+    Base local de CEPs carregada de um dataset offline (comando importar_ceps)
+    
+    Consultada antes de qualquer provedor externo: o preenchimento de
+    endereço no cadastro não depende de rede.
+    """
+    
+    cep = models.CharField(max_length=8, primary_key=True, verbose_name='CEP')
+    logradouro = models.CharField(max_length=200, blank=True, verbose_name='Logradouro')
+    complemento = models.CharField(max_length=100, blank=True, verbose_name='Complemento')
+    bairro = models.CharField(max_length=100, blank=True, verbose_name='Bairro')
+    cidade = models.CharField(max_length=100, verbose_name='Cidade')
+    uf = models.CharField(max_length=2, verbose_name='UF')
+    ibge = models.CharField(max_length=7, blank=True, verbose_name='Código IBGE')
+    referencia = models.CharField(
+        max_length=7,
+        help_text='Versão do dataset (AAAA-MM) em que o registro mudou pela última vez',
+        verbose_name='Referência'
+    )
+    
+    class Meta:
+        db_table = 'receita_ceps'
+        verbose_name = 'CEP (base local)'
+        verbose_name_plural = 'CEPs (base local)'
+    
+    def __str__(self):
+        return f"{self.cep} - {self.cidade}/{self.uf}"
+
 
-# Create your models here.
+class CEPConsulta(models.Model):
+    """
+    Cache persistente das consultas de CEP aos provedores externos
+    
+    Mesmo esquema do CNPJConsulta: entradas negativas para CEP inexistente,
+    validade decidida na leitura (CEP_CACHE_TTL / CEP_CACHE_NEGATIVE_TTL).
+    """
+    
+    cep = models.CharField(max_length=8, primary_key=True, verbose_name='CEP')
+    encontrado = models.BooleanField(default=True, verbose_name='Encontrado')
+    fonte = models.CharField(max_length=30, blank=True, verbose_name='Fonte')
+    dados = models.JSONField(default=dict, blank=True, verbose_name='Dados')
+    consultado_em = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='Consultado em')
+    
+    class Meta:
+        db_table = 'receita_cep_consultas'
+        verbose_name = 'Consulta de CEP'
+        verbose_name_plural = 'Consultas de CEP'
+        ordering = ['-consultado_em']
+    
+    def __str__(self):
+        status = self.dados.get('cidade') if self.encontrado else 'não encontrado'
+        return f"{self.cep} - {status}"
@@ -0,0 +1,367 @@
+"""
+Primitivas de resiliência para as consultas aos provedores de CNPJ
+Single-flight (coalescência de chamadas, em threads ou no event loop),
+token bucket, circuit breaker e estatísticas do serviço
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesce chamadas concorrentes com a mesma chave
+
+    A primeira thread executa a função; as demais que chegarem enquanto
+    ela está em andamento esperam e recebem o mesmo resultado (ou exceção).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_voo: Dict[str, Future] = {}
+
+    def executar(self, chave: str, funcao: Callable[[], Any]):
+        """
+        Returns:
+            (resultado, coalescida): coalescida=True se reaproveitou a
+            chamada de outra thread
+        """
+        with self._lock:
+            future = self._em_voo.get(chave)
+            lider = future is None
+            if lider:
+                future = self._em_voo[chave] = Future()
+
+        if not lider:
+            return future.result(), True
+
+        try:
+            resultado = funcao()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(resultado)
+            return resultado, False
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+
+    def em_voo(self) -> int:
+        return len(self._em_voo)
+
+
+class SingleFlightAsync:
+    """
+    Single-flight para corrotinas no mesmo event loop
+
+    A chamada compartilhada roda numa task própria protegida por shield:
+    se o cliente de uma das requisições desconectar, as demais continuam
+    esperando o mesmo resultado.
+    """
+
+    def __init__(self):
+        self._em_voo: Dict[str, asyncio.Task] = {}
+
+    async def executar(self, chave: str, fabrica: Callable[[], Any]):
+        """
+        Args:
+            fabrica: função sem argumentos que devolve a corrotina
+
+        Returns:
+            (resultado, coalescida)
+        """
+        tarefa = self._em_voo.get(chave)
+        if tarefa is not None:
+            return await asyncio.shield(tarefa), True
+
+        tarefa = asyncio.ensure_future(fabrica())
+        self._em_voo[chave] = tarefa
+
+        def remover(concluida):
+            if self._em_voo.get(chave) is concluida:
+                del self._em_voo[chave]
+
+        tarefa.add_done_callback(remover)
+        return await asyncio.shield(tarefa), False
+
+    def em_voo(self) -> int:
+        return len(self._em_voo)
+
+
+class TokenBucket:
+    """
+    Limitador de taxa token bucket (thread-safe)
+
+    Args:
+        taxa: tokens repostos por segundo
+        capacidade: rajada máxima
+    """
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self._tokens = float(capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def disponiveis(self) -> float:
+        """Tokens disponíveis agora, sem consumir"""
+        with self._lock:
+            self._repor()
+            return self._tokens
+
+    def espera(self) -> float:
+        """Segundos até haver um token (0 se já houver), sem consumir"""
+        with self._lock:
+            self._repor()
+            if self._tokens >= 1:
+                return 0.0
+            return (1 - self._tokens) / self.taxa if self.taxa > 0 else float('inf')
+
+    def tentar(self) -> float:
+        """
+        Tenta consumir um token sem bloquear
+
+        Returns:
+            0 se consumiu; senão, segundos até o próximo token
+        """
+        with self._lock:
+            self._repor()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.taxa if self.taxa > 0 else float('inf')
+
+    def adquirir(self, timeout: float = None) -> bool:
+        """Bloqueia até obter um token ou estourar o timeout"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            espera = self.tentar()
+            if espera == 0:
+                return True
+            if limite is not None:
+                restante = limite - time.monotonic()
+                if restante <= 0 or espera > restante:
+                    return False
+            time.sleep(espera)
+
+    async def aadquirir(self, timeout: float = None) -> bool:
+        """Versão para event loop de adquirir (espera com asyncio.sleep)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            espera = self.tentar()
+            if espera == 0:
+                return True
+            if limite is not None:
+                restante = limite - time.monotonic()
+                if restante <= 0 or espera > restante:
+                    return False
+            await asyncio.sleep(espera)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._repor()
+            return self._tokens
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com janela deslizante de taxa de erro
+
+    - fechado: chamadas liberadas; abre se, na janela, houver ao menos
+      min_chamadas e a taxa de erro passar de taxa_erro
+    - aberto: chamadas recusadas na hora até tempo_aberto_s
+    - meio_aberto: libera até max_sondas chamadas de teste; sucesso fecha,
+      falha reabre
+
+    Também guarda a latência recente das chamadas bem-sucedidas, usada
+    para ordenar os provedores.
+    """
+
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio_aberto'
+
+    def __init__(self, nome: str, janela_s: float = 60, min_chamadas: int = 5,
+                 taxa_erro: float = 0.5, tempo_aberto_s: float = 30, max_sondas: int = 1):
+        self.nome = nome
+        self.janela_s = janela_s
+        self.min_chamadas = min_chamadas
+        self.taxa_erro = taxa_erro
+        self.tempo_aberto_s = tempo_aberto_s
+        self.max_sondas = max_sondas
+        self._lock = threading.Lock()
+        self._janela = deque()  # (instante, sucesso, latencia)
+        self._estado = self.FECHADO
+        self._aberto_ate = 0.0
+        self._sondas = 0
+        self.aberturas = 0
+
+    def _podar(self, agora):
+        limite = agora - self.janela_s
+        while self._janela and self._janela[0][0] < limite:
+            self._janela.popleft()
+
+    def _abrir(self, agora):
+        self._estado = self.ABERTO
+        self._aberto_ate = agora + self.tempo_aberto_s
+        self._sondas = 0
+        self.aberturas += 1
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if self._estado == self.ABERTO and time.monotonic() >= self._aberto_ate:
+                return self.MEIO_ABERTO
+            return self._estado
+
+    def permitir(self) -> bool:
+        """Reserva uma chamada; False se o circuito recusar"""
+        with self._lock:
+            agora = time.monotonic()
+            if self._estado == self.ABERTO:
+                if agora < self._aberto_ate:
+                    return False
+                self._estado = self.MEIO_ABERTO
+                self._sondas = 0
+            if self._estado == self.MEIO_ABERTO:
+                if self._sondas >= self.max_sondas:
+                    return False
+                self._sondas += 1
+            return True
+
+    def liberar(self):
+        """Devolve uma reserva que não chegou a virar chamada"""
+        with self._lock:
+            if self._estado == self.MEIO_ABERTO and self._sondas > 0:
+                self._sondas -= 1
+
+    def registrar(self, sucesso: bool, latencia: float = None):
+        with self._lock:
+            agora = time.monotonic()
+
+            if self._estado == self.MEIO_ABERTO:
+                self._sondas = max(0, self._sondas - 1)
+                if sucesso:
+                    self._estado = self.FECHADO
+                    self._janela.clear()
+                else:
+                    self._abrir(agora)
+
+            self._janela.append((agora, sucesso, latencia))
+            self._podar(agora)
+
+            if self._estado == self.FECHADO:
+                total = len(self._janela)
+                erros = sum(1 for _, ok, _ in self._janela if not ok)
+                if total >= self.min_chamadas and erros / total >= self.taxa_erro:
+                    self._abrir(agora)
+
+    def latencia_recente(self):
+        """Latência mediana das chamadas bem-sucedidas na janela (None sem amostras)"""
+        with self._lock:
+            self._podar(time.monotonic())
+            return _percentil([lat for _, ok, lat in self._janela if ok and lat is not None], 50)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            agora = time.monotonic()
+            self._podar(agora)
+            total = len(self._janela)
+            erros = sum(1 for _, ok, _ in self._janela if not ok)
+            latencias = [lat for _, ok, lat in self._janela if ok and lat is not None]
+            estado = self._estado
+            if estado == self.ABERTO and agora >= self._aberto_ate:
+                estado = self.MEIO_ABERTO
+            return {
+                'estado': estado,
+                'chamadas_janela': total,
+                'taxa_erro': round(erros / total, 3) if total else 0.0,
+                'latencia_s': {
+                    'p50': _arredondar(_percentil(latencias, 50)),
+                    'p95': _arredondar(_percentil(latencias, 95)),
+                },
+                'reabre_em_s': round(self._aberto_ate - agora, 1) if estado == self.ABERTO else None,
+                'aberturas': self.aberturas,
+            }
+
+
+def _percentil(valores, percentil):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, int(round(percentil / 100 * len(ordenados))) - 1)
+    return ordenados[min(indice, len(ordenados) - 1)]
+
+
+class ReceitaStats:
+    """Contadores e latências do ReceitaFederalService (por processo)"""
+
+    JANELA_LATENCIAS = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.resetar()
+
+    def resetar(self):
+        with self._lock:
+            self.contadores = Counter()
+            self.chamadas = Counter()
+            self.vitorias = Counter()
+            self.falhas = Counter()
+            self.latencias = {}
+
+    def incrementar(self, nome: str, quantidade: int = 1):
+        with self._lock:
+            self.contadores[nome] += quantidade
+
+    def registrar_chamada(self, provedor: str, duracao: float, sucesso: bool):
+        with self._lock:
+            self.chamadas[provedor] += 1
+            if not sucesso:
+                self.falhas[provedor] += 1
+            self.latencias.setdefault(
+                provedor, deque(maxlen=self.JANELA_LATENCIAS)
+            ).append(duracao)
+
+    def registrar_vitoria(self, provedor: str, hedge: bool):
+        with self._lock:
+            self.vitorias[provedor] += 1
+            if hedge:
+                self.contadores['hedges_vencedores'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            provedores = {}
+            for provedor, janela in self.latencias.items():
+                amostras = list(janela)
+                provedores[provedor] = {
+                    'chamadas': self.chamadas[provedor],
+                    'falhas': self.falhas[provedor],
+                    'vitorias': self.vitorias[provedor],
+                    'latencia_s': {
+                        'p50': _arredondar(_percentil(amostras, 50)),
+                        'p90': _arredondar(_percentil(amostras, 90)),
+                        'p95': _arredondar(_percentil(amostras, 95)),
+                        'p99': _arredondar(_percentil(amostras, 99)),
+                    },
+                }
+            return {
+                **dict(self.contadores),
+                'provedores': provedores,
+            }
+
+
+def _arredondar(valor):
+    return round(valor, 3) if valor is not None else None
@@ -5,12 +5,30 @@ MultiBPO Sub-Fase 2.2.3 - Receita Federal Integration
 
 import requests
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from django.conf import settings
-from typing import Dict, Optional, Any
+from django.db import DatabaseError, connection
+from typing import Dict, Iterable, Iterator, Optional, Any
+from validate_docbr import CNPJ
+
+from .cache import cnpj_cache
+from .resiliencia import SingleFlight, ReceitaStats, TokenBucket, CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
 
+class CNPJNaoEncontrado(Exception):
+    """Provedor respondeu de forma definitiva que o CNPJ não existe"""
+    pass
+
+
+class LimiteTaxaExcedido(Exception):
+    """Sem token disponível no rate limiter do provedor"""
+    pass
+
+
 class ReceitaFederalService:
     """
     Serviço para consulta de dados na Receita Federal
@@ -22,20 +40,43 @@ class ReceitaFederalService:
     # URLs das APIs (configuráveis via settings)
     BRASILAPI_URL = "https://brasilapi.com.br/api/cnpj/v1"
     RECEITAWS_URL = "https://www.receitaws.com.br/v1/cnpj"
+    FONTE_LOCAL = 'ReceitaLocal'
+    
+    # Estado compartilhado entre instâncias (por processo)
+    _singleflight = SingleFlight()
+    _stats = ReceitaStats()
+    _executor = None
+    _executor_lock = threading.Lock()
+    _buckets = {}
+    _buckets_lock = threading.Lock()
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+    _prefetch_executor = None
+    _prefetch_pendentes = set()
+    _prefetch_lock = threading.Lock()
     
-    def __init__(self):
+    def __init__(self, cache=None):
         self.timeout = getattr(settings, 'RECEITA_TIMEOUT', 10)
+        self.hedge_delay = getattr(settings, 'RECEITA_HEDGE_DELAY', 1.5)
+        self.indice_local = getattr(settings, 'RECEITA_INDICE_LOCAL', True)
+        self.serve_stale = getattr(settings, 'RECEITA_CACHE_SERVE_STALE', True)
+        self.cache = cache or cnpj_cache
         self.headers = {
             'User-Agent': 'MultiBPO/1.0 (Contabilidade)',
             'Accept': 'application/json'
         }
     
-    def consultar_cnpj(self, cnpj: str) -> Dict[str, Any]:
+    def consultar_cnpj(self, cnpj: str, usar_cache: bool = True) -> Dict[str, Any]:
         """
         Consulta dados de CNPJ na Receita Federal
         
+        Usa o cache (LRU + banco) enquanto a entrada estiver dentro do TTL.
+        Se os provedores falharem e houver entrada vencida, ela é servida
+        (serve-stale) com cache.status = 'stale'.
+        
         Args:
             cnpj: CNPJ formatado ou apenas números
+            usar_cache: False força consulta aos provedores (e regrava o cache)
             
         Returns:
             Dict com dados da empresa ou erro
@@ -45,41 +86,510 @@ class ReceitaFederalService:
         if len(cnpj_clean) != 14:
             return self._error_response("CNPJ deve ter 14 dígitos")
         
-        # Tentar múltiplas APIs para maior confiabilidade
-        for api_name, api_method in [
+        self._stats.incrementar('consultas')
+        
+        entrada = self.cache.obter(cnpj_clean) if usar_cache else None
+        if entrada is not None and self.cache.fresca(entrada):
+            logger.debug(f"CNPJ {cnpj_clean} servido do cache")
+            self._stats.incrementar('cache_hits')
+            return self._resposta_do_cache(entrada, 'hit')
+        
+        self._stats.incrementar('cache_misses')
+        
+        # Single-flight: threads consultando o mesmo CNPJ dividem uma chamada
+        (situacao, result), coalescida = self._singleflight.executar(
+            cnpj_clean, lambda: self._buscar_e_gravar(cnpj_clean)
+        )
+        return self._resposta_da_busca(cnpj_clean, entrada, situacao, result, coalescida)
+    
+    def _resposta_da_busca(self, cnpj_clean, entrada, situacao, result, coalescida) -> Dict[str, Any]:
+        """
+        Resposta de consultar_cnpj depois da busca nos provedores
+        
+        cache.consulta_externa diz se esta chamada foi às APIs externas
+        (False para o índice local e para quem pegou carona no single-flight);
+        quem tem orçamento de requisições só deve contar essas.
+        """
+        if coalescida:
+            self._stats.incrementar('coalescidas')
+        externa = not coalescida
+        
+        if situacao == 'encontrado':
+            externa = externa and result.get('fonte') != self.FONTE_LOCAL
+            return {**result, 'cache': {'status': 'miss', 'consulta_externa': externa}}
+        
+        if situacao == 'nao_encontrado':
+            return {
+                **self._error_response("CNPJ não encontrado em nenhuma fonte"),
+                'cache': {'status': 'miss', 'consulta_externa': externa},
+            }
+        
+        # Todos os provedores falharam (timeout, 5xx, rate limit)
+        if entrada is not None and self.serve_stale:
+            logger.warning(f"Provedores indisponíveis; servindo CNPJ {cnpj_clean} vencido do cache")
+            self._stats.incrementar('cache_stale')
+            return self._resposta_do_cache(entrada, 'stale', externa=externa)
+        
+        return {
+            **self._error_response("CNPJ não encontrado em nenhuma fonte"),
+            'cache': {'status': 'miss', 'consulta_externa': externa},
+        }
+    
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """
+        Estatísticas do processo: cache, coalescência, hedges e latência
+        por provedor
+        
+        sugestao_hedge_delay_s é o p95 do provedor primário, referência
+        para ajustar RECEITA_HEDGE_DELAY.
+        """
+        snapshot = cls._stats.snapshot()
+        primario = snapshot['provedores'].get('BrasilAPI', {})
+        snapshot['hedge_delay_s'] = getattr(settings, 'RECEITA_HEDGE_DELAY', 1.5)
+        snapshot['sugestao_hedge_delay_s'] = primario.get('latencia_s', {}).get('p95')
+        snapshot['em_voo'] = cls._singleflight.em_voo()
+        return snapshot
+    
+    @classmethod
+    def resetar_estado(cls):
+        """Zera stats, rate limiters e breakers do processo (uso em testes/manutenção)"""
+        cls._stats.resetar()
+        with cls._buckets_lock:
+            cls._buckets.clear()
+        with cls._breakers_lock:
+            cls._breakers.clear()
+        with cls._prefetch_lock:
+            cls._prefetch_pendentes.clear()
+    
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """Pool compartilhado para as chamadas (hedge) aos provedores"""
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'RECEITA_MAX_WORKERS', 16),
+                        thread_name_prefix='receita'
+                    )
+        return cls._executor
+    
+    def _buscar_e_gravar(self, cnpj_clean: str):
+        """
+        Consulta os provedores e grava o resultado no cache
+        
+        Executado apenas pela thread líder do single-flight.
+        
+        Returns:
+            (situacao, resultado) com situacao em
+            'encontrado' | 'nao_encontrado' | 'falha'
+        """
+        try:
+            result = self._consultar_provedores(cnpj_clean)
+        except CNPJNaoEncontrado:
+            self.cache.salvar_negativo(cnpj_clean)
+            return 'nao_encontrado', None
+        
+        if result is None:
+            return 'falha', None
+        
+        self.cache.salvar(cnpj_clean, result)
+        return 'encontrado', result
+    
+    def _provedores(self):
+        """
+        Provedores em ordem dinâmica
+        
+        Circuitos fechados primeiro; entre eles, os que têm token no rate
+        limiter (um bucket vazio faria o primário esperar até
+        RECEITA_RATE_LIMIT_WAIT antes do hedge) e então do mais rápido para
+        o mais lento (mediana da janela do breaker). Sem amostras, vale a
+        ordem padrão.
+        """
+        padrao = [
             ('BrasilAPI', self._consultar_brasilapi),
             ('ReceitaWS', self._consultar_receitaws),
-        ]:
-            try:
-                logger.info(f"Consultando CNPJ {cnpj_clean} via {api_name}")
-                result = api_method(cnpj_clean)
+        ]
+        
+        def chave(item):
+            indice, (api_name, _) = item
+            breaker = self._breaker(api_name)
+            bucket = self._bucket(api_name)
+            latencia = breaker.latencia_recente()
+            return (
+                breaker.estado != CircuitBreaker.FECHADO,
+                bool(bucket) and bucket.espera() > 0,
+                latencia if latencia is not None else float('inf'),
+                indice,
+            )
+        
+        return [provedor for _, provedor in sorted(enumerate(padrao), key=chave)]
+    
+    @classmethod
+    def _breaker(cls, api_name: str) -> CircuitBreaker:
+        """Circuit breaker do provedor (RECEITA_BREAKER), criado sob demanda"""
+        if api_name not in cls._breakers:
+            with cls._breakers_lock:
+                if api_name not in cls._breakers:
+                    cls._breakers[api_name] = CircuitBreaker(
+                        api_name, **getattr(settings, 'RECEITA_BREAKER', {})
+                    )
+        return cls._breakers[api_name]
+    
+    @classmethod
+    def saude_provedores(cls) -> Dict[str, Dict[str, Any]]:
+        """Estado dos breakers e latência recente de cada provedor (sem chamadas externas)"""
+        return {
+            api_name: cls._breaker(api_name).snapshot()
+            for api_name in ('BrasilAPI', 'ReceitaWS')
+        }
+    
+    @classmethod
+    def _bucket(cls, api_name: str) -> Optional[TokenBucket]:
+        """Token bucket do provedor (RECEITA_RATE_LIMITS), criado sob demanda"""
+        if api_name not in cls._buckets:
+            with cls._buckets_lock:
+                if api_name not in cls._buckets:
+                    limite = getattr(settings, 'RECEITA_RATE_LIMITS', {}).get(api_name)
+                    cls._buckets[api_name] = TokenBucket(*limite) if limite else None
+        return cls._buckets[api_name]
+    
+    def _chamar_provedor(self, api_name: str, api_method, cnpj_clean: str) -> Dict[str, Any]:
+        """Executa um provedor registrando latência e resultado nas stats"""
+        breaker = self._breaker(api_name)
+        bucket = self._bucket(api_name)
+        if bucket and not bucket.adquirir(timeout=getattr(settings, 'RECEITA_RATE_LIMIT_WAIT', 2)):
+            breaker.liberar()
+            self._stats.incrementar(f'limitadas_{api_name}')
+            raise LimiteTaxaExcedido(f"Limite de taxa do {api_name} atingido")
+        
+        logger.info(f"Consultando CNPJ {cnpj_clean} via {api_name}")
+        inicio = time.monotonic()
+        sucesso = False
+        try:
+            result = api_method(cnpj_clean)
+            sucesso = bool(result.get('success'))
+            return result
+        except CNPJNaoEncontrado:
+            # Resposta definitiva: não conta como falha do provedor
+            sucesso = True
+            raise
+        finally:
+            duracao = time.monotonic() - inicio
+            breaker.registrar(sucesso, duracao)
+            self._stats.registrar_chamada(api_name, duracao, sucesso)
+    
+    def _consultar_provedores(self, cnpj_clean: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta os provedores com hedge
+        
+        O índice local vem primeiro, na própria thread. Depois, dispara o
+        primeiro provedor externo; se ele não responder em
+        RECEITA_HEDGE_DELAY segundos (ou falhar antes disso), dispara o
+        próximo. Vale a primeira resposta válida. Com RECEITA_HEDGE_DELAY = 0
+        a consulta é sequencial, como antes. Provedores com circuito aberto
+        são pulados sem chamada de rede.
+        
+        Returns:
+            Resultado do primeiro provedor que encontrar o CNPJ, ou None se
+            todos falharem
+            
+        Raises:
+            CNPJNaoEncontrado: algum provedor afirmou que o CNPJ não existe
+            e nenhum outro o encontrou
+        """
+        # Índice local (dados abertos importados) antes de qualquer API
+        result = self._consultar_local(cnpj_clean) if self.indice_local else None
+        if result is not None:
+            return result
+        
+        provedores = self._provedores()
+        executor = self._get_executor()
+        hedge_delay = self.hedge_delay if self.hedge_delay and self.hedge_delay > 0 else None
+        pendentes = {}
+        proximo = 0
+        nao_encontrado = False
+        
+        def disparar():
+            """Dispara o próximo provedor com circuito liberado (False se não houver)"""
+            nonlocal proximo
+            while proximo < len(provedores):
+                api_name, api_method = provedores[proximo]
+                proximo += 1
+                if not self._breaker(api_name).permitir():
+                    # Circuito aberto: pula sem custo de rede
+                    self._stats.incrementar(f'circuito_aberto_{api_name}')
+                    continue
+                future = executor.submit(self._chamar_provedor, api_name, api_method, cnpj_clean)
+                pendentes[future] = (api_name, len(pendentes) > 0)
+                return True
+            return False
+        
+        if not disparar():
+            logger.warning(f"Todos os circuitos abertos; CNPJ {cnpj_clean} não consultado")
+            return None
+        
+        while pendentes:
+            espera = hedge_delay if proximo < len(provedores) else None
+            concluidos, _ = wait(list(pendentes), timeout=espera, return_when=FIRST_COMPLETED)
+            
+            if not concluidos:
+                # Primário lento: dispara o backup em paralelo (hedge)
+                if disparar():
+                    self._stats.incrementar('hedges_disparados')
+                continue
+            
+            for future in concluidos:
+                api_name, hedge = pendentes.pop(future)
+                try:
+                    result = future.result()
+                except CNPJNaoEncontrado:
+                    logger.info(f"CNPJ {cnpj_clean} não existe segundo {api_name}")
+                    nao_encontrado = True
+                    continue
+                except LimiteTaxaExcedido as e:
+                    logger.info(str(e))
+                    continue
+                except Exception as e:
+                    logger.warning(f"Erro ao consultar {api_name}: {e}")
+                    continue
                 
                 if result.get('success'):
                     logger.info(f"CNPJ {cnpj_clean} encontrado via {api_name}")
+                    self._stats.registrar_vitoria(api_name, hedge)
                     return result
-                    
-            except Exception as e:
-                logger.warning(f"Erro ao consultar {api_name}: {e}")
+            
+            # Nada válido ainda e ninguém em andamento: tenta o próximo já
+            if not pendentes:
+                disparar()
+        
+        if nao_encontrado:
+            raise CNPJNaoEncontrado(cnpj_clean)
+        return None
+    
+    def consultar_lote(self, cnpjs: Iterable[str], max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Consulta vários CNPJs em paralelo, devolvendo cada resultado assim
+        que fica pronto
+        
+        Os CNPJs são normalizados, deduplicados e validados (dígitos
+        verificadores) localmente antes de qualquer chamada externa. As
+        consultas respeitam o cache, o single-flight e o rate limit de cada
+        provedor.
+        
+        Args:
+            cnpjs: CNPJs formatados ou apenas números
+            max_workers: tamanho do pool (default RECEITA_LOTE_WORKERS)
+            
+        Yields:
+            Dict com 'entrada' (valor original) e 'resultado'
+        """
+        validador = CNPJ()
+        vistos = set()
+        validos = []
+        
+        for original in cnpjs:
+            cnpj_clean = ''.join(filter(str.isdigit, str(original)))
+            if cnpj_clean in vistos:
                 continue
+            vistos.add(cnpj_clean)
+            
+            if len(cnpj_clean) != 14:
+                yield {'entrada': original, 'resultado': self._error_response("CNPJ deve ter 14 dígitos")}
+            elif not validador.validate(cnpj_clean):
+                yield {'entrada': original, 'resultado': self._error_response("CNPJ inválido")}
+            else:
+                validos.append((original, cnpj_clean))
+        
+        if not validos:
+            return
         
-        return self._error_response("CNPJ não encontrado em nenhuma fonte")
+        workers = max_workers or getattr(settings, 'RECEITA_LOTE_WORKERS', 8)
+        with ThreadPoolExecutor(max_workers=min(workers, len(validos)), thread_name_prefix='receita-lote') as executor:
+            futures = {
+                executor.submit(self._consultar_em_thread, cnpj_clean): original
+                for original, cnpj_clean in validos
+            }
+            for future in as_completed(futures):
+                try:
+                    resultado = future.result()
+                except Exception as e:
+                    logger.error(f"Erro na consulta em lote de {futures[future]}: {e}")
+                    resultado = self._error_response('Erro interno na consulta')
+                yield {'entrada': futures[future], 'resultado': resultado}
+    
+    def prefetch(self, cnpj: str) -> str:
+        """
+        Agenda a consulta do CNPJ em background para aquecer o cache
+        
+        Usado pela validação de documento em tempo real: quando o cadastro
+        chegar, consultar_cnpj encontra o resultado no cache (ou se junta à
+        consulta ainda em andamento via single-flight).
+        
+        O prefetch é especulativo: só roda enquanto o rate limiter do
+        provedor primário tiver mais que RECEITA_PREFETCH_RESERVA da
+        capacidade, reservando o restante para consultas de cadastros reais.
+        
+        Returns:
+            'agendado' | 'em_cache' | 'em_andamento' | 'ignorado'
+        """
+        cnpj_clean = ''.join(filter(str.isdigit, cnpj))
+        if len(cnpj_clean) != 14:
+            return 'ignorado'
+        
+        # Só o LRU: a thread da requisição não toca no banco
+        entrada = self.cache.lru.get(cnpj_clean)
+        if entrada is not None and self.cache.fresca(entrada):
+            return 'em_cache'
+        
+        if not self._orcamento_prefetch():
+            self._stats.incrementar('prefetch_sem_orcamento')
+            return 'ignorado'
+        
+        cls = type(self)
+        with cls._prefetch_lock:
+            if cnpj_clean in cls._prefetch_pendentes:
+                return 'em_andamento'
+            if len(cls._prefetch_pendentes) >= getattr(settings, 'RECEITA_PREFETCH_MAX_PENDENTES', 100):
+                self._stats.incrementar('prefetch_descartados')
+                return 'ignorado'
+            cls._prefetch_pendentes.add(cnpj_clean)
+        
+        self._get_prefetch_executor().submit(self._executar_prefetch, cnpj_clean)
+        self._stats.incrementar('prefetch_agendados')
+        return 'agendado'
+    
+    def _orcamento_prefetch(self) -> bool:
+        """Rate limiter do provedor primário acima da reserva dos cadastros"""
+        api_name, _ = self._provedores()[0]
+        bucket = self._bucket(api_name)
+        if bucket is None:
+            return True
+        reserva = getattr(settings, 'RECEITA_PREFETCH_RESERVA', 0.5)
+        return bucket.disponiveis() > bucket.capacidade * reserva
+    
+    @classmethod
+    def _get_prefetch_executor(cls) -> ThreadPoolExecutor:
+        """Pool próprio do prefetch (não disputa workers com o hedge)"""
+        if cls._prefetch_executor is None:
+            with cls._prefetch_lock:
+                if cls._prefetch_executor is None:
+                    cls._prefetch_executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'RECEITA_PREFETCH_WORKERS', 4),
+                        thread_name_prefix='receita-prefetch'
+                    )
+        return cls._prefetch_executor
+    
+    def _executar_prefetch(self, cnpj_clean: str):
+        try:
+            self._consultar_em_thread(cnpj_clean)
+        except Exception as e:
+            logger.warning(f"Prefetch do CNPJ {cnpj_clean} falhou: {e}")
+        finally:
+            with self._prefetch_lock:
+                self._prefetch_pendentes.discard(cnpj_clean)
+    
+    def _consultar_em_thread(self, cnpj_clean: str) -> Dict[str, Any]:
+        """consultar_cnpj fora da thread da requisição (fecha a conexão do banco ao final)"""
+        try:
+            return self.consultar_cnpj(cnpj_clean)
+        finally:
+            connection.close()
+    
+    def _resposta_do_cache(self, entrada, status_cache: str, externa: bool = False) -> Dict[str, Any]:
+        """Monta a resposta a partir de uma entrada do cache"""
+        meta = {
+            'status': status_cache,
+            'consultado_em': entrada.consultado_em.isoformat(),
+            'consulta_externa': externa,
+        }
+        if not entrada.encontrado:
+            return {**self._error_response("CNPJ não encontrado em nenhuma fonte"), 'cache': meta}
+        return {**entrada.dados, 'cache': meta}
+    
+    def _consultar_local(self, cnpj: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta o índice local importado dos dados abertos da Receita
+        
+        Returns:
+            Dict no formato dos demais provedores, ou None se o CNPJ não
+            estiver no índice (o índice pode estar incompleto ou filtrado
+            por UF, então ausência não é "não encontrado")
+        """
+        from .models import ReceitaEstabelecimento, ReceitaEmpresa, ReceitaCNAE, ReceitaMunicipio
+        
+        inicio = time.monotonic()
+        try:
+            estabelecimento = ReceitaEstabelecimento.objects.filter(cnpj=cnpj).first()
+            if estabelecimento is None:
+                return None
+            empresa = ReceitaEmpresa.objects.filter(cnpj_basico=estabelecimento.cnpj_basico).first()
+            cnae = ReceitaCNAE.objects.filter(codigo=estabelecimento.cnae_principal).first()
+            municipio = ReceitaMunicipio.objects.filter(codigo=estabelecimento.municipio_codigo).first()
+        except DatabaseError as e:
+            logger.warning(f"Índice local de CNPJ indisponível: {e}")
+            return None
+        finally:
+            self._stats.registrar_chamada(self.FONTE_LOCAL, time.monotonic() - inicio, True)
+        
+        self._stats.registrar_vitoria(self.FONTE_LOCAL, False)
+        logradouro = ' '.join(filter(None, [estabelecimento.tipo_logradouro, estabelecimento.logradouro]))
+        
+        return {
+            'success': True,
+            'fonte': self.FONTE_LOCAL,
+            'cnpj': self._format_cnpj(cnpj),
+            'razao_social': empresa.razao_social if empresa else '',
+            'nome_fantasia': estabelecimento.nome_fantasia,
+            'situacao': estabelecimento.get_situacao_cadastral_display(),
+            'endereco': {
+                'logradouro': logradouro,
+                'numero': estabelecimento.numero,
+                'complemento': estabelecimento.complemento,
+                'bairro': estabelecimento.bairro,
+                'municipio': municipio.descricao if municipio else '',
+                'uf': estabelecimento.uf,
+                'cep': estabelecimento.cep
+            },
+            'telefone': estabelecimento.telefone,
+            'email': estabelecimento.email,
+            'atividade_principal': cnae.descricao if cnae else '',
+            'data_consulta': estabelecimento.referencia,
+            'raw_data': {
+                'cnpj_basico': estabelecimento.cnpj_basico,
+                'matriz': estabelecimento.matriz,
+                'situacao_cadastral': estabelecimento.situacao_cadastral,
+                'data_situacao_cadastral': str(estabelecimento.data_situacao_cadastral or ''),
+                'data_inicio_atividade': str(estabelecimento.data_inicio_atividade or ''),
+                'cnae_fiscal': estabelecimento.cnae_principal,
+                'cnaes_secundarios': estabelecimento.cnaes_secundarios,
+                'natureza_juridica': empresa.natureza_juridica if empresa else '',
+                'porte': empresa.porte if empresa else '',
+                'capital_social': str(empresa.capital_social) if empresa and empresa.capital_social is not None else None,
+                'referencia': estabelecimento.referencia,
+            }
+        }
     
     def _consultar_brasilapi(self, cnpj: str) -> Dict[str, Any]:
         """Consulta via BrasilAPI"""
         url = f"{self.BRASILAPI_URL}/{cnpj}"
         
         response = requests.get(url, headers=self.headers, timeout=self.timeout)
+        if response.status_code == 404:
+            raise CNPJNaoEncontrado(cnpj)
         response.raise_for_status()
         
-        data = response.json()
-        
+        return self._normalizar_brasilapi(cnpj, response.json())
+    
+    def _normalizar_brasilapi(self, cnpj: str, data: Dict) -> Dict[str, Any]:
+        """Converte a resposta da BrasilAPI para o formato padrão"""
         return {
             'success': True,
             'fonte': 'BrasilAPI',
             'cnpj': self._format_cnpj(cnpj),
             'razao_social': data.get('razao_social', ''),
             'nome_fantasia': data.get('nome_fantasia', ''),
-            'situacao': data.get('situacao_cadastral', 'ATIVA'),
+            'situacao': data.get('descricao_situacao_cadastral') or data.get('situacao_cadastral', 'ATIVA'),
             'endereco': {
                 'logradouro': data.get('logradouro', ''),
                 'numero': data.get('numero', ''),
@@ -103,10 +613,13 @@ class ReceitaFederalService:
         response = requests.get(url, headers=self.headers, timeout=self.timeout)
         response.raise_for_status()
         
-        data = response.json()
-        
+        return self._normalizar_receitaws(cnpj, response.json())
+    
+    def _normalizar_receitaws(self, cnpj: str, data: Dict) -> Dict[str, Any]:
+        """Converte a resposta da ReceitaWS para o formato padrão"""
         if data.get('status') == 'ERROR':
-            return self._error_response(data.get('message', 'Erro na consulta'))
+            # Ex: "CNPJ inválido" / "CNPJ rejeitado pela Receita Federal"
+            raise CNPJNaoEncontrado(data.get('message', 'Erro na consulta'))
         
         return {
             'success': True,
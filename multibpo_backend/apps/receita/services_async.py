@@ -0,0 +1,250 @@
+"""
+Versão assíncrona do ReceitaFederalService
+Para uso em views async servidas por ASGI (uvicorn): enquanto as consultas
+esperam a rede, o worker segue atendendo outras requisições.
+
+Compartilha com a versão síncrona o cache, os rate limiters, os circuit
+breakers e as estatísticas do processo; as chamadas HTTP usam um
+httpx.AsyncClient por event loop (pool de conexões reaproveitado).
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .resiliencia import SingleFlightAsync
+from .services import ReceitaFederalService, CNPJNaoEncontrado, LimiteTaxaExcedido
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncReceitaFederalService(ReceitaFederalService):
+    """
+    Consulta de CNPJ sem bloquear o event loop
+
+    Mesma semântica de ReceitaFederalService.consultar_cnpj (cache com
+    serve-stale, single-flight, hedge, rate limit e breakers), com os
+    provedores chamados via httpx e o acesso ao banco via sync_to_async.
+    """
+
+    _singleflight_async = SingleFlightAsync()
+    _clientes = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+    def __init__(self, cache=None, transport=None):
+        super().__init__(cache=cache)
+        # transport: permite injetar httpx.MockTransport nos testes
+        self.transport = transport
+        self._cliente_proprio = None
+
+    # ========== CLIENTE HTTP ==========
+
+    def _novo_cliente(self) -> httpx.AsyncClient:
+        conexoes = getattr(settings, 'RECEITA_ASYNC_MAX_CONEXOES', 100)
+        return httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=conexoes, max_keepalive_connections=conexoes // 5 or 1),
+            transport=self.transport,
+        )
+
+    def _cliente(self) -> httpx.AsyncClient:
+        """Cliente do event loop atual (compartilhado entre requisições)"""
+        if self.transport is not None:
+            if self._cliente_proprio is None:
+                self._cliente_proprio = self._novo_cliente()
+            return self._cliente_proprio
+
+        loop = asyncio.get_running_loop()
+        cliente = self._clientes.get(loop)
+        if cliente is None or cliente.is_closed:
+            cliente = self._clientes[loop] = self._novo_cliente()
+        return cliente
+
+    @classmethod
+    async def fechar_clientes(cls):
+        """Fecha o cliente do event loop atual (shutdown do worker)"""
+        cliente = cls._clientes.pop(asyncio.get_running_loop(), None)
+        if cliente is not None:
+            await cliente.aclose()
+
+    async def aclose(self):
+        """Fecha o cliente próprio (quando criado com transport)"""
+        if self._cliente_proprio is not None:
+            await self._cliente_proprio.aclose()
+            self._cliente_proprio = None
+
+    # ========== CONSULTA ==========
+
+    async def aconsultar_cnpj(self, cnpj: str, usar_cache: bool = True) -> Dict[str, Any]:
+        """
+        Consulta dados de CNPJ (versão async de consultar_cnpj)
+
+        Returns:
+            Dict com dados da empresa ou erro, no mesmo formato da versão síncrona
+        """
+        cnpj_clean = ''.join(filter(str.isdigit, cnpj))
+
+        if len(cnpj_clean) != 14:
+            return self._error_response("CNPJ deve ter 14 dígitos")
+
+        self._stats.incrementar('consultas')
+
+        entrada = None
+        if usar_cache:
+            # LRU em memória primeiro: evita o salto de thread do banco
+            entrada = self.cache.lru.get(cnpj_clean) or await sync_to_async(self.cache.obter)(cnpj_clean)
+        if entrada is not None and self.cache.fresca(entrada):
+            self._stats.incrementar('cache_hits')
+            return self._resposta_do_cache(entrada, 'hit')
+
+        self._stats.incrementar('cache_misses')
+
+        (situacao, result), coalescida = await self._singleflight_async.executar(
+            cnpj_clean, lambda: self._abuscar_e_gravar(cnpj_clean)
+        )
+        return self._resposta_da_busca(cnpj_clean, entrada, situacao, result, coalescida)
+
+    async def _abuscar_e_gravar(self, cnpj_clean: str):
+        """Versão async de _buscar_e_gravar"""
+        try:
+            result = await self._aconsultar_provedores(cnpj_clean)
+        except CNPJNaoEncontrado:
+            await sync_to_async(self.cache.salvar_negativo)(cnpj_clean)
+            return 'nao_encontrado', None
+
+        if result is None:
+            return 'falha', None
+
+        await sync_to_async(self.cache.salvar)(cnpj_clean, result)
+        return 'encontrado', result
+
+    async def _achamar_provedor(self, api_name: str, api_method, cnpj_clean: str) -> Dict[str, Any]:
+        """Versão async de _chamar_provedor (chamada cancelada não conta no breaker)"""
+        breaker = self._breaker(api_name)
+        bucket = self._bucket(api_name)
+        if bucket and not await bucket.aadquirir(timeout=getattr(settings, 'RECEITA_RATE_LIMIT_WAIT', 2)):
+            breaker.liberar()
+            self._stats.incrementar(f'limitadas_{api_name}')
+            raise LimiteTaxaExcedido(f"Limite de taxa do {api_name} atingido")
+
+        logger.info(f"Consultando CNPJ {cnpj_clean} via {api_name} (async)")
+        inicio = time.monotonic()
+        sucesso = False
+        cancelada = False
+        try:
+            result = await api_method(cnpj_clean)
+            sucesso = bool(result.get('success'))
+            return result
+        except CNPJNaoEncontrado:
+            sucesso = True
+            raise
+        except asyncio.CancelledError:
+            # Perdeu o hedge: não é falha do provedor
+            cancelada = True
+            raise
+        finally:
+            if cancelada:
+                breaker.liberar()
+            else:
+                duracao = time.monotonic() - inicio
+                breaker.registrar(sucesso, duracao)
+                self._stats.registrar_chamada(api_name, duracao, sucesso)
+
+    async def _aconsultar_provedores(self, cnpj_clean: str) -> Optional[Dict[str, Any]]:
+        """
+        Versão async de _consultar_provedores (índice local + hedge)
+
+        Diferente da versão com threads, o provedor que perde o hedge é
+        cancelado, liberando a conexão do pool.
+        """
+        if self.indice_local:
+            result = await sync_to_async(self._consultar_local)(cnpj_clean)
+            if result is not None:
+                return result
+
+        provedores = self._provedores()
+        hedge_delay = self.hedge_delay if self.hedge_delay and self.hedge_delay > 0 else None
+        pendentes = {}
+        proximo = 0
+        nao_encontrado = False
+
+        def disparar():
+            nonlocal proximo
+            while proximo < len(provedores):
+                api_name, api_method = provedores[proximo]
+                proximo += 1
+                if not self._breaker(api_name).permitir():
+                    self._stats.incrementar(f'circuito_aberto_{api_name}')
+                    continue
+                tarefa = asyncio.ensure_future(self._achamar_provedor(api_name, api_method, cnpj_clean))
+                pendentes[tarefa] = (api_name, len(pendentes) > 0)
+                return True
+            return False
+
+        if not disparar():
+            logger.warning(f"Todos os circuitos abertos; CNPJ {cnpj_clean} não consultado")
+            return None
+
+        try:
+            while pendentes:
+                espera = hedge_delay if proximo < len(provedores) else None
+                concluidos, _ = await asyncio.wait(
+                    list(pendentes), timeout=espera, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not concluidos:
+                    if disparar():
+                        self._stats.incrementar('hedges_disparados')
+                    continue
+
+                for tarefa in concluidos:
+                    api_name, hedge = pendentes.pop(tarefa)
+                    try:
+                        result = tarefa.result()
+                    except CNPJNaoEncontrado:
+                        logger.info(f"CNPJ {cnpj_clean} não existe segundo {api_name}")
+                        nao_encontrado = True
+                        continue
+                    except LimiteTaxaExcedido as e:
+                        logger.info(str(e))
+                        continue
+                    except Exception as e:
+                        logger.warning(f"Erro ao consultar {api_name}: {e}")
+                        continue
+
+                    if result.get('success'):
+                        logger.info(f"CNPJ {cnpj_clean} encontrado via {api_name}")
+                        self._stats.registrar_vitoria(api_name, hedge)
+                        return result
+
+                if not pendentes:
+                    disparar()
+        finally:
+            for tarefa in pendentes:
+                tarefa.cancel()
+
+        if nao_encontrado:
+            raise CNPJNaoEncontrado(cnpj_clean)
+        return None
+
+    # ========== PROVEDORES ==========
+
+    async def _consultar_brasilapi(self, cnpj: str) -> Dict[str, Any]:
+        """Consulta via BrasilAPI"""
+        response = await self._cliente().get(f"{self.BRASILAPI_URL}/{cnpj}")
+        if response.status_code == 404:
+            raise CNPJNaoEncontrado(cnpj)
+        response.raise_for_status()
+        return self._normalizar_brasilapi(cnpj, response.json())
+
+    async def _consultar_receitaws(self, cnpj: str) -> Dict[str, Any]:
+        """Consulta via ReceitaWS (backup)"""
+        response = await self._cliente().get(f"{self.RECEITAWS_URL}/{cnpj}")
+        response.raise_for_status()
+        return self._normalizar_receitaws(cnpj, response.json())
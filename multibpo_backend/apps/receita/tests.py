@@ -1,3 +1,509 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import requests
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from .cache import CNPJCache
+from .cep import CEPCache, CEPNaoEncontrado, CEPService
+from .importador import ImportadorCNPJ
+from .models import CEPConsulta, CEPLocal, CNPJConsulta, ReceitaEstabelecimento, ReceitaImportacao
+from .resiliencia import TokenBucket, CircuitBreaker
+from .services import ReceitaFederalService, CNPJNaoEncontrado
+from .services_async import AsyncReceitaFederalService
+
+
+CNPJ = '07526557000100'
+
+
+def resultado_fake(fonte='BrasilAPI'):
+    return {
+        'success': True,
+        'fonte': fonte,
+        'cnpj': '07.526.557/0001-00',
+        'razao_social': 'EMPRESA TESTE LTDA',
+        'nome_fantasia': 'TESTE',
+        'situacao': 'ATIVA',
+        'endereco': {},
+        'telefone': '',
+        'email': '',
+        'atividade_principal': '',
+        'data_consulta': '',
+        'raw_data': {},
+    }
+
+
+class ReceitaTestCase(TestCase):
+    """Base: isola o estado compartilhado do serviço entre os testes"""
+    
+    def setUp(self):
+        ReceitaFederalService.resetar_estado()
+        self.addCleanup(ReceitaFederalService.resetar_estado)
+
+
+@override_settings(RECEITA_CACHE_TTL=3600, RECEITA_CACHE_NEGATIVE_TTL=60, RECEITA_CACHE_SERVE_STALE=True)
+class CNPJCacheTest(ReceitaTestCase):
+    """Testes do cache de consultas de CNPJ"""
+    
+    def setUp(self):
+        super().setUp()
+        self.service = ReceitaFederalService(cache=CNPJCache(maxsize=16))
+    
+    def _patch_provedores(self, brasilapi=None, receitaws=None):
+        patches = [
+            mock.patch.object(ReceitaFederalService, '_consultar_brasilapi', **brasilapi),
+            mock.patch.object(ReceitaFederalService, '_consultar_receitaws', **receitaws),
+        ]
+        mocks = [p.start() for p in patches]
+        for p in patches:
+            self.addCleanup(p.stop)
+        return mocks
+    
+    def test_segunda_consulta_nao_chama_provedores(self):
+        brasilapi, _ = self._patch_provedores(
+            brasilapi={'return_value': resultado_fake()},
+            receitaws={'side_effect': AssertionError('não deveria ser chamado')},
+        )
+        
+        primeira = self.service.consultar_cnpj(CNPJ)
+        segunda = ReceitaFederalService(cache=CNPJCache()).consultar_cnpj('07.526.557/0001-00')
+        
+        self.assertEqual(primeira['cache']['status'], 'miss')
+        self.assertTrue(primeira['cache']['consulta_externa'])
+        self.assertEqual(segunda['cache']['status'], 'hit')  # veio do banco
+        self.assertFalse(segunda['cache']['consulta_externa'])
+        self.assertEqual(segunda['razao_social'], 'EMPRESA TESTE LTDA')
+        self.assertEqual(brasilapi.call_count, 1)
+    
+    def test_cache_negativo(self):
+        brasilapi, receitaws = self._patch_provedores(
+            brasilapi={'side_effect': CNPJNaoEncontrado(CNPJ)},
+            receitaws={'side_effect': CNPJNaoEncontrado(CNPJ)},
+        )
+        
+        self.assertFalse(self.service.consultar_cnpj(CNPJ)['success'])
+        resposta = self.service.consultar_cnpj(CNPJ)
+        
+        self.assertFalse(resposta['success'])
+        self.assertEqual(resposta['cache']['status'], 'hit')
+        self.assertFalse(CNPJConsulta.objects.get(cnpj=CNPJ).encontrado)
+        self.assertEqual(brasilapi.call_count, 1)
+    
+    def test_serve_stale_quando_provedores_falham(self):
+        self.service.cache.salvar(
+            CNPJ, resultado_fake(), consultado_em=timezone.now() - timedelta(hours=2)
+        )
+        self._patch_provedores(
+            brasilapi={'side_effect': requests.Timeout()},
+            receitaws={'side_effect': requests.ConnectionError()},
+        )
+        
+        resposta = self.service.consultar_cnpj(CNPJ)
+        
+        self.assertTrue(resposta['success'])
+        self.assertEqual(resposta['cache']['status'], 'stale')
+    
+    def test_entrada_vencida_e_revalidada(self):
+        self.service.cache.salvar(
+            CNPJ, resultado_fake('ReceitaWS'), consultado_em=timezone.now() - timedelta(hours=2)
+        )
+        self._patch_provedores(
+            brasilapi={'return_value': resultado_fake('BrasilAPI')},
+            receitaws={'side_effect': AssertionError('não deveria ser chamado')},
+        )
+        
+        resposta = self.service.consultar_cnpj(CNPJ)
+        
+        self.assertEqual(resposta['cache']['status'], 'miss')
+        self.assertEqual(CNPJConsulta.objects.get(cnpj=CNPJ).fonte, 'BrasilAPI')
+
+
+class CacheMemoria(CNPJCache):
+    """CNPJCache só com o LRU (as threads do teste não enxergam a transação do TestCase)"""
+    
+    def obter(self, cnpj):
+        return self.lru.get(cnpj)
+    
+    def salvar(self, cnpj, dados, encontrado=True, consultado_em=None):
+        from .cache import EntradaCNPJ
+        entrada = EntradaCNPJ(cnpj, encontrado, dados, dados.get('fonte', ''), consultado_em or timezone.now())
+        self.lru.set(cnpj, entrada)
+        return entrada
+
+
+class HedgeSingleFlightTest(ReceitaTestCase):
+    """Testes de hedge e coalescência do ReceitaFederalService"""
+    
+    @override_settings(RECEITA_HEDGE_DELAY=0.05)
+    def test_hedge_dispara_backup_quando_primario_demora(self):
+        def lento(cnpj):
+            time.sleep(0.5)
+            return resultado_fake('BrasilAPI')
+        
+        with mock.patch.object(ReceitaFederalService, '_consultar_brasilapi', side_effect=lento), \
+             mock.patch.object(ReceitaFederalService, '_consultar_receitaws', return_value=resultado_fake('ReceitaWS')):
+            inicio = time.monotonic()
+            resposta = ReceitaFederalService(cache=CacheMemoria()).consultar_cnpj(CNPJ)
+            duracao = time.monotonic() - inicio
+        
+        self.assertEqual(resposta['fonte'], 'ReceitaWS')
+        self.assertLess(duracao, 0.4)
+        stats = ReceitaFederalService.stats()
+        self.assertEqual(stats['hedges_disparados'], 1)
+        self.assertEqual(stats['hedges_vencedores'], 1)
+    
+    @override_settings(RECEITA_HEDGE_DELAY=0)
+    def test_single_flight_coalesce_consultas_concorrentes(self):
+        chamadas = []
+        
+        def lento(cnpj):
+            chamadas.append(cnpj)
+            time.sleep(0.2)
+            return resultado_fake()
+        
+        service = ReceitaFederalService(cache=CacheMemoria())
+        with mock.patch.object(ReceitaFederalService, '_consultar_brasilapi', side_effect=lento):
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                respostas = list(executor.map(lambda _: service.consultar_cnpj(CNPJ), range(5)))
+        
+        self.assertEqual(len(chamadas), 1)
+        self.assertTrue(all(r['success'] for r in respostas))
+        self.assertEqual(ReceitaFederalService.stats()['coalescidas'], 4)
+
+
+@override_settings(RECEITA_INDICE_LOCAL=False)
+class AsyncReceitaTest(ReceitaTestCase):
+    """Testes do AsyncReceitaFederalService (httpx com transporte simulado)"""
+    
+    def _service(self, atraso_brasilapi=0.0, chamadas=None):
+        async def handler(request):
+            if chamadas is not None:
+                chamadas.append(request.url.host)
+            if request.url.host == 'brasilapi.com.br':
+                await asyncio.sleep(atraso_brasilapi)
+                return httpx.Response(200, json={'razao_social': 'EMPRESA TESTE LTDA', 'cnpj': CNPJ})
+            return httpx.Response(200, json={'status': 'OK', 'nome': 'EMPRESA TESTE LTDA'})
+        
+        return AsyncReceitaFederalService(cache=CacheMemoria(), transport=httpx.MockTransport(handler))
+    
+    @override_settings(RECEITA_HEDGE_DELAY=0.05)
+    async def test_hedge_async_cancela_primario_lento(self):
+        service = self._service(atraso_brasilapi=0.5)
+        inicio = time.monotonic()
+        resposta = await service.aconsultar_cnpj(CNPJ)
+        duracao = time.monotonic() - inicio
+        await service.aclose()
+        
+        self.assertEqual(resposta['fonte'], 'ReceitaWS')
+        self.assertEqual(resposta['cache']['status'], 'miss')
+        self.assertLess(duracao, 0.4)
+        self.assertEqual(ReceitaFederalService.stats()['hedges_vencedores'], 1)
+        # O primário cancelado não conta como falha no breaker
+        self.assertEqual(ReceitaFederalService.saude_provedores()['BrasilAPI']['chamadas_janela'], 0)
+    
+    @override_settings(RECEITA_HEDGE_DELAY=0)
+    async def test_single_flight_async(self):
+        chamadas = []
+        service = self._service(atraso_brasilapi=0.1, chamadas=chamadas)
+        respostas = await asyncio.gather(*(service.aconsultar_cnpj(CNPJ) for _ in range(10)))
+        segunda = await service.aconsultar_cnpj(CNPJ)
+        await service.aclose()
+        
+        self.assertEqual(chamadas, ['brasilapi.com.br'])
+        self.assertTrue(all(r['success'] for r in respostas))
+        self.assertEqual(segunda['cache']['status'], 'hit')
+        self.assertEqual(ReceitaFederalService.stats()['coalescidas'], 9)
+    
+    async def test_view_async(self):
+        from .views import CNPJConsultaAsyncView
+        
+        view = CNPJConsultaAsyncView.as_view()
+        request = AsyncRequestFactory().get(f'/api/v1/receita/cnpj/{CNPJ}/')
+        with mock.patch.object(AsyncReceitaFederalService, 'aconsultar_cnpj', return_value=resultado_fake()):
+            response = await view(request, cnpj=CNPJ)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['razao_social'], 'EMPRESA TESTE LTDA')
+
+
+class PrefetchTest(ReceitaTestCase):
+    """Prefetch disparado pela validação de documento"""
+    
+    def test_prefetch_aquece_cache_em_background(self):
+        service = ReceitaFederalService(cache=CacheMemoria())
+        with mock.patch.object(ReceitaFederalService, '_consultar_provedores', return_value=resultado_fake()) as provedores:
+            self.assertEqual(service.prefetch('07.526.557/0001-00'), 'agendado')
+            for _ in range(100):
+                if not ReceitaFederalService._prefetch_pendentes:
+                    break
+                time.sleep(0.01)
+            
+            self.assertEqual(service.prefetch(CNPJ), 'em_cache')
+            resposta = service.consultar_cnpj(CNPJ)
+        
+        self.assertEqual(resposta['cache']['status'], 'hit')
+        self.assertEqual(provedores.call_count, 1)
+        self.assertEqual(service.prefetch('123'), 'ignorado')
+    
+    def test_prefetch_preserva_reserva_do_rate_limiter(self):
+        service = ReceitaFederalService(cache=CacheMemoria())
+        bucket = ReceitaFederalService._bucket('BrasilAPI')
+        while bucket.disponiveis() > bucket.capacidade / 2:
+            bucket.tentar()
+        with mock.patch.object(ReceitaFederalService, '_consultar_provedores') as provedores:
+            self.assertEqual(service.prefetch(CNPJ), 'ignorado')
+        provedores.assert_not_called()
+        self.assertEqual(ReceitaFederalService.stats()['prefetch_sem_orcamento'], 1)
+
+
+class ConsultaLoteTest(ReceitaTestCase):
+    """Testes da consulta de CNPJs em lote"""
+    
+    def test_lote_deduplica_e_valida_localmente(self):
+        service = ReceitaFederalService(cache=CacheMemoria())
+        with mock.patch.object(ReceitaFederalService, '_consultar_brasilapi', return_value=resultado_fake()) as brasilapi:
+            itens = list(service.consultar_lote([CNPJ, '07.526.557/0001-00', '11111111111111', '123']))
+        
+        self.assertEqual(len(itens), 3)
+        self.assertEqual(brasilapi.call_count, 1)
+        por_entrada = {item['entrada']: item['resultado'] for item in itens}
+        self.assertTrue(por_entrada[CNPJ]['success'])
+        self.assertEqual(por_entrada['11111111111111']['message'], 'CNPJ inválido')
+    
+    def test_endpoint_ndjson(self):
+        from django.contrib.auth.models import User
+        from rest_framework.test import APIClient
+        
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('lote', password='x'))
+        with mock.patch.object(ReceitaFederalService, 'consultar_cnpj', return_value=resultado_fake()):
+            response = client.post('/api/v1/receita/cnpj/lote/', {'cnpjs': [CNPJ, '123']}, format='json')
+            linhas = [json.loads(l) for l in b''.join(response.streaming_content).decode().splitlines()]
+        
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(linhas), 3)
+        self.assertEqual(linhas[-1]['resumo']['encontrados'], 1)
+
+
+class TokenBucketTest(TestCase):
+    
+    def test_bucket_limita_rajada(self):
+        bucket = TokenBucket(taxa=1, capacidade=2)
+        self.assertTrue(bucket.adquirir(timeout=0))
+        self.assertTrue(bucket.adquirir(timeout=0))
+        self.assertFalse(bucket.adquirir(timeout=0))
+
+
+class CircuitBreakerTest(ReceitaTestCase):
+    """Testes dos circuit breakers dos provedores"""
+    
+    def test_breaker_abre_e_sonda_em_meio_aberto(self):
+        breaker = CircuitBreaker('teste', min_chamadas=2, taxa_erro=0.5, tempo_aberto_s=0.05)
+        breaker.registrar(False)
+        breaker.registrar(False)
+        self.assertEqual(breaker.estado, 'aberto')
+        self.assertFalse(breaker.permitir())
+        
+        time.sleep(0.06)
+        self.assertTrue(breaker.permitir())   # sonda
+        self.assertFalse(breaker.permitir())  # só uma sonda por vez
+        breaker.registrar(True, 0.1)
+        self.assertEqual(breaker.estado, 'fechado')
+    
+    @override_settings(RECEITA_HEDGE_DELAY=0, RECEITA_BREAKER={'min_chamadas': 1, 'tempo_aberto_s': 60})
+    def test_provedor_com_circuito_aberto_nao_e_chamado(self):
+        service = ReceitaFederalService(cache=CacheMemoria())
+        with mock.patch.object(ReceitaFederalService, '_consultar_brasilapi', side_effect=requests.HTTPError('429')) as brasilapi, \
+             mock.patch.object(ReceitaFederalService, '_consultar_receitaws', return_value=resultado_fake('ReceitaWS')):
+            for _ in range(3):
+                resposta = service.consultar_cnpj(CNPJ, usar_cache=False)
+        
+        self.assertEqual(resposta['fonte'], 'ReceitaWS')
+        self.assertEqual(brasilapi.call_count, 1)
+        self.assertEqual(ReceitaFederalService.saude_provedores()['BrasilAPI']['estado'], 'aberto')
+    
+    def test_provedor_sem_token_nao_e_primario(self):
+        ReceitaFederalService._breaker('BrasilAPI').registrar(True, 1.0)
+        ReceitaFederalService._breaker('ReceitaWS').registrar(True, 0.1)
+        service = ReceitaFederalService(cache=CacheMemoria())
+        self.assertEqual([nome for nome, _ in service._provedores()], ['ReceitaWS', 'BrasilAPI'])
+        
+        bucket = ReceitaFederalService._bucket('ReceitaWS')
+        while bucket.tentar() == 0:
+            pass
+        self.assertEqual([nome for nome, _ in service._provedores()], ['BrasilAPI', 'ReceitaWS'])
+    
+    def test_health_check_nao_consulta_provedores(self):
+        with mock.patch.object(ReceitaFederalService, '_consultar_brasilapi') as brasilapi:
+            response = self.client.get('/api/v1/receita/health/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['services']['BrasilAPI']['estado'], 'fechado')
+        brasilapi.assert_not_called()
+
+
+class IndiceLocalTest(ReceitaTestCase):
+    """Testes do importador de dados abertos e do provedor local"""
+    
+    def _zip(self, nome, linhas):
+        caminho = os.path.join(self.diretorio, nome)
+        with zipfile.ZipFile(caminho, 'w') as arquivo_zip:
+            conteudo = '\n'.join(';'.join(f'"{v}"' for v in linha) for linha in linhas)
+            arquivo_zip.writestr(nome.replace('.zip', '.CSV'), conteudo.encode('latin-1'))
+        return caminho
+    
+    def _estabelecimento(self, cnpj, situacao='02', uf='SP'):
+        linha = [''] * 30
+        linha[0], linha[1], linha[2] = cnpj[:8], cnpj[8:12], cnpj[12:]
+        linha[3], linha[4], linha[5] = '1', 'FANTASIA', situacao
+        linha[11], linha[14], linha[19], linha[20] = '6920601', 'RUA A', uf, '7107'
+        return linha
+    
+    def setUp(self):
+        super().setUp()
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self._zip('Cnaes.zip', [['6920601', 'Atividades de contabilidade']])
+        self._zip('Municipios.zip', [['7107', 'SAO PAULO']])
+        self._zip('Empresas0.zip', [[CNPJ[:8], 'EMPRESA LOCAL LTDA', '2062', '49', '1.000,00', '03', '']])
+    
+    def _importar(self, referencia, estabelecimentos, **kwargs):
+        importador = ImportadorCNPJ(referencia, lote=1, **kwargs)
+        for nome in ['Cnaes.zip', 'Municipios.zip', 'Empresas0.zip']:
+            importador.importar_arquivo(os.path.join(self.diretorio, nome))
+        return importador.importar_arquivo(self._zip('Estabelecimentos0.zip', estabelecimentos))
+    
+    def test_importacao_e_consulta_local_sem_api(self):
+        registro = self._importar('2025-05', [self._estabelecimento(CNPJ), self._estabelecimento('33000167000101', uf='RJ')], ufs=['SP'])
+        
+        self.assertEqual(registro.status, 'concluido')
+        self.assertEqual(registro.linhas_processadas, 2)
+        self.assertEqual(ReceitaEstabelecimento.objects.count(), 1)  # filtro de UF
+        
+        with mock.patch.object(ReceitaFederalService, '_consultar_brasilapi') as brasilapi:
+            resposta = ReceitaFederalService(cache=CacheMemoria()).consultar_cnpj(CNPJ)
+        
+        brasilapi.assert_not_called()
+        self.assertEqual(resposta['fonte'], 'ReceitaLocal')
+        self.assertFalse(resposta['cache']['consulta_externa'])
+        self.assertEqual(resposta['razao_social'], 'EMPRESA LOCAL LTDA')
+        self.assertEqual(resposta['situacao'], 'ATIVA')
+        self.assertEqual(resposta['endereco']['municipio'], 'SAO PAULO')
+        self.assertEqual(resposta['atividade_principal'], 'Atividades de contabilidade')
+    
+    def test_importacao_incremental_e_retomavel(self):
+        self._importar('2025-05', [self._estabelecimento(CNPJ)])
+        
+        # Dump seguinte: mesmo arquivo, mas registro mudou; a linha já
+        # processada (checkpoint) é pulada ao retomar
+        ReceitaImportacao.objects.create(
+            referencia='2025-06', arquivo='Estabelecimentos0.zip', tipo='estabelecimentos', linhas_processadas=1
+        )
+        registro = self._importar('2025-06', [self._estabelecimento(CNPJ, situacao='08'), self._estabelecimento('33000167000101')])
+        
+        self.assertEqual(registro.linhas_processadas, 2)
+        self.assertEqual(ReceitaEstabelecimento.objects.get(cnpj=CNPJ).situacao_cadastral, '02')
+        self.assertTrue(ReceitaEstabelecimento.objects.filter(cnpj='33000167000101', referencia='2025-06').exists())
+
+
+class CEPTest(TestCase):
+    """Testes da base local, do cache e dos provedores de CEP"""
+    
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        caminho = os.path.join(self.diretorio, 'ceps.csv')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write('cep;logradouro;bairro;cidade;uf;ibge\n')
+            arquivo.write('01310-100;Avenida Paulista;Bela Vista;São Paulo;sp;3550308\n')
+            arquivo.write('20040020;Rua da Assembleia;Centro;Rio de Janeiro;RJ;3304557\n')
+        call_command('importar_ceps', caminho, referencia='2025-05', stdout=StringIO())
+        self.service = CEPService(cache=CEPCache(maxsize=16))
+    
+    def _patch_provedores(self, brasilapi, viacep):
+        patches = [
+            mock.patch.object(CEPService, '_consultar_brasilapi', **brasilapi),
+            mock.patch.object(CEPService, '_consultar_viacep', **viacep),
+        ]
+        mocks = [p.start() for p in patches]
+        for p in patches:
+            self.addCleanup(p.stop)
+        return mocks
+    
+    def test_importacao_e_consulta_local_sem_rede(self):
+        self.assertEqual(CEPLocal.objects.count(), 2)  # cabeçalho ignorado
+        brasilapi, viacep = self._patch_provedores({}, {})
+        
+        resposta = self.service.consultar_cep('01310-100')
+        
+        brasilapi.assert_not_called()
+        viacep.assert_not_called()
+        self.assertEqual(resposta['fonte'], 'BaseLocal')
+        self.assertEqual(resposta['cep'], '01310-100')
+        self.assertEqual((resposta['logradouro'], resposta['cidade'], resposta['uf']), ('Avenida Paulista', 'São Paulo', 'SP'))
+    
+    def test_resposta_alterada_nao_contamina_cache(self):
+        self.service.consultar_cep('01310100')['logradouro'] = 'Outra Rua'
+        self.assertEqual(self.service.consultar_cep('01310100')['logradouro'], 'Avenida Paulista')
+    
+    def test_lote_com_uma_consulta_por_nivel(self):
+        with self.assertNumQueries(2):
+            resultados = self.service.consultar_lote(['01310100', '20040-020', '99999999', '123'])
+        self.assertTrue(resultados['01310100']['success'])
+        self.assertEqual(resultados['20040020']['bairro'], 'Centro')
+        self.assertFalse(resultados['99999999']['success'])
+        self.assertFalse(resultados['123']['success'])
+        
+        with self.assertNumQueries(0):
+            self.service.consultar_lote(['01310100', '20040020'])
+    
+    def test_provedor_externo_grava_cache(self):
+        dados = self.service._normalizar('BrasilAPI', '04538132', 'Avenida Brigadeiro Faria Lima', '',
+                                         'Itaim Bibi', 'São Paulo', 'SP', '')
+        brasilapi, viacep = self._patch_provedores({'return_value': dados}, {})
+        
+        self.assertFalse(self.service.consultar_cep('04538132', externo=False)['success'])
+        brasilapi.assert_not_called()
+        
+        self.assertEqual(self.service.consultar_cep('04538-132')['bairro'], 'Itaim Bibi')
+        self.assertEqual(CEPConsulta.objects.get(cep='04538132').fonte, 'BrasilAPI')
+        
+        # Outro processo (LRU vazio) lê do banco, sem provedores
+        outro = CEPService(cache=CEPCache(maxsize=16))
+        self.assertEqual(outro.consultar_cep('04538132')['fonte'], 'BrasilAPI')
+        self.assertEqual(brasilapi.call_count, 1)
+        viacep.assert_not_called()
+    
+    def test_cep_inexistente_fica_em_cache_negativo(self):
+        brasilapi, viacep = self._patch_provedores(
+            {'side_effect': CEPNaoEncontrado('00000000')}, {'side_effect': CEPNaoEncontrado('00000000')}
+        )
+        
+        self.assertFalse(self.service.consultar_cep('00000000')['success'])
+        self.assertFalse(self.service.consultar_cep('00000000')['success'])
+        
+        self.assertFalse(CEPConsulta.objects.get(cep='00000000').encontrado)
+        self.assertEqual((brasilapi.call_count, viacep.call_count), (1, 1))
+    
+    def test_serializer_de_escritorio_completa_endereco(self):
+        from apps.contadores.serializers import EscritorioSerializer
+        
+        brasilapi, _ = self._patch_provedores({}, {})
+        dados = EscritorioSerializer().validate({'cep': '01310100', 'logradouro': '', 'bairro': 'Jardins'})
+        
+        brasilapi.assert_not_called()
+        self.assertEqual(dados['logradouro'], 'Avenida Paulista')
+        self.assertEqual(dados['bairro'], 'Jardins')  # informado prevalece
+        self.assertEqual((dados['cidade'], dados['estado']), ('São Paulo', 'SP'))
@@ -2,14 +2,26 @@
 URLs do app Receita Federal
 """
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'receita'
 
+# Sob ASGI (RECEITA_ASYNC=True) a consulta individual usa a view async
+consulta_view = (
+    views.CNPJConsultaAsyncView.as_view()
+    if getattr(settings, 'RECEITA_ASYNC', False)
+    else views.CNPJConsultaView.as_view()
+)
+
 urlpatterns = [
     # Consulta de CNPJ
-    path('cnpj/<str:cnpj>/', views.CNPJConsultaView.as_view(), name='cnpj-consulta'),
+    path('cnpj/lote/', views.CNPJLoteView.as_view(), name='cnpj-lote'),
+    path('cnpj/<str:cnpj>/', consulta_view, name='cnpj-consulta'),
+    
+    # Consulta de CEP
+    path('cep/<str:cep>/', views.CEPConsultaView.as_view(), name='cep-consulta'),
     
     # Health check
     path('health/', views.health_check_receita, name='health-check'),
@@ -6,7 +6,13 @@ from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+import json
 import logging
+import time
 
 from .services import ReceitaFederalService
 
@@ -40,28 +46,145 @@ class CNPJConsultaView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class CNPJConsultaAsyncView(View):
+    """
+    Versão async da consulta de CNPJ (mesma URL, ativada com RECEITA_ASYNC)
+    GET /api/v1/receita/cnpj/{cnpj}/
+    
+    View Django pura (o APIView do DRF é síncrono): sob ASGI, a espera
+    pelos provedores não prende um worker. Mesma resposta e status do
+    CNPJConsultaView; o endpoint é público, como na versão síncrona.
+    """
+    
+    http_method_names = ['get', 'options']
+    
+    async def get(self, request, cnpj):
+        from .services_async import AsyncReceitaFederalService
+        
+        try:
+            result = await AsyncReceitaFederalService().aconsultar_cnpj(cnpj)
+            codigo = status.HTTP_200_OK if result.get('success') else status.HTTP_404_NOT_FOUND
+            return JsonResponse(result, status=codigo, encoder=DjangoJSONEncoder,
+                                json_dumps_params={'ensure_ascii': False})
+        
+        except Exception as e:
+            logger.error(f"Erro na consulta CNPJ {cnpj}: {e}")
+            return JsonResponse({
+                'success': False,
+                'error': True,
+                'message': 'Erro interno na consulta',
+                'cnpj': cnpj
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CEPConsultaView(APIView):
+    """
+    Endereço de um CEP (logradouro, bairro, cidade e UF)
+    GET /api/v1/receita/cep/{cep}/
+    
+    Base local e cache primeiro; provedores externos só se o CEP não estiver
+    em nenhum dos dois (e CEP_CONSULTA_EXTERNA ligado).
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, cep):
+        from .cep import CEPService
+        
+        try:
+            result = CEPService().consultar_cep(cep)
+            codigo = status.HTTP_200_OK if result.get('success') else status.HTTP_404_NOT_FOUND
+            return Response(result, status=codigo)
+        
+        except Exception as e:
+            logger.error(f"Erro na consulta CEP {cep}: {e}")
+            return Response({
+                'success': False,
+                'error': True,
+                'message': 'Erro interno na consulta',
+                'cep': cep
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CNPJLoteView(APIView):
+    """
+    Consulta de CNPJs em lote
+    POST /api/v1/receita/cnpj/lote/  {"cnpjs": ["...", "..."]}
+    
+    Responde em NDJSON (application/x-ndjson): uma linha por CNPJ, na
+    ordem em que as consultas terminam, e uma linha final de resumo.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        cnpjs = request.data.get('cnpjs')
+        if not isinstance(cnpjs, list) or not cnpjs:
+            return Response({
+                'success': False,
+                'error': True,
+                'message': 'Informe "cnpjs" como uma lista não vazia'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        limite = getattr(settings, 'RECEITA_LOTE_MAX', 500)
+        if len(cnpjs) > limite:
+            return Response({
+                'success': False,
+                'error': True,
+                'message': f'Máximo de {limite} CNPJs por lote'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = StreamingHttpResponse(
+            self._stream(cnpjs),
+            content_type='application/x-ndjson'
+        )
+        response['X-Accel-Buffering'] = 'no'  # nginx: não segurar o stream
+        return response
+    
+    def _stream(self, cnpjs):
+        service = ReceitaFederalService()
+        inicio = time.monotonic()
+        total = encontrados = 0
+        
+        for item in service.consultar_lote(cnpjs):
+            total += 1
+            encontrados += bool(item['resultado'].get('success'))
+            yield json.dumps(item, ensure_ascii=False, default=str) + '\n'
+        
+        yield json.dumps({'resumo': {
+            'recebidos': len(cnpjs),
+            'consultados': total,
+            'encontrados': encontrados,
+            'duracao_s': round(time.monotonic() - inicio, 3),
+        }}) + '\n'
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def health_check_receita(request):
     """
     Health check do app receita
     GET /api/v1/receita/health/
+    
+    Reporta o estado dos circuit breakers e a latência recente de cada
+    provedor, sem fazer consulta externa.
     """
     try:
-        # Testar consulta com CNPJ conhecido (Petrobras)
-        service = ReceitaFederalService()
-        test_result = service.consultar_cnpj('07526557000100')
+        provedores = ReceitaFederalService.saude_provedores()
+        abertos = [nome for nome, saude in provedores.items() if saude['estado'] == 'aberto']
+        
+        if not abertos:
+            situacao = 'healthy'
+        elif len(abertos) < len(provedores):
+            situacao = 'degraded'
+        else:
+            situacao = 'unhealthy'
         
         return Response({
-            'status': 'healthy',
+            'status': situacao,
             'app': 'receita',
             'version': '1.0.0',
-            'services': {
-                'brasilapi': 'available',
-                'receitaws': 'available'
-            },
-            'test_cnpj': test_result.get('success', False)
-        }, status=status.HTTP_200_OK)
+            'services': provedores,
+            'stats': ReceitaFederalService.stats()
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE if situacao == 'unhealthy' else status.HTTP_200_OK)
         
     except Exception as e:
         return Response({
@@ -87,19 +210,13 @@ def test_cnpj_examples(request):
     ]
     
     results = {}
-    for cnpj in test_cnpjs:
-        try:
-            result = service.consultar_cnpj(cnpj)
-            results[cnpj] = {
-                'success': result.get('success', False),
-                'razao_social': result.get('razao_social', 'N/A'),
-                'fonte': result.get('fonte', 'N/A')
-            }
-        except Exception as e:
-            results[cnpj] = {
-                'success': False,
-                'error': str(e)
-            }
+    for item in service.consultar_lote(test_cnpjs):
+        result = item['resultado']
+        results[item['entrada']] = {
+            'success': result.get('success', False),
+            'razao_social': result.get('razao_social', 'N/A'),
+            'fonte': result.get('fonte', 'N/A')
+        }
     
     return Response({
         'app': 'receita',
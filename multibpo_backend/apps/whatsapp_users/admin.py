@@ -1,14 +1,17 @@
 # apps/whatsapp_users/admin.py
 from django.contrib import admin
-from .models import WhatsAppUser, WhatsAppMessage, ConfiguracaoSistema, AssinaturaAsaas
+
+from config.admin_paginacao import TabelaGrandeAdminMixin
+from .models import WhatsAppUser, WhatsAppMessage, ConfiguracaoSistema, AssinaturaAsaas, PlanTransition
 
 
 @admin.register(WhatsAppUser)
-class WhatsAppUserAdmin(admin.ModelAdmin):
+class WhatsAppUserAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
     list_display = ['phone_number', 'nome', 'plano_atual', 'perguntas_realizadas', 'limite_perguntas', 'ativo', 'created_at']
     list_filter = ['plano_atual', 'ativo', 'termos_aceitos', 'email_verificado']
     search_fields = ['phone_number', 'nome', 'email']
     readonly_fields = ['created_at', 'updated_at']
+    raw_id_fields = ['user']
     fieldsets = (
         ('Informações Básicas', {
             'fields': ('phone_number', 'nome', 'email')
@@ -30,11 +33,13 @@ class WhatsAppUserAdmin(admin.ModelAdmin):
 
 
 @admin.register(WhatsAppMessage)
-class WhatsAppMessageAdmin(admin.ModelAdmin):
+class WhatsAppMessageAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
     list_display = ['whatsapp_user', 'pergunta_preview', 'tokens_utilizados', 'tempo_processamento', 'created_at']
     list_filter = ['created_at']
     search_fields = ['whatsapp_user__nome', 'whatsapp_user__phone_number', 'pergunta']
     readonly_fields = ['created_at']
+    list_select_related = ['whatsapp_user']
+    raw_id_fields = ['whatsapp_user']
     
     def pergunta_preview(self, obj):
         return obj.pergunta[:50] + "..." if len(obj.pergunta) > 50 else obj.pergunta
@@ -53,7 +58,7 @@ class ConfiguracaoSistemaAdmin(admin.ModelAdmin):
 # ===================================================================
 
 @admin.register(AssinaturaAsaas)
-class AssinaturaAsaasAdmin(admin.ModelAdmin):
+class AssinaturaAsaasAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
     list_display = [
         'formatted_phone', 
         'customer_name', 
@@ -76,6 +81,9 @@ class AssinaturaAsaasAdmin(admin.ModelAdmin):
         'customer_id',
         'subscription_id'
     ]
+    # Telefone e nome exibidos vêm do whatsapp_user
+    list_select_related = ['whatsapp_user']
+    autocomplete_fields = ['whatsapp_user']
     readonly_fields = [
         'customer_id',
         'subscription_id', 
@@ -133,4 +141,17 @@ class AssinaturaAsaasAdmin(admin.ModelAdmin):
             request, 
             f'{count} assinatura(s) suspensa(s)!'
         )
-    suspender_assinatura.short_description = "Suspender Assinatura"
\ No newline at end of file
+    suspender_assinatura.short_description = "Suspender Assinatura"
+
+@admin.register(PlanTransition)
+class PlanTransitionAdmin(TabelaGrandeAdminMixin, admin.ModelAdmin):
+    list_display = ['whatsapp_user', 'plano_anterior', 'plano_novo', 'causa', 'dias_desde_cadastro', 'primeira_vez', 'created_at']
+    list_filter = ['plano_anterior', 'plano_novo', 'causa', 'primeira_vez']
+    search_fields = ['whatsapp_user__phone_number', 'whatsapp_user__email']
+    raw_id_fields = ['whatsapp_user']
+    list_select_related = ['whatsapp_user']
+    date_hierarchy = 'created_at'
+    
+    def has_change_permission(self, request, obj=None):
+        # Log append-only
+        return False
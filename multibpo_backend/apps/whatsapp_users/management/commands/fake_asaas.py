@@ -0,0 +1,43 @@
+# apps/whatsapp_users/management/commands/fake_asaas.py
+from django.core.management.base import BaseCommand
+
+from apps.whatsapp_users.services.asaas_fake import FakeAsaasServer
+
+
+class Command(BaseCommand):
+    help = 'Sobe um servidor Asaas fake (/customers, /subscriptions, /payments) para testes de carga'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--porta', type=int, default=8099)
+        parser.add_argument('--latencia-ms', type=float, default=0, help='Latência fixa por requisição')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Latência extra aleatória')
+        parser.add_argument('--taxa-falha', type=float, default=0.0, help='Probabilidade de erro (0..1)')
+        parser.add_argument(
+            '--status-falha', default='500,503,429',
+            help='Status HTTP sorteados nas falhas (separados por vírgula)'
+        )
+        parser.add_argument('--api-key', default='', help='Exige este access_token nas requisições')
+        parser.add_argument('--verbose', action='store_true', help='Loga cada requisição')
+    
+    def handle(self, *args, **options):
+        server = FakeAsaasServer(
+            host=options['host'],
+            porta=options['porta'],
+            latencia_ms=options['latencia_ms'],
+            jitter_ms=options['jitter_ms'],
+            taxa_falha=options['taxa_falha'],
+            status_falha=[int(s) for s in options['status_falha'].split(',') if s.strip()],
+            api_key=options['api_key'],
+            verbose=options['verbose'],
+        )
+        
+        self.stdout.write(self.style.SUCCESS(f"🧪 Asaas fake em {server.base_url}"))
+        self.stdout.write(f"   Use ASAAS_BASE_URL={server.base_url} no backend")
+        
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Encerrando Asaas fake...")
+        finally:
+            server.server_close()
@@ -0,0 +1,88 @@
+# apps/whatsapp_users/management/commands/reconstruir_funil.py
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.whatsapp_users.models import (
+    WhatsAppUser, AssinaturaAsaas, PlanTransition, CoorteCadastro, FunilConversao
+)
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os agregados do funil de conversão a partir do PlanTransition'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-legado',
+            action='store_true',
+            help='Cria transições "legado" para usuários anteriores ao histórico de planos'
+        )
+    
+    def handle(self, *args, **options):
+        if options['seed_legado']:
+            criadas = self._seed_legado()
+            self.stdout.write(f"Transições de legado criadas: {criadas}")
+        
+        with transaction.atomic():
+            coortes = Counter(
+                CoorteCadastro.semana_de(created_at)
+                for created_at in WhatsAppUser.objects.values_list('created_at', flat=True).iterator()
+            )
+            CoorteCadastro.objects.all().delete()
+            CoorteCadastro.objects.bulk_create([
+                CoorteCadastro(semana_cadastro=semana, total=total)
+                for semana, total in coortes.items()
+            ])
+            
+            celulas = Counter(
+                PlanTransition.objects.filter(primeira_vez=True).values_list(
+                    'semana_cadastro', 'plano_anterior', 'plano_novo', 'dias_desde_cadastro'
+                ).iterator()
+            )
+            FunilConversao.objects.all().delete()
+            FunilConversao.objects.bulk_create([
+                FunilConversao(
+                    semana_cadastro=semana,
+                    plano_anterior=anterior,
+                    plano_novo=novo,
+                    dias_desde_cadastro=dias,
+                    total=total,
+                )
+                for (semana, anterior, novo, dias), total in celulas.items()
+            ])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Funil reconstruído: {len(coortes)} coortes, {len(celulas)} células"
+        ))
+    
+    def _seed_legado(self):
+        """
+        Gera transições aproximadas para usuários sem histórico
+        
+        basico: data de verificação do email (ou cadastro)
+        premium: última atualização da assinatura ativa (ou cadastro)
+        """
+        criadas = 0
+        ativacoes = dict(
+            AssinaturaAsaas.objects.filter(status='ACTIVE').values_list('whatsapp_user_id', 'updated_at')
+        )
+        usuarios = WhatsAppUser.objects.exclude(plano_atual='novo').filter(
+            transicoes_plano__isnull=True
+        )
+        
+        for user in usuarios.iterator():
+            momento_basico = user.email_verificado_em or user.created_at
+            anterior = 'novo'
+            
+            if user.plano_atual == 'basico' or user.email_verificado:
+                PlanTransition.registrar(user, 'novo', 'basico', causa='legado', momento=momento_basico)
+                criadas += 1
+                anterior = 'basico'
+            
+            if user.plano_atual == 'premium':
+                momento_premium = max(ativacoes.get(user.id) or user.created_at, momento_basico)
+                PlanTransition.registrar(user, anterior, 'premium', causa='legado', momento=momento_premium)
+                criadas += 1
+        
+        return criadas
@@ -0,0 +1,89 @@
+# apps/whatsapp_users/management/commands/replay_webhooks_asaas.py
+import contextlib
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.whatsapp_users.services.webhook_replay import (
+    carregar_eventos, preparar_assinaturas_sinteticas, gerar_eventos_sinteticos,
+    limpar_dados_sinteticos, executar_replay, DespachanteHTTP, DespachanteLocal,
+)
+
+
+class Command(BaseCommand):
+    help = 'Dispara eventos de webhook do Asaas contra o AsaasWebhookView e mede o resultado'
+    
+    def add_arguments(self, parser):
+        fonte = parser.add_mutually_exclusive_group(required=True)
+        fonte.add_argument('--arquivo', help='Eventos gravados (NDJSON ou lista JSON)')
+        fonte.add_argument('--sintetico', type=int, help='Número de assinaturas sintéticas a criar')
+        
+        parser.add_argument('--url', help='URL do webhook; se omitida, chama a view no próprio processo')
+        parser.add_argument('--token', default=None, help='X-Webhook-Token (default: ASAAS_WEBHOOK_TOKEN)')
+        parser.add_argument('--taxa', type=float, default=50.0, help='Eventos por segundo (0 = sem limite)')
+        parser.add_argument('--concorrencia', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--limpar', action='store_true', help='Remove os dados sintéticos ao final')
+        parser.add_argument('--json', action='store_true', help='Imprime o relatório em JSON')
+        parser.add_argument('--verbose', action='store_true', help='Mantém os prints do processamento')
+    
+    def handle(self, *args, **options):
+        if options['arquivo']:
+            try:
+                eventos = carregar_eventos(options['arquivo'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Erro ao ler eventos: {e}")
+        else:
+            assinaturas = preparar_assinaturas_sinteticas(options['sintetico'])
+            eventos = gerar_eventos_sinteticos(
+                [a.subscription_id for a in assinaturas], seed=options['seed']
+            )
+        
+        if options['url']:
+            despachante = DespachanteHTTP(options['url'], token=options['token'])
+        else:
+            despachante = DespachanteLocal(token=options['token'])
+        
+        self.stdout.write(
+            f"🔁 Disparando {len(eventos)} eventos a {options['taxa'] or '∞'} ev/s "
+            f"com {options['concorrencia']} workers..."
+        )
+        
+        # O processamento do webhook é bem verboso; silencia no modo local
+        saida = contextlib.nullcontext() if options['verbose'] or options['url'] \
+            else contextlib.redirect_stdout(io.StringIO())
+        with saida:
+            relatorio = executar_replay(
+                eventos, despachante,
+                taxa=options['taxa'],
+                concorrencia=options['concorrencia'],
+            )
+        
+        if options['limpar'] and options['sintetico']:
+            relatorio['sinteticos_removidos'] = limpar_dados_sinteticos()
+        
+        if options['json']:
+            self.stdout.write(json.dumps(relatorio, indent=2, ensure_ascii=False))
+        else:
+            self._imprimir(relatorio)
+    
+    def _imprimir(self, relatorio):
+        latencia = relatorio['latencia_ms']
+        consistencia = relatorio['consistencia']
+        
+        self.stdout.write(f"Eventos: {relatorio['eventos']} em {relatorio['duracao_s']}s")
+        self.stdout.write(f"Vazão: {relatorio['vazao_eps']} ev/s (alvo {relatorio['taxa_alvo_eps']})")
+        self.stdout.write(
+            f"Latência: p50={latencia['p50']}ms p90={latencia['p90']}ms "
+            f"p99={latencia['p99']}ms max={latencia['max']}ms"
+        )
+        self.stdout.write(f"Status: {relatorio['status']}")
+        
+        estilo = self.style.SUCCESS if not consistencia['divergencias'] else self.style.WARNING
+        self.stdout.write(estilo(
+            f"Consistência: {consistencia['consistentes']}/{consistencia['verificadas']} assinaturas "
+            f"({consistencia['nao_encontradas']} não encontradas)"
+        ))
+        for divergencia in consistencia['divergencias']:
+            self.stdout.write(f"  ✗ {divergencia}")
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_users', '0003_assinaturaasaas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoorteCadastro',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana_cadastro', models.DateField(help_text='Segunda-feira da semana de cadastro', unique=True, verbose_name='Semana de Cadastro')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total de Cadastros')),
+            ],
+            options={
+                'verbose_name': 'Coorte de Cadastro',
+                'verbose_name_plural': 'Coortes de Cadastro',
+                'db_table': 'whatsapp_coorte_cadastro',
+                'ordering': ['-semana_cadastro'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FunilConversao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana_cadastro', models.DateField(verbose_name='Semana de Cadastro')),
+                ('plano_anterior', models.CharField(max_length=20, verbose_name='Plano Anterior')),
+                ('plano_novo', models.CharField(max_length=20, verbose_name='Plano Novo')),
+                ('dias_desde_cadastro', models.PositiveIntegerField(verbose_name='Dias desde o Cadastro')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total de Usuários')),
+            ],
+            options={
+                'verbose_name': 'Funil de Conversão',
+                'verbose_name_plural': 'Funil de Conversão',
+                'db_table': 'whatsapp_funil_conversao',
+                'ordering': ['-semana_cadastro', 'plano_anterior', 'plano_novo', 'dias_desde_cadastro'],
+                'indexes': [models.Index(fields=['plano_anterior', 'plano_novo', 'dias_desde_cadastro'], name='whatsapp_fu_plano_a_ba9050_idx')],
+                'constraints': [models.UniqueConstraint(fields=('semana_cadastro', 'plano_anterior', 'plano_novo', 'dias_desde_cadastro'), name='whatsapp_funil_conversao_chave_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlanTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plano_anterior', models.CharField(max_length=20, verbose_name='Plano Anterior')),
+                ('plano_novo', models.CharField(max_length=20, verbose_name='Plano Novo')),
+                ('causa', models.CharField(choices=[('cadastro', 'Cadastro'), ('verificacao_email', 'Verificação de Email'), ('upgrade', 'Upgrade'), ('pagamento_confirmado', 'Pagamento Confirmado'), ('pagamento_recebido', 'Pagamento Recebido'), ('pagamento_atrasado', 'Pagamento em Atraso'), ('pagamento_estornado', 'Pagamento Estornado'), ('assinatura_ativada', 'Assinatura Ativada'), ('api', 'API WhatsApp'), ('sistema', 'Sistema'), ('legado', 'Reconstrução de Legado')], default='sistema', max_length=30, verbose_name='Causa')),
+                ('semana_cadastro', models.DateField(verbose_name='Semana de Cadastro')),
+                ('dias_desde_cadastro', models.PositiveIntegerField(verbose_name='Dias desde o Cadastro')),
+                ('primeira_vez', models.BooleanField(default=True, help_text='Primeira vez que o usuário faz esta transição (conta no funil)', verbose_name='Primeira Vez')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Ocorrida em')),
+                ('whatsapp_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transicoes_plano', to='whatsapp_users.whatsappuser', verbose_name='Usuário WhatsApp')),
+            ],
+            options={
+                'verbose_name': 'Transição de Plano',
+                'verbose_name_plural': 'Transições de Plano',
+                'db_table': 'whatsapp_plan_transitions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['whatsapp_user', 'plano_anterior', 'plano_novo'], name='whatsapp_pl_whatsap_c05144_idx'), models.Index(fields=['created_at'], name='whatsapp_pl_created_19a2ed_idx')],
+            },
+        ),
+    ]
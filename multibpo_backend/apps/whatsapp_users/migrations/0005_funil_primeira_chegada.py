@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:01
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def recalcular_primeira_chegada(apps, schema_editor):
+    """
+    primeira_vez passa a valer por (usuário, plano_novo): mantém só a
+    transição mais antiga de cada par e refaz as células do funil
+    """
+    PlanTransition = apps.get_model('whatsapp_users', 'PlanTransition')
+    FunilConversao = apps.get_model('whatsapp_users', 'FunilConversao')
+
+    vistos = set()
+    alterar = []
+    celulas = Counter()
+    transicoes = PlanTransition.objects.order_by('created_at', 'pk').only(
+        'whatsapp_user_id', 'plano_anterior', 'plano_novo', 'semana_cadastro',
+        'dias_desde_cadastro', 'primeira_vez',
+    )
+    for transicao in transicoes.iterator(chunk_size=2000):
+        chave = (transicao.whatsapp_user_id, transicao.plano_novo)
+        primeira = chave not in vistos
+        vistos.add(chave)
+        if primeira:
+            celulas[(
+                transicao.semana_cadastro, transicao.plano_anterior,
+                transicao.plano_novo, transicao.dias_desde_cadastro,
+            )] += 1
+        if primeira != transicao.primeira_vez:
+            transicao.primeira_vez = primeira
+            alterar.append(transicao)
+
+    PlanTransition.objects.bulk_update(alterar, ['primeira_vez'], batch_size=1000)
+    FunilConversao.objects.all().delete()
+    FunilConversao.objects.bulk_create([
+        FunilConversao(
+            semana_cadastro=semana,
+            plano_anterior=anterior,
+            plano_novo=novo,
+            dias_desde_cadastro=dias,
+            total=total,
+        )
+        for (semana, anterior, novo, dias), total in celulas.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_users', '0004_funil_conversao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plantransition',
+            name='primeira_vez',
+            field=models.BooleanField(default=True, help_text='Primeira vez que o usuário chega a plano_novo (conta no funil)', verbose_name='Primeira Vez'),
+        ),
+        migrations.RunPython(recalcular_primeira_chegada, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='plantransition',
+            constraint=models.UniqueConstraint(condition=models.Q(('primeira_vez', True)), fields=('whatsapp_user', 'plano_novo'), name='whatsapp_transicao_primeira_chegada_unica'),
+        ),
+    ]
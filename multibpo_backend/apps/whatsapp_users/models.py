@@ -3,7 +3,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
+from django.db import transaction
 from django.utils import timezone
+from datetime import timedelta
 import re
 import secrets
 
@@ -96,6 +98,46 @@ class WhatsAppUser(models.Model):
     def __str__(self):
         return f"{self.nome or 'Usuário'} - {self.phone_number}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda o plano carregado para detectar transições no save()"""
+        instance = super().from_db(db, field_names, values)
+        instance._plano_carregado = instance.__dict__.get('plano_atual')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """
+        Salva o usuário e registra transições de plano no PlanTransition
+        
+        A causa da transição pode ser informada antes do save() via
+        atributo `causa_transicao` (ex: 'verificacao_email').
+        """
+        criando = self._state.adding
+        plano_anterior = getattr(self, '_plano_carregado', None)
+        update_fields = kwargs.get('update_fields')
+        monitorar_plano = update_fields is None or 'plano_atual' in update_fields
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            if criando:
+                CoorteCadastro.incrementar(self.created_at)
+                # Cadastro direto em plano superior conta como conversão no dia 0
+                if self.plano_atual != 'novo':
+                    PlanTransition.registrar(
+                        self, 'novo', self.plano_atual,
+                        causa=getattr(self, 'causa_transicao', None) or 'cadastro'
+                    )
+            elif monitorar_plano and plano_anterior and plano_anterior != self.plano_atual:
+                PlanTransition.registrar(
+                    self, plano_anterior, self.plano_atual,
+                    causa=getattr(self, 'causa_transicao', None) or 'sistema'
+                )
+        
+        if monitorar_plano:
+            self._plano_carregado = self.plano_atual
+        self.causa_transicao = None
+    
     def clean_phone_number(self):
         """Remove caracteres especiais do telefone"""
         if self.phone_number:
@@ -117,11 +159,12 @@ class WhatsAppUser(models.Model):
             return True
         return False
     
-    def upgrade_plano(self, novo_plano):
+    def upgrade_plano(self, novo_plano, causa='upgrade'):
         """Faz upgrade do plano do usuário"""
         planos_validos = dict(self.PLANO_CHOICES).keys()
         if novo_plano in planos_validos:
             self.plano_atual = novo_plano
+            self.causa_transicao = causa
             
             # Ajustar limites conforme plano
             if novo_plano == 'basico':
@@ -151,7 +194,7 @@ class WhatsAppUser(models.Model):
         self.email_verificado_em = timezone.now()
         self.ativo = True  # ← CORREÇÃO: Ativar WhatsAppUser também
         if self.plano_atual == 'novo':
-            self.upgrade_plano('basico')
+            self.upgrade_plano('basico', causa='verificacao_email')
         self.save()
 
 
@@ -543,6 +586,7 @@ class AssinaturaAsaas(models.Model):
         """Ativa o plano premium para o usuário"""
         self.status = 'ACTIVE'
         self.whatsapp_user.plano_atual = 'premium'
+        self.whatsapp_user.causa_transicao = 'assinatura_ativada'
         self.whatsapp_user.limite_perguntas = None  # Ilimitado
         self.save()
         self.whatsapp_user.save()
@@ -550,4 +594,207 @@ class AssinaturaAsaas(models.Model):
         # Log da ativação
         print(f"✅ Usuário {self.whatsapp_user.phone_number} upgradado para PREMIUM!")
         
-        return True
\ No newline at end of file
+        return True
+
+# ===================================================================
+# FUNIL DE CONVERSÃO - Histórico de transições de plano
+# ===================================================================
+
+class CoorteCadastro(models.Model):
+    """
+    Agregado de cadastros por semana (coorte)
+    Mantido incrementalmente a cada novo WhatsAppUser
+    """
+    
+    semana_cadastro = models.DateField(
+        unique=True,
+        help_text='Segunda-feira da semana de cadastro',
+        verbose_name='Semana de Cadastro'
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name='Total de Cadastros')
+    
+    class Meta:
+        db_table = 'whatsapp_coorte_cadastro'
+        verbose_name = 'Coorte de Cadastro'
+        verbose_name_plural = 'Coortes de Cadastro'
+        ordering = ['-semana_cadastro']
+    
+    def __str__(self):
+        return f"Semana {self.semana_cadastro:%d/%m/%Y} - {self.total} cadastros"
+    
+    @staticmethod
+    def semana_de(momento):
+        """Retorna a segunda-feira (data local) da semana do momento informado"""
+        data = timezone.localtime(momento).date() if timezone.is_aware(momento) else momento.date()
+        return data - timedelta(days=data.weekday())
+    
+    @classmethod
+    def incrementar(cls, momento_cadastro):
+        """Soma um cadastro na coorte da semana correspondente"""
+        coorte, _ = cls.objects.get_or_create(semana_cadastro=cls.semana_de(momento_cadastro))
+        cls.objects.filter(pk=coorte.pk).update(total=models.F('total') + 1)
+
+
+class FunilConversao(models.Model):
+    """
+    Agregado do funil: primeiras chegadas de cada usuário a cada plano, por
+    coorte, plano de origem e dias decorridos desde o cadastro
+    
+    Cada usuário conta no máximo uma vez por plano_novo, então somar as
+    células de um plano de destino dá usuários distintos.
+    
+    Permite responder "novo→basico em até 7 dias" ou "basico→premium por
+    semana de cadastro" somando poucas linhas, sem varrer usuários.
+    """
+    
+    semana_cadastro = models.DateField(verbose_name='Semana de Cadastro')
+    plano_anterior = models.CharField(max_length=20, verbose_name='Plano Anterior')
+    plano_novo = models.CharField(max_length=20, verbose_name='Plano Novo')
+    dias_desde_cadastro = models.PositiveIntegerField(verbose_name='Dias desde o Cadastro')
+    total = models.PositiveIntegerField(default=0, verbose_name='Total de Usuários')
+    
+    class Meta:
+        db_table = 'whatsapp_funil_conversao'
+        verbose_name = 'Funil de Conversão'
+        verbose_name_plural = 'Funil de Conversão'
+        ordering = ['-semana_cadastro', 'plano_anterior', 'plano_novo', 'dias_desde_cadastro']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['semana_cadastro', 'plano_anterior', 'plano_novo', 'dias_desde_cadastro'],
+                name='whatsapp_funil_conversao_chave_unica'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['plano_anterior', 'plano_novo', 'dias_desde_cadastro']),
+        ]
+    
+    def __str__(self):
+        return f"{self.plano_anterior}→{self.plano_novo} D+{self.dias_desde_cadastro} ({self.semana_cadastro:%d/%m/%Y}): {self.total}"
+    
+    @classmethod
+    def incrementar(cls, semana_cadastro, plano_anterior, plano_novo, dias_desde_cadastro):
+        """Soma uma conversão na célula do funil"""
+        celula, _ = cls.objects.get_or_create(
+            semana_cadastro=semana_cadastro,
+            plano_anterior=plano_anterior,
+            plano_novo=plano_novo,
+            dias_desde_cadastro=dias_desde_cadastro,
+        )
+        cls.objects.filter(pk=celula.pk).update(total=models.F('total') + 1)
+
+
+class PlanTransition(models.Model):
+    """
+    Log append-only das transições de plano dos usuários WhatsApp
+    
+    Cada mudança de plano_atual gera uma linha. A primeira vez que o
+    usuário chega a cada plano (primeira_vez, única por usuário e
+    plano_novo) alimenta o FunilConversao na mesma transação.
+    """
+    
+    CAUSA_CHOICES = [
+        ('cadastro', 'Cadastro'),
+        ('verificacao_email', 'Verificação de Email'),
+        ('upgrade', 'Upgrade'),
+        ('pagamento_confirmado', 'Pagamento Confirmado'),
+        ('pagamento_recebido', 'Pagamento Recebido'),
+        ('pagamento_atrasado', 'Pagamento em Atraso'),
+        ('pagamento_estornado', 'Pagamento Estornado'),
+        ('assinatura_ativada', 'Assinatura Ativada'),
+        ('api', 'API WhatsApp'),
+        ('sistema', 'Sistema'),
+        ('legado', 'Reconstrução de Legado'),
+    ]
+    
+    whatsapp_user = models.ForeignKey(
+        WhatsAppUser,
+        on_delete=models.CASCADE,
+        related_name='transicoes_plano',
+        verbose_name='Usuário WhatsApp'
+    )
+    plano_anterior = models.CharField(max_length=20, verbose_name='Plano Anterior')
+    plano_novo = models.CharField(max_length=20, verbose_name='Plano Novo')
+    causa = models.CharField(
+        max_length=30,
+        choices=CAUSA_CHOICES,
+        default='sistema',
+        verbose_name='Causa'
+    )
+    
+    # Dados denormalizados para manter os agregados sem joins
+    semana_cadastro = models.DateField(verbose_name='Semana de Cadastro')
+    dias_desde_cadastro = models.PositiveIntegerField(verbose_name='Dias desde o Cadastro')
+    primeira_vez = models.BooleanField(
+        default=True,
+        help_text='Primeira vez que o usuário chega a plano_novo (conta no funil)',
+        verbose_name='Primeira Vez'
+    )
+    
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='Ocorrida em')
+    
+    class Meta:
+        db_table = 'whatsapp_plan_transitions'
+        verbose_name = 'Transição de Plano'
+        verbose_name_plural = 'Transições de Plano'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['whatsapp_user', 'plano_anterior', 'plano_novo']),
+            models.Index(fields=['created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['whatsapp_user', 'plano_novo'],
+                condition=models.Q(primeira_vez=True),
+                name='whatsapp_transicao_primeira_chegada_unica'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.whatsapp_user_id}: {self.plano_anterior}→{self.plano_novo} ({self.causa})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("PlanTransition é append-only e não pode ser alterada")
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def registrar(cls, whatsapp_user, plano_anterior, plano_novo, causa='sistema', momento=None):
+        """
+        Registra uma transição e atualiza o funil incrementalmente
+        
+        Args:
+            whatsapp_user: WhatsAppUser já salvo
+            plano_anterior: plano de origem
+            plano_novo: plano de destino
+            causa: motivo da transição (ver CAUSA_CHOICES)
+            momento: quando ocorreu (default: agora)
+        """
+        momento = momento or timezone.now()
+        cadastro = whatsapp_user.created_at or momento
+        semana = CoorteCadastro.semana_de(cadastro)
+        dias = max(0, (momento - cadastro).days)
+        
+        with transaction.atomic():
+            # Trava o usuário: saves concorrentes não registram duas "primeiras"
+            list(WhatsAppUser.objects.select_for_update().filter(pk=whatsapp_user.pk).values_list('pk'))
+            primeira_vez = not cls.objects.filter(
+                whatsapp_user=whatsapp_user,
+                plano_novo=plano_novo,
+                primeira_vez=True,
+            ).exists()
+            
+            transicao = cls.objects.create(
+                whatsapp_user=whatsapp_user,
+                plano_anterior=plano_anterior,
+                plano_novo=plano_novo,
+                causa=causa,
+                semana_cadastro=semana,
+                dias_desde_cadastro=dias,
+                primeira_vez=primeira_vez,
+                created_at=momento,
+            )
+            
+            if primeira_vez:
+                FunilConversao.incrementar(semana, plano_anterior, plano_novo, dias)
+        
+        return transicao
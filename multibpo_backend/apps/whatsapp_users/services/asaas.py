@@ -191,6 +191,7 @@ class AsaasService:
                 # Ativar premium no usuário WhatsApp
                 whatsapp_user = assinatura.whatsapp_user
                 whatsapp_user.plano_atual = 'premium'
+                whatsapp_user.causa_transicao = 'pagamento_confirmado'
                 whatsapp_user.limite_perguntas = 999999  # ✅ Valor alto = ilimitado
                 whatsapp_user.save()
 
@@ -212,6 +213,7 @@ class AsaasService:
                 whatsapp_user = assinatura.whatsapp_user
                 if whatsapp_user.plano_atual != 'premium':
                     whatsapp_user.plano_atual = 'premium'
+                    whatsapp_user.causa_transicao = 'pagamento_recebido'
                     whatsapp_user.limite_perguntas = 999999  # ✅ CORRIGIDO: Valor alto = ilimitado
                     whatsapp_user.save()
                     print(f"🔄 Premium confirmado para {whatsapp_user.phone_number}")
@@ -229,6 +231,7 @@ class AsaasService:
                 # Suspender premium (downgrade para básico)
                 whatsapp_user = assinatura.whatsapp_user
                 whatsapp_user.plano_atual = 'basico'
+                whatsapp_user.causa_transicao = 'pagamento_atrasado'
                 whatsapp_user.limite_perguntas = 10  # Volta para 10 perguntas
                 whatsapp_user.save()
                 
@@ -247,6 +250,7 @@ class AsaasService:
                 # Cancelar premium (downgrade para básico)
                 whatsapp_user = assinatura.whatsapp_user
                 whatsapp_user.plano_atual = 'basico'
+                whatsapp_user.causa_transicao = 'pagamento_estornado'
                 whatsapp_user.limite_perguntas = 10  # Volta para 10 perguntas
                 whatsapp_user.save()
                 
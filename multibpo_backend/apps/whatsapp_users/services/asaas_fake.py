@@ -0,0 +1,222 @@
+"""
+FakeAsaasServer - Servidor HTTP local que imita a API do Asaas
+Usado em testes de carga do checkout e dos webhooks sem tocar na API real
+
+Uso:
+    python manage.py fake_asaas --porta 8099 --latencia-ms 80 --taxa-falha 0.02
+    ASAAS_BASE_URL=http://localhost:8099/api/v3 python manage.py runserver
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeAsaasStore:
+    """Armazenamento em memória dos recursos do Asaas fake"""
+
+    RECURSOS = ('customers', 'subscriptions', 'payments')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dados = {recurso: {} for recurso in self.RECURSOS}
+
+    def _novo_id(self, recurso):
+        prefixo = {'customers': 'cus', 'subscriptions': 'sub', 'payments': 'pay'}[recurso]
+        return f"{prefixo}_{uuid.uuid4().hex[:16]}"
+
+    def criar(self, recurso, dados):
+        with self._lock:
+            objeto = dict(dados or {})
+            objeto['id'] = self._novo_id(recurso)
+            objeto['object'] = recurso.rstrip('s')
+            objeto['dateCreated'] = date.today().isoformat()
+            objeto['deleted'] = False
+
+            if recurso == 'subscriptions':
+                objeto.setdefault('status', 'ACTIVE')
+                objeto['invoiceUrl'] = f"https://sandbox.asaas.fake/i/{objeto['id']}"
+            elif recurso == 'payments':
+                objeto.setdefault('status', 'PENDING')
+                objeto.setdefault('dueDate', (date.today() + timedelta(days=3)).isoformat())
+                objeto['invoiceUrl'] = f"https://sandbox.asaas.fake/i/{objeto['id']}"
+
+            self._dados[recurso][objeto['id']] = objeto
+            return objeto
+
+    def obter(self, recurso, objeto_id):
+        with self._lock:
+            return self._dados[recurso].get(objeto_id)
+
+    def listar(self, recurso, offset=0, limit=10, filtros=None):
+        with self._lock:
+            itens = list(self._dados[recurso].values())
+        for campo, valor in (filtros or {}).items():
+            itens = [item for item in itens if str(item.get(campo)) == valor]
+        pagina = itens[offset:offset + limit]
+        return {
+            'object': 'list',
+            'hasMore': offset + limit < len(itens),
+            'totalCount': len(itens),
+            'limit': limit,
+            'offset': offset,
+            'data': pagina,
+        }
+
+    def atualizar(self, recurso, objeto_id, dados):
+        with self._lock:
+            objeto = self._dados[recurso].get(objeto_id)
+            if objeto is None:
+                return None
+            objeto.update(dados or {})
+            return objeto
+
+
+class FakeAsaasHandler(BaseHTTPRequestHandler):
+    """Handler HTTP com latência e falhas configuráveis"""
+
+    ROTA = re.compile(r'^(?:/api/v3)?/(customers|subscriptions|payments)(?:/([\w-]+))?/?$')
+
+    server_version = 'FakeAsaas/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _simular_rede(self):
+        """Aplica latência e sorteia falha. Retorna status de erro ou None"""
+        latencia = self.server.latencia_ms + random.uniform(0, self.server.jitter_ms)
+        if latencia > 0:
+            time.sleep(latencia / 1000)
+        if self.server.taxa_falha and random.random() < self.server.taxa_falha:
+            return random.choice(self.server.status_falha)
+        return None
+
+    def _responder(self, status, corpo):
+        payload = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _erro(self, status, descricao):
+        self._responder(status, {'errors': [{'code': 'fake_error', 'description': descricao}]})
+
+    def _rota(self):
+        url = urlparse(self.path)
+        match = self.ROTA.match(url.path)
+        if not match:
+            return None, None, None
+        return match.group(1), match.group(2), parse_qs(url.query)
+
+    def _autorizado(self):
+        token = self.server.api_key
+        return not token or self.headers.get('access_token') == token
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if not tamanho:
+            return {}
+        return json.loads(self.rfile.read(tamanho).decode('utf-8'))
+
+    def do_GET(self):
+        recurso, objeto_id, query = self._rota()
+        if recurso is None:
+            return self._erro(404, 'Rota não encontrada')
+        if not self._autorizado():
+            return self._erro(401, 'access_token inválido')
+        falha = self._simular_rede()
+        if falha:
+            return self._erro(falha, 'Falha simulada')
+
+        store = self.server.store
+        if objeto_id:
+            objeto = store.obter(recurso, objeto_id)
+            if objeto is None:
+                return self._erro(404, f'{recurso} {objeto_id} não encontrado')
+            return self._responder(200, objeto)
+
+        offset = int(query.pop('offset', ['0'])[0])
+        limit = int(query.pop('limit', ['10'])[0])
+        filtros = {campo: valores[0] for campo, valores in query.items()}
+        return self._responder(200, store.listar(recurso, offset, limit, filtros))
+
+    def do_POST(self):
+        recurso, objeto_id, _ = self._rota()
+        if recurso is None:
+            return self._erro(404, 'Rota não encontrada')
+        if not self._autorizado():
+            return self._erro(401, 'access_token inválido')
+
+        try:
+            dados = self._ler_json()
+        except ValueError:
+            return self._erro(400, 'JSON inválido')
+
+        falha = self._simular_rede()
+        if falha:
+            return self._erro(falha, 'Falha simulada')
+
+        store = self.server.store
+        if objeto_id:
+            objeto = store.atualizar(recurso, objeto_id, dados)
+            if objeto is None:
+                return self._erro(404, f'{recurso} {objeto_id} não encontrado')
+            return self._responder(200, objeto)
+
+        if recurso in ('subscriptions', 'payments') and not store.obter('customers', dados.get('customer', '')):
+            return self._erro(400, 'Customer inválido')
+
+        return self._responder(200, store.criar(recurso, dados))
+
+
+class FakeAsaasServer(ThreadingHTTPServer):
+    """
+    Servidor Asaas fake
+
+    Args:
+        porta: porta TCP (0 = escolhida pelo sistema)
+        latencia_ms: latência fixa por requisição
+        jitter_ms: latência extra aleatória (0..jitter_ms)
+        taxa_falha: probabilidade (0..1) de responder com erro
+        status_falha: status HTTP sorteados nas falhas
+        api_key: se informado, exige o header access_token
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', porta=8099, latencia_ms=0, jitter_ms=0,
+                 taxa_falha=0.0, status_falha=(500, 503, 429), api_key='', verbose=False):
+        super().__init__((host, porta), FakeAsaasHandler)
+        self.store = FakeAsaasStore()
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_falha = taxa_falha
+        self.status_falha = tuple(status_falha)
+        self.api_key = api_key
+        self.verbose = verbose
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}/api/v3"
+
+    def iniciar_em_background(self):
+        """Sobe o servidor numa thread daemon (útil em testes)"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
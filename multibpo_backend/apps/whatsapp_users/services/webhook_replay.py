@@ -0,0 +1,323 @@
+"""
+WebhookReplay - Dispara fluxos de eventos do Asaas contra o AsaasWebhookView
+Mede vazão, percentis de latência e a consistência final das assinaturas
+
+Os eventos podem vir de um arquivo gravado (NDJSON ou lista JSON com o
+corpo original do webhook) ou ser gerados sinteticamente.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import WhatsAppUser, AssinaturaAsaas
+
+
+# Estado final esperado (status da assinatura, plano do usuário) por evento
+ESTADO_ESPERADO = {
+    'PAYMENT_CONFIRMED': ('ACTIVE', 'premium'),
+    'PAYMENT_RECEIVED': ('ACTIVE', 'premium'),
+    'PAYMENT_OVERDUE': ('OVERDUE', 'basico'),
+    'PAYMENT_REFUNDED': ('REFUNDED', 'basico'),
+}
+
+# Sequências plausíveis de eventos por assinatura
+ROTEIROS_SINTETICOS = [
+    ['PAYMENT_CONFIRMED', 'PAYMENT_RECEIVED'],
+    ['PAYMENT_CONFIRMED', 'PAYMENT_RECEIVED', 'PAYMENT_OVERDUE'],
+    ['PAYMENT_OVERDUE', 'PAYMENT_CONFIRMED', 'PAYMENT_RECEIVED'],
+    ['PAYMENT_CONFIRMED', 'PAYMENT_RECEIVED', 'PAYMENT_REFUNDED'],
+]
+
+PREFIXO_TELEFONE_SINTETICO = '5500'
+PREFIXO_SUBSCRIPTION_SINTETICA = 'sub_replay_'
+
+
+# ========== FONTES DE EVENTOS ==========
+
+def carregar_eventos(caminho):
+    """Lê eventos gravados (NDJSON, um webhook por linha, ou lista JSON)"""
+    with open(caminho, encoding='utf-8') as arquivo:
+        conteudo = arquivo.read().strip()
+    if conteudo.startswith('['):
+        return json.loads(conteudo)
+    return [json.loads(linha) for linha in conteudo.splitlines() if linha.strip()]
+
+
+def preparar_assinaturas_sinteticas(quantidade):
+    """
+    Cria usuários e assinaturas PENDING para o replay sintético
+
+    Usa telefones com DDD 00 e subscription_id com prefixo próprio para
+    não se misturar com dados reais.
+    """
+    inicio = WhatsAppUser.objects.filter(
+        phone_number__startswith=PREFIXO_TELEFONE_SINTETICO
+    ).count()
+    assinaturas = []
+    for indice in range(inicio, inicio + quantidade):
+        user = WhatsAppUser.objects.create(
+            phone_number=f"{PREFIXO_TELEFONE_SINTETICO}{indice:09d}",
+            nome=f'Replay {indice}',
+            plano_atual='basico',
+            limite_perguntas=10,
+        )
+        assinaturas.append(AssinaturaAsaas.objects.create(
+            whatsapp_user=user,
+            customer_id=f'cus_replay_{indice}',
+            subscription_id=f'{PREFIXO_SUBSCRIPTION_SINTETICA}{uuid.uuid4().hex[:12]}',
+            checkout_url='https://sandbox.asaas.fake/checkout',
+            status='PENDING',
+        ))
+    return assinaturas
+
+
+def gerar_eventos_sinteticos(subscription_ids, seed=None, intercalar=True):
+    """
+    Gera um roteiro de eventos por assinatura
+
+    Args:
+        subscription_ids: assinaturas alvo
+        seed: semente para reprodutibilidade
+        intercalar: mistura eventos de assinaturas diferentes mantendo a
+            ordem relativa de cada assinatura
+    """
+    aleatorio = random.Random(seed)
+    filas = []
+    for subscription_id in subscription_ids:
+        roteiro = aleatorio.choice(ROTEIROS_SINTETICOS)
+        filas.append([
+            {
+                'event': evento,
+                'payment': {
+                    'id': f'pay_{uuid.UUID(int=aleatorio.getrandbits(128)).hex[:16]}',
+                    'subscription': subscription_id,
+                    'value': 29.90,
+                    'status': evento.replace('PAYMENT_', ''),
+                },
+            }
+            for evento in roteiro
+        ])
+
+    if not intercalar:
+        return [evento for fila in filas for evento in fila]
+
+    eventos = []
+    while filas:
+        fila = aleatorio.choice(filas)
+        eventos.append(fila.pop(0))
+        if not fila:
+            filas.remove(fila)
+    return eventos
+
+
+def _subscription_id(evento):
+    """Assinatura do webhook (em payment.subscription ou subscription.id)"""
+    return (evento.get('payment') or {}).get('subscription') \
+        or (evento.get('subscription') or {}).get('id')
+
+
+def particionar_por_assinatura(eventos, particoes):
+    """
+    Divide os eventos em filas por subscription_id, mantendo a ordem
+
+    Todos os eventos de uma assinatura caem na mesma fila. Assim, um worker
+    por fila nunca aplica OVERDUE antes do CONFIRMED que o precedeu.
+
+    Returns:
+        lista de filas [(indice_global, evento), ...]
+    """
+    filas = defaultdict(list)
+    for indice, evento in enumerate(eventos):
+        chave = _subscription_id(evento) or str(indice)
+        filas[zlib.crc32(chave.encode()) % particoes].append((indice, evento))
+    return list(filas.values())
+
+
+# ========== DESPACHANTES ==========
+
+class DespachanteHTTP:
+    """Envia os webhooks por HTTP para uma URL (servidor rodando)"""
+
+    def __init__(self, url, token=None, timeout=30):
+        self.url = url
+        self.token = token if token is not None else getattr(settings, 'ASAAS_WEBHOOK_TOKEN', '')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self, evento):
+        sessao = getattr(self._local, 'sessao', None)
+        if sessao is None:
+            sessao = self._local.sessao = requests.Session()
+        response = sessao.post(
+            self.url,
+            json=evento,
+            headers={'X-Webhook-Token': self.token},
+            timeout=self.timeout,
+        )
+        return response.status_code
+
+
+class DespachanteLocal:
+    """Chama o AsaasWebhookView no próprio processo (sem servidor HTTP)"""
+
+    def __init__(self, token=None):
+        from rest_framework.test import APIRequestFactory
+        from ..views import AsaasWebhookView
+
+        self.factory = APIRequestFactory()
+        self.view = AsaasWebhookView.as_view()
+        self.token = token if token is not None else getattr(settings, 'ASAAS_WEBHOOK_TOKEN', '')
+
+    def __call__(self, evento):
+        request = self.factory.post(
+            '/api/v1/whatsapp/asaas/webhook/',
+            evento,
+            format='json',
+            HTTP_X_WEBHOOK_TOKEN=self.token,
+        )
+        try:
+            return self.view(request).status_code
+        finally:
+            close_old_connections()
+
+
+# ========== EXECUÇÃO E RELATÓRIO ==========
+
+def _percentil(valores_ordenados, percentil):
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, int(round(percentil / 100 * len(valores_ordenados))) - 1)
+    return valores_ordenados[min(indice, len(valores_ordenados) - 1)]
+
+
+def verificar_consistencia(eventos, limite_divergencias=20):
+    """
+    Compara o estado final no banco com o último evento de cada assinatura
+
+    Returns:
+        dict: {'verificadas', 'consistentes', 'nao_encontradas', 'divergencias'}
+    """
+    ultimo_evento = {}
+    for evento in eventos:
+        nome = evento.get('event')
+        subscription_id = _subscription_id(evento)
+        if nome in ESTADO_ESPERADO and subscription_id:
+            ultimo_evento[subscription_id] = nome
+
+    assinaturas = {
+        assinatura.subscription_id: assinatura
+        for assinatura in AssinaturaAsaas.objects.filter(
+            subscription_id__in=list(ultimo_evento)
+        ).select_related('whatsapp_user')
+    }
+
+    consistentes = 0
+    divergencias = []
+    for subscription_id, nome in ultimo_evento.items():
+        assinatura = assinaturas.get(subscription_id)
+        if assinatura is None:
+            continue
+        esperado = ESTADO_ESPERADO[nome]
+        obtido = (assinatura.status, assinatura.whatsapp_user.plano_atual)
+        if obtido == esperado:
+            consistentes += 1
+        elif len(divergencias) < limite_divergencias:
+            divergencias.append({
+                'subscription_id': subscription_id,
+                'ultimo_evento': nome,
+                'esperado': esperado,
+                'obtido': obtido,
+            })
+
+    return {
+        'verificadas': len(assinaturas),
+        'consistentes': consistentes,
+        'nao_encontradas': len(ultimo_evento) - len(assinaturas),
+        'divergencias': divergencias,
+    }
+
+
+def executar_replay(eventos, despachante, taxa=50.0, concorrencia=8):
+    """
+    Dispara os eventos no ritmo alvo e coleta métricas
+
+    Args:
+        eventos: lista de corpos de webhook, na ordem de envio
+        despachante: callable(evento) -> status HTTP
+        taxa: eventos por segundo (0 = o mais rápido possível)
+        concorrencia: número de workers (1 = sequencial na thread atual);
+            cada assinatura fica num único worker, na ordem de `eventos`
+
+    Returns:
+        dict: relatório com vazão, latências, status e consistência
+    """
+    latencias = []
+    status = Counter()
+    lock = threading.Lock()
+    inicio = time.perf_counter()
+    intervalo = 1.0 / taxa if taxa else 0.0
+
+    def enviar(indice, evento):
+        agenda = inicio + indice * intervalo
+        espera = agenda - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        t0 = time.perf_counter()
+        try:
+            codigo = despachante(evento)
+        except Exception as e:
+            codigo = f'erro:{type(e).__name__}'
+        duracao_ms = (time.perf_counter() - t0) * 1000
+        with lock:
+            latencias.append(duracao_ms)
+            status[str(codigo)] += 1
+
+    if concorrencia <= 1:
+        # Sequencial na thread atual (preserva a ordem e a conexão do banco)
+        for indice, evento in enumerate(eventos):
+            enviar(indice, evento)
+    else:
+        def enviar_fila(fila):
+            for indice, evento in fila:
+                enviar(indice, evento)
+
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            for fila in particionar_por_assinatura(eventos, concorrencia):
+                executor.submit(enviar_fila, fila)
+
+    duracao = time.perf_counter() - inicio
+    latencias.sort()
+
+    return {
+        'eventos': len(eventos),
+        'duracao_s': round(duracao, 3),
+        'vazao_eps': round(len(eventos) / duracao, 2) if duracao else 0.0,
+        'taxa_alvo_eps': taxa,
+        'concorrencia': concorrencia,
+        'latencia_ms': {
+            'p50': round(_percentil(latencias, 50), 2),
+            'p90': round(_percentil(latencias, 90), 2),
+            'p99': round(_percentil(latencias, 99), 2),
+            'max': round(latencias[-1], 2) if latencias else 0.0,
+        },
+        'status': dict(status),
+        'consistencia': verificar_consistencia(eventos),
+    }
+
+
+def limpar_dados_sinteticos():
+    """Remove usuários e assinaturas criados pelo replay sintético"""
+    total, _ = WhatsAppUser.objects.filter(
+        phone_number__startswith=PREFIXO_TELEFONE_SINTETICO
+    ).delete()
+    return total
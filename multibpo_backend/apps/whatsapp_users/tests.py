@@ -1,3 +1,200 @@
-from django.test import TestCase
+import contextlib
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import (
+    WhatsAppUser, WhatsAppMessage, AssinaturaAsaas, PlanTransition, CoorteCadastro, FunilConversao,
+)
+from .services.asaas import AsaasService
+from .services.asaas_fake import FakeAsaasServer
+from .services.webhook_replay import (
+    preparar_assinaturas_sinteticas, gerar_eventos_sinteticos,
+    executar_replay, DespachanteLocal,
+)
+from .utils import conversao_ate_dias, conversao_por_coorte, taxas_conversao_geral
+
+
+class PlanTransitionTest(TestCase):
+    """Testes do log de transições e dos agregados do funil"""
+    
+    def _criar_usuario(self, phone='5511999990001'):
+        return WhatsAppUser.objects.create(phone_number=phone)
+    
+    def test_cadastro_incrementa_coorte(self):
+        user = self._criar_usuario()
+        coorte = CoorteCadastro.objects.get()
+        self.assertEqual(coorte.total, 1)
+        self.assertEqual(coorte.semana_cadastro, CoorteCadastro.semana_de(user.created_at))
+        self.assertFalse(PlanTransition.objects.exists())
+    
+    def test_upgrade_registra_transicao_com_causa(self):
+        user = self._criar_usuario()
+        user.upgrade_plano('basico', causa='verificacao_email')
+        user.save()
+        
+        transicao = PlanTransition.objects.get()
+        self.assertEqual((transicao.plano_anterior, transicao.plano_novo), ('novo', 'basico'))
+        self.assertEqual(transicao.causa, 'verificacao_email')
+        self.assertTrue(transicao.primeira_vez)
+        self.assertEqual(FunilConversao.objects.get().total, 1)
+    
+    def test_save_sem_mudanca_de_plano_nao_registra(self):
+        user = self._criar_usuario()
+        user.nome = 'Fulano'
+        user.save()
+        self.assertFalse(PlanTransition.objects.exists())
+    
+    def test_repeticao_nao_conta_no_funil(self):
+        user = self._criar_usuario()
+        for plano in ['basico', 'premium', 'basico', 'premium']:
+            user.plano_atual = plano
+            user.save()
+        
+        self.assertEqual(PlanTransition.objects.count(), 4)
+        celula = FunilConversao.objects.get(plano_anterior='basico', plano_novo='premium')
+        self.assertEqual(celula.total, 1)
+    
+    def test_conversao_repetida_conta_usuario_uma_vez(self):
+        user = self._criar_usuario()
+        for plano in ['premium', 'basico', 'premium']:
+            user.plano_atual = plano
+            user.save()
+        
+        self.assertEqual(PlanTransition.objects.filter(plano_novo='premium').count(), 2)
+        self.assertEqual(PlanTransition.objects.filter(plano_novo='premium', primeira_vez=True).count(), 1)
+        self.assertEqual(taxas_conversao_geral(), {'signup_rate': 100.0, 'premium_rate': 100.0})
+    
+    def test_transicao_append_only(self):
+        user = self._criar_usuario()
+        user.plano_atual = 'basico'
+        user.save()
+        transicao = PlanTransition.objects.get()
+        transicao.causa = 'admin'
+        with self.assertRaises(ValueError):
+            transicao.save()
+    
+    def test_consultas_do_funil(self):
+        convertido = self._criar_usuario('5511999990001')
+        self._criar_usuario('5511999990002')
+        convertido.plano_atual = 'basico'
+        convertido.save()
+        PlanTransition.registrar(
+            convertido, 'basico', 'premium',
+            causa='pagamento_confirmado', momento=convertido.created_at + timedelta(days=10)
+        )
+        
+        self.assertEqual(conversao_ate_dias('novo', 'basico', 7)['taxa'], 50.0)
+        self.assertEqual(conversao_ate_dias('basico', 'premium', 7)['convertidos'], 0)
+        coortes = conversao_por_coorte('basico', 'premium')
+        self.assertEqual(coortes[0]['base'], 1)
+        self.assertEqual(coortes[0]['taxa'], 100.0)
+        self.assertEqual(taxas_conversao_geral(), {'signup_rate': 50.0, 'premium_rate': 50.0})
+    
+    def test_reconstruir_funil(self):
+        user = self._criar_usuario()
+        user.plano_atual = 'basico'
+        user.save()
+        FunilConversao.objects.all().delete()
+        CoorteCadastro.objects.all().delete()
+        
+        call_command('reconstruir_funil', stdout=StringIO())
+        
+        self.assertEqual(CoorteCadastro.objects.get().total, 1)
+        self.assertEqual(FunilConversao.objects.get().total, 1)
+
+
+@override_settings(ASAAS_WEBHOOK_TOKEN='')
+class AsaasHarnessTest(TestCase):
+    """Testes do Asaas fake e do replay de webhooks"""
+    
+    def test_checkout_contra_asaas_fake(self):
+        server = FakeAsaasServer(porta=0).iniciar_em_background()
+        self.addCleanup(server.parar)
+        user = WhatsAppUser.objects.create(phone_number='5511999990001')
+        
+        with override_settings(ASAAS_BASE_URL=server.base_url), contextlib.redirect_stdout(StringIO()):
+            checkout_url = AsaasService().create_subscription(user)
+        
+        assinatura = AssinaturaAsaas.objects.get(whatsapp_user=user)
+        self.assertTrue(checkout_url.endswith(assinatura.subscription_id))
+        self.assertIsNotNone(server.store.obter('customers', assinatura.customer_id))
+    
+    def test_replay_sintetico_consistente(self):
+        assinaturas = preparar_assinaturas_sinteticas(5)
+        eventos = gerar_eventos_sinteticos([a.subscription_id for a in assinaturas], seed=42)
+        
+        with contextlib.redirect_stdout(StringIO()):
+            relatorio = executar_replay(eventos, DespachanteLocal(), taxa=0, concorrencia=1)
+        
+        self.assertEqual(relatorio['status'], {'200': len(eventos)})
+        self.assertEqual(relatorio['consistencia']['consistentes'], 5)
+        self.assertEqual(relatorio['consistencia']['divergencias'], [])
+
+    
+    def test_replay_concorrente_preserva_ordem_por_assinatura(self):
+        eventos = gerar_eventos_sinteticos([f'sub_{indice}' for indice in range(20)], seed=7)
+        recebidos = defaultdict(list)
+        
+        def despachante(evento):
+            time.sleep(random.random() / 1000)
+            recebidos[evento['payment']['subscription']].append(evento['event'])
+            return 200
+        
+        executar_replay(eventos, despachante, taxa=0, concorrencia=4)
+        
+        esperados = defaultdict(list)
+        for evento in eventos:
+            esperados[evento['payment']['subscription']].append(evento['event'])
+        self.assertEqual(recebidos, esperados)
+
+
+class AdminChangelistQueriesTest(TestCase):
+    """Changelists do admin com número de consultas independente do número de linhas"""
+    
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@multibpo.com', 'x'))
+        self.total = 0
+    
+    def _criar(self, quantidade):
+        for _ in range(quantidade):
+            self.total += 1
+            user = WhatsAppUser.objects.create(phone_number=f'55119{self.total:08d}', nome=f'Usuário {self.total}')
+            WhatsAppMessage.objects.create(whatsapp_user=user, pergunta='Pergunta', resposta='Resposta')
+            AssinaturaAsaas.objects.create(
+                whatsapp_user=user, customer_id=f'cus_{self.total}', subscription_id=f'sub_{self.total}',
+                checkout_url='https://sandbox.asaas.com/c/teste',
+            )
+    
+    def _consultas(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+    
+    def test_consultas_constantes(self):
+        urls = [
+            '/admin/whatsapp_users/whatsappmessage/',
+            '/admin/whatsapp_users/assinaturaasaas/',
+            '/admin/whatsapp_users/plantransition/',
+            '/admin/whatsapp_users/whatsappuser/',
+        ]
+        self._criar(2)
+        poucas = [self._consultas(url) for url in urls]
+        self._criar(10)
+        self.assertEqual([self._consultas(url) for url in urls], poucas)
+    
+    def test_formulario_da_assinatura_nao_lista_usuarios(self):
+        self._criar(3)
+        assinatura = AssinaturaAsaas.objects.first()
+        response = self.client.get(f'/admin/whatsapp_users/assinaturaasaas/{assinatura.pk}/change/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Usuário 2 - ')
@@ -1,4 +1,5 @@
 # apps/whatsapp_users/utils/__init__.py
 from .config_helpers import *
 from .limit_helpers import *
-from .user_helpers import *
\ No newline at end of file
+from .user_helpers import *
+from .funil_helpers import *
\ No newline at end of file
@@ -0,0 +1,110 @@
+# apps/whatsapp_users/utils/funil_helpers.py
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from ..models import CoorteCadastro, FunilConversao
+
+
+def _base_funil(plano_anterior, semana_inicio=None):
+    """
+    Base do funil para um plano de origem, por semana de cadastro
+    
+    Para 'novo' a base são os cadastros da coorte; para os demais planos,
+    os usuários que chegaram ao plano de origem pela primeira vez.
+    """
+    if plano_anterior == 'novo':
+        qs = CoorteCadastro.objects.all()
+        if semana_inicio:
+            qs = qs.filter(semana_cadastro__gte=semana_inicio)
+        return {c.semana_cadastro: c.total for c in qs}
+    
+    qs = FunilConversao.objects.filter(plano_novo=plano_anterior)
+    if semana_inicio:
+        qs = qs.filter(semana_cadastro__gte=semana_inicio)
+    return {
+        item['semana_cadastro']: item['total']
+        for item in qs.values('semana_cadastro').annotate(total=Sum('total'))
+    }
+
+
+def conversao_ate_dias(plano_anterior, plano_novo, dias):
+    """
+    Taxa de conversão plano_anterior → plano_novo em até N dias do cadastro
+    
+    Returns:
+        dict: {'base', 'convertidos', 'taxa'} com taxa em percentual
+    """
+    base = sum(_base_funil(plano_anterior).values())
+    convertidos = FunilConversao.objects.filter(
+        plano_anterior=plano_anterior,
+        plano_novo=plano_novo,
+        dias_desde_cadastro__lte=dias,
+    ).aggregate(total=Sum('total'))['total'] or 0
+    
+    return {
+        'base': base,
+        'convertidos': convertidos,
+        'taxa': round(convertidos / max(base, 1) * 100, 2),
+    }
+
+
+def conversao_por_coorte(plano_anterior, plano_novo, semanas=12):
+    """
+    Conversão plano_anterior → plano_novo por semana de cadastro
+    
+    Returns:
+        list: [{'semana', 'base', 'convertidos', 'taxa'}] da semana mais recente
+        para a mais antiga
+    """
+    hoje = timezone.localdate()
+    semana_inicio = hoje - timedelta(days=hoje.weekday(), weeks=semanas - 1)
+    
+    bases = _base_funil(plano_anterior, semana_inicio)
+    convertidos = {
+        item['semana_cadastro']: item['total']
+        for item in FunilConversao.objects.filter(
+            plano_anterior=plano_anterior,
+            plano_novo=plano_novo,
+            semana_cadastro__gte=semana_inicio,
+        ).values('semana_cadastro').annotate(total=Sum('total'))
+    }
+    
+    resultado = []
+    for semana in sorted(set(bases) | set(convertidos), reverse=True):
+        base = bases.get(semana, 0)
+        total = convertidos.get(semana, 0)
+        resultado.append({
+            'semana': semana.isoformat(),
+            'base': base,
+            'convertidos': total,
+            'taxa': round(total / max(base, 1) * 100, 2),
+        })
+    return resultado
+
+
+def taxas_conversao_geral():
+    """
+    Taxas de conversão acumuladas a partir dos agregados do funil
+    
+    Conta quem já passou pela etapa, mesmo que tenha voltado de plano
+    depois (ex: premium suspenso por atraso). Só a primeira chegada de cada
+    usuário a um plano entra no funil, então as somas são de usuários
+    distintos: quem volta ao premium não conta de novo.
+    
+    Returns:
+        dict: {'signup_rate', 'premium_rate'} em percentual
+    """
+    cadastros = CoorteCadastro.objects.aggregate(total=Sum('total'))['total'] or 0
+    saida_novo = FunilConversao.objects.filter(
+        plano_anterior='novo',
+    ).aggregate(total=Sum('total'))['total'] or 0
+    premium = FunilConversao.objects.filter(
+        plano_novo='premium',
+    ).aggregate(total=Sum('total'))['total'] or 0
+    
+    return {
+        'signup_rate': round(saida_novo / max(cadastros, 1) * 100, 2),
+        'premium_rate': round(premium / max(cadastros, 1) * 100, 2),
+    }
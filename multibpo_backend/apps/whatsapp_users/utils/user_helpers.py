@@ -104,11 +104,13 @@ def atualizar_usuario_whatsapp(whatsapp_user, action, data):
             # Upgrade para plano básico
             if whatsapp_user.plano_atual == 'novo':
                 whatsapp_user.plano_atual = 'basico'  # ✅ CORREÇÃO: nome consistente
+                whatsapp_user.causa_transicao = 'verificacao_email'
     
     elif action == 'upgrade_plano':
         novo_plano = data.get('plano', '')
         if novo_plano in ['cadastrado', 'premium']:
             whatsapp_user.plano_atual = novo_plano
+            whatsapp_user.causa_transicao = 'api'
             if novo_plano == 'premium':
                 whatsapp_user.limite_perguntas = 999999  # ✅ CORREÇÃO: Número alto
             elif novo_plano == 'cadastrado':
@@ -23,7 +23,8 @@ from .models import WhatsAppUser, WhatsAppMessage
 from .utils import (
     get_or_create_whatsapp_user, verificar_status_usuario,
     verificar_limites_usuario, incrementar_contador_usuario,
-    get_mensagem_limite, atualizar_usuario_whatsapp
+    get_mensagem_limite, atualizar_usuario_whatsapp,
+    taxas_conversao_geral, conversao_ate_dias, conversao_por_coorte
 )
 
 from django.contrib.auth.models import User
@@ -694,13 +695,8 @@ def metrics_view(request):
             count=Count('id')
         )
         
-        # Taxa de conversão
-        usuarios_novos = WhatsAppUser.objects.filter(plano_atual='novo').count()
-        usuarios_basicos = WhatsAppUser.objects.filter(plano_atual='basico').count()
-        usuarios_premium = WhatsAppUser.objects.filter(plano_atual='premium').count()
-        
-        conversao_cadastro = (usuarios_basicos + usuarios_premium) / max(users_total, 1) * 100
-        conversao_premium = usuarios_premium / max(users_total, 1) * 100
+        # Taxa de conversão (agregados incrementais do funil)
+        conversao = taxas_conversao_geral()
         
         # Mensagens por período
         messages_today = WhatsAppMessage.objects.filter(created_at__date=today).count()
@@ -735,8 +731,10 @@ def metrics_view(request):
                 'by_plan': {item['plano_atual']: item['count'] for item in users_by_plan}
             },
             'conversion': {
-                'signup_rate': round(conversao_cadastro, 2),
-                'premium_rate': round(conversao_premium, 2)
+                'signup_rate': conversao['signup_rate'],
+                'premium_rate': conversao['premium_rate'],
+                'novo_basico_7d': conversao_ate_dias('novo', 'basico', 7),
+                'basico_premium_por_coorte': conversao_por_coorte('basico', 'premium', semanas=8)
             },
             'messages': {
                 'today': messages_today,
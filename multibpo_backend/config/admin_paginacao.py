@@ -0,0 +1,94 @@
+"""
+Paginação do admin para tabelas grandes
+MultiBPO - changelists de mensagens, usuários WhatsApp, contadores...
+
+O Paginator padrão faz SELECT COUNT(*) a cada página, o que num PostgreSQL
+com milhões de linhas é uma varredura completa. Nas changelists sem filtros,
+acima de LIMIAR_ESTIMATIVA linhas, o total passa a ser o pg_class.reltuples
+(atualizado pelo ANALYZE/autovacuum). Com filtros ou busca, abaixo do
+limiar e fora do PostgreSQL a contagem continua exata.
+
+A estimativa erra para mais ou para menos: pedir a última página estimada
+(ou além) ou cair numa página vazia troca para a contagem exata, para que
+as páginas finais reais nunca sejam recusadas nem fiquem vazias.
+"""
+
+import logging
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+LIMIAR_ESTIMATIVA = 100000
+
+
+class ContagemEstimadaPaginator(Paginator):
+    """Paginator com count estimado para tabelas grandes no PostgreSQL"""
+
+    estimado = False
+
+    def _estimativa(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)]
+            )
+            linha = cursor.fetchone()
+            return linha[0] if linha else None
+
+    @cached_property
+    def count(self):
+        try:
+            estimativa = self._estimativa()
+        except Exception as e:
+            logger.warning(f"Estimativa de contagem indisponível: {e}")
+            estimativa = None
+
+        # reltuples = -1 em tabela nunca analisada
+        if estimativa is not None and estimativa >= LIMIAR_ESTIMATIVA:
+            self.estimado = True
+            return estimativa
+        return super().count
+
+    def _contar_exato(self):
+        self.estimado = False
+        self.__dict__['count'] = self.object_list.count()
+        self.__dict__.pop('num_pages', None)
+
+    def validate_number(self, number):
+        if self.count and self.estimado:
+            try:
+                pedido = int(number)
+            except (TypeError, ValueError):
+                pedido = None
+            if pedido is not None and pedido >= self.num_pages:
+                self._contar_exato()
+        return super().validate_number(number)
+
+    def page(self, number):
+        pagina = super().page(number)
+        # A estimativa passou do fim real (avaliar aqui não repete a consulta:
+        # a changelist usa o mesmo queryset já carregado)
+        if self.estimado and not pagina.object_list:
+            self._contar_exato()
+            pagina = super().page(number)
+        return pagina
+
+
+class TabelaGrandeAdminMixin:
+    """
+    ModelAdmin de tabelas com milhões de linhas
+
+    Total estimado na paginação e sem o segundo COUNT(*) do "N no total"
+    exibido junto aos resultados filtrados.
+    """
+
+    paginator = ContagemEstimadaPaginator
+    show_full_result_count = False
@@ -13,4 +13,6 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# Produção ASGI (views async, RECEITA_ASYNC=True):
+#   gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
 application = get_asgi_application()
@@ -57,11 +57,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',                        # lookups de trigram (busca)
     
     # Third Party Apps
     'rest_framework',
     'corsheaders',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',       # BLACKLIST_AFTER_ROTATION / logout
     'django_extensions',
     'phonenumber_field',
     
@@ -201,6 +203,9 @@ SIMPLE_JWT = {
     
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    
+    # Rotação com blacklist em um INSERT e cache de JTIs revogados
+    'TOKEN_REFRESH_SERIALIZER': 'apps.authentication.tokens.TokenRefreshRotativoSerializer',
 }
 
 # Phone Number Configuration
@@ -485,4 +490,92 @@ WHATSAPP_POLITICA_URL = MOBILE_POLITICA_URL
 ASAAS_API_KEY = os.environ.get('ASAAS_API_KEY', '')
 ASAAS_BASE_URL = os.environ.get('ASAAS_BASE_URL', 'https://www.asaas.com/api/v3')
 ASAAS_WEBHOOK_TOKEN = os.environ.get('ASAAS_WEBHOOK_TOKEN', '')
-SITE_URL = os.environ.get('SITE_URL', 'https://multibpo.com.br')
\ No newline at end of file
+SITE_URL = os.environ.get('SITE_URL', 'https://multibpo.com.br')
+
+# ===================================================================
+# RECEITA FEDERAL - Consulta de CNPJ
+# ===================================================================
+
+RECEITA_TIMEOUT = int(os.environ.get('RECEITA_TIMEOUT', '10'))
+
+# Cache de consultas (LRU em memória + tabela receita_cnpj_consultas)
+RECEITA_CACHE_TTL = int(os.environ.get('RECEITA_CACHE_TTL', str(7 * 24 * 3600)))  # 7 dias
+RECEITA_CACHE_NEGATIVE_TTL = int(os.environ.get('RECEITA_CACHE_NEGATIVE_TTL', '3600'))  # 1 hora
+RECEITA_CACHE_LRU_SIZE = int(os.environ.get('RECEITA_CACHE_LRU_SIZE', '2048'))
+RECEITA_CACHE_SERVE_STALE = os.environ.get('RECEITA_CACHE_SERVE_STALE', 'True').lower() == 'true'
+
+# Hedge: segundos até disparar o provedor reserva em paralelo (0 = sequencial)
+RECEITA_HEDGE_DELAY = float(os.environ.get('RECEITA_HEDGE_DELAY', '1.5'))
+RECEITA_MAX_WORKERS = int(os.environ.get('RECEITA_MAX_WORKERS', '16'))
+
+# Limite de taxa por provedor: (requisições por segundo, rajada)
+# ReceitaWS gratuita: 3 consultas por minuto
+RECEITA_RATE_LIMITS = {
+    'BrasilAPI': (float(os.environ.get('RECEITA_BRASILAPI_RPS', '5')), 10),
+    'ReceitaWS': (float(os.environ.get('RECEITA_RECEITAWS_RPM', '3')) / 60, 3),
+}
+# Espera máxima por um token antes de pular o provedor (segundos)
+RECEITA_RATE_LIMIT_WAIT = float(os.environ.get('RECEITA_RATE_LIMIT_WAIT', '2'))
+
+# Consulta em lote
+RECEITA_LOTE_MAX = int(os.environ.get('RECEITA_LOTE_MAX', '500'))
+RECEITA_LOTE_WORKERS = int(os.environ.get('RECEITA_LOTE_WORKERS', '8'))
+
+# Circuit breaker por provedor (janela deslizante de taxa de erro)
+RECEITA_BREAKER = {
+    'janela_s': int(os.environ.get('RECEITA_BREAKER_JANELA', '60')),
+    'min_chamadas': int(os.environ.get('RECEITA_BREAKER_MIN_CHAMADAS', '5')),
+    'taxa_erro': float(os.environ.get('RECEITA_BREAKER_TAXA_ERRO', '0.5')),
+    'tempo_aberto_s': int(os.environ.get('RECEITA_BREAKER_TEMPO_ABERTO', '30')),
+}
+
+# Índice local de CNPJ (dados abertos importados com importar_cnpj_receita)
+RECEITA_INDICE_LOCAL = os.environ.get('RECEITA_INDICE_LOCAL', 'True').lower() == 'true'
+
+# Atualização periódica dos snapshots da Receita (atualizar_dados_receita)
+RECEITA_REFRESH_RPM = float(os.environ.get('RECEITA_REFRESH_RPM', '20'))
+RECEITA_REFRESH_IDADE_DIAS = int(os.environ.get('RECEITA_REFRESH_IDADE_DIAS', '30'))
+# Espera antes de reconsultar um registro cuja última consulta falhou
+RECEITA_REFRESH_BACKOFF_HORAS = int(os.environ.get('RECEITA_REFRESH_BACKOFF_HORAS', '6'))
+
+# Consulta async (httpx) para deploy ASGI: uvicorn config.asgi:application
+RECEITA_ASYNC = os.environ.get('RECEITA_ASYNC', 'False').lower() == 'true'
+RECEITA_ASYNC_MAX_CONEXOES = int(os.environ.get('RECEITA_ASYNC_MAX_CONEXOES', '100'))
+
+# Prefetch da Receita disparado pela validação de documento em tempo real
+RECEITA_PREFETCH_WORKERS = int(os.environ.get('RECEITA_PREFETCH_WORKERS', '4'))
+RECEITA_PREFETCH_MAX_PENDENTES = int(os.environ.get('RECEITA_PREFETCH_MAX_PENDENTES', '100'))
+# Fração do rate limiter do provedor primário que o prefetch não usa
+RECEITA_PREFETCH_RESERVA = float(os.environ.get('RECEITA_PREFETCH_RESERVA', '0.5'))
+# Prefetch disparado por anônimos, por IP (apps.authentication.throttles)
+RECEITA_PREFETCH_THROTTLE = os.environ.get('RECEITA_PREFETCH_THROTTLE', '10/hour')
+
+# Validação de CPF/CNPJ (tempo real e lote)
+DOCUMENTO_VALIDACAO_CACHE_TTL = int(os.environ.get('DOCUMENTO_VALIDACAO_CACHE_TTL', '30'))
+DOCUMENTO_VALIDACAO_LOTE_MAX = int(os.environ.get('DOCUMENTO_VALIDACAO_LOTE_MAX', '10000'))
+# Throttles da validação (apps.authentication.throttles; precisam de cache compartilhado)
+DOCUMENTO_VALIDACAO_THROTTLE = os.environ.get('DOCUMENTO_VALIDACAO_THROTTLE', '120/min')
+DOCUMENTO_VALIDACAO_LOTE_THROTTLE = os.environ.get('DOCUMENTO_VALIDACAO_LOTE_THROTTLE', '20/hour')
+
+# Autenticação JWT sem consulta ao User (views de leitura, ex: perfil)
+JWT_STATELESS_AUTH = os.environ.get('JWT_STATELESS_AUTH', 'False').lower() == 'true'
+JWT_REVOGACAO_CACHE_TTL = int(os.environ.get('JWT_REVOGACAO_CACHE_TTL', '30'))
+
+# Cache versionado do perfil (GET /api/v1/auth/profile/ com ETag)
+# Precisa de um cache compartilhado entre processos; com DummyCache não há cache nem 304
+PERFIL_CACHE_ALIAS = os.environ.get('PERFIL_CACHE_ALIAS', 'default')
+PERFIL_CACHE_TTL = int(os.environ.get('PERFIL_CACHE_TTL', '300'))
+PERFIL_VERSAO_TTL = int(os.environ.get('PERFIL_VERSAO_TTL', str(24 * 3600)))
+
+# Catálogo em memória das especialidades (usa o cache de PERFIL_CACHE_ALIAS para a versão)
+ESPECIALIDADES_CATALOGO_VERIFICACAO = int(os.environ.get('ESPECIALIDADES_CATALOGO_VERIFICACAO', '5'))
+ESPECIALIDADES_CATALOGO_TTL = int(os.environ.get('ESPECIALIDADES_CATALOGO_TTL', '300'))
+
+# Consulta de CEP (apps.receita.cep): base local (importar_ceps) + cache + provedores externos
+# O cadastro de escritório só usa base local e cache; a rede fica para GET /api/v1/receita/cep/<cep>/
+CEP_CONSULTA_EXTERNA = os.environ.get('CEP_CONSULTA_EXTERNA', 'True').lower() == 'true'
+CEP_TIMEOUT = int(os.environ.get('CEP_TIMEOUT', '3'))
+CEP_CACHE_TTL = int(os.environ.get('CEP_CACHE_TTL', str(90 * 24 * 3600)))
+CEP_CACHE_NEGATIVE_TTL = int(os.environ.get('CEP_CACHE_NEGATIVE_TTL', str(24 * 3600)))
+CEP_CACHE_LRU_SIZE = int(os.environ.get('CEP_CACHE_LRU_SIZE', '4096'))
+CEP_LOTE_WORKERS = int(os.environ.get('CEP_LOTE_WORKERS', '4'))